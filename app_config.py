@@ -157,6 +157,13 @@ def save_db_path(db_path: str) -> bool:
             f.write("#   path = /mnt/share/inventarium/inventarium.db (cartella condivisa)\n")
             f.write("#   path = //server/share/inventarium.db         (UNC Windows)\n")
             f.write(f"path = {db_path}\n")
+            # Keep the other settings (tuning profile, [printer], ...)
+            for key, value in config.items("database"):
+                if key != "path":
+                    f.write(f"{key} = {value}\n")
+            f.write("\n")
+            config.remove_section("database")
+            config.write(f)
         return True
     except Exception as e:
         log_to_file(f"Error saving config: {e}", "ERROR")
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Timings and query plans of the Inventarium queries.
+
+Runs every named query and domain method against a database (usually
+one built by generate_dataset.py), records for each case the minimum and
+median wall time over --repeat runs, the rows returned, and the SQL it
+executed with its EXPLAIN QUERY PLAN. The results can be saved as a
+baseline and later runs compared with it: a case slower than the
+baseline by more than --threshold (and by more than --noise ms) is a
+regression, and a changed plan is reported next to it, so that a dropped
+index or a rewritten query shows up as a measured difference.
+
+Usage:
+    python3 generate_dataset.py /tmp/bench.db
+    python3 benchmark.py /tmp/bench.db --save baseline.json
+    ... change an index or a query ...
+    python3 benchmark.py /tmp/bench.db --baseline baseline.json
+
+The exit status is 1 when a regression is found.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+from dbms import DBMS
+from controller import Controller, TAT_ORDER_SQL, TAT_STOCK_SQL, LABEL_MOVEMENTS_SQL
+from cube import MovementCube, SQL_CUBE_FACTS, SQL_CUBE_PACKAGES
+from fefo import analyse_fefo, SQL_FEFO_LABELS, SQL_FEFO_PACKAGES
+from forecast import suggest_reorders, SQL_DEMAND, SQL_LEAD_TIMES, SQL_POSITION
+from views.stats_expiring import SQL_EXPIRED_BATCHES
+from views.warehouse import SQL_PRODUCTS
+
+# Relative slowdown of the median that counts as a regression
+THRESHOLD = 0.20
+
+# Slowdowns below this many milliseconds are noise
+NOISE_MS = 5.0
+
+# Tables counted in the results, to tell whether two runs used the same data
+COUNTED_TABLES = ("packages", "requests", "items", "deliveries", "batches", "labels",
+                  "label_movements_daily")
+
+
+class _BenchmarkDB(DBMS, Controller):
+    """
+    DBMS with the domain methods, remembering the statements it runs.
+
+    Profiling is on, so every read() and stream() passes through
+    _record_query(); the first arguments of each statement are kept to
+    explain it afterwards.
+    """
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.profiling = True
+        self.slow_query_ms = float("inf")
+        self.statements = {}
+
+    def _record_query(self, sql, args, elapsed, rows):
+        key = " ".join(sql.split())
+        if key not in self.statements:
+            self.statements[key] = (sql, args)
+        super()._record_query(sql, args, elapsed, rows)
+
+
+def _period(db):
+    """Last year of the history, ending at the last movement of the database."""
+    row = db.read(False, """SELECT MAX(day) AS last FROM label_movements_daily""")
+    last = row["last"] if row and row["last"] else datetime.date.today().isoformat()
+    date_to = datetime.date.fromisoformat(last)
+    return (date_to - datetime.timedelta(days=365)).isoformat(), date_to.isoformat()
+
+
+def get_cases(date_from, date_to):
+    """
+    Return the benchmark cases as a list of (name, callable(db)).
+
+    Named SQL comes first (as the modules define it), then the domain
+    methods that build on it.
+    """
+    today = datetime.date.fromisoformat(date_to)
+    period = (date_from, date_to)
+
+    def sql(text, args=()):
+        return lambda db: db.read(True, text, args)
+
+    return [
+        ("sql.warehouse_products", sql(SQL_PRODUCTS + " ORDER BY p.description")),
+        ("sql.expired_batches", sql(SQL_EXPIRED_BATCHES, period)),
+        ("sql.tat_order", sql(TAT_ORDER_SQL, period)),
+        ("sql.tat_stock", sql(TAT_STOCK_SQL, period)),
+        ("sql.label_movements", sql(LABEL_MOVEMENTS_SQL)),
+        ("sql.cube_packages", sql(SQL_CUBE_PACKAGES)),
+        ("sql.cube_facts", sql(SQL_CUBE_FACTS)),
+        ("sql.fefo_labels", sql(SQL_FEFO_LABELS)),
+        ("sql.fefo_packages", sql(SQL_FEFO_PACKAGES)),
+        ("sql.forecast_demand", sql(SQL_DEMAND, period)),
+        ("sql.forecast_lead_times", sql(SQL_LEAD_TIMES, period)),
+        ("sql.forecast_position", sql(SQL_POSITION)),
+
+        ("get_stock", lambda db: db.get_stock()),
+        ("get_expiring_batches", lambda db: db.get_expiring_batches(90)),
+        ("get_expired_batches", lambda db: db.get_expired_batches()),
+        ("get_open_requests", lambda db: db.get_open_requests()),
+        ("get_supplier_performance", lambda db: db.get_supplier_performance(*period)),
+        ("get_rotation", lambda db: db.get_rotation(*period)),
+        ("get_tat_statistics", lambda db: db.get_tat_statistics(*period)),
+        ("dashboard_snapshot", lambda db: db.dashboard_snapshot()),
+        ("fefo.analyse_fefo", lambda db: analyse_fefo(db)),
+        ("cube.load", lambda db: MovementCube.load(db).days),
+        ("forecast.suggest_reorders", lambda db: suggest_reorders(db, today=today)),
+    ]
+
+
+def _size(result):
+    """Rows (or entries) of a case result, None if it has no length."""
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def run_case(db, fn, repeat):
+    """
+    Time one case.
+
+    Returns:
+        Dict with min_ms, median_ms, rows and statements (sql and plan of
+        every statement the case executed)
+    """
+    db.statements = {}
+    result = fn(db)  # warm-up: page cache and the statements run
+    statements = dict(db.statements)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(db)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "rows": _size(result),
+        "statements": [
+            {"sql": key, "plan": db.explain_query_plan(sql, args) if args is not None else []}
+            for key, (sql, args) in statements.items()
+        ],
+    }
+
+
+def run(database, repeat=5, only=None, verbose=True):
+    """
+    Run the benchmark cases on a database.
+
+    Args:
+        database: Path of the database
+        repeat: Timed runs per case
+        only: Optional list of case names (or name prefixes) to run
+        verbose: Print each case as it completes
+
+    Returns:
+        Dict with meta (tables rows, SQLite version, period...) and cases
+        (name -> run_case() result)
+    """
+    db = _BenchmarkDB(database)
+    try:
+        date_from, date_to = _period(db)
+        meta = {
+            "database": os.path.abspath(database),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "sqlite_version": sqlite3.sqlite_version,
+            "python": sys.version.split()[0],
+            "repeat": repeat,
+            "period": [date_from, date_to],
+            "tables": {table: db.read(False, f"SELECT COUNT(*) AS n FROM {table}")["n"]
+                       for table in COUNTED_TABLES},
+        }
+
+        cases = {}
+        for name, fn in get_cases(date_from, date_to):
+            if only and not any(name == o or name.startswith(o) for o in only):
+                continue
+            cases[name] = run_case(db, fn, repeat)
+            if verbose:
+                case = cases[name]
+                print(f"{name:<30}{case['median_ms']:>12.1f} ms{case['min_ms']:>12.1f} ms"
+                      f"{case['rows'] if case['rows'] is not None else '':>10}", flush=True)
+    finally:
+        db.close()
+
+    return {"meta": meta, "cases": cases}
+
+
+def compare(results, baseline, threshold=THRESHOLD, noise_ms=NOISE_MS):
+    """
+    Compare a run with a baseline run.
+
+    Returns:
+        List of dicts, one per case present in both: name, baseline_ms,
+        median_ms, change (relative), regression (bool) and plan_changed
+        (statements whose plan differs, with the old and new plan)
+    """
+    report = []
+    for name, case in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+
+        change = (case["median_ms"] - old["median_ms"]) / old["median_ms"] if old["median_ms"] else 0.0
+        regression = (case["median_ms"] > old["median_ms"] * (1 + threshold)
+                      and case["median_ms"] - old["median_ms"] > noise_ms)
+
+        old_plans = {s["sql"]: s["plan"] for s in old["statements"]}
+        plan_changed = [
+            {"sql": s["sql"], "old": old_plans[s["sql"]], "new": s["plan"]}
+            for s in case["statements"]
+            if s["sql"] in old_plans and old_plans[s["sql"]] != s["plan"]
+        ]
+
+        report.append({
+            "name": name,
+            "baseline_ms": old["median_ms"],
+            "median_ms": case["median_ms"],
+            "change": change,
+            "regression": regression,
+            "plan_changed": plan_changed,
+        })
+    return report
+
+
+def print_report(report, results, baseline, only=None):
+    """Print the comparison; return the number of regressions."""
+    if results["meta"]["tables"] != baseline["meta"]["tables"]:
+        print("WARNING: the baseline was taken on different data:")
+        for table, rows in results["meta"]["tables"].items():
+            print(f"    {table:<24}{baseline['meta']['tables'].get(table, '-'):>12}{rows:>12}")
+
+    print()
+    print(f"{'case':<30}{'baseline':>12}{'now':>12}{'change':>10}")
+    regressions = 0
+    for r in report:
+        flag = ""
+        if r["regression"]:
+            flag = "  REGRESSION"
+            regressions += 1
+        if r["plan_changed"]:
+            flag += "  PLAN CHANGED"
+        print(f"{r['name']:<30}{r['baseline_ms']:>10.1f}ms{r['median_ms']:>10.1f}ms"
+              f"{r['change'] * 100:>+9.0f}%{flag}")
+
+    for r in report:
+        for p in r["plan_changed"]:
+            print()
+            print(f"{r['name']}: {p['sql'][:100]}")
+            print("  baseline:")
+            for line in p["old"]:
+                print(f"    {line}")
+            print("  now:")
+            for line in p["new"]:
+                print(f"    {line}")
+
+    missing = set(baseline["cases"]) - set(results["cases"])
+    if missing and not only:
+        print()
+        print(f"Not run: {', '.join(sorted(missing))}")
+
+    print()
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Inventarium queries and compare with a baseline.")
+    parser.add_argument("database", help="Database to run the cases on")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", nargs="+", metavar="CASE", help="Run only these cases (name or prefix)")
+    parser.add_argument("--save", metavar="FILE", help="Write the results (JSON) to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare with the results saved in FILE")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative slowdown counted as a regression (default 0.20)")
+    parser.add_argument("--noise", type=float, default=NOISE_MS,
+                        help="Slowdowns below this many ms are ignored (default 5)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} does not exist")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"{'case':<30}{'median':>15}{'min':>15}{'rows':>10}")
+    results = run(args.database, max(1, args.repeat), args.only)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.save}")
+
+    if baseline is not None:
+        report = compare(results, baseline, args.threshold, args.noise)
+        if print_report(report, results, baseline, args.only):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Catalog Index - In-memory search over the active packages for Inventarium.
+
+Every active package is held with its product description and code,
+packaging, supplier name and codes. The text is normalized (case and
+accents folded) and split into tokens; a trigram index maps every three
+characters of a token to the packages having it, and the short tokens
+are kept in a sorted vocabulary for prefix lookups. A search term is
+split the same way and every one of its tokens must be found:
+
+    - tokens of three or more characters match anywhere inside a word,
+      like LIKE '%term%' (the trigram postings give the candidates,
+      which are then checked);
+    - shorter tokens match the beginning of a word.
+
+The index answers in memory; the views only go to the database for the
+stock of the matched packages. It is refreshed per package, product or
+supplier when those change (see Engine.notify), re-indexing only the
+rows whose text differs.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+# Searchable text of the packages, with the status to tell the active ones
+SQL_CATALOG = """
+    SELECT
+        pk.package_id,
+        pk.product_id,
+        pk.category_id,
+        pk.supplier_id,
+        p.description AS product,
+        p.reference AS product_code,
+        pk.reference AS package_code,
+        pk.packaging,
+        s.description AS supplier,
+        s.reference AS supplier_code,
+        pk.status AS package_status,
+        p.status AS product_status
+    FROM packages pk
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+"""
+
+# Fields searched by each search mode
+FIELDS = {
+    "name": ("product", "supplier", "packaging"),
+    "code": ("product_code", "package_code", "supplier_code"),
+    "all": ("product", "supplier", "packaging",
+            "product_code", "package_code", "supplier_code"),
+}
+
+# Columns kept for every package
+COLUMNS = ("product_id", "category_id", "supplier_id", "product", "product_code",
+           "package_code", "packaging", "supplier", "supplier_code")
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Fold case and accents: 'Élite' -> 'elite'."""
+    if not text:
+        return ""
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    """Words of a normalized text."""
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(token):
+    """The three-character slices of a token."""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class CatalogIndex:
+    """
+    Trigram and prefix index of the active packages.
+
+    Usage (through Engine.get_catalog):
+        >>> catalog = self.engine.get_catalog()
+        >>> package_ids = catalog.search("gluc 500")
+        >>> catalog.entries[package_ids[0]]["product"]
+        'Glucose 500 ml'
+    """
+
+    def __init__(self):
+        # package_id -> row (COLUMNS)
+        self.entries = {}
+        # package_id -> {mode: normalized text of its fields}, and its sort key
+        self._texts = {}
+        self._sort_keys = {}
+        # Per mode: trigram -> package_ids, token -> package_ids and the
+        # sorted vocabulary of the tokens (built on demand)
+        self._trigrams = {mode: {} for mode in FIELDS}
+        self._tokens = {mode: {} for mode in FIELDS}
+        self._vocabulary = {}
+        # package_id -> position in the sort order (built on demand)
+        self._rank = None
+
+    @classmethod
+    def load(cls, db):
+        """Index every active package."""
+        catalog = cls()
+        for row in db.read(True, SQL_CATALOG + " WHERE pk.status = 1 AND p.status = 1") or ():
+            catalog._add(row)
+        return catalog
+
+    def __len__(self):
+        return len(self.entries)
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+
+    def refresh(self, db, package_ids=None, product_ids=None, supplier_ids=None):
+        """
+        Bring the index up to date after changes.
+
+        Only the packages of the given ids are read; without ids every
+        package is read and compared. Either way only the rows whose
+        text changed are indexed again, and the packages no longer
+        active (or deleted) are dropped.
+
+        Returns:
+            Number of packages added, changed or dropped
+        """
+        filters = []
+        args = []
+        for column, ids in (("pk.package_id", package_ids),
+                            ("pk.product_id", product_ids),
+                            ("pk.supplier_id", supplier_ids)):
+            if ids:
+                ids = list(ids)
+                filters.append(f"{column} IN ({', '.join('?' * len(ids))})")
+                args.extend(ids)
+
+        if filters:
+            rs = db.read(True, SQL_CATALOG + " WHERE " + " OR ".join(filters), tuple(args))
+        elif package_ids is None and product_ids is None and supplier_ids is None:
+            rs = db.read(True, SQL_CATALOG)
+        else:
+            return 0
+
+        if rs is None:
+            return 0
+
+        changed = 0
+        seen = set()
+        for row in rs:
+            package_id = row["package_id"]
+            seen.add(package_id)
+            if row["package_status"] == 1 and row["product_status"] == 1:
+                if self._entry(row) != self.entries.get(package_id):
+                    self._remove(package_id)
+                    self._add(row)
+                    changed += 1
+            elif package_id in self.entries:
+                self._remove(package_id)
+                changed += 1
+
+        # Deleted packages: requested (or, on a full refresh, indexed) but not read
+        if filters:
+            gone = {i for i in package_ids or () if i in self.entries} - seen
+        else:
+            gone = set(self.entries) - seen
+        for package_id in gone:
+            self._remove(package_id)
+            changed += 1
+
+        return changed
+
+    @staticmethod
+    def _entry(row):
+        return {column: row[column] for column in COLUMNS}
+
+    def _add(self, row):
+        package_id = row["package_id"]
+        entry = self._entry(row)
+        self.entries[package_id] = entry
+
+        # Fields joined by a space: a search word (letters and digits
+        # only) cannot match across two of them
+        texts = {mode: " ".join(normalize(entry[field]) for field in fields)
+                 for mode, fields in FIELDS.items()}
+        self._texts[package_id] = texts
+        self._sort_keys[package_id] = (normalize(entry["product"]), normalize(entry["supplier"]),
+                                       normalize(entry["packaging"]), package_id)
+
+        for mode, text in texts.items():
+            for token in set(_WORD.findall(text)):
+                self._tokens[mode].setdefault(token, set()).add(package_id)
+                for gram in trigrams(token):
+                    self._trigrams[mode].setdefault(gram, set()).add(package_id)
+
+        self._vocabulary.clear()
+        self._rank = None
+
+    def _remove(self, package_id):
+        texts = self._texts.pop(package_id, None)
+        if texts is None:
+            return
+        del self.entries[package_id]
+        del self._sort_keys[package_id]
+
+        for mode, text in texts.items():
+            for token in set(_WORD.findall(text)):
+                self._discard(self._tokens[mode], token, package_id)
+                for gram in trigrams(token):
+                    self._discard(self._trigrams[mode], gram, package_id)
+
+        self._vocabulary.clear()
+        self._rank = None
+
+    @staticmethod
+    def _discard(postings, key, package_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(package_id)
+            if not ids:
+                del postings[key]
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def search(self, term, mode="name", category_id=None, limit=None):
+        """
+        Packages matching every word of the term.
+
+        Args:
+            term: Words to find (three or more characters: anywhere in a
+                  word; shorter: at the beginning of a word)
+            mode: "name" (product, supplier, packaging), "code"
+                  (product, package and supplier codes) or "all" (both)
+            category_id: Only packages of this category
+            limit: Maximum number of packages returned
+
+        Returns:
+            List of package_id, sorted by product and packaging
+        """
+        words = tokenize(term)
+        if not words:
+            return []
+
+        # Rarest first: the candidates shrink as fast as possible
+        postings = sorted((self._postings(word, mode) for word in words), key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return []
+
+        # Prefixes and three-character words are exact, longer words
+        # have their trigrams somewhere but must be checked as a whole
+        longer = [word for word in words if len(word) > 3]
+
+        matches = []
+        for package_id in candidates:
+            if category_id and self.entries[package_id]["category_id"] != category_id:
+                continue
+            text = self._texts[package_id][mode]
+            if all(word in text for word in longer):
+                matches.append(package_id)
+
+        if self._rank is None:
+            self._rank = {package_id: rank for rank, package_id
+                          in enumerate(sorted(self._sort_keys, key=self._sort_keys.get))}
+        matches.sort(key=self._rank.__getitem__)
+        return matches[:limit] if limit else matches
+
+    def _postings(self, word, mode):
+        """Packages that may contain the word (exact up to three characters)."""
+        if len(word) < 3:
+            return self._prefixed(word, mode)
+
+        index = self._trigrams[mode]
+        grams = sorted((index.get(gram, set()) for gram in trigrams(word)), key=len)
+        ids = set(grams[0])
+        for other in grams[1:]:
+            ids &= other
+        return ids
+
+    def _prefixed(self, prefix, mode):
+        """Packages with a word starting with prefix."""
+        tokens = self._tokens[mode]
+        vocabulary = self._vocabulary.get(mode)
+        if vocabulary is None:
+            vocabulary = self._vocabulary[mode] = sorted(tokens)
+
+        ids = set()
+        i = bisect_left(vocabulary, prefix)
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            ids |= tokens[vocabulary[i]]
+            i += 1
+        return ids
+
+    def sort_key(self, package_id):
+        """Order of the packages in lists: product, supplier, packaging."""
+        return self._sort_keys[package_id]
+
+    # -------------------------------------------------------------------------
+    # Pickers
+    # -------------------------------------------------------------------------
+
+    def products(self, category_id=None, package_ids=None):
+        """
+        Products having active packages, as (product_id, description) sorted by description.
+
+        Args:
+            category_id: Only packages of this category
+            package_ids: Only these packages (e.g. a search result)
+        """
+        ids = self.entries if package_ids is None else package_ids
+        products = {}
+        for package_id in ids:
+            entry = self.entries.get(package_id)
+            if entry is None or (category_id and entry["category_id"] != category_id):
+                continue
+            products[entry["product_id"]] = entry["product"]
+        return sorted(products.items(), key=lambda p: (normalize(p[1]), p[0]))
+
+    def packages(self, product_id, category_id=None, package_ids=None):
+        """
+        Active packages of a product, as package_id sorted by supplier and packaging.
+
+        Args:
+            product_id: Product of the packages
+            category_id: Only packages of this category
+            package_ids: Only these packages (e.g. a search result)
+        """
+        ids = self.entries if package_ids is None else package_ids
+        packages = [
+            package_id for package_id in ids
+            if package_id in self.entries
+            and self.entries[package_id]["product_id"] == product_id
+            and not (category_id and self.entries[package_id]["category_id"] != category_id)
+        ]
+        packages.sort(key=self.sort_key)
+        return packages
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Change Feed - Changes committed by the other workstations, as events.
+
+Triggers append every insert, update and delete of the main tables to
+change_log (seq, table_name, pk, op and the batch and package of the
+row). The feed polls PRAGMA data_version from the Tk thread: it changes
+only when another connection commits, so a poll with nothing new costs
+one tiny statement. When it does change, the rows past the last seq seen
+are read and published on the Engine bus as targeted events (see
+Engine.notify), so the open windows refresh only the rows changed
+elsewhere, as they do for the local changes.
+
+The changes made by this workstation are skipped: they have already
+been notified by the view that made them.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+
+# Milliseconds between two polls (change_feed_ms in config.ini, 0 = off)
+POLL_MS = 1000
+
+# Rows read by one poll; a workstation further behind refreshes everything
+MAX_ROWS = 5000
+
+# Rows kept in change_log when a workstation starts, the older are deleted
+KEEP_ROWS = 10000
+
+# Event of the changes of each table, by op (None: any op); the labels
+# trigger logs op X for an unload, U for any other change of a label
+TABLE_EVENTS = {
+    "labels": {"X": "label_unloaded", None: "stock_changed"},
+    "batches": {None: "stock_changed"},
+    "packages": {None: "package_changed"},
+    "products": {None: "product_changed"},
+    "suppliers": {None: "supplier_changed"},
+    "categories": {None: "category_changed"},
+    "requests": {None: "request_changed"},
+    "items": {None: "request_changed"},
+}
+
+# Payload key of the pk of each table
+PK_KEYS = {
+    "labels": "label_ids",
+    "batches": "batch_ids",
+    "packages": "package_ids",
+    "products": "product_ids",
+    "suppliers": "supplier_ids",
+    "requests": "request_ids",
+}
+
+
+def group_changes(rows):
+    """
+    Events with their ids from change_log rows.
+
+    Returns:
+        Dict event -> {payload key: set of ids}, in order of first change
+    """
+    events = {}
+    for row in rows:
+        table_events = TABLE_EVENTS.get(row["table_name"])
+        if table_events is None:
+            continue
+        event = table_events.get(row["op"], table_events[None])
+        ids = events.setdefault(event, {})
+
+        key = PK_KEYS.get(row["table_name"])
+        if key is not None:
+            ids.setdefault(key, set()).add(row["pk"])
+        if row["batch_id"] is not None:
+            ids.setdefault("batch_ids", set()).add(row["batch_id"])
+        if row["package_id"] is not None:
+            ids.setdefault("package_ids", set()).add(row["package_id"])
+
+    return events
+
+
+class ChangeFeed:
+    """
+    Poller of change_log, publishing the changes of the other workstations.
+
+    Usage (through Engine.start_change_feed):
+        >>> feed = ChangeFeed(engine)
+        >>> feed.start(root)
+        >>> ...
+        >>> feed.stop()
+    """
+
+    def __init__(self, engine, poll_ms=POLL_MS):
+        self.engine = engine
+        self.poll_ms = poll_ms
+        self.root = None
+        self.last_seq = None
+        self.data_version = None
+        self.publishing = False
+        self._after = None
+
+    def start(self, widget):
+        """
+        Start polling from the Tk event loop of widget.
+
+        Returns:
+            False if the database has no change_log (not migrated yet)
+        """
+        row = self.engine.read(
+            False, "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+        if row is None:
+            return False
+
+        self.root = widget.nametowidget(".")
+        self.data_version = self._data_version()
+        self.last_seq = self._max_seq()
+        self.prune()
+        self._after = self.root.after(self.poll_ms, self.poll)
+        return True
+
+    def stop(self):
+        """Stop polling."""
+        if self._after is not None:
+            try:
+                self.root.after_cancel(self._after)
+            except Exception:
+                # Tk already gone
+                pass
+            self._after = None
+
+    def prune(self):
+        """Delete the rows older than the last KEEP_ROWS."""
+        if self.last_seq > KEEP_ROWS:
+            self.engine.write("DELETE FROM change_log WHERE seq <= ?", (self.last_seq - KEEP_ROWS,))
+
+    def poll(self):
+        """Publish the changes committed by the others since the last poll."""
+        try:
+            self.check()
+        finally:
+            self._after = self.root.after(self.poll_ms, self.poll)
+
+    def check(self):
+        """
+        Read and publish the new change_log rows, if another connection committed.
+
+        Returns:
+            Number of changes published (-1: too many or some already
+            pruned, every event published without ids)
+        """
+        version = self._data_version()
+        if version is None or version == self.data_version:
+            return 0
+        self.data_version = version
+
+        rows = self.engine.read(
+            True,
+            "SELECT seq, table_name, pk, op, batch_id, package_id FROM change_log "
+            "WHERE seq > ? ORDER BY seq LIMIT ?",
+            (self.last_seq, MAX_ROWS + 1)
+        )
+        if not rows:
+            return 0
+
+        # Rows missing (pruned) or too many: refresh everything
+        if len(rows) > MAX_ROWS or rows[0]["seq"] != self.last_seq + 1:
+            self.last_seq = self._max_seq()
+            events = {event: {} for table_events in TABLE_EVENTS.values()
+                      for event in table_events.values()}
+            count = -1
+        else:
+            self.last_seq = rows[-1]["seq"]
+            events = group_changes(rows)
+            count = len(rows)
+
+        self.publishing = True
+        try:
+            for event, ids in events.items():
+                self.engine.notify(event, **ids)
+        finally:
+            self.publishing = False
+        return count
+
+    def skip_local(self):
+        """
+        Mark the rows written by this workstation as seen.
+
+        Called after a local notify: if no other connection committed
+        since the last poll, every row past the last seq is ours and
+        already notified.
+        """
+        seq = self._max_seq()
+        if self._data_version() == self.data_version:
+            self.last_seq = seq
+
+    def _data_version(self):
+        row = self.engine.read(False, "PRAGMA data_version")
+        return row["data_version"] if row else None
+
+    def _max_seq(self):
+        row = self.engine.read(False, "SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log")
+        return row["seq"] if row else 0
@@ -13,7 +13,6 @@ Architecture:
 Responsibilities:
     - Build SQL queries for INSERT/UPDATE/DELETE operations
     - Implement domain-specific data retrieval methods
-    - Window instance management and refresh coordination
 
 Classes:
     Controller: SQL builder and domain logic layer
@@ -25,7 +24,57 @@ Version: I (SQLite Edition)
 import sys
 import inspect
 import re
-from typing import Optional, List, Dict, Any, Union
+import datetime
+from typing import Optional, List, Dict, Any, Union, Callable
+
+from quantiles import Durations
+
+# Barcode ticks are microsecond timestamps (~1.7e15), label_ids are rowids:
+# any code at or above this threshold is a tick.
+TICK_MIN = 10 ** 12
+
+# Rows between two progress reports of the streamed statistics
+PROGRESS_ROWS = 5000
+
+# Raw durations for the TAT statistics, one row per delivery / unloaded label
+TAT_ORDER_SQL = """
+    SELECT pk.supplier_id, pk.product_id, julianday(d.delivered) - julianday(r.issued) AS days
+    FROM deliveries d
+    JOIN items i ON i.item_id = d.item_id
+    JOIN requests r ON r.request_id = i.request_id
+    JOIN packages pk ON pk.package_id = i.package_id
+    WHERE d.delivered >= ? AND d.delivered <= ? AND d.status = 1 AND r.issued IS NOT NULL
+"""
+
+TAT_STOCK_SQL = """
+    SELECT pk.supplier_id, pk.product_id, julianday(lb.unloaded) - julianday(lb.loaded) AS days
+    FROM labels lb
+    JOIN batches b ON b.batch_id = lb.batch_id
+    JOIN packages pk ON pk.package_id = b.package_id
+    WHERE lb.status = 0 AND lb.unloaded >= ? AND lb.unloaded <= ? AND lb.loaded IS NOT NULL
+"""
+
+# label_movements_daily recounted from the labels table: one row per day and
+# package with loads (and cancellations among them) and unloads with residence
+LABEL_MOVEMENTS_SQL = """
+    SELECT day, package_id, SUM(loaded) AS loaded_count, SUM(unloaded) AS unloaded_count,
+        SUM(cancelled) AS cancelled_count, COUNT(residence) AS residence_count,
+        COALESCE(SUM(residence), 0) AS residence_days,
+        MIN(residence) AS min_residence, MAX(residence) AS max_residence
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id
+"""
 
 
 class Controller:
@@ -87,57 +136,6 @@ class Controller:
 
         return hybrid
 
-    def refresh_windows_for_table(self, table_name: str) -> None:
-        """
-        Central dispatcher for cross-window GUI refreshes after editing lookup tables.
-        """
-        registry = getattr(self, "dict_instances", None)
-        if not registry:
-            return
-
-        # Mapping of table changes to windows that need refresh
-        mapping = {
-            "products": ("packages", "batches", "main"),
-            "packages": ("batches", "items", "main"),
-            "batches": ("labels", "main"),
-            "suppliers": ("packages",),
-            "categories": ("packages", "locations"),
-            "conservations": ("packages", "locations"),
-            "locations": ("packages",),
-            "requests": ("items", "deliveries"),
-            "items": ("deliveries",),
-        }
-
-        # Default refresh methods for each window type
-        refresh_methods = {
-            "main": "refresh",
-            "packages": "refresh",
-            "batches": "refresh",
-            "labels": "refresh",
-            "items": "refresh",
-            "deliveries": "refresh",
-        }
-
-        targets = mapping.get(table_name, ())
-        if not targets:
-            return
-
-        for name in targets:
-            win = registry.get(name)
-            if not win:
-                continue
-
-            try:
-                if callable(getattr(win, "winfo_exists", None)) and not win.winfo_exists():
-                    continue
-
-                method_name = refresh_methods.get(name, "refresh")
-                if method_name and hasattr(win, method_name):
-                    getattr(win, method_name)()
-
-            except Exception as e:
-                print(f"Error refreshing {name}: {e}")
-
     # -------------------------------------------------------------------------
     # Domain-specific queries for Inventarium
     # -------------------------------------------------------------------------
@@ -163,16 +161,15 @@ class Controller:
                 s.description AS supplier,
                 c.description AS category,
                 l.description AS location,
-                COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock,
-                COUNT(CASE WHEN lb.status = 0 THEN 1 END) AS used,
-                COUNT(CASE WHEN lb.status = -1 THEN 1 END) AS cancelled
+                COALESCE(ps.in_stock, 0) AS in_stock,
+                COALESCE(ps.used, 0) AS used,
+                COALESCE(ps.cancelled, 0) AS cancelled
             FROM products p
             JOIN packages pk ON pk.product_id = p.product_id
             LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
             LEFT JOIN categories c ON c.category_id = pk.category_id
             LEFT JOIN locations l ON l.location_id = pk.location_id
-            LEFT JOIN batches b ON b.package_id = pk.package_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+            LEFT JOIN package_stock ps ON ps.package_id = pk.package_id
             WHERE p.status = 1 AND pk.status = 1
         """
 
@@ -181,7 +178,7 @@ class Controller:
             sql += " AND pk.package_id = ?"
             args = (package_id,)
 
-        sql += " GROUP BY pk.package_id ORDER BY p.description"
+        sql += " ORDER BY p.description"
 
         return self.read(True, sql, args) or []
 
@@ -203,16 +200,15 @@ class Controller:
                 b.description AS lot,
                 b.expiration,
                 CAST(julianday(b.expiration) - julianday('now') AS INTEGER) AS days_left,
-                COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS labels_in_stock
+                COALESCE(bs.in_stock, 0) AS labels_in_stock
             FROM batches b
             JOIN packages pk ON pk.package_id = b.package_id
             JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+            LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
             WHERE b.expiration IS NOT NULL
               AND b.expiration >= date('now')
               AND b.expiration <= date('now', '+' || ? || ' days')
               AND b.status = 1
-            GROUP BY b.batch_id
             ORDER BY b.expiration
         """
         return self.read(True, sql, (days,)) or []
@@ -232,14 +228,13 @@ class Controller:
                 b.description AS lot,
                 b.expiration,
                 CAST(julianday('now') - julianday(b.expiration) AS INTEGER) AS days_expired,
-                COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS labels_in_stock
+                COALESCE(bs.in_stock, 0) AS labels_in_stock
             FROM batches b
             JOIN packages pk ON pk.package_id = b.package_id
             JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+            LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
             WHERE b.expiration < date('now')
               AND b.status = 1
-            GROUP BY b.batch_id
             ORDER BY b.expiration DESC
         """
         return self.read(True, sql) or []
@@ -268,6 +263,338 @@ class Controller:
         """
         return self.read(True, sql) or []
 
+    def get_supplier_performance(self, date_from: str, date_to: str) -> List[Dict[str, Any]]:
+        """
+        Get order and delivery performance of every supplier in one query.
+
+        Orders are counted on the issue date of the request, deliveries on
+        their delivery date, each pre-aggregated per supplier in its own
+        CTE and then joined: the cost does not grow with the number of
+        suppliers.
+
+        Args:
+            date_from: First day of the period (yyyy-mm-dd)
+            date_to: Last day of the period (yyyy-mm-dd)
+
+        Returns:
+            List of records (supplier_id, supplier, orders, items_ordered,
+            items_delivered, completion, avg_tat, min_tat, max_tat, products)
+            ordered by items ordered; TAT in days, None without deliveries
+        """
+        sql = """
+            WITH ordered AS (
+                SELECT
+                    pk.supplier_id,
+                    COUNT(DISTINCT r.request_id) AS orders,
+                    SUM(i.quantity) AS items_ordered,
+                    COUNT(DISTINCT pk.package_id) AS products
+                FROM items i
+                JOIN requests r ON r.request_id = i.request_id
+                JOIN packages pk ON pk.package_id = i.package_id
+                WHERE r.issued >= ? AND r.issued <= ?
+                GROUP BY pk.supplier_id
+            ),
+            delivered AS (
+                SELECT
+                    pk.supplier_id,
+                    SUM(d.quantity) AS items_delivered,
+                    AVG(julianday(d.delivered) - julianday(r.issued)) AS avg_tat,
+                    MIN(julianday(d.delivered) - julianday(r.issued)) AS min_tat,
+                    MAX(julianday(d.delivered) - julianday(r.issued)) AS max_tat
+                FROM deliveries d
+                JOIN items i ON i.item_id = d.item_id
+                JOIN requests r ON r.request_id = i.request_id
+                JOIN packages pk ON pk.package_id = i.package_id
+                WHERE d.status = 1 AND d.delivered >= ? AND d.delivered <= ?
+                GROUP BY pk.supplier_id
+            )
+            SELECT
+                s.supplier_id,
+                s.description AS supplier,
+                o.orders,
+                COALESCE(o.items_ordered, 0) AS items_ordered,
+                COALESCE(dl.items_delivered, 0) AS items_delivered,
+                dl.avg_tat,
+                dl.min_tat,
+                dl.max_tat,
+                o.products
+            FROM ordered o
+            JOIN suppliers s ON s.supplier_id = o.supplier_id
+            LEFT JOIN delivered dl ON dl.supplier_id = o.supplier_id
+            WHERE s.status = 1
+            ORDER BY items_ordered DESC, s.description
+        """
+        rs = self.read(True, sql, (date_from, date_to, date_from, date_to)) or []
+
+        for row in rs:
+            ordered = row["items_ordered"]
+            row["completion"] = round(row["items_delivered"] / ordered * 100, 1) if ordered > 0 else 0
+
+        return rs
+
+    def get_rotation(self, date_from: str, date_to: str) -> List[Dict[str, Any]]:
+        """
+        Get rotation index, coverage and ABC class of every active package.
+
+        The average stock is time-weighted: each label counts for the days
+        it was on hand within the period (from its load date to the day
+        before its unload date), so the sum over the labels of a package
+        divided by the days of the period is the mean of its daily stock.
+        It is summed from label_movements_daily: every day's net load
+        (loaded - cancelled - unloaded) stays on hand from that day, or
+        from the start of the period, to the end of the period.
+
+        Args:
+            date_from: First day of the period (yyyy-mm-dd)
+            date_to: Last day of the period (yyyy-mm-dd), included
+
+        Returns:
+            List of records (package_id, product, supplier, avg_stock,
+            stock, consumed, rotation, coverage, abc) by consumption,
+            where stock is on hand at the end of the period and coverage
+            is None without consumption
+        """
+        sql = """
+            WITH period AS (
+                SELECT julianday(?) - julianday(?) + 1 AS days
+            ),
+            totals AS (
+                SELECT
+                    m.package_id,
+                    SUM((m.loaded_count - m.cancelled_count - m.unloaded_count)
+                        * (julianday(?) - julianday(MAX(m.day, ?)) + 1)) AS label_days,
+                    SUM(m.loaded_count - m.cancelled_count - m.unloaded_count) AS stock,
+                    SUM(CASE WHEN m.day >= ? THEN m.unloaded_count ELSE 0 END) AS consumed
+                FROM label_movements_daily m
+                WHERE m.day <= ?
+                GROUP BY m.package_id
+            )
+            SELECT
+                pk.package_id,
+                p.description AS product,
+                s.description AS supplier,
+                COALESCE(t.label_days, 0) * 1.0 / pe.days AS avg_stock,
+                COALESCE(t.stock, 0) AS stock,
+                COALESCE(t.consumed, 0) AS consumed,
+                pe.days
+            FROM packages pk
+            JOIN products p ON p.product_id = pk.product_id
+            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+            LEFT JOIN totals t ON t.package_id = pk.package_id
+            CROSS JOIN period pe
+            WHERE pk.status = 1
+            ORDER BY consumed DESC, p.description
+        """
+        args = (date_to, date_from, date_to, date_from, date_from, date_to)
+        rs = self.read(True, sql, args) or []
+
+        # ABC on the cumulative share of consumption: A up to 80%, B up to 95%
+        total_consumed = sum(row["consumed"] for row in rs)
+        cumulative = 0
+
+        for row in rs:
+            days = row.pop("days")
+            consumed = row["consumed"]
+            avg_stock = row["avg_stock"]
+
+            row["avg_stock"] = round(avg_stock, 1)
+            row["rotation"] = round(consumed / avg_stock, 2) if avg_stock > 0 else 0
+            row["coverage"] = round(row["stock"] / (consumed / days)) if consumed > 0 else None
+
+            cumulative += consumed
+            cumulative_pct = cumulative / total_consumed * 100 if total_consumed > 0 else 100
+            if cumulative_pct <= 80:
+                row["abc"] = "A"
+            elif cumulative_pct <= 95:
+                row["abc"] = "B"
+            else:
+                row["abc"] = "C"
+
+        return rs
+
+    def get_tat_statistics(self, date_from: str, date_to: str,
+                           progress: Optional[Callable] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get order and stock TAT with median, p90 and p95 by supplier and product.
+
+        The raw durations are streamed once per measure and grouped in
+        Python (quantiles.Durations: exact for small groups, a mergeable
+        sketch for large ones), since SQLite has no percentile aggregate.
+
+        Args:
+            date_from: First day of the period (yyyy-mm-dd)
+            date_to: Last day of the period (yyyy-mm-dd), included
+            progress: Optional Callable(done, total, partial) (e.g. the
+                      worker's db.progress), called every PROGRESS_ROWS
+                      durations and with the partial result after each
+                      measure
+
+        Returns:
+            {"order": ..., "stock": ...}: request to delivery of the
+            deliveries and load to unload of the labels unloaded in the
+            period, each a dict with "all" (summary) and "supplier" and
+            "product" (lists of records id, name, count, mean, min, max,
+            median, p90, p95 by descending median); durations in days
+        """
+        suppliers = {row["supplier_id"]: row["description"]
+                     for row in self.read(True, "SELECT supplier_id, description FROM suppliers") or []}
+        products = {row["product_id"]: row["description"]
+                    for row in self.read(True, "SELECT product_id, description FROM products") or []}
+
+        result = {}
+        measures = (("order", TAT_ORDER_SQL), ("stock", TAT_STOCK_SQL))
+        for step, (measure, sql) in enumerate(measures):
+            overall = Durations()
+            by_supplier = {}
+            by_product = {}
+
+            for rows, row in enumerate(self.stream(sql, (date_from, date_to)), 1):
+                if progress and rows % PROGRESS_ROWS == 0:
+                    progress(step, len(measures))
+
+                days = row["days"]
+                if days is None:
+                    continue
+                overall.add(days)
+
+                group = by_supplier.get(row["supplier_id"])
+                if group is None:
+                    group = by_supplier[row["supplier_id"]] = Durations()
+                group.add(days)
+
+                group = by_product.get(row["product_id"])
+                if group is None:
+                    group = by_product[row["product_id"]] = Durations()
+                group.add(days)
+
+            result[measure] = {
+                "all": overall.summary(),
+                "supplier": self._tat_rows(by_supplier, suppliers),
+                "product": self._tat_rows(by_product, products),
+            }
+
+            if progress:
+                progress(step + 1, len(measures), dict(result))
+
+        return result
+
+    @staticmethod
+    def _tat_rows(groups: Dict[Any, Durations], names: Dict[Any, str]) -> List[Dict[str, Any]]:
+        """Summaries of the groups as records, by descending median."""
+        rows = []
+        for key, durations in groups.items():
+            row = {"id": key, "name": names.get(key)}
+            row.update(durations.summary())
+            rows.append(row)
+
+        rows.sort(key=lambda row: (-row["median"], row["name"] or ""))
+        return rows
+
+    def dashboard_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Get all the dashboard metrics in two statements.
+
+        The counters come from one statement that reads each table once
+        with conditional aggregation: stock, reorder and cancelled labels
+        from packages and package_stock, expirations from batches and
+        batch_stock, movements from the last 30 days of
+        label_movements_daily, open requests from items and deliveries.
+        The top consumption is the second statement. Caching is left to the caller
+        (Engine.get_dashboard).
+
+        Returns:
+            Dict with the counters (active_products, labels_in_stock,
+            active_batches, below_reorder, out_of_stock, expired,
+            expiring_30, expiring_60, expiring_90, loaded, unloaded,
+            cancelled, open_requests, pending_items), top_consumption
+            (list of product, consumed over the last 30 days) and taken
+            (datetime of the snapshot); None on error
+        """
+        today = datetime.date.today()
+        days_ago_30 = (today - datetime.timedelta(days=30)).isoformat()
+        in_30 = (today + datetime.timedelta(days=30)).isoformat()
+        in_60 = (today + datetime.timedelta(days=60)).isoformat()
+        in_90 = (today + datetime.timedelta(days=90)).isoformat()
+        today = today.isoformat()
+
+        sql = """
+            WITH stock AS (
+                SELECT
+                    COALESCE(SUM(pk.status = 1), 0) AS active_products,
+                    COALESCE(SUM(ps.in_stock), 0) AS labels_in_stock,
+                    COALESCE(SUM(ps.cancelled), 0) AS cancelled,
+                    COALESCE(SUM(pk.status = 1 AND pk.reorder > 0
+                                 AND COALESCE(ps.in_stock, 0) <= pk.reorder), 0) AS below_reorder,
+                    COALESCE(SUM(pk.status = 1 AND pk.reorder > 0
+                                 AND COALESCE(ps.in_stock, 0) = 0), 0) AS out_of_stock
+                FROM packages pk
+                LEFT JOIN package_stock ps ON ps.package_id = pk.package_id
+            ),
+            expiring AS (
+                SELECT
+                    COUNT(*) AS active_batches,
+                    COALESCE(SUM(bs.in_stock > 0 AND b.expiration < ?), 0) AS expired,
+                    COALESCE(SUM(bs.in_stock > 0 AND b.expiration >= ? AND b.expiration <= ?), 0) AS expiring_30,
+                    COALESCE(SUM(bs.in_stock > 0 AND b.expiration >= ? AND b.expiration <= ?), 0) AS expiring_60,
+                    COALESCE(SUM(bs.in_stock > 0 AND b.expiration >= ? AND b.expiration <= ?), 0) AS expiring_90
+                FROM batches b
+                LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
+                WHERE b.status = 1
+            ),
+            movements AS (
+                SELECT
+                    COALESCE(SUM(loaded_count), 0) AS loaded,
+                    COALESCE(SUM(unloaded_count), 0) AS unloaded
+                FROM label_movements_daily
+                WHERE day >= ?
+            ),
+            delivered AS (
+                SELECT d.item_id, SUM(d.quantity) AS quantity
+                FROM deliveries d
+                JOIN items i ON i.item_id = d.item_id
+                JOIN requests r ON r.request_id = i.request_id
+                WHERE d.status = 1 AND r.status = 1
+                GROUP BY d.item_id
+            ),
+            pending AS (
+                SELECT
+                    COUNT(DISTINCT r.request_id) AS open_requests,
+                    COALESCE(SUM(i.status = 1 AND i.quantity > COALESCE(dl.quantity, 0)), 0) AS pending_items
+                FROM requests r
+                LEFT JOIN items i ON i.request_id = r.request_id
+                LEFT JOIN delivered dl ON dl.item_id = i.item_id
+                WHERE r.status = 1
+            )
+            SELECT *
+            FROM stock, expiring, movements, pending
+        """
+        args = (today, today, in_30, today, in_60, today, in_90, days_ago_30)
+        snapshot = self.read(False, sql, args)
+
+        if snapshot is None:
+            return None
+
+        sql = """
+            SELECT p.description AS product, SUM(m.unloaded_count) AS consumed
+            FROM label_movements_daily m
+            JOIN packages pk ON pk.package_id = m.package_id
+            JOIN products p ON p.product_id = pk.product_id
+            WHERE m.day >= ?
+            GROUP BY m.package_id
+            HAVING consumed > 0
+            ORDER BY consumed DESC
+            LIMIT 5
+        """
+        rs = self.read(True, sql, (days_ago_30,))
+
+        if rs is None:
+            return None
+
+        snapshot["top_consumption"] = rs
+        snapshot["taken"] = datetime.datetime.now()
+
+        return snapshot
+
     def load_label(self, batch_id: int) -> Optional[int]:
         """
         Create a new label (load into stock).
@@ -282,6 +609,145 @@ class Controller:
         sql = "INSERT INTO labels (batch_id, tick, loaded, status) VALUES (?, ?, date('now'), 1)"
         return self.write(sql, (batch_id, tick))
 
+    def load_labels(self, batch_id: int, count: int) -> Optional[List[int]]:
+        """
+        Create N labels for a batch in a single transaction.
+
+        Ticks are reserved up front and the rows inserted with one
+        executemany, so loading 100 labels costs one commit instead of 100.
+
+        Args:
+            batch_id: Batch to create labels for
+            count: Number of labels to create
+
+        Returns:
+            List of new label_ids (in tick order) or None on error
+        """
+        try:
+            with self.transaction():
+                return self._insert_labels(batch_id, count)
+        except Exception:
+            return None
+
+    def _insert_labels(self, batch_id: int, count: int) -> List[int]:
+        """Insert count labels with pre-reserved ticks; raises on error."""
+        if count < 1:
+            return []
+
+        ticks = self.get_ticks(count)
+        sql = "INSERT INTO labels (batch_id, tick, loaded, status) VALUES (?, ?, date('now'), 1)"
+        self.write_many(sql, [(batch_id, tick) for tick in ticks])
+
+        rs = self.read(True,
+                       "SELECT label_id, tick FROM labels "
+                       "WHERE batch_id = ? AND tick BETWEEN ? AND ? "
+                       "ORDER BY tick",
+                       (batch_id, ticks[0], ticks[-1]))
+        if rs is None:
+            raise RuntimeError("Cannot read back new labels")
+
+        reserved = set(ticks)
+        return [row["label_id"] for row in rs if row["tick"] in reserved]
+
+    def receive_delivery(self, item_id: int, package_id: int, ddt: str,
+                         delivered: Optional[str], quantity: int, labels: int,
+                         batch_id: Optional[int] = None, lot: Optional[str] = None,
+                         expiration: Optional[str] = None,
+                         request_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Record a delivery and load its labels in one write transaction.
+
+        Batch upsert, delivery insert, bulk label insert and request
+        auto-close either all succeed or leave nothing behind, and the
+        shared database is locked once instead of once per statement.
+
+        Args:
+            item_id: Request item being delivered
+            package_id: Delivered package
+            ddt: Transport document number
+            delivered: Delivery date (YYYY-MM-DD)
+            quantity: Delivered quantity
+            labels: Number of labels to create
+            batch_id: Existing batch; None to use lot/expiration
+            lot: Lot number of a new batch (reused if already active)
+            expiration: Expiration of a new batch (YYYY-MM-DD)
+            request_id: Request to close when all its items are delivered
+
+        Returns:
+            Dict with batch_id, delivery_id, label_ids and request_closed,
+            or None on error (nothing is written)
+        """
+        try:
+            with self.transaction():
+                if batch_id is None:
+                    sql = """SELECT batch_id FROM batches
+                             WHERE package_id = ? AND description = ? AND expiration IS ? AND status = 1"""
+                    row = self.read(False, sql, (package_id, lot, expiration))
+                    if row:
+                        batch_id = row["batch_id"]
+                    else:
+                        sql = """
+                            INSERT INTO batches (package_id, description, expiration, status)
+                            VALUES (?, ?, ?, 1)
+                        """
+                        batch_id = self.write(sql, (package_id, lot, expiration))
+
+                sql = """
+                    INSERT INTO deliveries (item_id, package_id, ddt, delivered, quantity, status)
+                    VALUES (?, ?, ?, ?, ?, 1)
+                """
+                delivery_id = self.write(sql, (item_id, package_id, ddt, delivered, quantity))
+
+                label_ids = self._insert_labels(batch_id, labels)
+
+                request_closed = False
+                if request_id:
+                    sql = """
+                        SELECT COUNT(*) AS pending
+                        FROM items i
+                        WHERE i.request_id = ? AND i.status = 1
+                        AND i.quantity > COALESCE(
+                            (SELECT SUM(d.quantity) FROM deliveries d WHERE d.item_id = i.item_id AND d.status = 1), 0
+                        )
+                    """
+                    row = self.read(False, sql, (request_id,))
+                    if row and row["pending"] == 0:
+                        sql = "UPDATE requests SET status = 0 WHERE request_id = ?"
+                        self.write(sql, (request_id,))
+                        request_closed = True
+
+        except Exception:
+            return None
+
+        return {
+            "batch_id": batch_id,
+            "delivery_id": delivery_id,
+            "label_ids": label_ids,
+            "request_closed": request_closed,
+        }
+
+    def create_draft_request(self, items: List[tuple]) -> Optional[int]:
+        """
+        Create a draft request with its items in one write transaction.
+
+        Args:
+            items: (package_id, quantity) pairs
+
+        Returns:
+            The new request_id, or None on error (nothing is written)
+        """
+        try:
+            with self.transaction():
+                sql = "INSERT INTO requests (reference, issued, status) VALUES (?, ?, 1)"
+                request_id = self.write(sql, (str(self.get_tick()), self.get_date()))
+
+                sql = "INSERT INTO items (request_id, package_id, quantity, status) VALUES (?, ?, ?, 1)"
+                self.write_many(sql, [(request_id, package_id, quantity) for package_id, quantity in items])
+        except Exception:
+            return None
+
+        return request_id
+
     def unload_label(self, label_id: int) -> Optional[int]:
         """
         Unload a label (mark as used).
@@ -321,9 +787,28 @@ class Controller:
         sql = "UPDATE labels SET unloaded = NULL, status = 1 WHERE label_id = ?"
         return self.write(sql, (label_id,))
 
-    def get_label_info(self, code: int) -> Optional[Dict[str, Any]]:
+    def is_tick(self, code: int) -> bool:
         """
-        Get complete label information by tick or label_id.
+        Tell a barcode tick from a label_id by value range.
+
+        Ticks are microsecond timestamps (see get_tick) and are always
+        above TICK_MIN; label_id is a rowid and never gets that far.
+
+        Args:
+            code: Scanned or typed label code
+
+        Returns:
+            True if code is a tick, False if it is a label_id
+        """
+        return code >= TICK_MIN
+
+    def resolve_label(self, code: int) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a scanned code to its label with a single indexed lookup.
+
+        The code is matched either on labels.tick (idx_labels_tick_unique)
+        or on labels.label_id (primary key), never on both: an OR across
+        the two columns forces SQLite to scan the whole labels table.
 
         Args:
             code: Label tick (barcode) or label_id
@@ -331,9 +816,12 @@ class Controller:
         Returns:
             Dict with label details or None if not found
         """
-        sql = """
+        column = "lb.tick" if self.is_tick(code) else "lb.label_id"
+
+        sql = f"""
             SELECT
                 lb.label_id,
+                lb.batch_id,
                 lb.tick,
                 lb.status,
                 lb.loaded,
@@ -343,6 +831,7 @@ class Controller:
                 CAST(julianday(b.expiration) - julianday('now') AS INTEGER) AS days_left,
                 p.reference AS product_code,
                 p.description AS product_name,
+                pk.package_id,
                 pk.packaging,
                 pk.reference AS supplier_code,
                 s.description AS supplier,
@@ -357,9 +846,189 @@ class Controller:
             LEFT JOIN categories c ON c.category_id = pk.category_id
             LEFT JOIN locations l ON l.location_id = pk.location_id
             LEFT JOIN conservations con ON con.conservation_id = pk.conservation_id
-            WHERE lb.tick = ? OR lb.label_id = ?
+            WHERE {column} = ?
+        """
+        return self.read(False, sql, (code,))
+
+    def get_label_info(self, code: int) -> Optional[Dict[str, Any]]:
+        """
+        Get complete label information by tick or label_id.
+
+        Args:
+            code: Label tick (barcode) or label_id
+
+        Returns:
+            Dict with label details or None if not found
+        """
+        return self.resolve_label(code)
+
+    # -------------------------------------------------------------------------
+    # Stock counters (package_stock / batch_stock / label_movements_daily,
+    # maintained by triggers)
+    # -------------------------------------------------------------------------
+
+    def verify_stock_counters(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Compare the stock counters with a full recount of the labels table.
+
+        Returns:
+            List of mismatches (level 'batch' or 'package', id, recounted
+            in_stock/used/cancelled and the counter_* values), empty if the
+            counters are exact, None on error
+        """
+        sql = """
+            WITH
+            batch_expected AS (
+                SELECT
+                    b.batch_id,
+                    b.package_id,
+                    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock,
+                    COUNT(CASE WHEN lb.status = 0 THEN 1 END) AS used,
+                    COUNT(CASE WHEN lb.status = -1 THEN 1 END) AS cancelled
+                FROM batches b
+                LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+                GROUP BY b.batch_id
+            ),
+            package_expected AS (
+                SELECT
+                    pk.package_id,
+                    COALESCE(SUM(be.in_stock), 0) AS in_stock,
+                    COALESCE(SUM(be.used), 0) AS used,
+                    COALESCE(SUM(be.cancelled), 0) AS cancelled
+                FROM packages pk
+                LEFT JOIN batch_expected be ON be.package_id = pk.package_id
+                GROUP BY pk.package_id
+            )
+            SELECT
+                'batch' AS level,
+                be.batch_id AS id,
+                be.in_stock,
+                be.used,
+                be.cancelled,
+                COALESCE(bs.in_stock, 0) AS counter_in_stock,
+                COALESCE(bs.used, 0) AS counter_used,
+                COALESCE(bs.cancelled, 0) AS counter_cancelled
+            FROM batch_expected be
+            LEFT JOIN batch_stock bs ON bs.batch_id = be.batch_id
+            WHERE be.in_stock <> COALESCE(bs.in_stock, 0)
+               OR be.used <> COALESCE(bs.used, 0)
+               OR be.cancelled <> COALESCE(bs.cancelled, 0)
+               OR bs.package_id <> be.package_id
+            UNION ALL
+            SELECT
+                'package' AS level,
+                pe.package_id AS id,
+                pe.in_stock,
+                pe.used,
+                pe.cancelled,
+                COALESCE(ps.in_stock, 0) AS counter_in_stock,
+                COALESCE(ps.used, 0) AS counter_used,
+                COALESCE(ps.cancelled, 0) AS counter_cancelled
+            FROM package_expected pe
+            LEFT JOIN package_stock ps ON ps.package_id = pe.package_id
+            WHERE pe.in_stock <> COALESCE(ps.in_stock, 0)
+               OR pe.used <> COALESCE(ps.used, 0)
+               OR pe.cancelled <> COALESCE(ps.cancelled, 0)
+        """
+        return self.read(True, sql)
+
+    def rebuild_stock_counters(self) -> bool:
+        """
+        Rebuild package_stock and batch_stock from the labels table.
+
+        Runs in a single write transaction so readers never see the
+        counters half rebuilt.
+
+        Returns:
+            True on success, False on error (nothing is changed)
+        """
+        statements = (
+            "DELETE FROM batch_stock",
+            """
+            INSERT INTO batch_stock (batch_id, package_id, in_stock, used, cancelled)
+            SELECT
+                b.batch_id,
+                b.package_id,
+                COUNT(CASE WHEN lb.status = 1 THEN 1 END),
+                COUNT(CASE WHEN lb.status = 0 THEN 1 END),
+                COUNT(CASE WHEN lb.status = -1 THEN 1 END)
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            GROUP BY b.batch_id
+            """,
+            "DELETE FROM package_stock",
+            """
+            INSERT INTO package_stock (package_id, in_stock, used, cancelled)
+            SELECT package_id, SUM(in_stock), SUM(used), SUM(cancelled)
+            FROM batch_stock
+            GROUP BY package_id
+            """
+        )
+
+        try:
+            with self.transaction():
+                for sql in statements:
+                    self.write(sql)
+        except Exception:
+            return False
+
+        return True
+
+    def verify_label_movements(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Compare label_movements_daily with a full recount of the labels table.
+
+        Returns:
+            List of mismatching (day, package_id), missing on either side
+            or with different values, empty if the table is exact, None on
+            error
+        """
+        sql = f"""
+            WITH expected AS ({LABEL_MOVEMENTS_SQL})
+            SELECT e.day, e.package_id
+            FROM expected e
+            LEFT JOIN label_movements_daily m ON m.day = e.day AND m.package_id = e.package_id
+            WHERE m.day IS NULL
+               OR e.loaded_count <> m.loaded_count
+               OR e.unloaded_count <> m.unloaded_count
+               OR e.cancelled_count <> m.cancelled_count
+               OR e.residence_count <> m.residence_count
+               OR ABS(e.residence_days - m.residence_days) > 1e-6
+               OR e.min_residence IS NOT m.min_residence
+               OR e.max_residence IS NOT m.max_residence
+            UNION ALL
+            SELECT m.day, m.package_id
+            FROM label_movements_daily m
+            WHERE NOT EXISTS (
+                SELECT 1 FROM expected e WHERE e.day = m.day AND e.package_id = m.package_id
+            )
+        """
+        return self.read(True, sql)
+
+    def rebuild_label_movements(self) -> bool:
+        """
+        Rebuild label_movements_daily from the labels table in one transaction.
+
+        Returns:
+            True on success, False on error (nothing is changed)
         """
-        return self.read(False, sql, (code, code))
+        statements = (
+            "DELETE FROM label_movements_daily",
+            f"""
+            INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+                cancelled_count, residence_count, residence_days, min_residence, max_residence)
+            {LABEL_MOVEMENTS_SQL}
+            """
+        )
+
+        try:
+            with self.transaction():
+                for sql in statements:
+                    self.write(sql)
+        except Exception:
+            return False
+
+        return True
 
     # -------------------------------------------------------------------------
     # Settings management
@@ -377,7 +1046,7 @@ class Controller:
             Setting value or default
         """
         sql = "SELECT value FROM settings WHERE key = ?"
-        row = self.read(False, sql, (key,))
+        row = self.read_cached(False, sql, (key,), tables=("settings",))
         if row:
             return row["value"] or default
         return default
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Movement Cube - In-memory label movement analytics for Inventarium.
+
+The daily movement facts (label_movements_daily) are loaded once into
+compact columns ordered by day: day ordinal, package index and one
+column per measure. A period is a contiguous slice found by bisection,
+and the filters (category, supplier) and group-bys (package, category,
+supplier, month) are answered in memory without going back to the
+database. NumPy is used when installed, plain array columns otherwise.
+
+The cube is a snapshot: is_current() compares PRAGMA data_version of the
+connection that loaded it, so a reload happens only after another
+connection has committed.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Description, category and supplier of every package
+SQL_CUBE_PACKAGES = """
+    SELECT
+        pk.package_id,
+        p.description AS product,
+        pk.category_id,
+        pk.supplier_id,
+        s.description AS supplier
+    FROM packages pk
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+"""
+
+# The facts, in day order so that a period is a slice
+SQL_CUBE_FACTS = """
+    SELECT
+        day,
+        package_id,
+        loaded_count,
+        unloaded_count,
+        cancelled_count,
+        residence_count,
+        residence_days
+    FROM label_movements_daily
+    ORDER BY day
+"""
+
+# Measure columns and their array typecode
+MEASURES = {
+    "loaded_count": "l",
+    "unloaded_count": "l",
+    "cancelled_count": "l",
+    "residence_count": "l",
+    "residence_days": "d",
+}
+
+GROUP_BY = ("package", "category", "supplier", "month")
+
+# Facts between two progress reports of load()
+PROGRESS_ROWS = 20000
+
+
+class MovementCube:
+    """
+    Label movements by day and package, held in columns.
+
+    Usage (through Engine.get_cube):
+        >>> totals = cube.totals(date_from, date_to, "unloaded_count",
+        ...                      group_by="package", category_id=3)
+        >>> for package_id, consumed in totals.items():
+        ...     print(cube.packages[package_id]["product"], consumed)
+    """
+
+    def __init__(self):
+        # package_id -> record (package_id, product, category_id, supplier_id, supplier)
+        self.packages = {}
+        self.package_ids = []
+        self.data_version = None
+
+        self.days = array("l")
+        self.months = array("l")
+        self.package = array("l")
+        self.measures = {name: array(code) for name, code in MEASURES.items()}
+
+    @classmethod
+    def load(cls, db, progress=None):
+        """
+        Read the package attributes and all the movement facts.
+
+        Args:
+            db: DBMS instance (read() and stream())
+            progress: Optional Callable(done, total) called every
+                      PROGRESS_ROWS facts (e.g. the worker's db.progress)
+
+        Returns:
+            The loaded cube
+        """
+        cube = cls()
+        cube.data_version = cls._data_version(db)
+
+        index = {}
+        for row in db.read(True, SQL_CUBE_PACKAGES) or []:
+            index[row["package_id"]] = len(cube.package_ids)
+            cube.package_ids.append(row["package_id"])
+            cube.packages[row["package_id"]] = row
+
+        columns = [(name, cube.measures[name]) for name in MEASURES]
+
+        total = None
+        if progress:
+            row = db.read(False, "SELECT COUNT(*) AS facts FROM label_movements_daily")
+            total = row["facts"] if row else None
+
+        for rows, row in enumerate(db.stream(SQL_CUBE_FACTS), 1):
+            if progress and rows % PROGRESS_ROWS == 0:
+                progress(rows, total)
+
+            idx = index.get(row["package_id"])
+            if idx is None:
+                continue
+            try:
+                day = datetime.date.fromisoformat(row["day"])
+            except (TypeError, ValueError):
+                continue
+
+            cube.days.append(day.toordinal())
+            cube.months.append(day.year * 12 + day.month - 1)
+            cube.package.append(idx)
+            for name, column in columns:
+                column.append(row[name])
+
+        return cube
+
+    @staticmethod
+    def _data_version(db):
+        row = db.read(False, "PRAGMA data_version")
+        return row["data_version"] if row else None
+
+    def is_current(self, db):
+        """True if nothing was committed since load() on this connection."""
+        version = self._data_version(db)
+        return version is not None and version == self.data_version
+
+    def __len__(self):
+        return len(self.days)
+
+    def _slice(self, date_from, date_to):
+        """Return the fact range [start, stop) of the period, dates included."""
+        start = bisect_left(self.days, date_from.toordinal())
+        stop = bisect_right(self.days, date_to.toordinal())
+        return start, max(start, stop)
+
+    def _selected(self, category_id, supplier_id):
+        """Return a per-package-index flag list for the filters, None if unfiltered."""
+        if category_id is None and supplier_id is None:
+            return None
+
+        return [
+            (category_id is None or self.packages[pid]["category_id"] == category_id)
+            and (supplier_id is None or self.packages[pid]["supplier_id"] == supplier_id)
+            for pid in self.package_ids
+        ]
+
+    def totals(self, date_from, date_to, measure="unloaded_count",
+               group_by="package", category_id=None, supplier_id=None):
+        """
+        Sum a measure over a period, filtered and grouped.
+
+        Args:
+            date_from: First day (datetime.date), included
+            date_to: Last day (datetime.date), included
+            measure: One of MEASURES
+            group_by: "package" (package_id), "category" (category_id),
+                      "supplier" (supplier_id) or "month" ("yyyy-mm")
+            category_id: Keep only packages of this category
+            supplier_id: Keep only packages of this supplier
+
+        Returns:
+            Dict group key -> total, without zero totals
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: '{measure}'")
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Unknown group_by: '{group_by}'")
+
+        start, stop = self._slice(date_from, date_to)
+        selected = self._selected(category_id, supplier_id)
+
+        if group_by == "month":
+            sums = self._sum_by(self.months, start, stop, measure, selected)
+            return {f"{key // 12}-{key % 12 + 1:02d}": value for key, value in sums.items() if value}
+
+        by_package = self._sum_by(self.package, start, stop, measure, selected)
+
+        if group_by == "package":
+            return {self.package_ids[idx]: value for idx, value in by_package.items() if value}
+
+        field = "category_id" if group_by == "category" else "supplier_id"
+        result = {}
+        for idx, value in by_package.items():
+            key = self.packages[self.package_ids[idx]][field]
+            result[key] = result.get(key, 0) + value
+        return {key: value for key, value in result.items() if value}
+
+    def _sum_by(self, keys, start, stop, measure, selected):
+        """Sum measure[start:stop] by keys[start:stop], optionally filtered by package."""
+        values = self.measures[measure]
+
+        if numpy is not None and stop > start:
+            return self._sum_by_numpy(keys, start, stop, values, selected)
+
+        sums = {}
+        package = self.package
+        for i in range(start, stop):
+            if selected is not None and not selected[package[i]]:
+                continue
+            key = keys[i]
+            sums[key] = sums.get(key, 0) + values[i]
+        return sums
+
+    def _sum_by_numpy(self, keys, start, stop, values, selected):
+        """NumPy version of _sum_by: one bincount over the slice."""
+        k = numpy.frombuffer(keys, dtype=numpy.dtype(keys.typecode))[start:stop]
+        v = numpy.frombuffer(values, dtype=numpy.dtype(values.typecode))[start:stop]
+
+        if selected is not None:
+            mask = numpy.array(selected, dtype=bool)[
+                numpy.frombuffer(self.package, dtype=numpy.dtype(self.package.typecode))[start:stop]
+            ]
+            k = k[mask]
+            v = v[mask]
+
+        if not len(k):
+            return {}
+
+        base = int(k.min())
+        sums = numpy.bincount(k - base, weights=v)
+        if values.typecode != "d":
+            sums = sums.round().astype(numpy.int64)
+        return {base + int(i): sums[i].item() for i in numpy.flatnonzero(sums)}
@@ -16,6 +16,12 @@ Key Features:
     - Parameterized query support (SQL injection prevention)
     - Comprehensive error logging
     - Transaction support with rollback
+    - Batched writes (executemany) and multi-statement transactions
+    - Connection tuning PRAGMAs with "local" and "network" presets
+    - Retry with exponential backoff when another workstation holds the lock
+    - Opt-in query timing, slow-query log with EXPLAIN QUERY PLAN
+    - Read-through LRU cache for lookup queries, tagged by table
+    - Streaming reads (fetchmany) for exports of any size
 
 Security:
     - All table/column names validated against SQL identifier regex
@@ -31,8 +37,69 @@ Version: I (SQLite Edition)
 import sys
 import inspect
 import re
+import time
+import random
 import sqlite3
-from typing import Optional, Union, List, Dict, Tuple, Any
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Union, List, Dict, Tuple, Any, Iterable, Iterator
+
+# Connection tuning presets, selected with "profile" in the [database]
+# section of config.ini. cache_size < 0 is in KiB (SQLite convention).
+# The network preset avoids WAL and mmap: neither is safe on SMB/NFS shares,
+# and WAL, once set, is persistent in the database file.
+DB_PROFILES = {
+    "local": {
+        "busy_timeout": 5000,
+        "cache_size": -32000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "journal_mode": "WAL",
+    },
+    "network": {
+        "busy_timeout": 30000,
+        "cache_size": -32000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "journal_mode": "DELETE",
+    },
+}
+
+DEFAULT_DB_PROFILE = "network"
+
+# Retry budgets for SQLITE_BUSY / SQLITE_LOCKED: (deadline, first delay,
+# max delay) in seconds. The deadline is the wall-clock time of the whole
+# statement, the waits inside busy_timeout included: no retry starts that
+# would end past it, so a statement gives up after about
+# max(deadline, busy_timeout).
+# Writers get the larger budget so that they queue up instead of failing.
+RETRY_BUDGETS = {
+    "read": (10.0, 0.05, 1.0),
+    "write": (30.0, 0.1, 2.0),
+}
+
+# Maximum number of result sets kept by read_cached() (LRU eviction)
+QUERY_CACHE_SIZE = 256
+
+# Rows fetched per round trip by stream()
+STREAM_BATCH = 500
+
+# Target table of a DML statement, to invalidate cached reads on it
+_DML_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+([A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE
+)
+
+# Statements that never change cached data
+_NO_DATA_CHANGE = ("BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE",
+                   "PRAGMA", "VACUUM", "ANALYZE", "EXPLAIN")
+
+# Accepted values for the non-integer PRAGMAs (they cannot be parameterized)
+PRAGMA_CHOICES = {
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL"),
+}
 
 
 class DBMS:
@@ -52,16 +119,39 @@ class DBMS:
 
     Connection Management:
         - Automatic connection on initialization
+        - Tuning PRAGMAs from get_db_pragmas() applied on every connection
         - Row factory for dictionary-like access
         - Proper cleanup and cursor management
 
     Query Execution:
         - read(): Execute SELECT queries, return dict results
+        - stream(): Generator over a SELECT, fetched in batches, for
+          exports that must run in constant memory
         - write(): Execute INSERT/UPDATE/DELETE with auto-commit or rollback
+        - write_many(): Execute one statement for many parameter rows in a
+          single transaction (executemany)
+        - transaction(): Context manager grouping several writes into one
+          commit, rolled back as a unit on error
         - Parameterized queries only (SQL injection prevention)
         - Dictionary cursor for named-key access (no positional indexing)
 
+    Query Cache:
+        - read_cached(): read() through an LRU cache keyed by SQL + args,
+          each entry tagged with the tables it depends on
+        - Local writes drop the entries of the table they modify,
+          invalidate_cache() drops them on application events, and a
+          change of PRAGMA data_version (commit by another workstation)
+          clears the whole cache
+
+    Profiling (opt-in, profiling = True):
+        - Wall time and rows of every statement, aggregated per SQL text
+          with the calling functions; get_query_stats() ranks them
+        - Statements slower than slow_query_ms go to on_slow_query()
+          together with their EXPLAIN QUERY PLAN
+
     Error Handling:
+        - SQLITE_BUSY/SQLITE_LOCKED retried with backoff and jitter within
+          RETRY_BUDGETS; counters available from get_lock_stats()
         - All database errors logged via on_log()
         - Graceful degradation (returns None on failure)
         - Automatic rollback on write failures
@@ -75,7 +165,15 @@ class DBMS:
         >>> rows = dbms.read(True, "SELECT * FROM products WHERE status = ?", (1,))
         >>> for row in rows:
         ...     print(row["description"])  # Named-key access
+
+        >>> with dbms.transaction():
+        ...     dbms.write_many("UPDATE labels SET status = 0 WHERE label_id = ?",
+        ...                     [(1,), (2,), (3,)])
     """
+    # Modules of wrappers around read()/write(), skipped when profiling
+    # looks for the caller of a statement
+    _caller_skip: Tuple[str, ...] = ()
+
     def __init__(
         self,
         database: str,
@@ -84,6 +182,17 @@ class DBMS:
 
         self.database = database
         self.autocommit = autocommit
+        self._tx_depth = 0
+        self.profiling = False
+        self.slow_query_ms = 250
+        self.reset_lock_stats()
+        self.reset_query_stats()
+        self._cache = OrderedDict()
+        self._cache_tags = {}
+        self._cache_version = None
+        self._cache_stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        self._row_description = None
+        self._row_columns = ()
         self.con = self._set_connection()
 
     def __str__(self) -> str:
@@ -92,7 +201,13 @@ class DBMS:
 
     def _dict_factory(self, cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
         """Convert SQLite row to dictionary."""
-        return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
+        # cursor.description is the same tuple for all the rows of a
+        # statement: build the column names once per statement
+        description = cursor.description
+        if description is not self._row_description:
+            self._row_description = description
+            self._row_columns = tuple(col[0] for col in description)
+        return dict(zip(self._row_columns, row))
 
     def _set_connection(self) -> Optional[sqlite3.Connection]:
         try:
@@ -102,6 +217,7 @@ class DBMS:
             con.execute("PRAGMA foreign_keys = ON")
             if self.autocommit:
                 con.isolation_level = None  # autocommit mode
+            self._apply_pragmas(con, self.get_db_pragmas())
             return con
         except Exception as e:
             f = inspect.currentframe()
@@ -110,6 +226,57 @@ class DBMS:
             self.on_log(function, e, type(e), sys.modules[__name__], caller)
             return None
 
+    def get_db_pragmas(self) -> Dict[str, Any]:
+        """
+        Return the tuning PRAGMAs for new connections.
+
+        Override this method to read them from configuration;
+        the default is the DEFAULT_DB_PROFILE preset.
+        """
+        return dict(DB_PROFILES[DEFAULT_DB_PROFILE])
+
+    def _apply_pragmas(self, con: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+        """
+        Apply tuning PRAGMAs to a connection.
+
+        busy_timeout goes first so that the other statements already wait
+        for a lock held by another workstation. Invalid values are logged
+        and skipped: a bad setting must not prevent opening the database.
+        """
+        for name in ("busy_timeout", "cache_size", "mmap_size", "temp_store", "journal_mode"):
+            if name not in pragmas:
+                continue
+            try:
+                value = pragmas[name]
+                if name in PRAGMA_CHOICES:
+                    value = str(value).upper()
+                    if value not in PRAGMA_CHOICES[name]:
+                        raise ValueError(f"Invalid {name}: '{pragmas[name]}'")
+                else:
+                    value = int(value)
+                con.execute(f"PRAGMA {name} = {value}").fetchall()
+            except Exception as e:
+                f = inspect.currentframe()
+                function = f.f_code.co_name
+                caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+                self.on_log(function, e, type(e), sys.modules[__name__], caller)
+
+    def get_effective_pragmas(self) -> Dict[str, Any]:
+        """
+        Read back the PRAGMAs in effect on the current connection.
+
+        Returns:
+            Dict name -> value (e.g. {'journal_mode': 'delete', ...}),
+            empty on error
+        """
+        pragmas = {}
+        for name in ("busy_timeout", "cache_size", "mmap_size", "temp_store",
+                     "journal_mode", "foreign_keys", "page_size", "synchronous"):
+            row = self.read(False, f"PRAGMA {name}")
+            if row:
+                pragmas[name] = next(iter(row.values()))
+        return pragmas
+
     def _ensure_connection(self) -> None:
         """
         Ensure there is an active DB connection.
@@ -149,13 +316,21 @@ class DBMS:
             if self.con is None:
                 raise RuntimeError("No active DB connection")
 
+            started = time.perf_counter() if self.profiling else None
+
             cursor = self.con.cursor()
-            cursor.execute(sql, args)
+            self._retry("read", cursor.execute, sql, args)
 
             if fetch:
-                return cursor.fetchall()  # → list of dicts (possibly empty)
+                rs = cursor.fetchall()  # → list of dicts (possibly empty)
             else:
-                return cursor.fetchone()  # → single dict or None
+                rs = cursor.fetchone()  # → single dict or None
+
+            if started is not None:
+                rows = len(rs) if fetch else int(rs is not None)
+                self._record_query(sql, args, time.perf_counter() - started, rows)
+
+            return rs
 
         except Exception as e:
             f = inspect.currentframe()
@@ -174,6 +349,198 @@ class DBMS:
                     caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
                     self.on_log(function, e, type(e), sys.modules[__name__], caller)
 
+    def stream(
+        self,
+        sql: str,
+        args: Tuple = (),
+        batch: int = STREAM_BATCH
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a SELECT query and yield its rows one by one as dictionaries.
+
+        Rows are fetched batch at a time with fetchmany(), so memory use
+        does not depend on the size of the result set. Unlike read(),
+        errors are logged and re-raised: a truncated export must not look
+        complete. The cursor is closed when the generator is exhausted or
+        discarded.
+
+        Args:
+            sql (str): SQL query string
+            args (tuple): parameters for the query (default: ())
+            batch (int): rows per fetchmany() call
+
+        Example:
+            >>> for row in dbms.stream("SELECT * FROM labels WHERE status = ?", (0,)):
+            ...     writer.writerow(row.values())
+        """
+        cursor = None
+        rows = 0
+        try:
+            self._ensure_connection()
+            if self.con is None:
+                raise RuntimeError("No active DB connection")
+
+            started = time.perf_counter() if self.profiling else None
+
+            cursor = self.con.cursor()
+            # Plain tuples, zipped with the column names computed once below
+            cursor.row_factory = None
+            self._retry("read", cursor.execute, sql, args)
+            columns = tuple(col[0] for col in cursor.description)
+
+            while True:
+                chunk = cursor.fetchmany(batch)
+                if not chunk:
+                    break
+                rows += len(chunk)
+                for row in chunk:
+                    yield dict(zip(columns, row))
+
+            if started is not None:
+                self._record_query(sql, args, time.perf_counter() - started, rows)
+
+        except Exception as e:
+            f = inspect.currentframe()
+            function = f.f_code.co_name
+            caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+            self.on_log(function, e, type(e), sys.modules[__name__], caller)
+            raise
+
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception as e:
+                    f = inspect.currentframe()
+                    function = f.f_code.co_name + ".close"
+                    caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+                    self.on_log(function, e, type(e), sys.modules[__name__], caller)
+
+    def read_cached(
+        self,
+        fetch: bool,
+        sql: str,
+        args: Tuple = (),
+        tables: Tuple[str, ...] = ()
+    ) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        read() through the query cache, for lookup data that rarely changes.
+
+        Entries are keyed by fetch + SQL + args and tagged with tables:
+        they are dropped when one of those tables is written on this
+        connection or named in invalidate_cache(), and the whole cache is
+        dropped when PRAGMA data_version reports a commit from another
+        connection. None results (error, or no row with fetch=False) are
+        not cached.
+
+        Args:
+            fetch: As read()
+            sql: SELECT statement
+            args: Parameters
+            tables: Tables the result depends on
+
+        Returns:
+            As read(); rows are copies, callers may modify them.
+
+        Example:
+            >>> rs = engine.read_cached(True, "SELECT * FROM suppliers WHERE status = 1",
+            ...                         tables=("suppliers",))
+        """
+        self._check_data_version()
+
+        key = (fetch, " ".join(sql.split()), tuple(args))
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._cache_stats["hits"] += 1
+            return self._copy_rs(self._cache[key])
+
+        self._cache_stats["misses"] += 1
+        rs = self.read(fetch, sql, args)
+
+        if rs is not None:
+            self._cache[key] = rs
+            for table in tables:
+                self._cache_tags.setdefault(table, set()).add(key)
+            while len(self._cache) > QUERY_CACHE_SIZE:
+                old_key, _rs = self._cache.popitem(last=False)
+                self._untag(old_key)
+                self._cache_stats["evictions"] += 1
+
+        return self._copy_rs(rs)
+
+    @staticmethod
+    def _copy_rs(rs):
+        """Return a copy of a cached result so callers cannot alter the cache."""
+        if isinstance(rs, list):
+            return [dict(row) for row in rs]
+        if isinstance(rs, dict):
+            return dict(rs)
+        return rs
+
+    def _untag(self, key) -> None:
+        """Remove a cache key from every table tag."""
+        for keys in self._cache_tags.values():
+            keys.discard(key)
+
+    def _check_data_version(self) -> None:
+        """Clear the cache if another connection committed since the last check."""
+        row = self.read(False, "PRAGMA data_version")
+        version = row["data_version"] if row else None
+
+        if version is None or version != self._cache_version:
+            if self._cache:
+                self.invalidate_cache()
+            self._cache_version = version
+
+    def invalidate_cache(self, tables: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached results.
+
+        Args:
+            tables: Drop only entries tagged with these tables
+                    (None = clear the whole cache)
+        """
+        if tables is None:
+            if self._cache:
+                self._cache_stats["invalidations"] += len(self._cache)
+            self._cache.clear()
+            self._cache_tags.clear()
+            return
+
+        for table in tables:
+            for key in self._cache_tags.pop(table, set()):
+                if key in self._cache:
+                    del self._cache[key]
+                    self._cache_stats["invalidations"] += 1
+                self._untag(key)
+
+    def _invalidate_for_write(self, sql: str) -> None:
+        """Drop cached reads made stale by a local write statement."""
+        if not self._cache:
+            return
+
+        m = _DML_TABLE_RE.match(sql)
+        if m:
+            self.invalidate_cache((m.group(1),))
+            return
+
+        first = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if first not in _NO_DATA_CHANGE:
+            # DDL or anything not recognized
+            self.invalidate_cache()
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Return query cache counters.
+
+        Returns:
+            Dict with entries, hits, misses, invalidations and evictions
+        """
+        stats = dict(self._cache_stats)
+        stats["entries"] = len(self._cache)
+        return stats
+
     def write(self, sql: str, args: Tuple = ()) -> Optional[int]:
         """
         Execute a DML statement (INSERT/UPDATE/DELETE).
@@ -191,18 +558,40 @@ class DBMS:
             if self.con is None:
                 raise RuntimeError("No active DB connection")
 
+            started = time.perf_counter() if self.profiling else None
+
             cursor = self.con.cursor()
-            cursor.execute(sql, args)
 
-            # Commit only when autocommit is disabled
-            if not self.autocommit:
-                self.con.commit()
+            if self._tx_depth:
+                # The block already holds the write lock (BEGIN IMMEDIATE)
+                cursor.execute(sql, args)
+            else:
+                self._retry("write", cursor.execute, sql, args)
+
+            # Commit only when autocommit is disabled and no
+            # transaction() block owns the commit
+            if not self.autocommit and not self._tx_depth:
+                self._retry("write", self.con.commit)
+
+            if started is not None:
+                self._record_query(sql, args, time.perf_counter() - started, cursor.rowcount)
+
+            self._invalidate_for_write(sql)
 
             # Prefer lastrowid; fallback to rowcount if not meaningful
             last_id = cursor.lastrowid
             return last_id if last_id not in (None, 0) else cursor.rowcount
 
         except Exception as e:
+            f = inspect.currentframe()
+            function = f.f_code.co_name
+            caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+            self.on_log(function, e, type(e), sys.modules[__name__], caller)
+
+            # Inside transaction() the whole block must be rolled back
+            if self._tx_depth:
+                raise
+
             # Rollback only if autocommit is disabled
             try:
                 if self.con and not self.autocommit:
@@ -210,10 +599,6 @@ class DBMS:
             except Exception:
                 pass
 
-            f = inspect.currentframe()
-            function = f.f_code.co_name
-            caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
-            self.on_log(function, e, type(e), sys.modules[__name__], caller)
             return None
 
         finally:
@@ -226,6 +611,354 @@ class DBMS:
                     caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
                     self.on_log(function, e, type(e), sys.modules[__name__], caller)
 
+    def write_many(self, sql: str, seq_of_args: Iterable[Tuple]) -> Optional[int]:
+        """
+        Execute one DML statement for every parameter tuple (executemany).
+
+        All rows are written in a single transaction: when called outside a
+        transaction() block one is opened and committed here, so N rows cost
+        one commit instead of N.
+
+        Args:
+            sql: INSERT/UPDATE/DELETE statement with '?' placeholders
+            seq_of_args: Iterable of parameter tuples, one per row
+
+        Returns:
+            Total rows affected, or None on error (nothing is written).
+            Inside a transaction() block errors are re-raised instead.
+        """
+        if self._tx_depth:
+            return self._execute_many(sql, seq_of_args)
+
+        try:
+            with self.transaction():
+                return self._execute_many(sql, seq_of_args)
+        except Exception:
+            # Already logged by _execute_many / transaction
+            return None
+
+    def _execute_many(self, sql: str, seq_of_args: Iterable[Tuple]) -> int:
+        """Run executemany on a fresh cursor, logging and re-raising errors."""
+        cursor = None
+        try:
+            self._ensure_connection()
+
+            if self.con is None:
+                raise RuntimeError("No active DB connection")
+
+            started = time.perf_counter() if self.profiling else None
+
+            cursor = self.con.cursor()
+            cursor.executemany(sql, seq_of_args)
+            self._invalidate_for_write(sql)
+
+            if started is not None:
+                self._record_query(sql, None, time.perf_counter() - started, cursor.rowcount)
+
+            return cursor.rowcount
+
+        except Exception as e:
+            f = inspect.currentframe()
+            function = f.f_code.co_name
+            caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+            self.on_log(function, e, type(e), sys.modules[__name__], caller)
+            raise
+
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group several writes into one transaction.
+
+        Opens BEGIN IMMEDIATE (the write lock is taken up front, so the
+        block cannot fail half-way on a lock upgrade), commits on normal
+        exit and rolls everything back if the block raises. write() and
+        write_many() re-raise their errors inside the block, so a failed
+        statement aborts the whole unit. Nested blocks join the outermost
+        transaction.
+
+        Raises:
+            Exception: Whatever aborted the block, after rollback
+
+        Example:
+            >>> with engine.transaction():
+            ...     batch_id = engine.write(sql_batch, args)
+            ...     engine.write_many(sql_label, rows)
+        """
+        if self._tx_depth:
+            self._tx_depth += 1
+            try:
+                yield
+            finally:
+                self._tx_depth -= 1
+            return
+
+        self._ensure_connection()
+        if self.con is None:
+            raise RuntimeError("No active DB connection")
+
+        try:
+            self._retry("write", self.con.execute, "BEGIN IMMEDIATE")
+        except Exception as e:
+            f = inspect.currentframe()
+            function = f.f_code.co_name
+            caller = f.f_back.f_back.f_code.co_name if f and f.f_back and f.f_back.f_back else "<top>"
+            self.on_log(function, e, type(e), sys.modules[__name__], caller)
+            raise
+
+        self._tx_depth = 1
+        try:
+            yield
+        except BaseException:
+            self._tx_depth = 0
+            try:
+                self.con.rollback()
+            except Exception:
+                pass
+            # Entries cached inside the block may hold rolled back rows
+            self.invalidate_cache()
+            raise
+        else:
+            self._tx_depth = 0
+            try:
+                # COMMIT can be busy while other connections still read
+                self._retry("write", self.con.commit)
+            except Exception as e:
+                try:
+                    self.con.rollback()
+                except Exception:
+                    pass
+                f = inspect.currentframe()
+                function = f.f_code.co_name + ".commit"
+                caller = f.f_back.f_back.f_code.co_name if f and f.f_back and f.f_back.f_back else "<top>"
+                self.on_log(function, e, type(e), sys.modules[__name__], caller)
+                raise
+
+    @staticmethod
+    def _is_busy(e: Exception) -> bool:
+        """Return True if e is SQLITE_BUSY or SQLITE_LOCKED (another connection holds the lock)."""
+        if not isinstance(e, sqlite3.OperationalError):
+            return False
+        code = getattr(e, "sqlite_errorcode", None)  # Python 3.11+
+        if code is not None:
+            return code & 0xFF in (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+        msg = str(e).lower()
+        return "locked" in msg or "busy" in msg
+
+    def _retry(self, kind: str, fn, *args) -> Any:
+        """
+        Call fn(*args), retrying on lock contention.
+
+        Waits with exponential backoff and jitter (half to full delay)
+        until the deadline of the RETRY_BUDGETS entry for kind ("read" or
+        "write"), then re-raises. The deadline runs from the first attempt
+        and includes the time spent in busy_timeout by each attempt; a
+        retry is not started if the pause plus another attempt as long as
+        the last one would end past it. Other errors are raised at once.
+
+        Args:
+            kind: "read" or "write", selects budget and counters
+            fn: Callable executing the statement
+            *args: Arguments for fn
+
+        Returns:
+            Whatever fn returns
+        """
+        deadline, delay, max_delay = RETRY_BUDGETS[kind]
+        stats = self._lock_stats[kind]
+        stats["statements"] += 1
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            tried = time.monotonic()
+            try:
+                result = fn(*args)
+                break
+            except sqlite3.OperationalError as e:
+                if not self._is_busy(e):
+                    raise
+                now = time.monotonic()
+                pause = min(max_delay, delay * 2 ** attempt)
+                pause = random.uniform(pause / 2, pause)
+                if now + pause + (now - tried) > start + deadline:
+                    stats["failures"] += 1
+                    self._record_wait(stats, now - start)
+                    raise
+                time.sleep(pause)
+                attempt += 1
+                stats["retries"] += 1
+
+        if attempt:
+            stats["contended"] += 1
+            self._record_wait(stats, time.monotonic() - start)
+
+        return result
+
+    @staticmethod
+    def _record_wait(stats: Dict[str, Union[int, float]], waited: float) -> None:
+        """Add the wall-clock time of a contended statement to its counters."""
+        stats["wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def get_lock_stats(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        Return lock contention counters since start (or last reset).
+
+        Returns:
+            {"read": {...}, "write": {...}}, each with statements,
+            contended (statements that had to wait), retries, failures
+            (deadline exceeded), wait (total seconds of the contended
+            statements, busy_timeout included) and max_wait (longest
+            contended statement, seconds)
+        """
+        return {kind: dict(stats) for kind, stats in self._lock_stats.items()}
+
+    def reset_lock_stats(self) -> None:
+        """Reset lock contention counters."""
+        self._lock_stats = {
+            kind: {"statements": 0, "contended": 0, "retries": 0,
+                   "failures": 0, "wait": 0.0, "max_wait": 0.0}
+            for kind in RETRY_BUDGETS
+        }
+
+    def _record_query(self, sql: str, args: Optional[Tuple], elapsed: float, rows: int) -> None:
+        """
+        Add one timed statement to the profiling counters.
+
+        Statements are aggregated on their whitespace-normalized text, so
+        the same inline SQL called with different arguments counts as one.
+        Slow ones are passed to on_slow_query() with their query plan
+        (not for write_many, whose arguments are a sequence of rows).
+        """
+        try:
+            caller = self._get_query_caller()
+            key = " ".join(sql.split())
+
+            stats = self._query_stats.get(key)
+            if stats is None:
+                stats = {"calls": 0, "total": 0.0, "max": 0.0, "rows": 0, "callers": set()}
+                self._query_stats[key] = stats
+
+            stats["calls"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["rows"] += max(rows, 0)
+            stats["callers"].add(caller)
+
+            if elapsed * 1000 >= self.slow_query_ms:
+                plan = self.explain_query_plan(sql, args) if args is not None else []
+                self.on_slow_query(key, args, elapsed, rows, caller, plan)
+
+        except Exception as e:
+            f = inspect.currentframe()
+            function = f.f_code.co_name
+            caller = f.f_back.f_code.co_name if f and f.f_back else "<top>"
+            self.on_log(function, e, type(e), sys.modules[__name__], caller)
+
+    def _get_query_caller(self) -> str:
+        """Return 'module.function' of the first frame outside this module (and _caller_skip)."""
+        skip = (__name__, "contextlib") + self._caller_skip
+        f = inspect.currentframe()
+        while f is not None:
+            module = f.f_globals.get("__name__", "")
+            if module not in skip:
+                return f"{module}.{f.f_code.co_name}"
+            f = f.f_back
+        return "<top>"
+
+    def explain_query_plan(self, sql: str, args: Tuple = ()) -> List[str]:
+        """
+        Return the EXPLAIN QUERY PLAN of a statement as indented lines.
+
+        Only SELECT/WITH/INSERT/UPDATE/DELETE/REPLACE are explained;
+        the statement itself is not executed.
+
+        Args:
+            sql: SQL statement
+            args: Its parameters
+
+        Returns:
+            One line per plan node (e.g. 'SCAN lb', '  SEARCH b USING ...'),
+            empty if the statement cannot be explained
+        """
+        first = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if first not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+            return []
+
+        cursor = None
+        try:
+            cursor = self.con.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", args)
+            depth = {0: -1}
+            lines = []
+            for row in cursor.fetchall():
+                level = depth.get(row["parent"], -1) + 1
+                depth[row["id"]] = level
+                lines.append("  " * level + row["detail"])
+            return lines
+        except Exception:
+            return []
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def on_slow_query(self, sql: str, args: Optional[Tuple], elapsed: float,
+                      rows: int, caller: str, plan: List[str]) -> None:
+        """
+        Report a statement slower than slow_query_ms. Override this method for custom logging.
+
+        Args:
+            sql: Normalized SQL text
+            args: Statement parameters (None for write_many)
+            elapsed: Wall time in seconds
+            rows: Rows returned or affected
+            caller: 'module.function' that issued the statement
+            plan: EXPLAIN QUERY PLAN lines
+        """
+        print(f"[SLOW] {elapsed * 1000:.1f} ms, {rows} rows, {caller}: {sql}")
+        for line in plan:
+            print(f"    {line}")
+
+    def get_query_stats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the profiled statements, slowest total time first.
+
+        Args:
+            limit: Maximum number of statements (None = all)
+
+        Returns:
+            List of dicts with sql, calls, total_ms, avg_ms, max_ms, rows
+            and callers (comma separated 'module.function' names)
+        """
+        rs = []
+        # Snapshot: the worker connection's counters are read from the Tk thread
+        for sql, stats in list(self._query_stats.items()):
+            rs.append({
+                "sql": sql,
+                "calls": stats["calls"],
+                "total_ms": stats["total"] * 1000,
+                "avg_ms": stats["total"] * 1000 / stats["calls"],
+                "max_ms": stats["max"] * 1000,
+                "rows": stats["rows"],
+                "callers": ", ".join(sorted(stats["callers"])),
+            })
+        rs.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rs[:limit] if limit else rs
+
+    def reset_query_stats(self) -> None:
+        """Reset the profiling counters."""
+        self._query_stats = {}
+
     def on_log(self, function: str, exception: Exception, exc_type: type,
                module: Any, caller: str) -> None:
         """
@@ -28,17 +28,65 @@ import traceback
 import datetime
 import time
 import configparser
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any
 
 from tools import Tools
-from dbms import DBMS
+from dbms import DBMS, DB_PROFILES, DEFAULT_DB_PROFILE
 from controller import Controller
 from launcher import Launcher
+from query_executor import QueryExecutor, QueryJob
+from cube import MovementCube
+from catalog import CatalogIndex
+from change_feed import ChangeFeed, POLL_MS
 from app_config import APP_ICON
 from i18n import set_language, _
 
 APP_TITLE = "Inventarium"
 
+# Tables whose cached reads (read_cached) are stale after each event
+EVENT_TABLES = {
+    "stock_changed": ("batches", "labels", "deliveries", "requests", "items"),
+    "label_unloaded": ("labels",),
+    "batch_cancelled": ("batches",),
+    "category_changed": ("categories",),
+    "package_changed": ("packages",),
+    "product_changed": ("products",),
+    "supplier_changed": ("suppliers",),
+    "request_changed": ("requests", "items"),
+}
+
+# Ids an event can carry (notify keyword arguments, merged when coalesced)
+PAYLOAD_KEYS = ("package_ids", "product_ids", "supplier_ids",
+                "batch_ids", "label_ids", "request_ids")
+
+# Events that change the catalog index (refreshed with their ids)
+CATALOG_EVENTS = ("package_changed", "product_changed", "supplier_changed")
+
+# Event announcing a change of each table (refresh_windows_for_table)
+TABLE_EVENTS = {
+    "products": "product_changed",
+    "packages": "package_changed",
+    "suppliers": "supplier_changed",
+    "categories": "category_changed",
+    "batches": "stock_changed",
+    "labels": "stock_changed",
+    "requests": "request_changed",
+    "items": "request_changed",
+}
+
+# Seconds a dashboard snapshot is reused before querying again
+DASHBOARD_TTL = 60
+
+# Events that make the dashboard snapshot stale
+DASHBOARD_EVENTS = ("stock_changed", "label_unloaded", "batch_cancelled", "request_changed")
+
+# Seconds a statistics result (run_stats) is reused for an identical request
+STATS_TTL = 120
+
+# Statistics results kept for reuse, least recently used dropped first
+STATS_CACHE_SIZE = 16
+
 
 class _EngineMeta(type):
     """
@@ -96,7 +144,12 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
         Engine provides an event system for decoupled view communication:
         - subscribe(event, callback): Register for an event
         - unsubscribe(event, callback): Unregister from an event
-        - notify(event, data): Emit an event to all subscribers
+        - notify(event, **ids): Emit an event to all subscribers
+
+        Notifications are coalesced: subscribers are called once per Tk
+        idle cycle with the ids (package_ids, batch_ids, label_ids, ...)
+        of every notification of the event merged, or None when one of
+        them gave no ids and everything may have changed.
 
         Events:
         - "stock_changed": Fired when stock is modified (delivery)
@@ -105,6 +158,7 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
         - "category_changed": Fired when a category is modified (category)
         - "package_changed": Fired when a package is modified (package)
         - "product_changed": Fired when a product is modified (product)
+        - "supplier_changed": Fired when a supplier is modified (supplier)
         - "request_changed": Fired when a request is modified (requests)
 
     Attributes:
@@ -123,11 +177,35 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
     def __init__(self, database: str, autocommit: bool = True):
         super().__init__(database=database, autocommit=autocommit)
 
+        # Query timing (opt-in from config.ini)
+        self.profiling, self.slow_query_ms = self.get_profiling()
+
         # Windows registry: name -> widget
         self.dict_instances = {}
 
-        # Event system: event_name -> [callbacks]
+        # Event system: event_name -> [callbacks], and the payloads
+        # waiting for the idle cycle: event_name -> payload
         self._subscribers = {}
+        self._pending = {}
+        self._flush_after = None
+
+        # Dashboard snapshot (get_dashboard): value, monotonic time, generation
+        self._dashboard = None
+        self._dashboard_at = 0.0
+        self._dashboard_generation = 0
+
+        # Movement cube (get_cube), loaded on first use
+        self._cube = None
+
+        # Catalog search index (get_catalog), loaded on first use
+        self._catalog = None
+
+        # Changes of the other workstations (start_change_feed)
+        self._feed = None
+
+        # Statistics results (run_stats): (key, args) -> (result, monotonic time)
+        self._stats = OrderedDict()
+        self._stats_generation = 0
 
         # Initialize i18n from settings
         self._init_i18n()
@@ -239,27 +317,121 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
             except ValueError:
                 pass
 
-    def notify(self, event: str, data=None) -> None:
+    def notify(self, event: str, **ids) -> None:
         """
         Notify all subscribers of an event.
 
         Views call this after making changes that other views might
-        need to know about. Subscribers receive the event asynchronously.
+        need to know about. Cached reads and the catalog index are
+        brought up to date at once; subscribers are called later, once
+        per Tk idle cycle, with a payload merging every notification of
+        the event since: a dict of sets of the ids affected, by kind, or
+        None if a notification gave no ids (refresh everything).
 
         Args:
             event: Event name
-            data: Optional data to pass to callbacks
+            **ids: Iterables of the ids affected (see PAYLOAD_KEYS)
 
         Example:
-            # In delivery after saving:
-            self.engine.notify("stock_changed")
+            # In barcode after unloading:
+            self.engine.notify("label_unloaded", label_ids=(label_id,),
+                               batch_ids=(batch_id,), package_ids=(package_id,))
         """
-        for callback in self._subscribers.get(event, []):
-            try:
-                callback(data)
-            except Exception:
-                # Subscriber might be dead or have errors, ignore
-                pass
+        for key in ids:
+            if key not in PAYLOAD_KEYS:
+                raise ValueError(f"Invalid payload: {key}")
+
+        payload = {key: set(values) for key, values in ids.items()} if ids else None
+
+        self.invalidate_cache(EVENT_TABLES.get(event, ()))
+
+        if event in DASHBOARD_EVENTS:
+            self.invalidate_dashboard()
+
+        self.invalidate_stats()
+
+        if self._feed is not None and not self._feed.publishing:
+            # Our own rows in change_log: already notified here
+            self._feed.skip_local()
+
+        if event in CATALOG_EVENTS and self._catalog is not None:
+            # Only the changed rows are read; without ids all are compared
+            if payload is None:
+                self._catalog.refresh(self)
+            else:
+                self._catalog.refresh(self, **{key: payload.get(key, ())
+                                               for key in ("package_ids", "product_ids", "supplier_ids")})
+
+        if not self._subscribers.get(event):
+            return
+
+        if event in self._pending:
+            self._pending[event] = self.merge_payloads(self._pending[event], payload)
+        else:
+            self._pending[event] = payload
+
+        self._schedule_flush(event)
+
+    @staticmethod
+    def merge_payloads(payload, other):
+        """Union of two event payloads (None, i.e. everything, absorbs the other)."""
+        if payload is None or other is None:
+            return None
+        for key, values in other.items():
+            payload.setdefault(key, set()).update(values)
+        return payload
+
+    def _schedule_flush(self, event):
+        """Deliver the pending events at the next idle cycle of Tk."""
+        if self._flush_after is not None:
+            return
+
+        # Any subscribed widget leads to the Tk root; the callback is
+        # scheduled there, so that it outlives the windows closed meanwhile
+        for callback in self._subscribers[event]:
+            widget = getattr(callback, "__self__", None)
+            if hasattr(widget, "nametowidget"):
+                try:
+                    self._flush_after = widget.nametowidget(".").after_idle(self._flush)
+                    return
+                except Exception:
+                    # Widget destroyed: try the next one
+                    pass
+
+        # No Tk widget subscribed: deliver at once
+        self._flush()
+
+    def _flush(self):
+        """Call the subscribers of the pending events with their merged payloads."""
+        self._flush_after = None
+        pending, self._pending = self._pending, {}
+
+        for event, payload in pending.items():
+            for callback in list(self._subscribers.get(event, [])):
+                try:
+                    callback(payload)
+                except Exception:
+                    # Subscriber might be dead or have errors, ignore
+                    pass
+
+    def refresh_windows_for_table(self, table_name: str, **ids) -> None:
+        """
+        Announce the change of a table edited outside the views that notify.
+
+        The event of the table (TABLE_EVENTS) goes through notify(), so
+        that the cached reads are dropped and the windows subscribed to
+        it refresh the rows of the given ids; a table with no event only
+        has its cached reads dropped.
+
+        Args:
+            table_name: Table edited
+            **ids: Iterables of the ids affected (see PAYLOAD_KEYS)
+        """
+        event = TABLE_EVENTS.get(table_name)
+        if event is None:
+            self.invalidate_cache((table_name,))
+        else:
+            self.notify(event, **ids)
 
     def __str__(self):
         return "class: {0}\nMRO: {1}".format(
@@ -307,6 +479,112 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
         except Exception:
             pass
 
+    def on_slow_query(self, sql, args, elapsed, rows, caller, plan):
+        """
+        Write a slow statement and its query plan to slow_query.log.
+
+        Args:
+            sql: Normalized SQL text
+            args: Statement parameters (None for write_many)
+            elapsed: Wall time in seconds
+            rows: Rows returned or affected
+            caller: 'module.function' that issued the statement
+            plan: EXPLAIN QUERY PLAN lines
+        """
+        try:
+            now = datetime.datetime.now().astimezone()
+            ts = now.isoformat(sep=" ", timespec="seconds")
+
+            log_text = (
+                f"{ts}  {elapsed * 1000:.1f} ms  {rows} rows  (caller: {caller})\n"
+                f"{sql}\n"
+                f"args: {args!r}\n"
+            )
+            for line in plan:
+                log_text += f"    {line}\n"
+
+            path = self.get_file("slow_query.log")
+            with open(path, "a", encoding="utf-8", errors="backslashreplace") as fh:
+                fh.write(log_text + "\n")
+
+        except Exception:
+            pass
+
+    def get_slow_query_log(self):
+        """Open slow_query.log in default application."""
+        path = self.get_file("slow_query.log")
+        if not os.path.exists(path):
+            open(path, "a").close()
+        self.launch(path)
+
+    def _get_worker_db(self):
+        """Return the connection of the background query thread, None if not started."""
+        executor = getattr(self, "_executor", None)
+        return executor.db if executor is not None else None
+
+    def set_profiling(self, enabled):
+        """Switch statement timing for this session, background reads included."""
+        self.profiling = enabled
+        if getattr(self, "_executor", None) is not None:
+            self._executor.set_profiling(enabled)
+
+    def get_query_stats(self, limit=None):
+        """
+        Return the profiled statements, background reads included.
+
+        The statements of the worker connection are merged with the
+        same SQL text of this one.
+        """
+        rs = {row["sql"]: row for row in super().get_query_stats()}
+
+        worker = self._get_worker_db()
+        if worker is not None:
+            for row in worker.get_query_stats():
+                mine = rs.get(row["sql"])
+                if mine is None:
+                    rs[row["sql"]] = row
+                    continue
+                mine["calls"] += row["calls"]
+                mine["total_ms"] += row["total_ms"]
+                mine["avg_ms"] = mine["total_ms"] / mine["calls"]
+                mine["max_ms"] = max(mine["max_ms"], row["max_ms"])
+                mine["rows"] += row["rows"]
+                callers = set(mine["callers"].split(", ")) | set(row["callers"].split(", "))
+                mine["callers"] = ", ".join(sorted(callers))
+
+        rs = sorted(rs.values(), key=lambda r: r["total_ms"], reverse=True)
+        return rs[:limit] if limit else rs
+
+    def reset_query_stats(self):
+        """Reset the profiling counters, background reads included."""
+        super().reset_query_stats()
+        worker = self._get_worker_db()
+        if worker is not None:
+            worker.reset_query_stats()
+
+    def get_lock_stats(self):
+        """Return lock contention counters, background reads included."""
+        rs = super().get_lock_stats()
+
+        worker = self._get_worker_db()
+        if worker is not None:
+            for kind, stats in worker.get_lock_stats().items():
+                mine = rs[kind]
+                for name, value in stats.items():
+                    if name == "max_wait":
+                        mine[name] = max(mine[name], value)
+                    else:
+                        mine[name] += value
+
+        return rs
+
+    def reset_lock_stats(self):
+        """Reset lock contention counters, background reads included."""
+        super().reset_lock_stats()
+        worker = self._get_worker_db()
+        if worker is not None:
+            worker.reset_lock_stats()
+
     def rotate_log(self, max_size_kb=500):
         """
         Rotate log file if it exceeds max size.
@@ -361,6 +639,222 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
         """Return full path of file in program directory."""
         return os.path.join(os.path.dirname(__file__), filename)
 
+    def run_async(self, caller, fn, callback, key=None, on_error=None, on_progress=None):
+        """
+        Run fn(db) on the background query thread and pass its result to callback.
+
+        The window stays responsive and shows the busy cursor until the
+        result arrives. callback runs on the Tk thread, and only if the
+        job was not superseded and the window is still open.
+
+        Args:
+            caller: Window waiting for the result
+            fn: Callable(db) run on the worker; db offers read() and
+                the read-only Controller queries
+            callback: Callable(result) run on the Tk thread
+            key: A new job with the same key cancels this one
+            on_error: Callable(exception) for errors raised by fn
+            on_progress: Callable(done, total, partial) run on the Tk
+                         thread for each db.progress() of fn
+
+        Returns:
+            The queued QueryJob
+        """
+        if getattr(self, "_executor", None) is None:
+            self._executor = QueryExecutor(
+                self.database,
+                self.get_db_pragmas(),
+                self.on_log,
+                self.busy,
+                self.not_busy,
+                self.profiling,
+                self.slow_query_ms,
+                self.on_slow_query
+            )
+            self._executor.start()
+
+        return self._executor.submit(QueryJob(caller, fn, callback, key, on_error, on_progress))
+
+    def read_async(self, caller, fetch, sql, args=(), callback=None, key=None, on_error=None):
+        """
+        Asynchronous read(): run the query in background, then callback(rs).
+
+        Example:
+            self.engine.read_async(self, True, sql, args, self.show_products,
+                                   key="warehouse.products")
+        """
+        return self.run_async(caller, lambda db: db.read(fetch, sql, args), callback, key, on_error)
+
+    def cancel_async(self, key):
+        """Cancel the background job with this key (no callback)."""
+        if getattr(self, "_executor", None) is not None:
+            self._executor.cancel(key)
+
+    def run_stats(self, caller, key, args, fn, callback, on_progress=None, on_error=None, refresh=False):
+        """
+        Run a statistics computation in background, reusing recent results.
+
+        The result of an identical request (same key and args) younger
+        than STATS_TTL seconds, with no notify() since, is handed over at
+        once. Otherwise fn runs on the background thread, superseding the
+        previous computation with the same key (e.g. when the period
+        changes), and may report progress and partial results with
+        db.progress().
+
+        Args:
+            caller: Window waiting for the result
+            key: Name of the computation, one running at a time
+            args: Hashable parameters that identify the result
+            fn: Callable(db) computing the result on the worker
+            callback: Callable(result) run on the Tk thread
+            on_progress: Callable(done, total, partial) run on the Tk thread
+            on_error: Callable(exception) for errors raised by fn
+            refresh: Compute even if a recent result exists
+
+        Returns:
+            The queued QueryJob, or None if a recent result was used
+
+        Example:
+            >>> self.engine.run_stats(self, "stats_tat", (date_from, date_to),
+            ...                       lambda db: db.get_tat_statistics(date_from, date_to),
+            ...                       self.show_data, on_progress=self.on_progress)
+        """
+        entry = (key, args)
+
+        if not refresh and entry in self._stats:
+            result, taken = self._stats[entry]
+            if time.monotonic() - taken < STATS_TTL:
+                self._stats.move_to_end(entry)
+                self.cancel_async(key)
+                callback(result)
+                return None
+            del self._stats[entry]
+
+        generation = self._stats_generation
+
+        def on_result(result):
+            if result is not None and generation == self._stats_generation:
+                self._stats[entry] = (result, time.monotonic())
+                self._stats.move_to_end(entry)
+                while len(self._stats) > STATS_CACHE_SIZE:
+                    self._stats.popitem(last=False)
+            callback(result)
+
+        return self.run_async(caller, fn, on_result, key, on_error, on_progress)
+
+    def invalidate_stats(self):
+        """Drop the statistics results kept by run_stats."""
+        self._stats.clear()
+        self._stats_generation += 1
+
+    def get_dashboard(self, caller, callback, refresh=False):
+        """
+        Pass the dashboard snapshot (Controller.dashboard_snapshot) to callback.
+
+        A snapshot younger than DASHBOARD_TTL seconds is handed over at
+        once without touching the database; otherwise it is queried on
+        the background thread. A snapshot whose query started before an
+        invalidate_dashboard() is shown but not kept.
+
+        Args:
+            caller: Window waiting for the snapshot
+            callback: Callable(snapshot) run on the Tk thread; the
+                      snapshot is None on error
+            refresh: Query even if the cached snapshot is still valid
+
+        Returns:
+            The queued QueryJob, or None if the cached snapshot was used
+        """
+        if (not refresh and self._dashboard is not None
+                and time.monotonic() - self._dashboard_at < DASHBOARD_TTL):
+            callback(self._dashboard)
+            return None
+
+        generation = self._dashboard_generation
+
+        def on_snapshot(snapshot):
+            if snapshot is not None and generation == self._dashboard_generation:
+                self._dashboard = snapshot
+                self._dashboard_at = time.monotonic()
+            callback(snapshot)
+
+        return self.run_async(caller, lambda db: db.dashboard_snapshot(), on_snapshot,
+                              key="stats_dashboard")
+
+    def invalidate_dashboard(self):
+        """Drop the cached dashboard snapshot."""
+        self._dashboard = None
+        self._dashboard_generation += 1
+
+    def get_cube(self, caller, callback, on_progress=None, on_error=None):
+        """
+        Pass the in-memory movement cube (cube.MovementCube) to callback.
+
+        The worker checks PRAGMA data_version and reloads the facts only
+        if the database was committed to since the cube was loaded; the
+        filters and group-bys are then answered without queries.
+
+        Args:
+            caller: Window waiting for the cube
+            callback: Callable(cube) run on the Tk thread
+            on_progress: Callable(done, total, partial) for the loading
+            on_error: Callable(exception) for errors while loading
+        """
+        cube = self._cube
+
+        def fetch(db):
+            if cube is not None and cube.is_current(db):
+                return cube
+            return MovementCube.load(db, db.progress if on_progress else None)
+
+        def on_cube(new_cube):
+            self._cube = new_cube
+            callback(new_cube)
+
+        return self.run_async(caller, fetch, on_cube, f"{caller}.cube", on_error, on_progress)
+
+    def get_catalog(self):
+        """
+        The in-memory catalog search index (catalog.CatalogIndex).
+
+        Loaded on first use, then kept up to date by notify() on
+        package_changed, product_changed and supplier_changed.
+        """
+        if self._catalog is None:
+            self._catalog = CatalogIndex.load(self)
+        return self._catalog
+
+    def start_change_feed(self, widget):
+        """
+        Publish on the event bus the changes committed by the other workstations.
+
+        change_log is polled from the Tk event loop of widget every
+        change_feed_ms (config.ini); see change_feed.ChangeFeed.
+
+        Returns:
+            True if started (off in config.ini, or database without
+            change_log: False)
+        """
+        poll_ms = self.get_change_feed_ms()
+        if poll_ms <= 0 or self._feed is not None:
+            return False
+
+        feed = ChangeFeed(self, poll_ms)
+        if not feed.start(widget):
+            return False
+        self._feed = feed
+        return True
+
+    def close(self):
+        """Stop the background query thread and close the database connection."""
+        if self._feed is not None:
+            self._feed.stop()
+            self._feed = None
+        if getattr(self, "_executor", None) is not None:
+            self._executor.stop()
+            self._executor = None
+        super().close()
+
     def busy(self, caller):
         """Set busy cursor on widget."""
         caller.config(cursor="watch")
@@ -395,13 +889,109 @@ class Engine(DBMS, Controller, Tools, Launcher, metaclass=_EngineMeta):
         return self.entry_width
 
     def get_tick(self) -> int:
-        """Return current timestamp in microseconds."""
-        return int(time.time() * 1e6)
+        """
+        Return current timestamp in microseconds.
+
+        Ticks are barcodes and labels.tick is unique, so the value is kept
+        strictly increasing: on Windows time.time() only advances every
+        few milliseconds and a loop of load_label() would repeat it.
+        """
+        tick = int(time.time() * 1e6)
+        last = getattr(self, "_last_tick", 0)
+        if tick <= last:
+            tick = last + 1
+        self._last_tick = tick
+        return tick
+
+    def get_ticks(self, count: int) -> List[int]:
+        """Reserve count consecutive ticks for a batch of new labels."""
+        first = self.get_tick()
+        self._last_tick = first + count - 1
+        return list(range(first, first + count))
 
     def _get_config_path(self) -> str:
         """Return full path to config.ini."""
         return self.get_file("config.ini")
 
+    def get_db_profile(self) -> str:
+        """Get the connection tuning preset ("local" or "network") for this workstation."""
+        config_path = self._get_config_path()
+
+        if not os.path.exists(config_path):
+            return DEFAULT_DB_PROFILE
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+
+        profile = config.get("database", "profile", fallback=DEFAULT_DB_PROFILE).strip().lower()
+        return profile if profile in DB_PROFILES else DEFAULT_DB_PROFILE
+
+    def get_db_pragmas(self) -> Dict[str, Any]:
+        """
+        Return the tuning PRAGMAs from the [database] section of config.ini.
+
+        The preset named by "profile" is the base; busy_timeout, cache_size,
+        mmap_size, temp_store and journal_mode in the same section override
+        single values.
+        """
+        pragmas = dict(DB_PROFILES[self.get_db_profile()])
+        config_path = self._get_config_path()
+
+        if not os.path.exists(config_path):
+            return pragmas
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+
+        for name in pragmas:
+            value = config.get("database", name, fallback="").strip()
+            if value:
+                pragmas[name] = value
+
+        return pragmas
+
+    def get_profiling(self) -> tuple:
+        """
+        Get query timing settings from the [database] section of config.ini.
+
+        Returns:
+            (enabled, slow_query_ms); timing is off by default
+        """
+        config_path = self._get_config_path()
+
+        if not os.path.exists(config_path):
+            return False, self.slow_query_ms
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+
+        try:
+            enabled = config.getboolean("database", "profiling", fallback=False)
+            slow_ms = config.getint("database", "slow_query_ms", fallback=self.slow_query_ms)
+            return enabled, slow_ms
+        except ValueError:
+            return False, self.slow_query_ms
+
+    def get_change_feed_ms(self) -> int:
+        """
+        Get the change feed poll interval from the [database] section of config.ini.
+
+        Returns:
+            Milliseconds between two polls, 0 if the feed is off
+        """
+        config_path = self._get_config_path()
+
+        if not os.path.exists(config_path):
+            return POLL_MS
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+
+        try:
+            return config.getint("database", "change_feed_ms", fallback=POLL_MS)
+        except ValueError:
+            return POLL_MS
+
     def is_printer_enabled(self) -> bool:
         """Check if label printing is enabled on this workstation."""
         config_path = self._get_config_path()
@@ -481,6 +1071,12 @@ def main():
     print(engine)
     print()
 
+    print(f"=== PRAGMAs (profile: {engine.get_db_profile()}) ===")
+    for name, value in engine.get_effective_pragmas().items():
+        print(f"  {name} = {value}")
+
+    print()
+
     print("=== Stock ===")
     stock = engine.get_stock()
     for item in stock[:5]:
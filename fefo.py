@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+FEFO Analysis - First Expired First Out compliance for Inventarium.
+
+An unload is a FEFO violation when, at that moment, the same package had
+in stock a label of a batch expiring earlier. For each package the
+load/unload events of its labels are sorted by date and swept once,
+keeping the expirations in stock in a min-heap: the cost is
+O(n log n) in the labels of the package instead of one correlated
+EXISTS per unloaded label.
+
+Labels are streamed from the database ordered by package, so memory
+holds one package at a time.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import heapq
+from itertools import groupby
+
+# Labels that went through the warehouse (cancelled ones are excluded),
+# grouped by package for the sweep
+SQL_FEFO_LABELS = """
+    SELECT
+        b.package_id,
+        b.expiration,
+        lb.loaded,
+        lb.unloaded,
+        lb.status
+    FROM labels lb
+    JOIN batches b ON b.batch_id = lb.batch_id
+    WHERE lb.status IN (0, 1)
+    ORDER BY b.package_id
+"""
+
+# Description, category and supplier of every package
+SQL_FEFO_PACKAGES = """
+    SELECT
+        pk.package_id,
+        p.description AS product,
+        c.description AS category,
+        s.description AS supplier
+    FROM packages pk
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN categories c ON c.category_id = pk.category_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+"""
+
+# Event kinds: on the same date loads come before unloads
+LOAD = 0
+UNLOAD = 1
+
+
+def count_violations(labels):
+    """
+    Sweep the labels of one package and count the FEFO violations.
+
+    Args:
+        labels: Iterable of dicts with expiration, loaded, unloaded, status
+
+    Returns:
+        (unloaded, violations) tuple
+    """
+    events = []
+    for label in labels:
+        expiration = label["expiration"]
+        loaded = label["loaded"] or ""
+        events.append((loaded, LOAD, expiration or ""))
+        if label["status"] == 0 and label["unloaded"]:
+            events.append((label["unloaded"], UNLOAD, expiration or ""))
+
+    # Same-day unloads in expiration order: unloading an old and a new
+    # label on the same day is not a violation
+    events.sort()
+
+    in_stock = []
+    removed = {}
+    unloaded = 0
+    violations = 0
+
+    for _date, kind, expiration in events:
+        if kind == LOAD:
+            # Labels without expiration never expire "earlier"
+            if expiration:
+                heapq.heappush(in_stock, expiration)
+            continue
+
+        unloaded += 1
+        if not expiration:
+            continue
+
+        # Lazy removal of the unloaded label from the heap
+        removed[expiration] = removed.get(expiration, 0) + 1
+        while in_stock and removed.get(in_stock[0], 0):
+            removed[in_stock[0]] -= 1
+            heapq.heappop(in_stock)
+
+        if in_stock and in_stock[0] < expiration:
+            violations += 1
+
+    return unloaded, violations
+
+
+def _summary(key, unloaded, violations):
+    """Build a result record with the efficiency percentage."""
+    correct = unloaded - violations
+    return {
+        "key": key,
+        "unloaded": unloaded,
+        "violations": violations,
+        "correct": correct,
+        "fefo_pct": round(correct / unloaded * 100, 1) if unloaded > 0 else 100,
+    }
+
+
+def analyse_fefo(db, min_unloaded=2):
+    """
+    Compute FEFO compliance per package, category and supplier.
+
+    Args:
+        db: DBMS instance (stream() and read())
+        min_unloaded: Skip packages with fewer unloaded labels
+
+    Returns:
+        Dict with "packages", "categories" and "suppliers": lists of
+        records (key, unloaded, violations, correct, fefo_pct), worst
+        efficiency first; package records also carry package_id,
+        category and supplier
+    """
+    packages = {row["package_id"]: row for row in db.read(True, SQL_FEFO_PACKAGES) or []}
+
+    by_package = []
+    by_category = {}
+    by_supplier = {}
+
+    for package_id, labels in groupby(db.stream(SQL_FEFO_LABELS), key=lambda row: row["package_id"]):
+        unloaded, violations = count_violations(labels)
+        if unloaded < min_unloaded:
+            continue
+
+        info = packages.get(package_id, {})
+        category = info.get("category") or ""
+        supplier = info.get("supplier") or ""
+
+        record = _summary(info.get("product") or str(package_id), unloaded, violations)
+        record.update(package_id=package_id, category=category, supplier=supplier)
+        by_package.append(record)
+
+        for totals, key in ((by_category, category), (by_supplier, supplier)):
+            counts = totals.setdefault(key, [0, 0])
+            counts[0] += unloaded
+            counts[1] += violations
+
+    def ranked(records):
+        return sorted(records, key=lambda r: (r["fefo_pct"], -r["unloaded"], r["key"]))
+
+    return {
+        "packages": ranked(by_package),
+        "categories": ranked(_summary(k, *v) for k, v in by_category.items()),
+        "suppliers": ranked(_summary(k, *v) for k, v in by_supplier.items()),
+    }
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Reorder Forecast - Demand-driven reorder points for Inventarium.
+
+For every active package, in one batched pass (three grouped queries):
+
+    demand      daily unloads over the history window, from
+                label_movements_daily: mean and standard deviation per
+                day, days without movements counted as zero
+    lead time   delivered - issued of the deliveries in the same window,
+                as in stats_tat; the supplier average is used for
+                packages never delivered, DEFAULT_LEAD_TIME without one
+    position    labels in stock plus labels still on order in open
+                requests
+
+    reorder point   = demand x lead time + safety stock
+    safety stock    = z x sqrt(lead time x sd_demand^2 + demand^2 x sd_lead^2)
+    suggested order = reorder point + demand x cover days - position,
+                      rounded up to whole order units
+
+Quantities are in labels up to the order, which is converted to the
+order unit of the package (labels_per_unit, pieces_per_label) as the
+delivery dialog does in reverse.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import datetime
+import math
+
+# Lead time (days) for packages of suppliers that never delivered
+DEFAULT_LEAD_TIME = 14
+
+# Daily unloads per package: sum and sum of squares of the daily counts
+SQL_DEMAND = """
+    SELECT
+        package_id,
+        SUM(unloaded_count) AS demand,
+        SUM(unloaded_count * unloaded_count) AS demand_sq
+    FROM label_movements_daily
+    WHERE day >= ? AND day <= ?
+    GROUP BY package_id
+"""
+
+# Delivery lead times per package: count, sum and sum of squares
+SQL_LEAD_TIMES = """
+    SELECT
+        i.package_id,
+        COUNT(*) AS deliveries,
+        SUM(julianday(d.delivered) - julianday(r.issued)) AS lead,
+        SUM((julianday(d.delivered) - julianday(r.issued))
+            * (julianday(d.delivered) - julianday(r.issued))) AS lead_sq
+    FROM deliveries d
+    JOIN items i ON i.item_id = d.item_id
+    JOIN requests r ON r.request_id = i.request_id
+    WHERE d.status = 1 AND d.delivered >= ? AND d.delivered <= ?
+    GROUP BY i.package_id
+"""
+
+# Active packages with stock and quantity still on order (draft or sent requests)
+SQL_POSITION = """
+    WITH delivered AS (
+        SELECT item_id, SUM(quantity) AS quantity
+        FROM deliveries
+        WHERE status = 1
+        GROUP BY item_id
+    ),
+    on_order AS (
+        SELECT i.package_id, SUM(MAX(i.quantity - COALESCE(dl.quantity, 0), 0)) AS quantity
+        FROM items i
+        JOIN requests r ON r.request_id = i.request_id AND r.status IN (1, 2)
+        LEFT JOIN delivered dl ON dl.item_id = i.item_id
+        WHERE i.status = 1
+        GROUP BY i.package_id
+    )
+    SELECT
+        pk.package_id,
+        p.description AS product,
+        pk.supplier_id,
+        s.description AS supplier,
+        pk.reorder,
+        COALESCE(pk.labels_per_unit, 1) AS labels_per_unit,
+        COALESCE(pk.pieces_per_label, 1) AS pieces_per_label,
+        COALESCE(ps.in_stock, 0) AS in_stock,
+        COALESCE(oo.quantity, 0) AS on_order
+    FROM packages pk
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+    LEFT JOIN package_stock ps ON ps.package_id = pk.package_id
+    LEFT JOIN on_order oo ON oo.package_id = pk.package_id
+    WHERE pk.status = 1 AND p.status = 1
+"""
+
+
+def _mean_sd(n, total, total_sq):
+    """Mean and sample standard deviation from count, sum and sum of squares."""
+    if n <= 0:
+        return 0.0, 0.0
+    mean = total / n
+    if n < 2:
+        return mean, 0.0
+    variance = max(total_sq - n * mean * mean, 0.0) / (n - 1)
+    return mean, math.sqrt(variance)
+
+
+def _z_score(p):
+    """
+    Standard normal quantile of p (as NormalDist().inv_cdf, which needs Python 3.8).
+
+    Bisection on the CDF built on math.erf, to about 1e-12.
+    """
+    if not 0 < p < 1:
+        raise ValueError(f"Probability out of range: {p}")
+    lo, hi = -40.0, 40.0
+    while hi - lo > 1e-12:
+        mid = (lo + hi) / 2
+        if 0.5 * (1 + math.erf(mid / math.sqrt(2))) < p:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def labels_to_quantity(labels, labels_per_unit, pieces_per_label):
+    """Order quantity giving at least the given labels (inverse of the delivery dialog)."""
+    labels_per_unit = labels_per_unit or 1
+    pieces_per_label = pieces_per_label or 1
+    quantity = math.ceil(labels * pieces_per_label / labels_per_unit)
+    # Deliveries must be multiples of pieces_per_label
+    return math.ceil(quantity / pieces_per_label) * pieces_per_label
+
+
+def quantity_to_labels(quantity, labels_per_unit, pieces_per_label):
+    """Labels created by delivering a quantity (as the delivery dialog)."""
+    return (quantity * (labels_per_unit or 1)) // (pieces_per_label or 1)
+
+
+def suggest_reorders(db, history_days=180, service_level=0.95, cover_days=30, today=None,
+                     progress=None):
+    """
+    Compute demand, lead time and reorder point of every active package.
+
+    Args:
+        db: DBMS instance (read())
+        history_days: Days of unloads and deliveries used as history
+        service_level: Probability of not running out during the lead time
+        cover_days: Demand covered by an order beyond the reorder point
+        today: Last day of the history (default: today)
+        progress: Optional Callable(done, total) called after each query
+                  (e.g. the worker's db.progress)
+
+    Returns:
+        List of records (package_id, product, supplier, in_stock,
+        on_order, demand, demand_sd, lead_time, lead_time_sd,
+        reorder_point, order_labels, order_quantity, reorder, below),
+        packages to reorder first, most urgent (least days of stock)
+        first; order_* are 0 when no order is needed
+    """
+    today = today or datetime.date.today()
+    date_from = (today - datetime.timedelta(days=history_days - 1)).isoformat()
+    date_to = today.isoformat()
+    z = _z_score(service_level)
+
+    demand = {row["package_id"]: row for row in db.read(True, SQL_DEMAND, (date_from, date_to)) or []}
+    if progress:
+        progress(1, 3)
+    leads = {row["package_id"]: row for row in db.read(True, SQL_LEAD_TIMES, (date_from, date_to)) or []}
+    if progress:
+        progress(2, 3)
+    packages = db.read(True, SQL_POSITION) or []
+
+    # Supplier lead times from the package sums, for packages never delivered
+    by_supplier = {}
+    for row in packages:
+        lead = leads.get(row["package_id"])
+        if lead:
+            sums = by_supplier.setdefault(row["supplier_id"], [0, 0.0, 0.0])
+            sums[0] += lead["deliveries"]
+            sums[1] += lead["lead"]
+            sums[2] += lead["lead_sq"]
+
+    results = []
+    for row in packages:
+        d = demand.get(row["package_id"])
+        rate, rate_sd = _mean_sd(history_days, d["demand"], d["demand_sq"]) if d else (0.0, 0.0)
+
+        lead = leads.get(row["package_id"])
+        if lead:
+            lead_time, lead_sd = _mean_sd(lead["deliveries"], lead["lead"], lead["lead_sq"])
+        elif row["supplier_id"] in by_supplier:
+            lead_time, lead_sd = _mean_sd(*by_supplier[row["supplier_id"]])
+        else:
+            lead_time, lead_sd = float(DEFAULT_LEAD_TIME), 0.0
+
+        safety = z * math.sqrt(lead_time * rate_sd ** 2 + rate ** 2 * lead_sd ** 2)
+        reorder_point = math.ceil(rate * lead_time + safety)
+
+        on_order = quantity_to_labels(row["on_order"], row["labels_per_unit"], row["pieces_per_label"])
+        position = row["in_stock"] + on_order
+
+        below = rate > 0 and position <= reorder_point
+        order_labels = math.ceil(reorder_point + rate * cover_days - position) if below else 0
+        order_labels = max(order_labels, 0)
+
+        results.append({
+            "package_id": row["package_id"],
+            "product": row["product"],
+            "supplier": row["supplier"] or "",
+            "in_stock": row["in_stock"],
+            "on_order": on_order,
+            "demand": rate,
+            "demand_sd": rate_sd,
+            "lead_time": lead_time,
+            "lead_time_sd": lead_sd,
+            "reorder_point": reorder_point,
+            "order_labels": order_labels,
+            "order_quantity": labels_to_quantity(order_labels, row["labels_per_unit"],
+                                                 row["pieces_per_label"]) if order_labels else 0,
+            "reorder": row["reorder"] or 0,
+            "below": below,
+        })
+
+    def urgency(r):
+        days_left = r["in_stock"] / r["demand"] if r["demand"] > 0 else math.inf
+        return (not r["below"], days_left, r["product"])
+
+    results.sort(key=urgency)
+    return results
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Dataset Generator - Synthetic Inventarium databases for benchmarks.
+
+Builds a new database from sql/schema.sql and fills it with a realistic,
+deterministic history: the same arguments (seed and end date included)
+always give the same rows.
+
+    suppliers, products, categories, locations, packages and prices
+    requests with their items, issued over the last --days days
+    deliveries of most items after a per-supplier lead time, one batch
+    each, labels loaded on delivery and unloaded after an exponential
+    residence (a few cancelled), the rest still in stock
+
+Package popularity and supplier share follow a Pareto distribution, so
+a few packages account for most of the movements as in a real lab.
+
+For speed the triggers and indexes of the schema are dropped during the
+bulk load and recreated afterwards; the counter tables (package_stock,
+batch_stock, label_movements_daily) are then rebuilt with the Controller
+methods used by Database > Check Stock Counters.
+
+Usage:
+    python3 generate_dataset.py /tmp/bench.db --packages 5000 --labels 2000000 --deliveries 50000
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import argparse
+import datetime
+import itertools
+import os
+import random
+import sys
+import time
+
+from dbms import DBMS
+from controller import Controller
+from forecast import labels_to_quantity, quantity_to_labels
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "schema.sql")
+
+# First barcode tick of the generated labels (ticks are microsecond timestamps)
+TICK_BASE = 1_700_000_000_000_000
+
+CATEGORIES = [
+    (1, 1, "Reagents"),
+    (2, 1, "Standards & Controls"),
+    (3, 1, "Solvents"),
+    (4, 2, "Equipment"),
+    (5, 2, "Consumables"),
+]
+
+CONSERVATIONS = [
+    (1, "Room temperature (15-25°C)"),
+    (2, "Refrigerated (2-8°C)"),
+    (3, "Frozen (-20°C)"),
+    (4, "Not specified"),
+]
+
+PACKAGINGS = ("1 x 100 ml", "10 x 5 ml", "1 x 500 g", "Kit 96 tests", "Box 100 pcs", "1 x 1 L")
+
+
+class _GeneratorDB(DBMS, Controller):
+    """DBMS with the Controller rebuild methods, as the background worker."""
+
+
+def _day(date):
+    return date.isoformat()
+
+
+class Generator:
+    """
+    Deterministic synthetic dataset.
+
+    Usage:
+        >>> counts = Generator(packages=500, labels=50000, deliveries=5000).build("/tmp/small.db")
+    """
+
+    def __init__(self, packages=5000, labels=2000000, deliveries=50000,
+                 days=730, seed=1, end=None, verbose=False):
+        """
+        Args:
+            packages: Number of packages
+            labels: Approximate number of labels
+            deliveries: Approximate number of deliveries (one batch each)
+            days: Length of the history, ending at end
+            seed: Random seed
+            end: Last day of the history (datetime.date, default today)
+            verbose: Print the progress of each step
+        """
+        self.packages = max(1, packages)
+        self.labels = max(1, labels)
+        self.deliveries = max(1, deliveries)
+        self.days = max(1, days)
+        self.seed = seed
+        self.end = end or datetime.date.today()
+        self.start = self.end - datetime.timedelta(days=self.days - 1)
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+
+    def log(self, text):
+        if self.verbose:
+            print(text, flush=True)
+
+    def build(self, path):
+        """
+        Create the database at path (which must not exist).
+
+        Returns:
+            Dict table -> rows
+        """
+        if os.path.exists(path):
+            raise FileExistsError(path)
+
+        started = time.perf_counter()
+        db = _GeneratorDB(database=path)
+        try:
+            with open(SCHEMA, encoding="utf-8") as f:
+                db.con.executescript(f.read())
+
+            saved = self._drop_triggers_and_indexes(db)
+
+            with db.transaction():
+                self._lookups(db)
+                self._packages(db)
+                self._history(db)
+
+            self.log("recreating indexes and triggers")
+            with db.transaction():
+                for sql in saved:
+                    db.write(sql)
+
+            self.log("rebuilding counters")
+            if not db.rebuild_stock_counters() or not db.rebuild_label_movements():
+                raise RuntimeError("Cannot rebuild the counter tables")
+
+            counts = {}
+            for table in ("suppliers", "products", "packages", "requests", "items",
+                          "deliveries", "batches", "labels", "label_movements_daily"):
+                counts[table] = db.read(False, f"SELECT COUNT(*) AS n FROM {table}")["n"]
+        finally:
+            db.close()
+
+        self.log(f"done in {time.perf_counter() - started:.1f} s")
+        return counts
+
+    def _drop_triggers_and_indexes(self, db):
+        """Drop the schema triggers and indexes, returning their CREATE statements."""
+        rs = db.read(True, """SELECT type, name, sql FROM sqlite_master
+                              WHERE type IN ('trigger', 'index') AND sql IS NOT NULL
+                              ORDER BY type DESC, name""") or []
+        for row in rs:
+            db.write(f"DROP {row['type'].upper()} {row['name']}")
+        # Indexes first, then triggers
+        return [row["sql"] for row in rs]
+
+    def _lookups(self, db):
+        rng = self.rng
+        self.log("lookups")
+
+        db.write_many("INSERT INTO categories (category_id, reference_id, description, status) VALUES (?, ?, ?, 1)",
+                      CATEGORIES)
+        db.write_many("INSERT INTO conservations (conservation_id, description, status) VALUES (?, ?, 1)",
+                      CONSERVATIONS)
+
+        self.location_ids = list(range(1, 21))
+        db.write_many(
+            "INSERT INTO locations (location_id, category_id, code, room, description, conservation_id, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, 1)",
+            [(i, rng.randint(1, len(CATEGORIES)), f"L{i:03d}", f"Room {i % 5 + 1}",
+              f"Location {i:03d}", rng.randint(1, len(CONSERVATIONS))) for i in self.location_ids]
+        )
+
+        suppliers = max(5, self.packages // 100)
+        self.supplier_ids = list(range(1, suppliers + 1))
+        # Mean lead time (days) of each supplier
+        self.supplier_lead = {i: rng.uniform(3, 20) for i in self.supplier_ids}
+        db.write_many("INSERT INTO suppliers (supplier_id, description, reference, status) VALUES (?, ?, ?, 1)",
+                      [(i, f"Supplier {i:04d}", f"SUP{i:04d}") for i in self.supplier_ids])
+
+        self.products = max(1, int(self.packages * 0.8))
+        db.write_many("INSERT INTO products (product_id, reference, description, status) VALUES (?, ?, ?, ?)",
+                      [(i, f"P{i:06d}", f"Product {i:06d}", 0 if rng.random() < 0.02 else 1)
+                       for i in range(1, self.products + 1)])
+
+    def _packages(self, db):
+        rng = self.rng
+        self.log("packages")
+
+        supplier_weights = list(itertools.accumulate(rng.paretovariate(1.5) for _ in self.supplier_ids))
+
+        self.package_info = {}
+        rows = []
+        prices = []
+        for package_id in range(1, self.packages + 1):
+            product_id = package_id if package_id <= self.products else rng.randint(1, self.products)
+            supplier_id = rng.choices(self.supplier_ids, cum_weights=supplier_weights)[0]
+            pieces_per_label = rng.choice((1, 1, 1, 1, 1, 1, 1, 1, 2, 5))
+            labels_per_unit = rng.choice((1, 1, 1, 1, 1, 1, 1, 2, 10))
+            status = 0 if rng.random() < 0.03 else 1
+
+            self.package_info[package_id] = (supplier_id, pieces_per_label, labels_per_unit)
+            rows.append((
+                package_id, product_id, supplier_id, f"REF-{package_id:06d}", 1,
+                rng.choice(PACKAGINGS), rng.randint(1, len(CONSERVATIONS)), rng.randint(1, len(CATEGORIES)),
+                rng.choice(self.location_ids), status, pieces_per_label, labels_per_unit,
+                rng.choice((0, 0, 2, 5, 10)),
+            ))
+            prices.append((package_id, supplier_id, round(rng.uniform(5, 900), 2), _day(self.start)))
+
+        db.write_many(
+            "INSERT INTO packages (package_id, product_id, supplier_id, reference, labels, packaging, "
+            "conservation_id, category_id, location_id, status, pieces_per_label, labels_per_unit, reorder) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        db.write_many("INSERT INTO prices (package_id, supplier_id, price, vat, valid_from, status) "
+                      "VALUES (?, ?, ?, 22, ?, 1)", prices)
+
+        self.package_ids = list(self.package_info)
+        self.package_weights = list(itertools.accumulate(rng.paretovariate(1.2) for _ in self.package_ids))
+
+    def _history(self, db):
+        """Requests, items, deliveries, batches and labels, in issue order."""
+        rng = self.rng
+        end = self.end
+
+        items_total = int(self.deliveries * 1.08)
+        requests_total = max(1, items_total // 3)
+        labels_per_delivery = max(1.0, self.labels / self.deliveries)
+
+        # Issue dates in order, one request every few hours on average
+        issued = sorted(self.start + datetime.timedelta(days=rng.randrange(self.days))
+                        for _ in range(requests_total))
+        request_items = [[] for _ in range(requests_total)]
+        for _ in range(items_total):
+            request_items[rng.randrange(requests_total)].append(
+                rng.choices(self.package_ids, cum_weights=self.package_weights)[0])
+
+        self.log(f"history: {requests_total} requests, {items_total} items")
+
+        requests, items, deliveries, batches = [], [], [], []
+        item_id = delivery_id = 0
+        # Labels are generated lazily from the deliveries
+        self._label_specs = []
+
+        for index, packages in enumerate(request_items):
+            request_id = index + 1
+            day = issued[index]
+            delivered_all = True
+            delivered_any = False
+
+            for package_id in packages:
+                item_id += 1
+                supplier_id, pieces_per_label, labels_per_unit = self.package_info[package_id]
+
+                labels = max(1, int(rng.expovariate(1 / labels_per_delivery) + 0.5))
+                quantity = labels_to_quantity(labels, labels_per_unit, pieces_per_label)
+                items.append((item_id, request_id, package_id, quantity))
+
+                lead = self.supplier_lead[supplier_id] + rng.expovariate(1 / 3)
+                delivered = day + datetime.timedelta(days=int(lead))
+                if delivered > end or rng.random() < 0.02:
+                    delivered_all = False
+                    continue
+
+                delivered_any = True
+                delivery_id += 1
+                deliveries.append((delivery_id, item_id, package_id, f"DDT{delivery_id:07d}",
+                                   _day(delivered), quantity))
+                expiration = delivered + datetime.timedelta(days=rng.randint(60, 900))
+                batches.append((delivery_id, package_id, f"LOT{delivery_id:07d}", _day(expiration)))
+                self._label_specs.append((delivery_id, delivered,
+                                          quantity_to_labels(quantity, labels_per_unit, pieces_per_label)))
+
+            # Closed once delivered (or old), recent undelivered ones partly still drafts
+            age = (end - day).days
+            if delivered_all and packages or age > 120:
+                status = 0
+            elif age <= 7 and not delivered_any and rng.random() < 0.5:
+                status = 1
+            else:
+                status = 2
+            requests.append((request_id, f"R{request_id:07d}", _day(day), status))
+
+        db.write_many("INSERT INTO requests (request_id, reference, issued, status) VALUES (?, ?, ?, ?)", requests)
+        db.write_many("INSERT INTO items (item_id, request_id, package_id, quantity, status) "
+                      "VALUES (?, ?, ?, ?, 1)", items)
+        db.write_many("INSERT INTO deliveries (delivery_id, item_id, package_id, ddt, delivered, quantity, status) "
+                      "VALUES (?, ?, ?, ?, ?, ?, 1)", deliveries)
+        db.write_many("INSERT INTO batches (batch_id, package_id, description, expiration, status) "
+                      "VALUES (?, ?, ?, ?, 1)", batches)
+
+        self.log(f"labels: ~{sum(spec[2] for spec in self._label_specs)}")
+        db.write_many("INSERT INTO labels (label_id, batch_id, loaded, unloaded, status, tick) "
+                      "VALUES (?, ?, ?, ?, ?, ?)", self._labels())
+
+    def _labels(self):
+        """Yield the label rows: unloaded after an exponential residence, a few cancelled."""
+        rng = self.rng
+        end = self.end
+        label_id = 0
+
+        for batch_id, loaded, count in self._label_specs:
+            # Slow and fast movers: mean residence between 10 and 120 days
+            mean = rng.uniform(10, 120)
+            for _ in range(count):
+                label_id += 1
+                tick = TICK_BASE + label_id
+                if rng.random() < 0.01:
+                    yield (label_id, batch_id, _day(loaded), None, -1, tick)
+                    continue
+
+                unloaded = loaded + datetime.timedelta(days=int(rng.expovariate(1 / mean)))
+                if unloaded <= end:
+                    yield (label_id, batch_id, _day(loaded), _day(unloaded), 0, tick)
+                else:
+                    yield (label_id, batch_id, _day(loaded), None, 1, tick)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a synthetic Inventarium database.")
+    parser.add_argument("database", help="Path of the new database")
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--labels", type=int, default=2000000, help="Approximate number of labels")
+    parser.add_argument("--deliveries", type=int, default=50000, help="Approximate number of deliveries")
+    parser.add_argument("--days", type=int, default=730, help="Days of history")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None,
+                        help="Last day of the history, yyyy-mm-dd (default: today)")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing database")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.database):
+        if not args.force:
+            parser.error(f"{args.database} exists (use --force to overwrite)")
+        os.remove(args.database)
+
+    generator = Generator(args.packages, args.labels, args.deliveries, args.days,
+                          args.seed, args.end, verbose=True)
+    counts = generator.build(args.database)
+
+    for table, rows in counts.items():
+        print(f"{table:<24}{rows:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,6 +43,38 @@ TRANSLATIONS = {
     "After": {"it": "Dopo", "en": "After", "es": "Después", "de": "Nachher", "fr": "Après"},
     "Saved": {"it": "Risparmiato", "en": "Saved", "es": "Ahorrado", "de": "Gespart", "fr": "Économisé"},
     "Error during compaction": {"it": "Errore durante la compattazione", "en": "Error during compaction", "es": "Error durante la compactación", "de": "Fehler beim Komprimieren", "fr": "Erreur lors du compactage"},
+    "Check Stock Counters": {"it": "Verifica Contatori Giacenze", "en": "Check Stock Counters", "es": "Verificar Contadores de Existencias", "de": "Bestandszähler prüfen", "fr": "Vérifier les compteurs de stock"},
+    "Stock counters are consistent.": {"it": "I contatori delle giacenze sono coerenti.", "en": "Stock counters are consistent.", "es": "Los contadores de existencias son coherentes.", "de": "Die Bestandszähler sind konsistent.", "fr": "Les compteurs de stock sont cohérents."},
+    "stock counters do not match the labels.": {"it": "contatori delle giacenze non corrispondono alle etichette.", "en": "stock counters do not match the labels.", "es": "contadores de existencias no coinciden con las etiquetas.", "de": "Bestandszähler stimmen nicht mit den Etiketten überein.", "fr": "compteurs de stock ne correspondent pas aux étiquettes."},
+    "Rebuild them now?": {"it": "Ricostruirli ora?", "en": "Rebuild them now?", "es": "¿Reconstruirlos ahora?", "de": "Jetzt neu aufbauen?", "fr": "Les reconstruire maintenant ?"},
+    "Connection Tuning": {"it": "Parametri Connessione", "en": "Connection Tuning", "es": "Parámetros de Conexión", "de": "Verbindungsparameter", "fr": "Paramètres de connexion"},
+    "Profile": {"it": "Profilo", "en": "Profile", "es": "Perfil", "de": "Profil", "fr": "Profil"},
+    "Lock Contention": {"it": "Contesa Lock", "en": "Lock Contention", "es": "Contención de Bloqueos", "de": "Sperrkonflikte", "fr": "Contention des verrous"},
+    "Reads": {"it": "Letture", "en": "Reads", "es": "Lecturas", "de": "Lesevorgänge", "fr": "Lectures"},
+    "Writes": {"it": "Scritture", "en": "Writes", "es": "Escrituras", "de": "Schreibvorgänge", "fr": "Écritures"},
+    "Statements": {"it": "Istruzioni", "en": "Statements", "es": "Sentencias", "de": "Anweisungen", "fr": "Instructions"},
+    "Waited": {"it": "In attesa", "en": "Waited", "es": "En espera", "de": "Gewartet", "fr": "En attente"},
+    "Retries": {"it": "Tentativi", "en": "Retries", "es": "Reintentos", "de": "Wiederholungen", "fr": "Tentatives"},
+    "Failed": {"it": "Falliti", "en": "Failed", "es": "Fallidos", "de": "Fehlgeschlagen", "fr": "Échoués"},
+    "Total wait": {"it": "Attesa totale", "en": "Total wait", "es": "Espera total", "de": "Gesamtwartezeit", "fr": "Attente totale"},
+    "Max wait": {"it": "Attesa massima", "en": "Max wait", "es": "Espera máxima", "de": "Maximale Wartezeit", "fr": "Attente maximale"},
+    "Query Statistics": {"it": "Statistiche Query", "en": "Query Statistics", "es": "Estadísticas de Consultas", "de": "Abfragestatistik", "fr": "Statistiques des requêtes"},
+    "Enable query timing": {"it": "Misura tempi query", "en": "Enable query timing", "es": "Medir tiempos de consulta", "de": "Abfragezeiten messen", "fr": "Mesurer le temps des requêtes"},
+    "Slow query threshold:": {"it": "Soglia query lente:", "en": "Slow query threshold:", "es": "Umbral de consultas lentas:", "de": "Schwelle langsame Abfragen:", "fr": "Seuil des requêtes lentes :"},
+    "Calls": {"it": "Chiamate", "en": "Calls", "es": "Llamadas", "de": "Aufrufe", "fr": "Appels"},
+    "Total (ms)": {"it": "Totale (ms)", "en": "Total (ms)", "es": "Total (ms)", "de": "Gesamt (ms)", "fr": "Total (ms)"},
+    "Avg (ms)": {"it": "Media (ms)", "en": "Avg (ms)", "es": "Media (ms)", "de": "Mittel (ms)", "fr": "Moy. (ms)"},
+    "Max (ms)": {"it": "Max (ms)", "en": "Max (ms)", "es": "Máx (ms)", "de": "Max (ms)", "fr": "Max (ms)"},
+    "Caller": {"it": "Chiamante", "en": "Caller", "es": "Llamador", "de": "Aufrufer", "fr": "Appelant"},
+    "Reset": {"it": "Azzera", "en": "Reset", "es": "Restablecer", "de": "Zurücksetzen", "fr": "Réinitialiser"},
+    "Slow Query Log": {"it": "Log Query Lente", "en": "Slow Query Log", "es": "Registro de Consultas Lentas", "de": "Log langsamer Abfragen", "fr": "Journal des requêtes lentes"},
+    "Query cache": {"it": "Cache query", "en": "Query cache", "es": "Caché de consultas", "de": "Abfrage-Cache", "fr": "Cache des requêtes"},
+    "entries": {"it": "voci", "en": "entries", "es": "entradas", "de": "Einträge", "fr": "entrées"},
+    "hits": {"it": "successi", "en": "hits", "es": "aciertos", "de": "Treffer", "fr": "succès"},
+    "misses": {"it": "mancati", "en": "misses", "es": "fallos", "de": "Fehlgriffe", "fr": "échecs"},
+    "invalidated": {"it": "invalidate", "en": "invalidated", "es": "invalidadas", "de": "ungültig", "fr": "invalidées"},
+    "evicted": {"it": "rimosse", "en": "evicted", "es": "expulsadas", "de": "verdrängt", "fr": "évincées"},
+    "Stock counters rebuilt!": {"it": "Contatori delle giacenze ricostruiti!", "en": "Stock counters rebuilt!", "es": "¡Contadores de existencias reconstruidos!", "de": "Bestandszähler neu aufgebaut!", "fr": "Compteurs de stock reconstruits !"},
     "Database Configuration": {"it": "Configurazione Database", "en": "Database Configuration", "es": "Configuración de Base de Datos", "de": "Datenbankkonfiguration", "fr": "Configuration de la base de données"},
     "Configure Database Path": {"it": "Configura Percorso Database", "en": "Configure Database Path", "es": "Configurar Ruta de Base de Datos", "de": "Datenbankpfad konfigurieren", "fr": "Configurer le chemin de la base de données"},
     "Database path configuration.": {"it": "Configurazione del percorso database.", "en": "Database path configuration.", "es": "Configuración de la ruta de base de datos.", "de": "Datenbankpfad-Konfiguration.", "fr": "Configuration du chemin de la base de données."},
@@ -213,6 +245,7 @@ TRANSLATIONS = {
     "Product:": {"it": "Prodotto:", "en": "Product:", "es": "Producto:", "de": "Produkt:", "fr": "Produit :"},
     "Number of labels:": {"it": "Numero etichette:", "en": "Number of labels:", "es": "Número de etiquetas:", "de": "Anzahl Etiketten:", "fr": "Nombre d'étiquettes :"},
     "Enter a valid number of labels!": {"it": "Inserire un numero di etichette valido!", "en": "Enter a valid number of labels!", "es": "¡Ingrese un número de etiquetas válido!", "de": "Gültige Anzahl Etiketten eingeben!", "fr": "Entrez un nombre d'étiquettes valide !"},
+    "Error loading labels!": {"it": "Errore durante il caricamento delle etichette!", "en": "Error loading labels!", "es": "¡Error al cargar las etiquetas!", "de": "Fehler beim Laden der Etiketten!", "fr": "Erreur lors du chargement des étiquettes !"},
     "Caricare {} etichetta?": {"it": "Caricare {} etichetta?", "en": "Load {} label?", "es": "¿Cargar {} etiqueta?", "de": "{} Etikett laden?", "fr": "Charger {} étiquette ?"},
     "Caricare {} etichette?": {"it": "Caricare {} etichette?", "en": "Load {} labels?", "es": "¿Cargar {} etiquetas?", "de": "{} Etiketten laden?", "fr": "Charger {} étiquettes ?"},
 
@@ -541,6 +574,7 @@ TRANSLATIONS = {
     "already unloaded!": {"it": "già scaricata!", "en": "already unloaded!", "es": "¡ya descargada!", "de": "bereits entladen!", "fr": "déjà déchargée !"},
     "cancelled!": {"it": "annullata!", "en": "cancelled!", "es": "¡cancelada!", "de": "storniert!", "fr": "annulée !"},
     "Unloaded:": {"it": "Scaricata:", "en": "Unloaded:", "es": "Descargada:", "de": "Entladen:", "fr": "Déchargée :"},
+    "Updated:": {"it": "Aggiornato:", "en": "Updated:", "es": "Actualizado:", "de": "Aktualisiert:", "fr": "Mis à jour :"},
     "Error unloading!": {"it": "Errore nello scarico!", "en": "Error unloading!", "es": "¡Error al descargar!", "de": "Fehler beim Entladen!", "fr": "Erreur lors du déchargement !"},
     "Label unloaded:": {"it": "Etichetta scaricata:", "en": "Label unloaded:", "es": "Etiqueta descargada:", "de": "Etikett entladen:", "fr": "Étiquette déchargée :"},
     "Label not found!": {"it": "Etichetta non trovata!", "en": "Label not found!", "es": "¡Etiqueta no encontrada!", "de": "Etikett nicht gefunden!", "fr": "Étiquette non trouvée !"},
@@ -582,6 +616,7 @@ TRANSLATIONS = {
     "Used": {"it": "Usato", "en": "Used", "es": "Usado", "de": "Verwendet", "fr": "Utilisé"},
     "Loss %": {"it": "Perdita %", "en": "Loss %", "es": "Pérdida %", "de": "Verlust %", "fr": "Perte %"},
     "Unloaded Labels": {"it": "Etichette Scaricate", "en": "Unloaded Labels", "es": "Etiquetas Descargadas", "de": "Entladene Etiketten", "fr": "Étiquettes déchargées"},
+    "Group by:": {"it": "Raggruppa per:", "en": "Group by:", "es": "Agrupar por:", "de": "Gruppieren nach:", "fr": "Grouper par :"},
     "FEFO Correct": {"it": "FEFO Corrette", "en": "FEFO Correct", "es": "FEFO Correctas", "de": "FEFO korrekt", "fr": "FEFO Correct"},
     "Efficiency %": {"it": "Efficienza %", "en": "Efficiency %", "es": "Eficiencia %", "de": "Effizienz %", "fr": "Efficacité %"},
     "Expired batches with stock:": {"it": "Lotti scaduti con giacenza:", "en": "Expired batches with stock:", "es": "Lotes caducados con existencias:", "de": "Abgelaufene Chargen mit Bestand:", "fr": "Lots expirés avec stock :"},
@@ -600,6 +635,10 @@ TRANSLATIONS = {
     "Min (days)": {"it": "Min (gg)", "en": "Min (days)", "es": "Mín (días)", "de": "Min (Tage)", "fr": "Min (jours)"},
     "Max (days)": {"it": "Max (gg)", "en": "Max (days)", "es": "Máx (días)", "de": "Max (Tage)", "fr": "Max (jours)"},
     "Avg order TAT:": {"it": "TAT medio ordini:", "en": "Avg order TAT:", "es": "TAT promedio pedidos:", "de": "Durchschn. Bestell-TAT:", "fr": "TAT moyen commandes :"},
+    "Median order TAT:": {"it": "TAT mediano ordini:", "en": "Median order TAT:", "es": "TAT mediano pedidos:", "de": "Median Bestell-TAT:", "fr": "TAT médian commandes :"},
+    "Median stock TAT:": {"it": "TAT mediano giacenza:", "en": "Median stock TAT:", "es": "TAT mediano stock:", "de": "Median Lager-TAT:", "fr": "TAT médian stock :"},
+    "Median": {"it": "Mediana", "en": "Median", "es": "Mediana", "de": "Median", "fr": "Médiane"},
+    "Request → Delivery Time": {"it": "Tempo Richiesta → Consegna", "en": "Request → Delivery Time", "es": "Tiempo Solicitud → Entrega", "de": "Anfrage → Lieferzeit", "fr": "Délai Demande → Livraison"},
     "Avg warehouse TAT:": {"it": "TAT medio magazzino:", "en": "Avg warehouse TAT:", "es": "TAT promedio almacén:", "de": "Durchschn. Lager-TAT:", "fr": "TAT moyen entrepôt :"},
     "days": {"it": "giorni", "en": "days", "es": "días", "de": "Tage", "fr": "jours"},
     "Consumption Analysis": {"it": "Analisi Consumi", "en": "Consumption Analysis", "es": "Análisis de Consumos", "de": "Verbrauchsanalyse", "fr": "Analyse de la consommation"},
@@ -767,6 +806,7 @@ TRANSLATIONS = {
     "All items have been delivered.": {"it": "Tutti gli articoli sono stati consegnati.", "en": "All items have been delivered.", "es": "Todos los artículos han sido entregados.", "de": "Alle Artikel wurden geliefert.", "fr": "Tous les articles ont été livrés."},
     "Already Delivered:": {"it": "Già consegnato:", "en": "Already Delivered:", "es": "Ya entregado:", "de": "Bereits geliefert:", "fr": "Déjà livré :"},
     "Application restart is required to apply the new language.\n\nRestart now?": {"it": "È necessario riavviare l'applicazione per applicare la nuova lingua.\n\nRiavviare ora?", "en": "Application restart is required to apply the new language.\n\nRestart now?", "es": "Es necesario reiniciar la aplicación para aplicar el nuevo idioma.\n\n¿Reiniciar ahora?", "de": "Ein Neustart der Anwendung ist erforderlich, um die neue Sprache anzuwenden.\n\nJetzt neu starten?", "fr": "Un redémarrage de l'application est nécessaire pour appliquer la nouvelle langue.\n\nRedémarrer maintenant ?"},
+    "Avg Stock": {"it": "Giacenza media", "en": "Avg Stock", "es": "Stock medio", "de": "Durchschn. Bestand", "fr": "Stock moyen"},
     "Avg stock TAT:": {"it": "TAT medio giacenza:", "en": "Avg stock TAT:", "es": "TAT medio stock:", "de": "Durchschn. Lager-TAT:", "fr": "TAT moyen stock :"},
     "Barcode Scanner": {"it": "Lettore Codice a Barre", "en": "Barcode Scanner", "es": "Escáner de Código de Barras", "de": "Barcode-Scanner", "fr": "Lecteur de code-barres"},
     "Batch '{}' already exists with expiration {}.\nInsert anyway with expiration {}?": {"it": "Il lotto '{}' esiste già con scadenza {}.\nInserire comunque con scadenza {}?", "en": "Batch '{}' already exists with expiration {}.\nInsert anyway with expiration {}?", "es": "El lote '{}' ya existe con vencimiento {}.\n¿Insertar de todos modos con vencimiento {}?", "de": "Charge '{}' existiert bereits mit Ablaufdatum {}.\nTrotzdem mit Ablaufdatum {} einfügen?", "fr": "Le lot '{}' existe déjà avec expiration {}.\nInsérer quand même avec expiration {} ?"},
@@ -896,6 +936,33 @@ TRANSLATIONS = {
     "Done": {"it": "Fatto", "en": "Done", "es": "Hecho", "de": "Erledigt", "fr": "Terminé"},
     "Show completed": {"it": "Mostra completati", "en": "Show completed", "es": "Mostrar completados", "de": "Erledigte anzeigen", "fr": "Afficher terminés"},
     "Delete this memo?": {"it": "Eliminare questo promemoria?", "en": "Delete this memo?", "es": "¿Eliminar esta nota?", "de": "Diese Notiz löschen?", "fr": "Supprimer ce mémo ?"},
+
+    # ==========================================================================
+    # Suggested reorders view
+    # ==========================================================================
+    "Suggested Reorders": {"it": "Riordini suggeriti", "en": "Suggested Reorders", "es": "Pedidos sugeridos", "de": "Vorgeschlagene Nachbestellungen", "fr": "Réapprovisionnements suggérés"},
+    "Parameters": {"it": "Parametri", "en": "Parameters", "es": "Parámetros", "de": "Parameter", "fr": "Paramètres"},
+    "History:": {"it": "Storico:", "en": "History:", "es": "Historial:", "de": "Verlauf:", "fr": "Historique :"},
+    "Service level:": {"it": "Livello di servizio:", "en": "Service level:", "es": "Nivel de servicio:", "de": "Servicegrad:", "fr": "Niveau de service :"},
+    "Cover (days):": {"it": "Copertura (giorni):", "en": "Cover (days):", "es": "Cobertura (días):", "de": "Reichweite (Tage):", "fr": "Couverture (jours) :"},
+    "On order": {"it": "In ordine", "en": "On order", "es": "Pedido", "de": "Bestellt", "fr": "En commande"},
+    "Demand/day": {"it": "Domanda/giorno", "en": "Demand/day", "es": "Demanda/día", "de": "Bedarf/Tag", "fr": "Demande/jour"},
+    "Lead time (days)": {"it": "Tempo consegna (giorni)", "en": "Lead time (days)", "es": "Plazo de entrega (días)", "de": "Lieferzeit (Tage)", "fr": "Délai (jours)"},
+    "Reorder point": {"it": "Punto di riordino", "en": "Reorder point", "es": "Punto de pedido", "de": "Meldebestand", "fr": "Point de commande"},
+    "Order qty": {"it": "Qtà da ordinare", "en": "Order qty", "es": "Cant. a pedir", "de": "Bestellmenge", "fr": "Qté à commander"},
+    "To reorder": {"it": "Da riordinare", "en": "To reorder", "es": "Para pedir", "de": "Nachzubestellen", "fr": "À commander"},
+    "Create Draft Request": {"it": "Crea richiesta bozza", "en": "Create Draft Request", "es": "Crear borrador de solicitud", "de": "Anforderungsentwurf erstellen", "fr": "Créer une demande brouillon"},
+    "Select at least one package with a quantity to order!": {"it": "Selezionare almeno una confezione con una quantità da ordinare!", "en": "Select at least one package with a quantity to order!", "es": "¡Seleccione al menos un envase con una cantidad a pedir!", "de": "Mindestens eine Packung mit Bestellmenge auswählen!", "fr": "Sélectionnez au moins un conditionnement avec une quantité à commander !"},
+    "Create a draft request with the selected packages?": {"it": "Creare una richiesta bozza con le confezioni selezionate?", "en": "Create a draft request with the selected packages?", "es": "¿Crear un borrador de solicitud con los envases seleccionados?", "de": "Anforderungsentwurf mit den ausgewählten Packungen erstellen?", "fr": "Créer une demande brouillon avec les conditionnements sélectionnés ?"},
+    "Error creating the request!": {"it": "Errore nella creazione della richiesta!", "en": "Error creating the request!", "es": "¡Error al crear la solicitud!", "de": "Fehler beim Erstellen der Anforderung!", "fr": "Erreur lors de la création de la demande !"},
+    "Draft request created.": {"it": "Richiesta bozza creata.", "en": "Draft request created.", "es": "Borrador de solicitud creado.", "de": "Anforderungsentwurf erstellt.", "fr": "Demande brouillon créée."},
+    "Export Suggested Reorders": {"it": "Esporta riordini suggeriti", "en": "Export Suggested Reorders", "es": "Exportar pedidos sugeridos", "de": "Vorgeschlagene Nachbestellungen exportieren", "fr": "Exporter les réapprovisionnements suggérés"},
+
+    # ==========================================================================
+    # Statistics progress
+    # ==========================================================================
+    "Computing...": {"it": "Calcolo...", "en": "Computing...", "es": "Calculando...", "de": "Berechnung...", "fr": "Calcul..."},
+    "Stopped": {"it": "Interrotto", "en": "Stopped", "es": "Detenido", "de": "Abgebrochen", "fr": "Interrompu"},
 }
 
 
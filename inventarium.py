@@ -108,6 +108,9 @@ class App(tk.Tk):
         main = Main(self)
         main.on_open()
 
+        # Refresh the open windows with the changes of the other workstations
+        self.engine.start_change_feed(self)
+
         # Start idle monitor (auto-close after inactivity)
         self._start_monitor()
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Quantiles - Streaming duration statistics for Inventarium.
+
+SQLite has no percentile aggregate, so the durations are streamed once
+and fed to one Durations accumulator per group. A group keeps its values
+and answers exactly (linear interpolation between the closest ranks)
+until it holds EXACT_LIMIT values; beyond that the values are moved to a
+logarithmic bucket sketch with RELATIVE_ACCURACY relative error, whose
+memory does not grow with the number of values. Count, mean, min and max
+are always exact, and two accumulators can be merged (e.g. the products
+of a supplier, or partial streams).
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import math
+
+# Groups up to this many values are answered exactly
+EXACT_LIMIT = 1000
+
+# Relative error of the quantiles of larger groups
+RELATIVE_ACCURACY = 0.01
+
+# Reported quantiles: name -> q
+PERCENTILES = {"median": 0.5, "p90": 0.9, "p95": 0.95}
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+class Durations:
+    """
+    Count, mean, min, max and quantiles of a stream of durations (days).
+
+    Usage:
+        >>> d = Durations()
+        >>> for days in (1, 2, 3, 40):
+        ...     d.add(days)
+        >>> d.quantile(0.5), round(d.summary()["p95"], 2)
+        (2.5, 34.45)
+    """
+
+    __slots__ = ("count", "total", "min", "max", "values", "buckets", "zeros")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # Exact values, None once moved to the sketch
+        self.values = []
+        # Sketch: bucket index -> count, values <= 0 counted apart
+        self.buckets = None
+        self.zeros = 0
+
+    def add(self, value):
+        """Add one duration."""
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if self.values is not None:
+            self.values.append(value)
+            if len(self.values) > EXACT_LIMIT:
+                self._to_sketch()
+        else:
+            self._bucket(value)
+
+    def merge(self, other):
+        """Add all the durations of another accumulator."""
+        if not other.count:
+            return self
+
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+        if self.values is not None and other.values is not None:
+            self.values.extend(other.values)
+            if len(self.values) > EXACT_LIMIT:
+                self._to_sketch()
+            return self
+
+        if self.values is not None:
+            self._to_sketch()
+        if other.values is not None:
+            for value in other.values:
+                self._bucket(value)
+        else:
+            self.zeros += other.zeros
+            for index, n in other.buckets.items():
+                self.buckets[index] = self.buckets.get(index, 0) + n
+        return self
+
+    def _to_sketch(self):
+        """Move the exact values to the bucket sketch."""
+        values, self.values = self.values, None
+        self.buckets = {}
+        for value in values:
+            self._bucket(value)
+
+    def _bucket(self, value):
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / _LOG_GAMMA)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def exact(self):
+        """True while the quantiles are exact."""
+        return self.values is not None
+
+    def quantile(self, q):
+        """Return the q-quantile (0 <= q <= 1), None if empty."""
+        return self.quantiles((q,))[0]
+
+    def quantiles(self, qs):
+        """
+        Return the list of the qs-quantiles, None each if empty.
+
+        Exact groups interpolate between the closest ranks (as
+        statistics.quantiles(method="inclusive")); sketched groups
+        return the midpoint of the bucket holding the rank.
+        """
+        if not self.count:
+            return [None for q in qs]
+
+        if self.values is not None:
+            values = sorted(self.values)
+            result = []
+            for q in qs:
+                position = q * (len(values) - 1)
+                lower = math.floor(position)
+                upper = min(lower + 1, len(values) - 1)
+                result.append(values[lower] + (values[upper] - values[lower]) * (position - lower))
+            return result
+
+        indexes = sorted(self.buckets)
+        return [self._sketch_quantile(q, indexes) for q in qs]
+
+    def _sketch_quantile(self, q, indexes):
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return min(max(0.0, self.min), self.max)
+
+        for index in indexes:
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * _GAMMA ** index / (_GAMMA + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def summary(self):
+        """Return count, mean, min, max and PERCENTILES as a dict."""
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+        }
+        result.update(zip(PERCENTILES, self.quantiles(PERCENTILES.values())))
+        return result
+
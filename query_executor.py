@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Query Executor - Background database reads for Inventarium.
+
+Runs queries on a worker thread with its own SQLite connection, so the
+Tk main loop keeps redrawing while a slow query runs on the network
+share. Results are handed back to the Tk thread through a queue polled
+with after(): callbacks always run on the Tk thread and may touch
+widgets.
+
+A job submitted with a key supersedes the previous job with the same
+key (e.g. one search per keystroke): a pending one is skipped, a running
+one is interrupted, and neither calls back.
+
+Long jobs report their progress (and optionally a partial result) with
+db.progress(); the job's on_progress callback receives it on the Tk
+thread, and progress() raises JobCancelled as soon as the job is
+cancelled, so Python loops stop as well as SQL statements.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import queue
+import threading
+
+from dbms import DBMS
+from controller import Controller
+
+# Milliseconds between two checks of the result queue
+POLL_MS = 30
+
+
+class JobCancelled(Exception):
+    """Raised by _WorkerDB.progress() in a job that was cancelled."""
+
+
+class _WorkerDB(DBMS, Controller):
+    """
+    DBMS on the worker thread: engine PRAGMAs, errors and slow statements
+    logged by the engine, profiling switched with the engine's.
+
+    Controller is mixed in for its read-only queries
+    (e.g. db.get_supplier_performance()).
+    """
+
+    # Statements are attributed to the job, not to read() below
+    _caller_skip = (__name__,)
+
+    def __init__(self, database, pragmas, log, profiling=False, slow_query_ms=250, slow_query=None):
+        self._pragmas = pragmas
+        self._log = log
+        self._slow_query = slow_query
+        self.interrupted = False
+        # Set by the executor: running job and its progress sink
+        self.job = None
+        self.report = None
+        super().__init__(database=database)
+        self.profiling = profiling
+        self.slow_query_ms = slow_query_ms
+
+    def get_db_pragmas(self):
+        return dict(self._pragmas)
+
+    def read(self, fetch, sql, args=()):
+        # Once the job is cancelled its remaining queries are not run
+        if self.interrupted:
+            return None
+        return super().read(fetch, sql, args)
+
+    def progress(self, done, total=None, partial=None):
+        """
+        Report the progress of the running job to its on_progress callback.
+
+        Args:
+            done: Work done so far (rows, steps, ...)
+            total: Total work, None if unknown
+            partial: Partial result to show while the job goes on
+
+        Raises:
+            JobCancelled: The job was cancelled; let it propagate
+        """
+        job = self.job
+        if self.interrupted or job is None or job.cancelled:
+            raise JobCancelled()
+        if job.on_progress is not None:
+            self.report(job, (done, total, partial))
+
+    def on_log(self, function, exception, exc_type, module, caller):
+        # A cancelled query fails with "interrupted": not an error
+        if self.interrupted:
+            return
+        self._log(function, exception, exc_type, module, caller)
+
+    def on_slow_query(self, sql, args, elapsed, rows, caller, plan):
+        if self._slow_query is None:
+            super().on_slow_query(sql, args, elapsed, rows, caller, plan)
+        else:
+            self._slow_query(sql, args, elapsed, rows, caller, plan)
+
+
+class QueryJob:
+    """A unit of work for the executor."""
+
+    def __init__(self, widget, fn, callback, key=None, on_error=None, on_progress=None):
+        """
+        Args:
+            widget: Window waiting for the result (busy cursor, liveness)
+            fn: Callable(db) run on the worker thread, returns the result
+            callback: Callable(result) run on the Tk thread
+            key: Jobs with the same key supersede each other
+            on_error: Callable(exception) run on the Tk thread if fn raises
+            on_progress: Callable(done, total, partial) run on the Tk
+                         thread for each db.progress() of fn
+        """
+        self.widget = widget
+        self.fn = fn
+        self.callback = callback
+        self.key = key
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+
+class QueryExecutor(threading.Thread):
+    """
+    Worker thread executing read jobs on a dedicated connection.
+
+    Usage (through Engine.run_async / Engine.read_async):
+        >>> engine.read_async(self, True, sql, args, self.show_rows, key="warehouse")
+    """
+
+    def __init__(self, database, pragmas, log, busy, not_busy,
+                 profiling=False, slow_query_ms=250, slow_query=None):
+        """
+        Args:
+            database: Database path
+            pragmas: Connection tuning PRAGMAs (as Engine.get_db_pragmas())
+            log: Error logger with the DBMS.on_log signature
+            busy: Callable(widget) showing the busy indicator
+            not_busy: Callable(widget) hiding it
+            profiling: Time the statements of the worker connection
+            slow_query_ms: Threshold for slow_query
+            slow_query: Slow statement logger with the DBMS.on_slow_query
+                        signature (called on the worker thread)
+        """
+        threading.Thread.__init__(self, daemon=True)
+
+        self.database = database
+        self.pragmas = pragmas
+        self.log = log
+        self.busy = busy
+        self.not_busy = not_busy
+        self.profiling = profiling
+        self.slow_query_ms = slow_query_ms
+        self.slow_query = slow_query
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.db = None
+        self.running = None
+        self.latest = {}
+        self.pending = {}
+        self.polling = False
+        self.root = None
+        self.lock = threading.Lock()
+
+    def submit(self, job):
+        """Queue a job, superseding the previous one with the same key (Tk thread)."""
+        if job.key is not None:
+            self.cancel(job.key)
+            self.latest[job.key] = job
+
+        self._set_pending(job.widget, 1)
+        self.jobs.put(job)
+        self._schedule_poll(job.widget)
+        return job
+
+    def cancel(self, key):
+        """Cancel the pending or running job with this key (Tk thread)."""
+        job = self.latest.pop(key, None)
+        if job is None or job.cancelled:
+            return
+
+        job.cancelled = True
+        with self.lock:
+            if self.running is job and self.db and self.db.con:
+                self.db.interrupted = True
+                self.db.con.interrupt()
+
+    def stop(self):
+        """Stop the worker after the current job."""
+        self.jobs.put(None)
+
+    def set_profiling(self, enabled):
+        """Switch statement timing on the worker connection (Tk thread)."""
+        self.profiling = enabled
+        if self.db is not None:
+            self.db.profiling = enabled
+
+    def run(self):
+        """Worker loop: open the connection, then execute jobs in order."""
+        self.db = _WorkerDB(self.database, self.pragmas, self.log,
+                            self.profiling, self.slow_query_ms, self.slow_query)
+        self.db.report = lambda job, progress: self.results.put((job, progress))
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            if not job.cancelled:
+                with self.lock:
+                    self.running = job
+                    self.db.job = job
+                    self.db.interrupted = False
+                try:
+                    job.result = job.fn(self.db)
+                except JobCancelled:
+                    pass
+                except Exception as e:
+                    job.error = e
+                finally:
+                    with self.lock:
+                        self.running = None
+                        self.db.job = None
+
+            self.results.put((job, None))
+
+        self.db.close()
+
+    def _set_pending(self, widget, delta):
+        """Count jobs per window and toggle its busy indicator."""
+        count = self.pending.get(widget, 0) + delta
+        try:
+            if delta > 0 and count == 1:
+                self.busy(widget)
+            elif count <= 0:
+                self.not_busy(widget)
+        except Exception:
+            # Window already destroyed
+            pass
+
+        if count > 0:
+            self.pending[widget] = count
+        else:
+            self.pending.pop(widget, None)
+
+    def _schedule_poll(self, widget):
+        """Start polling the result queue from the Tk thread."""
+        if self.polling:
+            return
+        self.root = widget.nametowidget(".")
+        self.polling = True
+        self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        """Deliver finished jobs to their callbacks (Tk thread)."""
+        while True:
+            try:
+                job, progress = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if progress is None:
+                self._deliver(job)
+            else:
+                self._progress(job, progress)
+
+        if self.pending:
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def _progress(self, job, progress):
+        """Pass a progress report to its job unless cancelled or its window is gone."""
+        if job.cancelled:
+            return
+
+        try:
+            if job.widget.winfo_exists():
+                job.on_progress(*progress)
+        except Exception as e:
+            self.log("_progress", e, type(e), __import__(__name__), job.key)
+
+    def _deliver(self, job):
+        """Call back a finished job unless cancelled or its window is gone."""
+        self._set_pending(job.widget, -1)
+
+        if job.key is not None and self.latest.get(job.key) is job:
+            del self.latest[job.key]
+
+        if job.cancelled:
+            return
+
+        try:
+            if not job.widget.winfo_exists():
+                return
+        except Exception:
+            return
+
+        try:
+            if job.error is None:
+                job.callback(job.result)
+            elif job.on_error:
+                job.on_error(job.error)
+            else:
+                raise job.error
+        except Exception as e:
+            # Keep polling for the other jobs
+            self.log("_deliver", e, type(e), __import__(__name__), job.key)
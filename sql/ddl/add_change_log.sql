@@ -0,0 +1,203 @@
+-- ============================================
+-- Add the trigger-maintained change log
+-- change_log records every insert, update and delete of the main tables,
+-- so each workstation reads what the others changed since its last poll
+-- and refreshes only those rows (see change_feed.py).
+-- Re-run it to update trg_labels_log_update (dropped and created again) on a
+-- database that already has the table.
+-- Usage: sqlite3 inventarium.db ".read ddl/add_change_log.sql"
+-- ============================================
+
+BEGIN TRANSACTION;
+
+-- Change feed for the other workstations, appended by the trg_*_log_* triggers:
+-- one row per row inserted (I), updated (U, X for a label unloaded) or deleted (D)
+-- in the main tables, with the batch and package it belongs to where there is one.
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER NOT NULL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    pk INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    batch_id INTEGER,
+    package_id INTEGER
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', NEW.label_id, 'I', NEW.batch_id, (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id));
+END;
+
+DROP TRIGGER IF EXISTS trg_labels_log_update;
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_update
+AFTER UPDATE ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.unloaded IS NOT NEW.unloaded OR OLD.batch_id IS NOT NEW.batch_id
+  OR OLD.loaded IS NOT NEW.loaded OR OLD.tick IS NOT NEW.tick
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', NEW.label_id, CASE WHEN NEW.status = 0 AND OLD.status IS NOT 0 THEN 'X' ELSE 'U' END,
+            NEW.batch_id, (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id));
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    SELECT 'labels', OLD.label_id, 'U', OLD.batch_id, (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    WHERE OLD.batch_id IS NOT NEW.batch_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_delete
+AFTER DELETE ON labels
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', OLD.label_id, 'D', OLD.batch_id, (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_insert
+AFTER INSERT ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', NEW.batch_id, 'I', NEW.batch_id, NEW.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_update
+AFTER UPDATE ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', NEW.batch_id, 'U', NEW.batch_id, NEW.package_id);
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    SELECT 'batches', OLD.batch_id, 'U', OLD.batch_id, OLD.package_id
+    WHERE OLD.package_id IS NOT NEW.package_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_delete
+AFTER DELETE ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', OLD.batch_id, 'D', OLD.batch_id, OLD.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_insert
+AFTER INSERT ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', NEW.package_id, 'I', NULL, NEW.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_update
+AFTER UPDATE ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', NEW.package_id, 'U', NULL, NEW.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_delete
+AFTER DELETE ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', OLD.package_id, 'D', NULL, OLD.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_log_insert
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', NEW.product_id, 'I', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_log_update
+AFTER UPDATE ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', NEW.product_id, 'U', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_log_delete
+AFTER DELETE ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', OLD.product_id, 'D', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_insert
+AFTER INSERT ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', NEW.supplier_id, 'I', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_update
+AFTER UPDATE ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', NEW.supplier_id, 'U', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_delete
+AFTER DELETE ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', OLD.supplier_id, 'D', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_insert
+AFTER INSERT ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', NEW.category_id, 'I', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_update
+AFTER UPDATE ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', NEW.category_id, 'U', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_delete
+AFTER DELETE ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', OLD.category_id, 'D', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_insert
+AFTER INSERT ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', NEW.request_id, 'I', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_update
+AFTER UPDATE ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', NEW.request_id, 'U', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_delete
+AFTER DELETE ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', OLD.request_id, 'D', NULL, NULL);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_log_insert
+AFTER INSERT ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', NEW.item_id, 'I', NULL, NEW.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_log_update
+AFTER UPDATE ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', NEW.item_id, 'U', NULL, NEW.package_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_log_delete
+AFTER DELETE ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', OLD.item_id, 'D', NULL, OLD.package_id);
+END;
+
+COMMIT;
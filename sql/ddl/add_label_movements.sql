@@ -0,0 +1,249 @@
+-- ============================================
+-- Add the trigger-maintained daily movement table
+-- label_movements_daily holds, per package and day, the labels loaded,
+-- unloaded and cancelled and the residence time of the unloaded ones,
+-- so period statistics read days x packages instead of every label.
+-- Re-run it to update the labels triggers of a database that has the table
+-- (they are dropped and created again) and recount it.
+-- Usage: sqlite3 inventarium.db ".read ddl/add_label_movements.sql"
+-- ============================================
+
+BEGIN TRANSACTION;
+
+-- Daily label movements per package, maintained by the trg_*_movements_* triggers
+-- below. loaded_count: labels loaded on day (cancelled_count of them are now
+-- cancelled); unloaded_count: labels unloaded on day, if they had been loaded
+-- (a label without load date never entered the stock); residence_*: days from
+-- load to unload of the labels unloaded on day.
+CREATE TABLE IF NOT EXISTS label_movements_daily (
+    day DATE NOT NULL,
+    package_id INTEGER NOT NULL,
+    loaded_count INTEGER NOT NULL DEFAULT 0,
+    unloaded_count INTEGER NOT NULL DEFAULT 0,
+    cancelled_count INTEGER NOT NULL DEFAULT 0,
+    residence_count INTEGER NOT NULL DEFAULT 0,
+    residence_days REAL NOT NULL DEFAULT 0,
+    min_residence REAL,
+    max_residence REAL,
+    PRIMARY KEY (day, package_id)
+) WITHOUT ROWID;
+
+DROP TRIGGER IF EXISTS trg_labels_movements_insert;
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.loaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count + 1,
+        cancelled_count = cancelled_count + (NEW.status = -1)
+    WHERE day = NEW.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.unloaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.status = 0 AND NEW.unloaded IS NOT NULL
+    AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count + 1,
+        residence_count = residence_count + (NEW.loaded IS NOT NULL),
+        residence_days = residence_days + COALESCE(julianday(NEW.unloaded) - julianday(NEW.loaded), 0),
+        min_residence = COALESCE(MIN(min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+        max_residence = COALESCE(MAX(max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded))
+    WHERE NEW.status = 0 AND NEW.loaded IS NOT NULL AND day = NEW.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+DROP TRIGGER IF EXISTS trg_labels_movements_update;
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_update
+AFTER UPDATE OF batch_id, status, loaded, unloaded ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.batch_id IS NOT NEW.batch_id
+  OR OLD.loaded IS NOT NEW.loaded OR OLD.unloaded IS NOT NEW.unloaded
+BEGIN
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count - 1,
+        cancelled_count = cancelled_count - (OLD.status = -1)
+    WHERE day = OLD.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count - 1,
+        residence_count = residence_count - (OLD.loaded IS NOT NULL),
+        residence_days = residence_days - COALESCE(julianday(OLD.unloaded) - julianday(OLD.loaded), 0)
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    -- The label was the shortest or longest stay of its day: recount them
+    UPDATE label_movements_daily SET
+        min_residence = (
+            SELECT MIN(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        ),
+        max_residence = (
+            SELECT MAX(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        )
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND julianday(OLD.unloaded) - julianday(OLD.loaded) IN (min_residence, max_residence);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.loaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count + 1,
+        cancelled_count = cancelled_count + (NEW.status = -1)
+    WHERE day = NEW.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.unloaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.status = 0 AND NEW.unloaded IS NOT NULL
+    AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count + 1,
+        residence_count = residence_count + (NEW.loaded IS NOT NULL),
+        residence_days = residence_days + COALESCE(julianday(NEW.unloaded) - julianday(NEW.loaded), 0),
+        min_residence = COALESCE(MIN(min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+        max_residence = COALESCE(MAX(max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded))
+    WHERE NEW.status = 0 AND NEW.loaded IS NOT NULL AND day = NEW.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    DELETE FROM label_movements_daily
+    WHERE day IN (OLD.loaded, OLD.unloaded)
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND loaded_count = 0 AND unloaded_count = 0;
+END;
+
+DROP TRIGGER IF EXISTS trg_labels_movements_delete;
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_delete
+AFTER DELETE ON labels
+BEGIN
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count - 1,
+        cancelled_count = cancelled_count - (OLD.status = -1)
+    WHERE day = OLD.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count - 1,
+        residence_count = residence_count - (OLD.loaded IS NOT NULL),
+        residence_days = residence_days - COALESCE(julianday(OLD.unloaded) - julianday(OLD.loaded), 0)
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    -- The label was the shortest or longest stay of its day: recount them
+    UPDATE label_movements_daily SET
+        min_residence = (
+            SELECT MIN(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        ),
+        max_residence = (
+            SELECT MAX(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        )
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND julianday(OLD.unloaded) - julianday(OLD.loaded) IN (min_residence, max_residence);
+
+    DELETE FROM label_movements_daily
+    WHERE day IN (OLD.loaded, OLD.unloaded)
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND loaded_count = 0 AND unloaded_count = 0;
+END;
+
+-- A batch moved to another package or deleted: recount the packages involved
+CREATE TRIGGER IF NOT EXISTS trg_batches_movements_move
+AFTER UPDATE OF package_id ON batches
+WHEN OLD.package_id IS NOT NEW.package_id
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id IN (OLD.package_id, NEW.package_id);
+    INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+        cancelled_count, residence_count, residence_days, min_residence, max_residence)
+    SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+        COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id IN (OLD.package_id, NEW.package_id) AND lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id IN (OLD.package_id, NEW.package_id) AND lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_movements_delete
+AFTER DELETE ON batches
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id = OLD.package_id;
+    INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+        cancelled_count, residence_count, residence_days, min_residence, max_residence)
+    SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+        COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id = OLD.package_id AND lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id = OLD.package_id AND lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_packages_movements_delete
+AFTER DELETE ON packages
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id = OLD.package_id;
+END;
+
+-- Initial population (same as dml/rebuild_label_movements.sql)
+DELETE FROM label_movements_daily;
+INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+    cancelled_count, residence_count, residence_days, min_residence, max_residence)
+SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+    COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+FROM (
+    SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+        lb.status = -1 AS cancelled, NULL AS residence
+    FROM batches b
+    JOIN labels lb ON lb.batch_id = b.batch_id
+    WHERE lb.loaded IS NOT NULL
+    UNION ALL
+    SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+    FROM batches b
+    JOIN labels lb ON lb.batch_id = b.batch_id
+    WHERE lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+)
+GROUP BY day, package_id;
+
+COMMIT;
+
+-- Verify: should return no rows
+.read dql/verify_label_movements.sql
@@ -0,0 +1,17 @@
+-- ============================================
+-- Add unique index on labels.tick (barcode scan lookup)
+-- Usage: sqlite3 inventarium.db ".read ddl/add_labels_tick_index.sql"
+-- ============================================
+
+-- Duplicate ticks prevent the unique index from being created.
+-- If this query returns rows, fix them before running the CREATE below.
+SELECT tick, COUNT(*) AS n
+FROM labels
+WHERE tick IS NOT NULL
+GROUP BY tick
+HAVING n > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_labels_tick_unique ON labels(tick);
+
+-- Verify: the scan must use the index, not a full SCAN of labels
+EXPLAIN QUERY PLAN SELECT label_id FROM labels WHERE tick = 1705312800123456;
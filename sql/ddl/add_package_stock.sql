@@ -0,0 +1,192 @@
+-- ============================================
+-- Add trigger-maintained stock counters
+-- package_stock / batch_stock hold in_stock, used and cancelled label
+-- counts, kept exact by triggers on labels, so stock reads no longer
+-- aggregate the whole label history.
+-- Usage: sqlite3 inventarium.db ".read ddl/add_package_stock.sql"
+-- ============================================
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS package_stock (
+    package_id INTEGER NOT NULL PRIMARY KEY,
+    in_stock INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS batch_stock (
+    batch_id INTEGER NOT NULL PRIMARY KEY,
+    package_id INTEGER NOT NULL,
+    in_stock INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT OR IGNORE INTO batch_stock (batch_id, package_id)
+    SELECT batch_id, package_id FROM batches WHERE batch_id = NEW.batch_id;
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT package_id FROM batches WHERE batch_id = NEW.batch_id;
+
+    UPDATE batch_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE batch_id = NEW.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_update
+AFTER UPDATE OF batch_id, status ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.batch_id IS NOT NEW.batch_id
+BEGIN
+    UPDATE batch_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE batch_id = OLD.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    INSERT OR IGNORE INTO batch_stock (batch_id, package_id)
+    SELECT batch_id, package_id FROM batches WHERE batch_id = NEW.batch_id;
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT package_id FROM batches WHERE batch_id = NEW.batch_id;
+
+    UPDATE batch_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE batch_id = NEW.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_delete
+AFTER DELETE ON labels
+BEGIN
+    UPDATE batch_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE batch_id = OLD.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_stock_move
+AFTER UPDATE OF package_id ON batches
+WHEN OLD.package_id IS NOT NEW.package_id
+BEGIN
+    UPDATE package_stock SET
+        in_stock = in_stock - (SELECT in_stock FROM batch_stock WHERE batch_id = NEW.batch_id),
+        used = used - (SELECT used FROM batch_stock WHERE batch_id = NEW.batch_id),
+        cancelled = cancelled - (SELECT cancelled FROM batch_stock WHERE batch_id = NEW.batch_id)
+    WHERE package_id = OLD.package_id
+    AND EXISTS (SELECT 1 FROM batch_stock WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT NEW.package_id FROM batch_stock WHERE batch_id = NEW.batch_id;
+
+    UPDATE package_stock SET
+        in_stock = in_stock + (SELECT in_stock FROM batch_stock WHERE batch_id = NEW.batch_id),
+        used = used + (SELECT used FROM batch_stock WHERE batch_id = NEW.batch_id),
+        cancelled = cancelled + (SELECT cancelled FROM batch_stock WHERE batch_id = NEW.batch_id)
+    WHERE package_id = NEW.package_id
+    AND EXISTS (SELECT 1 FROM batch_stock WHERE batch_id = NEW.batch_id);
+
+    UPDATE batch_stock SET package_id = NEW.package_id WHERE batch_id = NEW.batch_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_batches_stock_delete
+AFTER DELETE ON batches
+BEGIN
+    DELETE FROM batch_stock WHERE batch_id = OLD.batch_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_packages_stock_delete
+AFTER DELETE ON packages
+BEGIN
+    DELETE FROM package_stock WHERE package_id = OLD.package_id;
+END;
+
+-- Views now read the counters
+DROP VIEW IF EXISTS v_expiring;
+DROP VIEW IF EXISTS v_stock;
+
+CREATE VIEW IF NOT EXISTS v_expiring AS
+SELECT 
+    p.description AS product_name,
+    pk.packaging,
+    b.batch_id,
+    b.description AS lot,
+    b.expiration,
+    CAST(julianday(b.expiration) - julianday('now') AS INTEGER) AS days_left,
+    COALESCE(bs.in_stock, 0) AS labels_in_stock
+FROM batches b
+JOIN packages pk ON pk.package_id = b.package_id
+JOIN products p ON p.product_id = pk.product_id
+LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
+WHERE b.expiration IS NOT NULL
+ORDER BY b.expiration;
+
+CREATE VIEW IF NOT EXISTS v_stock AS
+SELECT 
+    p.product_id,
+    p.reference AS product_code,
+    p.description AS product_name,
+    pk.package_id,
+    pk.reference AS supplier_code,
+    pk.packaging,
+    s.description AS supplier,
+    c.description AS category,
+    l.description AS location,
+    COALESCE(ps.in_stock, 0) AS in_stock,
+    COALESCE(ps.used, 0) AS used,
+    COALESCE(ps.cancelled, 0) AS cancelled
+FROM products p
+JOIN packages pk ON pk.product_id = p.product_id
+LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+LEFT JOIN categories c ON c.category_id = pk.category_id
+LEFT JOIN locations l ON l.location_id = pk.location_id
+LEFT JOIN package_stock ps ON ps.package_id = pk.package_id;
+
+-- Initial population (same as dml/rebuild_package_stock.sql)
+DELETE FROM batch_stock;
+INSERT INTO batch_stock (batch_id, package_id, in_stock, used, cancelled)
+SELECT
+    b.batch_id,
+    b.package_id,
+    COUNT(CASE WHEN lb.status = 1 THEN 1 END),
+    COUNT(CASE WHEN lb.status = 0 THEN 1 END),
+    COUNT(CASE WHEN lb.status = -1 THEN 1 END)
+FROM batches b
+JOIN labels lb ON lb.batch_id = b.batch_id
+GROUP BY b.batch_id;
+
+DELETE FROM package_stock;
+INSERT INTO package_stock (package_id, in_stock, used, cancelled)
+SELECT package_id, SUM(in_stock), SUM(used), SUM(cancelled)
+FROM batch_stock
+GROUP BY package_id;
+
+COMMIT;
+
+-- Verify: should return no rows
+.read dql/verify_package_stock.sql
@@ -0,0 +1,28 @@
+-- ============================================
+-- Rebuild the daily movement table from the labels table
+-- Run if dql/verify_label_movements.sql reports differences.
+-- Usage: sqlite3 inventarium.db ".read dml/rebuild_label_movements.sql"
+-- ============================================
+
+BEGIN TRANSACTION;
+
+DELETE FROM label_movements_daily;
+INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+    cancelled_count, residence_count, residence_days, min_residence, max_residence)
+SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+    COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+FROM (
+    SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+        lb.status = -1 AS cancelled, NULL AS residence
+    FROM batches b
+    JOIN labels lb ON lb.batch_id = b.batch_id
+    WHERE lb.loaded IS NOT NULL
+    UNION ALL
+    SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+    FROM batches b
+    JOIN labels lb ON lb.batch_id = b.batch_id
+    WHERE lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+)
+GROUP BY day, package_id;
+
+COMMIT;
@@ -0,0 +1,27 @@
+-- ============================================
+-- Rebuild stock counters from the labels table
+-- Run if dql/verify_package_stock.sql reports differences.
+-- Usage: sqlite3 inventarium.db ".read dml/rebuild_package_stock.sql"
+-- ============================================
+
+BEGIN TRANSACTION;
+
+DELETE FROM batch_stock;
+INSERT INTO batch_stock (batch_id, package_id, in_stock, used, cancelled)
+SELECT
+    b.batch_id,
+    b.package_id,
+    COUNT(CASE WHEN lb.status = 1 THEN 1 END),
+    COUNT(CASE WHEN lb.status = 0 THEN 1 END),
+    COUNT(CASE WHEN lb.status = -1 THEN 1 END)
+FROM batches b
+JOIN labels lb ON lb.batch_id = b.batch_id
+GROUP BY b.batch_id;
+
+DELETE FROM package_stock;
+INSERT INTO package_stock (package_id, in_stock, used, cancelled)
+SELECT package_id, SUM(in_stock), SUM(used), SUM(cancelled)
+FROM batch_stock
+GROUP BY package_id;
+
+COMMIT;
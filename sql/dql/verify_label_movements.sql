@@ -0,0 +1,57 @@
+-- ============================================
+-- Verify label_movements_daily against the labels table
+-- Lists every day/package whose row differs from a full recount
+-- (or is missing on either side). No rows means the table is exact.
+-- Fix with: .read dml/rebuild_label_movements.sql
+-- Usage: sqlite3 inventarium.db ".read dql/verify_label_movements.sql"
+-- ============================================
+
+.headers on
+.mode column
+
+WITH expected AS (
+    SELECT day, package_id, SUM(loaded) AS loaded_count, SUM(unloaded) AS unloaded_count,
+        SUM(cancelled) AS cancelled_count, COUNT(residence) AS residence_count,
+        COALESCE(SUM(residence), 0) AS residence_days,
+        MIN(residence) AS min_residence, MAX(residence) AS max_residence
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id
+)
+SELECT
+    e.day,
+    e.package_id,
+    e.loaded_count, m.loaded_count AS table_loaded,
+    e.unloaded_count, m.unloaded_count AS table_unloaded,
+    e.cancelled_count, m.cancelled_count AS table_cancelled
+FROM expected e
+LEFT JOIN label_movements_daily m ON m.day = e.day AND m.package_id = e.package_id
+WHERE m.day IS NULL
+   OR e.loaded_count <> m.loaded_count
+   OR e.unloaded_count <> m.unloaded_count
+   OR e.cancelled_count <> m.cancelled_count
+   OR e.residence_count <> m.residence_count
+   OR ABS(e.residence_days - m.residence_days) > 1e-6
+   OR e.min_residence IS NOT m.min_residence
+   OR e.max_residence IS NOT m.max_residence
+UNION ALL
+SELECT
+    m.day,
+    m.package_id,
+    NULL, m.loaded_count,
+    NULL, m.unloaded_count,
+    NULL, m.cancelled_count
+FROM label_movements_daily m
+WHERE NOT EXISTS (
+    SELECT 1 FROM expected e WHERE e.day = m.day AND e.package_id = m.package_id
+);
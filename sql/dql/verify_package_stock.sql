@@ -0,0 +1,63 @@
+-- ============================================
+-- Verify stock counters against the labels table
+-- Lists every batch/package whose package_stock/batch_stock counters
+-- differ from a full recount. No rows means the counters are exact.
+-- Fix with: .read dml/rebuild_package_stock.sql
+-- Usage: sqlite3 inventarium.db ".read dql/verify_package_stock.sql"
+-- ============================================
+
+.headers on
+.mode column
+
+WITH
+batch_expected AS (
+    SELECT
+        b.batch_id,
+        b.package_id,
+        COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock,
+        COUNT(CASE WHEN lb.status = 0 THEN 1 END) AS used,
+        COUNT(CASE WHEN lb.status = -1 THEN 1 END) AS cancelled
+    FROM batches b
+    LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+    GROUP BY b.batch_id
+),
+package_expected AS (
+    SELECT
+        pk.package_id,
+        COALESCE(SUM(be.in_stock), 0) AS in_stock,
+        COALESCE(SUM(be.used), 0) AS used,
+        COALESCE(SUM(be.cancelled), 0) AS cancelled
+    FROM packages pk
+    LEFT JOIN batch_expected be ON be.package_id = pk.package_id
+    GROUP BY pk.package_id
+)
+SELECT
+    'batch' AS level,
+    be.batch_id AS id,
+    be.in_stock,
+    be.used,
+    be.cancelled,
+    COALESCE(bs.in_stock, 0) AS counter_in_stock,
+    COALESCE(bs.used, 0) AS counter_used,
+    COALESCE(bs.cancelled, 0) AS counter_cancelled
+FROM batch_expected be
+LEFT JOIN batch_stock bs ON bs.batch_id = be.batch_id
+WHERE be.in_stock <> COALESCE(bs.in_stock, 0)
+   OR be.used <> COALESCE(bs.used, 0)
+   OR be.cancelled <> COALESCE(bs.cancelled, 0)
+   OR bs.package_id <> be.package_id
+UNION ALL
+SELECT
+    'package' AS level,
+    pe.package_id AS id,
+    pe.in_stock,
+    pe.used,
+    pe.cancelled,
+    COALESCE(ps.in_stock, 0) AS counter_in_stock,
+    COALESCE(ps.used, 0) AS counter_used,
+    COALESCE(ps.cancelled, 0) AS counter_cancelled
+FROM package_expected pe
+LEFT JOIN package_stock ps ON ps.package_id = pe.package_id
+WHERE pe.in_stock <> COALESCE(ps.in_stock, 0)
+   OR pe.used <> COALESCE(ps.used, 0)
+   OR pe.cancelled <> COALESCE(ps.cancelled, 0);
@@ -16,6 +16,15 @@ CREATE TABLE IF NOT EXISTS "batches" (
     FOREIGN KEY (package_id) REFERENCES packages(package_id)
 );
 
+-- Table: batch_stock
+CREATE TABLE IF NOT EXISTS batch_stock (
+    batch_id INTEGER NOT NULL PRIMARY KEY,
+    package_id INTEGER NOT NULL,
+    in_stock INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+
 -- Table: categories
 CREATE TABLE IF NOT EXISTS categories (
  category_id INTEGER NOT NULL ,
@@ -25,6 +34,16 @@ CREATE TABLE IF NOT EXISTS categories (
  PRIMARY KEY (category_id)
 );
 
+-- Table: change_log
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER NOT NULL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    pk INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    batch_id INTEGER,
+    package_id INTEGER
+);
+
 -- Table: conservations
 CREATE TABLE IF NOT EXISTS conservations (
  conservation_id INTEGER NOT NULL ,
@@ -74,6 +93,20 @@ CREATE TABLE IF NOT EXISTS "items" (
     FOREIGN KEY (package_id) REFERENCES packages(package_id)
 );
 
+-- Table: label_movements_daily
+CREATE TABLE IF NOT EXISTS label_movements_daily (
+    day DATE NOT NULL,
+    package_id INTEGER NOT NULL,
+    loaded_count INTEGER NOT NULL DEFAULT 0,
+    unloaded_count INTEGER NOT NULL DEFAULT 0,
+    cancelled_count INTEGER NOT NULL DEFAULT 0,
+    residence_count INTEGER NOT NULL DEFAULT 0,
+    residence_days REAL NOT NULL DEFAULT 0,
+    min_residence REAL,
+    max_residence REAL,
+    PRIMARY KEY (day, package_id)
+) WITHOUT ROWID;
+
 -- Table: labels
 CREATE TABLE IF NOT EXISTS "labels" (
     label_id INTEGER NOT NULL PRIMARY KEY,
@@ -138,6 +171,14 @@ CREATE TABLE IF NOT EXISTS "packages" (
     FOREIGN KEY (location_id) REFERENCES locations(location_id)
 );
 
+-- Table: package_stock
+CREATE TABLE IF NOT EXISTS package_stock (
+    package_id INTEGER NOT NULL PRIMARY KEY,
+    in_stock INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+
 -- Table: prices
 CREATE TABLE IF NOT EXISTS prices (
     price_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -209,6 +250,9 @@ CREATE INDEX IF NOT EXISTS idx_labels_batch ON labels(batch_id);
 -- Index: idx_labels_status
 CREATE INDEX IF NOT EXISTS idx_labels_status ON labels(status);
 
+-- Index: idx_labels_tick_unique
+CREATE UNIQUE INDEX IF NOT EXISTS idx_labels_tick_unique ON labels(tick);
+
 -- Index: idx_memos_status
 CREATE INDEX IF NOT EXISTS idx_memos_status ON memos(status);
 
@@ -241,6 +285,513 @@ ON products(reference);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_suppliers_description_unique 
 ON suppliers(description);
 
+-- Trigger: trg_batches_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_delete
+AFTER DELETE ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', OLD.batch_id, 'D', OLD.batch_id, OLD.package_id);
+END;
+
+-- Trigger: trg_batches_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_insert
+AFTER INSERT ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', NEW.batch_id, 'I', NEW.batch_id, NEW.package_id);
+END;
+
+-- Trigger: trg_batches_log_update
+CREATE TRIGGER IF NOT EXISTS trg_batches_log_update
+AFTER UPDATE ON batches
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('batches', NEW.batch_id, 'U', NEW.batch_id, NEW.package_id);
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    SELECT 'batches', OLD.batch_id, 'U', OLD.batch_id, OLD.package_id
+    WHERE OLD.package_id IS NOT NEW.package_id;
+END;
+
+-- Trigger: trg_batches_movements_delete
+CREATE TRIGGER IF NOT EXISTS trg_batches_movements_delete
+AFTER DELETE ON batches
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id = OLD.package_id;
+    INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+        cancelled_count, residence_count, residence_days, min_residence, max_residence)
+    SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+        COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id = OLD.package_id AND lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id = OLD.package_id AND lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id;
+END;
+
+-- Trigger: trg_batches_movements_move
+CREATE TRIGGER IF NOT EXISTS trg_batches_movements_move
+AFTER UPDATE OF package_id ON batches
+WHEN OLD.package_id IS NOT NEW.package_id
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id IN (OLD.package_id, NEW.package_id);
+    INSERT INTO label_movements_daily (day, package_id, loaded_count, unloaded_count,
+        cancelled_count, residence_count, residence_days, min_residence, max_residence)
+    SELECT day, package_id, SUM(loaded), SUM(unloaded), SUM(cancelled),
+        COUNT(residence), COALESCE(SUM(residence), 0), MIN(residence), MAX(residence)
+    FROM (
+        SELECT b.package_id, lb.loaded AS day, 1 AS loaded, 0 AS unloaded,
+            lb.status = -1 AS cancelled, NULL AS residence
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id IN (OLD.package_id, NEW.package_id) AND lb.loaded IS NOT NULL
+        UNION ALL
+        SELECT b.package_id, lb.unloaded, 0, 1, 0, julianday(lb.unloaded) - julianday(lb.loaded)
+        FROM batches b
+        JOIN labels lb ON lb.batch_id = b.batch_id
+        WHERE b.package_id IN (OLD.package_id, NEW.package_id) AND lb.status = 0 AND lb.unloaded IS NOT NULL AND lb.loaded IS NOT NULL
+    )
+    GROUP BY day, package_id;
+END;
+
+-- Trigger: trg_batches_stock_delete
+CREATE TRIGGER IF NOT EXISTS trg_batches_stock_delete
+AFTER DELETE ON batches
+BEGIN
+    DELETE FROM batch_stock WHERE batch_id = OLD.batch_id;
+END;
+
+-- Trigger: trg_batches_stock_move
+CREATE TRIGGER IF NOT EXISTS trg_batches_stock_move
+AFTER UPDATE OF package_id ON batches
+WHEN OLD.package_id IS NOT NEW.package_id
+BEGIN
+    UPDATE package_stock SET
+        in_stock = in_stock - (SELECT in_stock FROM batch_stock WHERE batch_id = NEW.batch_id),
+        used = used - (SELECT used FROM batch_stock WHERE batch_id = NEW.batch_id),
+        cancelled = cancelled - (SELECT cancelled FROM batch_stock WHERE batch_id = NEW.batch_id)
+    WHERE package_id = OLD.package_id
+    AND EXISTS (SELECT 1 FROM batch_stock WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT NEW.package_id FROM batch_stock WHERE batch_id = NEW.batch_id;
+
+    UPDATE package_stock SET
+        in_stock = in_stock + (SELECT in_stock FROM batch_stock WHERE batch_id = NEW.batch_id),
+        used = used + (SELECT used FROM batch_stock WHERE batch_id = NEW.batch_id),
+        cancelled = cancelled + (SELECT cancelled FROM batch_stock WHERE batch_id = NEW.batch_id)
+    WHERE package_id = NEW.package_id
+    AND EXISTS (SELECT 1 FROM batch_stock WHERE batch_id = NEW.batch_id);
+
+    UPDATE batch_stock SET package_id = NEW.package_id WHERE batch_id = NEW.batch_id;
+END;
+
+-- Trigger: trg_categories_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_delete
+AFTER DELETE ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', OLD.category_id, 'D', NULL, NULL);
+END;
+
+-- Trigger: trg_categories_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_insert
+AFTER INSERT ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', NEW.category_id, 'I', NULL, NULL);
+END;
+
+-- Trigger: trg_categories_log_update
+CREATE TRIGGER IF NOT EXISTS trg_categories_log_update
+AFTER UPDATE ON categories
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('categories', NEW.category_id, 'U', NULL, NULL);
+END;
+
+-- Trigger: trg_items_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_items_log_delete
+AFTER DELETE ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', OLD.item_id, 'D', NULL, OLD.package_id);
+END;
+
+-- Trigger: trg_items_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_items_log_insert
+AFTER INSERT ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', NEW.item_id, 'I', NULL, NEW.package_id);
+END;
+
+-- Trigger: trg_items_log_update
+CREATE TRIGGER IF NOT EXISTS trg_items_log_update
+AFTER UPDATE ON items
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('items', NEW.item_id, 'U', NULL, NEW.package_id);
+END;
+
+-- Trigger: trg_labels_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_delete
+AFTER DELETE ON labels
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', OLD.label_id, 'D', OLD.batch_id, (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id));
+END;
+
+-- Trigger: trg_labels_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', NEW.label_id, 'I', NEW.batch_id, (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id));
+END;
+
+-- Trigger: trg_labels_log_update
+CREATE TRIGGER IF NOT EXISTS trg_labels_log_update
+AFTER UPDATE ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.unloaded IS NOT NEW.unloaded OR OLD.batch_id IS NOT NEW.batch_id
+  OR OLD.loaded IS NOT NEW.loaded OR OLD.tick IS NOT NEW.tick
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('labels', NEW.label_id, CASE WHEN NEW.status = 0 AND OLD.status IS NOT 0 THEN 'X' ELSE 'U' END,
+            NEW.batch_id, (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id));
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    SELECT 'labels', OLD.label_id, 'U', OLD.batch_id, (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    WHERE OLD.batch_id IS NOT NEW.batch_id;
+END;
+
+-- Trigger: trg_labels_movements_delete
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_delete
+AFTER DELETE ON labels
+BEGIN
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count - 1,
+        cancelled_count = cancelled_count - (OLD.status = -1)
+    WHERE day = OLD.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count - 1,
+        residence_count = residence_count - (OLD.loaded IS NOT NULL),
+        residence_days = residence_days - COALESCE(julianday(OLD.unloaded) - julianday(OLD.loaded), 0)
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    -- The label was the shortest or longest stay of its day: recount them
+    UPDATE label_movements_daily SET
+        min_residence = (
+            SELECT MIN(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        ),
+        max_residence = (
+            SELECT MAX(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        )
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND julianday(OLD.unloaded) - julianday(OLD.loaded) IN (min_residence, max_residence);
+
+    DELETE FROM label_movements_daily
+    WHERE day IN (OLD.loaded, OLD.unloaded)
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND loaded_count = 0 AND unloaded_count = 0;
+END;
+
+-- Trigger: trg_labels_movements_insert
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.loaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count + 1,
+        cancelled_count = cancelled_count + (NEW.status = -1)
+    WHERE day = NEW.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.unloaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.status = 0 AND NEW.unloaded IS NOT NULL
+    AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count + 1,
+        residence_count = residence_count + (NEW.loaded IS NOT NULL),
+        residence_days = residence_days + COALESCE(julianday(NEW.unloaded) - julianday(NEW.loaded), 0),
+        min_residence = COALESCE(MIN(min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+        max_residence = COALESCE(MAX(max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded))
+    WHERE NEW.status = 0 AND NEW.loaded IS NOT NULL AND day = NEW.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+-- Trigger: trg_labels_movements_update
+CREATE TRIGGER IF NOT EXISTS trg_labels_movements_update
+AFTER UPDATE OF batch_id, status, loaded, unloaded ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.batch_id IS NOT NEW.batch_id
+  OR OLD.loaded IS NOT NEW.loaded OR OLD.unloaded IS NOT NEW.unloaded
+BEGIN
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count - 1,
+        cancelled_count = cancelled_count - (OLD.status = -1)
+    WHERE day = OLD.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count - 1,
+        residence_count = residence_count - (OLD.loaded IS NOT NULL),
+        residence_days = residence_days - COALESCE(julianday(OLD.unloaded) - julianday(OLD.loaded), 0)
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    -- The label was the shortest or longest stay of its day: recount them
+    UPDATE label_movements_daily SET
+        min_residence = (
+            SELECT MIN(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        ),
+        max_residence = (
+            SELECT MAX(julianday(lb.unloaded) - julianday(lb.loaded))
+            FROM batches b
+            JOIN labels lb ON lb.batch_id = b.batch_id
+            WHERE b.package_id = label_movements_daily.package_id
+            AND lb.status = 0 AND lb.unloaded = label_movements_daily.day
+        )
+    WHERE OLD.status = 0 AND OLD.loaded IS NOT NULL AND day = OLD.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND julianday(OLD.unloaded) - julianday(OLD.loaded) IN (min_residence, max_residence);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.loaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        loaded_count = loaded_count + 1,
+        cancelled_count = cancelled_count + (NEW.status = -1)
+    WHERE day = NEW.loaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    INSERT OR IGNORE INTO label_movements_daily (day, package_id)
+    SELECT NEW.unloaded, package_id FROM batches
+    WHERE batch_id = NEW.batch_id AND NEW.status = 0 AND NEW.unloaded IS NOT NULL
+    AND NEW.loaded IS NOT NULL;
+    UPDATE label_movements_daily SET
+        unloaded_count = unloaded_count + 1,
+        residence_count = residence_count + (NEW.loaded IS NOT NULL),
+        residence_days = residence_days + COALESCE(julianday(NEW.unloaded) - julianday(NEW.loaded), 0),
+        min_residence = COALESCE(MIN(min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 min_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+        max_residence = COALESCE(MAX(max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded)),
+                                 max_residence, julianday(NEW.unloaded) - julianday(NEW.loaded))
+    WHERE NEW.status = 0 AND NEW.loaded IS NOT NULL AND day = NEW.unloaded
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+
+    DELETE FROM label_movements_daily
+    WHERE day IN (OLD.loaded, OLD.unloaded)
+    AND package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id)
+    AND loaded_count = 0 AND unloaded_count = 0;
+END;
+
+-- Trigger: trg_labels_stock_delete
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_delete
+AFTER DELETE ON labels
+BEGIN
+    UPDATE batch_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE batch_id = OLD.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+END;
+
+-- Trigger: trg_labels_stock_insert
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_insert
+AFTER INSERT ON labels
+BEGIN
+    INSERT OR IGNORE INTO batch_stock (batch_id, package_id)
+    SELECT batch_id, package_id FROM batches WHERE batch_id = NEW.batch_id;
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT package_id FROM batches WHERE batch_id = NEW.batch_id;
+
+    UPDATE batch_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE batch_id = NEW.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+-- Trigger: trg_labels_stock_update
+CREATE TRIGGER IF NOT EXISTS trg_labels_stock_update
+AFTER UPDATE OF batch_id, status ON labels
+WHEN OLD.status IS NOT NEW.status OR OLD.batch_id IS NOT NEW.batch_id
+BEGIN
+    UPDATE batch_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE batch_id = OLD.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock - (OLD.status = 1),
+        used = used - (OLD.status = 0),
+        cancelled = cancelled - (OLD.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = OLD.batch_id);
+
+    INSERT OR IGNORE INTO batch_stock (batch_id, package_id)
+    SELECT batch_id, package_id FROM batches WHERE batch_id = NEW.batch_id;
+    INSERT OR IGNORE INTO package_stock (package_id)
+    SELECT package_id FROM batches WHERE batch_id = NEW.batch_id;
+
+    UPDATE batch_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE batch_id = NEW.batch_id;
+    UPDATE package_stock SET
+        in_stock = in_stock + (NEW.status = 1),
+        used = used + (NEW.status = 0),
+        cancelled = cancelled + (NEW.status = -1)
+    WHERE package_id = (SELECT package_id FROM batches WHERE batch_id = NEW.batch_id);
+END;
+
+-- Trigger: trg_packages_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_delete
+AFTER DELETE ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', OLD.package_id, 'D', NULL, OLD.package_id);
+END;
+
+-- Trigger: trg_packages_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_insert
+AFTER INSERT ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', NEW.package_id, 'I', NULL, NEW.package_id);
+END;
+
+-- Trigger: trg_packages_log_update
+CREATE TRIGGER IF NOT EXISTS trg_packages_log_update
+AFTER UPDATE ON packages
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('packages', NEW.package_id, 'U', NULL, NEW.package_id);
+END;
+
+-- Trigger: trg_packages_movements_delete
+CREATE TRIGGER IF NOT EXISTS trg_packages_movements_delete
+AFTER DELETE ON packages
+BEGIN
+    DELETE FROM label_movements_daily WHERE package_id = OLD.package_id;
+END;
+
+-- Trigger: trg_packages_stock_delete
+CREATE TRIGGER IF NOT EXISTS trg_packages_stock_delete
+AFTER DELETE ON packages
+BEGIN
+    DELETE FROM package_stock WHERE package_id = OLD.package_id;
+END;
+
+-- Trigger: trg_products_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_products_log_delete
+AFTER DELETE ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', OLD.product_id, 'D', NULL, NULL);
+END;
+
+-- Trigger: trg_products_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_products_log_insert
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', NEW.product_id, 'I', NULL, NULL);
+END;
+
+-- Trigger: trg_products_log_update
+CREATE TRIGGER IF NOT EXISTS trg_products_log_update
+AFTER UPDATE ON products
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('products', NEW.product_id, 'U', NULL, NULL);
+END;
+
+-- Trigger: trg_requests_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_delete
+AFTER DELETE ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', OLD.request_id, 'D', NULL, NULL);
+END;
+
+-- Trigger: trg_requests_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_insert
+AFTER INSERT ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', NEW.request_id, 'I', NULL, NULL);
+END;
+
+-- Trigger: trg_requests_log_update
+CREATE TRIGGER IF NOT EXISTS trg_requests_log_update
+AFTER UPDATE ON requests
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('requests', NEW.request_id, 'U', NULL, NULL);
+END;
+
+-- Trigger: trg_suppliers_log_delete
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_delete
+AFTER DELETE ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', OLD.supplier_id, 'D', NULL, NULL);
+END;
+
+-- Trigger: trg_suppliers_log_insert
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_insert
+AFTER INSERT ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', NEW.supplier_id, 'I', NULL, NULL);
+END;
+
+-- Trigger: trg_suppliers_log_update
+CREATE TRIGGER IF NOT EXISTS trg_suppliers_log_update
+AFTER UPDATE ON suppliers
+BEGIN
+    INSERT INTO change_log (table_name, pk, op, batch_id, package_id)
+    VALUES ('suppliers', NEW.supplier_id, 'U', NULL, NULL);
+END;
+
 -- View: v_expiring
 CREATE VIEW IF NOT EXISTS v_expiring AS
 SELECT 
@@ -250,13 +801,12 @@ SELECT
     b.description AS lot,
     b.expiration,
     CAST(julianday(b.expiration) - julianday('now') AS INTEGER) AS days_left,
-    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS labels_in_stock
+    COALESCE(bs.in_stock, 0) AS labels_in_stock
 FROM batches b
 JOIN packages pk ON pk.package_id = b.package_id
 JOIN products p ON p.product_id = pk.product_id
-LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
 WHERE b.expiration IS NOT NULL
-GROUP BY b.batch_id
 ORDER BY b.expiration;
 
 -- View: v_open_requests
@@ -286,17 +836,15 @@ SELECT
     s.description AS supplier,
     c.description AS category,
     l.description AS location,
-    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock,
-    COUNT(CASE WHEN lb.status = 0 THEN 1 END) AS used,
-    COUNT(CASE WHEN lb.status = -1 THEN 1 END) AS cancelled
+    COALESCE(ps.in_stock, 0) AS in_stock,
+    COALESCE(ps.used, 0) AS used,
+    COALESCE(ps.cancelled, 0) AS cancelled
 FROM products p
 JOIN packages pk ON pk.product_id = p.product_id
 LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
 LEFT JOIN categories c ON c.category_id = pk.category_id
 LEFT JOIN locations l ON l.location_id = pk.location_id
-LEFT JOIN batches b ON b.package_id = pk.package_id
-LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-GROUP BY pk.package_id;
+LEFT JOIN package_stock ps ON ps.package_id = pk.package_id;
 
 COMMIT TRANSACTION;
 PRAGMA foreign_keys = on;
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+catalog.CatalogIndex against a scan of the active packages.
+
+The reference reads every active package and checks every word of the
+term against the words of its fields: three or more characters anywhere
+inside a word, shorter ones at its beginning (the rule of catalog.py,
+without the trigram and prefix indexes), sorted by product, supplier,
+packaging and id.
+
+The terms are cut from the indexed text (inside words, prefixes of one
+and two characters, several words, other case and accents) plus some
+that match nothing. After changes to packages, products and suppliers,
+refresh() with the changed ids must give the same index as a new load().
+
+The products of the Generator dataset are renamed from a small word
+list with accents and shared prefixes, so that words match many
+packages in different ways.
+
+Run from the repository root:
+    python -m pytest -q tests
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import datetime
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbms import DBMS
+from controller import Controller
+from generate_dataset import Generator
+from catalog import FIELDS, SQL_CATALOG, CatalogIndex, normalize, tokenize
+
+END = datetime.date(2025, 6, 30)
+
+WORDS = ["Glucose", "Glucosio", "Sodium", "chloride", "Élite", "Würze", "Acido", "acetico",
+         "Tampone", "PBS", "Reagent", "Reagenti", "Kit", "Anti-HBs", "Calibrator", "crème",
+         "Ethanol", "Etanolo", "ÆTHER", "pH"]
+
+MODES = list(FIELDS)
+
+
+class _TestDB(DBMS, Controller):
+    """DBMS with the Controller queries, as the background worker."""
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog") / "catalog.db")
+    Generator(packages=300, labels=500, deliveries=50, days=60, seed=5, end=END).build(path)
+
+    db = _TestDB(database=path)
+    rng = random.Random(5)
+    for row in db.read(True, "SELECT product_id FROM products"):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3))) + f" {rng.randint(1, 999)}"
+        db.write("UPDATE products SET description = ? WHERE product_id = ?", (name, row["product_id"]))
+    yield db
+    db.close()
+
+
+def active_rows(db):
+    return db.read(True, SQL_CATALOG + " WHERE pk.status = 1 AND p.status = 1")
+
+
+def reference_search(rows, term, mode, category_id=None):
+    """Package ids matching every word of the term, scanning all the rows."""
+    words = tokenize(term)
+    if not words:
+        return []
+
+    matches = []
+    for row in rows:
+        if category_id and row["category_id"] != category_id:
+            continue
+        tokens = [token for field in FIELDS[mode] for token in tokenize(row[field])]
+        if all(any(word in token if len(word) >= 3 else token.startswith(word) for token in tokens)
+               for word in words):
+            matches.append(row)
+
+    matches.sort(key=lambda row: (normalize(row["product"]), normalize(row["supplier"]),
+                                  normalize(row["packaging"]), row["package_id"]))
+    return [row["package_id"] for row in matches]
+
+
+def sample_terms(rows, rng, n=60):
+    """Search terms cut from the text of random packages, and a few misses."""
+    terms = ["zzz", "qx", "glucose zzz", "", "  ", "-", "é"]
+    for _ in range(n):
+        row = rng.choice(rows)
+        tokens = [token for field in FIELDS[rng.choice(MODES)] for token in tokenize(row[field])]
+        words = []
+        for token in rng.sample(tokens, min(len(tokens), rng.randint(1, 2))):
+            kind = rng.random()
+            if kind < 0.3 or len(token) < 3:
+                words.append(token[:rng.randint(1, 2)])
+            else:
+                start = rng.randint(0, len(token) - 3)
+                words.append(token[start:rng.randint(start + 3, len(token))])
+        term = " ".join(words)
+        terms.append(term.upper() if rng.random() < 0.2 else term)
+    return terms
+
+
+def assert_same_index(catalog, db, terms):
+    rows = active_rows(db)
+    assert set(catalog.entries) == {row["package_id"] for row in rows}
+    for mode in MODES:
+        for term in terms:
+            assert catalog.search(term, mode) == reference_search(rows, term, mode), (term, mode)
+
+
+def test_normalize():
+    assert normalize("Élite") == "elite"
+    assert normalize("WÜRZE crème") == "wurze creme"
+    assert tokenize("Anti-HBs 10 x 5 ml") == ["anti", "hbs", "10", "x", "5", "ml"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_search_matches_scan(db, mode):
+    rows = active_rows(db)
+    catalog = CatalogIndex.load(db)
+    assert len(catalog) == len(rows)
+
+    for term in sample_terms(rows, random.Random(mode)):
+        assert catalog.search(term, mode) == reference_search(rows, term, mode), term
+
+
+def test_search_cases(db):
+    rows = active_rows(db)
+    catalog = CatalogIndex.load(db)
+
+    # Accents folded both ways, inside words and as prefixes
+    for term in ("elite", "ÉLITE", "wurz", "CRÈME", "æther", "Æt", "gluc", "GL", "ucos", "hbs"):
+        expected = reference_search(rows, term, "name")
+        assert expected, term
+        assert catalog.search(term, "name") == expected, term
+
+    # Shorter words only match the beginning of a word
+    assert catalog.search("lu", "name") == reference_search(rows, "lu", "name") == []
+
+    # Category filter and limit
+    category_id = rows[0]["category_id"]
+    expected = reference_search(rows, "gluc", "all", category_id)
+    assert expected
+    assert catalog.search("gluc", "all", category_id=category_id) == expected
+    assert catalog.search("gluc", "all", category_id=category_id, limit=3) == expected[:3]
+
+
+def test_refresh(db):
+    catalog = CatalogIndex.load(db)
+    rows = active_rows(db)
+    rng = random.Random(9)
+
+    packages = [row["package_id"] for row in rows]
+    products = sorted({row["product_id"] for row in rows})
+    suppliers = sorted({row["supplier_id"] for row in rows})
+
+    # Searched before: the prefix vocabulary is built and must follow the changes
+    terms = sample_terms(rows, rng) + ["zymase", "wurze labs", "zx", "flacone", "new"]
+    assert_same_index(catalog, db, terms)
+    words = {token for row in rows for mode in MODES for field in FIELDS[mode]
+             for token in tokenize(row[field])}
+
+    # Text changed: a product (all its packages), a supplier, a package
+    renamed_product, renamed_supplier = rng.choice(products), rng.choice(suppliers)
+    db.write("UPDATE products SET description = 'Zymase Élite 42' WHERE product_id = ?",
+             (renamed_product,))
+    db.write("UPDATE suppliers SET description = 'Würze Labs' WHERE supplier_id = ?",
+             (renamed_supplier,))
+    repacked = rng.choice(packages)
+    db.write("UPDATE packages SET packaging = '6 x 250 ml', reference = 'ZX-9' WHERE package_id = ?",
+             (repacked,))
+    # Left the list: a package and a product deactivated
+    dropped_package = rng.choice(packages)
+    db.write("UPDATE packages SET status = 0 WHERE package_id = ?", (dropped_package,))
+    dropped_product = rng.choice(products)
+    db.write("UPDATE products SET status = 0 WHERE product_id = ?", (dropped_product,))
+    # Came back: an inactive package
+    restored = db.read(False, "SELECT pk.package_id FROM packages pk JOIN products p "
+                              "ON p.product_id = pk.product_id WHERE pk.status = 0 AND p.status = 1 "
+                              "AND pk.package_id != ?", (dropped_package,))
+    db.write("UPDATE packages SET status = 1 WHERE package_id = ?", (restored["package_id"],))
+    # New package
+    added = db.write("INSERT INTO packages (product_id, supplier_id, reference, packaging, category_id) "
+                     "SELECT product_id, supplier_id, 'NEW-1', 'Flacone 1 l', category_id "
+                     "FROM packages WHERE package_id = ?", (packages[0],))
+
+    changed_packages = (repacked, dropped_package, restored["package_id"], added)
+    changed = catalog.refresh(db, package_ids=changed_packages,
+                              product_ids=(renamed_product, dropped_product),
+                              supplier_ids=(renamed_supplier,))
+    assert changed > len(changed_packages)
+
+    # The words no longer indexed, as prefixes
+    words -= {token for row in active_rows(db) for mode in MODES for field in FIELDS[mode]
+              for token in tokenize(row[field])}
+    assert words
+    terms += sorted({word[:n] for word in words for n in (1, 2)})
+    assert_same_index(catalog, db, terms)
+    assert catalog.entries == CatalogIndex.load(db).entries
+    assert catalog.search("zymase elite", "name")
+    assert catalog.search("zx", "code") == [repacked]
+
+    # Unchanged rows are not indexed again
+    assert catalog.refresh(db, package_ids=changed_packages) == 0
+    assert catalog.refresh(db, package_ids=()) == 0
+
+    # Deleted package, requested by id: its words leave the prefix lookup
+    db.write("DELETE FROM packages WHERE package_id = ?", (added,))
+    assert catalog.refresh(db, package_ids=(added,)) == 1
+    assert added not in catalog.entries
+    assert_same_index(catalog, db, ["fl", "fla", "flacone", "ne"])
+
+    # Full refresh: every package read and compared
+    db.write("UPDATE products SET description = 'Glucose 5%' WHERE product_id = ?", (products[1],))
+    assert catalog.refresh(db) >= 1
+    assert_same_index(catalog, db, terms + ["glucose 5"])
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+fefo.analyse_fefo against a brute-force reading of the FEFO rule.
+
+The reference applies the definition of fefo.py to every unload on its
+own, with no heap: an unload is a violation when another label of the
+same package, with an earlier expiration, had been loaded by then (on
+the same day counts) and had not been unloaded yet. Of two labels
+unloaded on the same day the earlier expiring goes first, so it is not
+in stock for the other one.
+
+The sweep is checked on random label sets with few dates and few
+expirations (many ties and repeated expirations, which the lazy heap
+deletion must handle), then analyse_fefo on a small Generator dataset
+with some labels without expiration or load date.
+
+Run from the repository root:
+    python -m pytest -q tests
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import datetime
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbms import DBMS
+from controller import Controller
+from generate_dataset import Generator
+from fefo import SQL_FEFO_LABELS, SQL_FEFO_PACKAGES, analyse_fefo, count_violations
+
+END = datetime.date(2025, 6, 30)
+
+
+class _TestDB(DBMS, Controller):
+    """DBMS with the Controller queries, as the background worker."""
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("fefo") / "fefo.db")
+    Generator(packages=40, labels=4000, deliveries=300, days=240, seed=11, end=END).build(path)
+
+    db = _TestDB(database=path)
+    db.write("UPDATE batches SET expiration = NULL WHERE batch_id % 13 = 0")
+    db.write("UPDATE labels SET loaded = NULL WHERE label_id % 97 = 0")
+    yield db
+    db.close()
+
+
+def brute_violations(labels):
+    """(unloaded, violations) of one package, checking every unload against every label."""
+    unloaded = 0
+    violations = 0
+    for i, label in enumerate(labels):
+        if label["status"] != 0 or not label["unloaded"]:
+            continue
+        unloaded += 1
+        day, expiration = label["unloaded"], label["expiration"]
+        if not expiration:
+            continue
+        for j, other in enumerate(labels):
+            if j == i or not other["expiration"] or other["expiration"] >= expiration:
+                continue
+            loaded = (other["loaded"] or "") <= day
+            gone = other["status"] == 0 and other["unloaded"] and other["unloaded"] <= day
+            if loaded and not gone:
+                violations += 1
+                break
+    return unloaded, violations
+
+
+def random_labels(rng, n):
+    """Labels of one package over a few days and expirations."""
+    days = [f"2025-01-{d:02d}" for d in range(1, 8)]
+    expirations = [None, "2025-03-01", "2025-04-01", "2025-05-01", "2025-06-01"]
+    labels = []
+    for _ in range(n):
+        loaded = rng.choice(days)
+        status = rng.choice((0, 0, 1))
+        labels.append({
+            "expiration": rng.choice(expirations),
+            "loaded": None if rng.random() < 0.05 else loaded,
+            "unloaded": rng.choice([d for d in days if d >= loaded]) if status == 0 else None,
+            "status": status,
+        })
+    return labels
+
+
+def test_lazy_deletion():
+    """The earliest expiration in stock was unloaded already: no violation after it."""
+    labels = [
+        {"expiration": "2025-03-01", "loaded": "2025-01-01", "unloaded": "2025-01-02", "status": 0},
+        {"expiration": "2025-03-01", "loaded": "2025-01-01", "unloaded": "2025-01-05", "status": 0},
+        {"expiration": "2025-04-01", "loaded": "2025-01-01", "unloaded": "2025-01-03", "status": 0},
+        {"expiration": "2025-05-01", "loaded": "2025-01-01", "unloaded": "2025-01-06", "status": 0},
+    ]
+    # 2025-01-03: one 03-01 label still in stock -> violation; 01-05 and
+    # 01-06 unload the earliest left
+    assert count_violations(labels) == (4, 1) == brute_violations(labels)
+
+
+def test_same_day_unloads():
+    """Unloading an old and a new label on the same day is not a violation."""
+    labels = [
+        {"expiration": "2025-05-01", "loaded": "2025-01-01", "unloaded": "2025-01-02", "status": 0},
+        {"expiration": "2025-03-01", "loaded": "2025-01-01", "unloaded": "2025-01-02", "status": 0},
+    ]
+    assert count_violations(labels) == (2, 0) == brute_violations(labels)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_sweep_matches_brute_force(seed):
+    rng = random.Random(seed)
+    labels = random_labels(rng, rng.randint(1, 60))
+    assert count_violations(labels) == brute_violations(labels)
+
+
+def brute_analysis(db, min_unloaded):
+    """Per package, category and supplier totals, from the brute-force counts."""
+    packages = {row["package_id"]: row for row in db.read(True, SQL_FEFO_PACKAGES)}
+    by_package = {}
+    for row in db.read(True, SQL_FEFO_LABELS):
+        by_package.setdefault(row["package_id"], []).append(row)
+
+    records = {}
+    categories = {}
+    suppliers = {}
+    for package_id, labels in by_package.items():
+        unloaded, violations = brute_violations(labels)
+        if unloaded < min_unloaded:
+            continue
+        records[package_id] = (unloaded, violations)
+        info = packages[package_id]
+        for totals, key in ((categories, info["category"] or ""), (suppliers, info["supplier"] or "")):
+            counts = totals.setdefault(key, [0, 0])
+            counts[0] += unloaded
+            counts[1] += violations
+    return records, categories, suppliers
+
+
+def test_dataset_covers_the_cases(db):
+    result = analyse_fefo(db)
+    assert any(r["violations"] for r in result["packages"])
+    assert any(not r["violations"] for r in result["packages"])
+
+
+@pytest.mark.parametrize("min_unloaded", [0, 2, 100])
+def test_analysis_matches_brute_force(db, min_unloaded):
+    records, categories, suppliers = brute_analysis(db, min_unloaded)
+    result = analyse_fefo(db, min_unloaded=min_unloaded)
+
+    assert {r["package_id"]: (r["unloaded"], r["violations"]) for r in result["packages"]} == records
+    for name, expected in (("categories", categories), ("suppliers", suppliers)):
+        assert {r["key"]: [r["unloaded"], r["violations"]] for r in result[name]} == expected, name
+
+    for records in result.values():
+        for r in records:
+            assert r["correct"] == r["unloaded"] - r["violations"]
+            pct = round(r["correct"] / r["unloaded"] * 100, 1) if r["unloaded"] else 100
+            assert r["fefo_pct"] == pct
+        # Worst efficiency first
+        assert [r["fefo_pct"] for r in records] == sorted(r["fefo_pct"] for r in records)
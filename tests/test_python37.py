@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+The application still imports on Python 3.7, the interpreter of the
+Windows build (see README, Production Environment).
+
+The modules are imported by a python3.7 interpreter (PYTHON37 to use
+another path); the tests are skipped where there is none, e.g. with
+pyenv:
+    PYENV_VERSION=3.11.7:3.7.16 python -m pytest -q tests
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import os
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PYTHON37 = os.environ.get("PYTHON37", "python3.7")
+
+# The main window imports every view; the scripts import forecast
+MODULES = ["views.main", "generate_dataset", "benchmark", "forecast", "quantiles",
+           "fefo", "catalog", "change_feed", "query_executor"]
+
+
+def _run(*args):
+    return subprocess.run([PYTHON37, *args], cwd=ROOT, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, universal_newlines=True)
+
+
+def _available():
+    try:
+        result = _run("-c", "import sys; assert sys.version_info[:2] == (3, 7)")
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+pytestmark = pytest.mark.skipif(not _available(), reason="no Python 3.7 interpreter")
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_imports(module):
+    result = _run("-c", f"import {module}")
+    assert result.returncode == 0, result.stdout
+
+
+def test_forecast_z_score():
+    result = _run("-c", "import forecast; print(round(forecast._z_score(0.95), 6))")
+    assert result.returncode == 0, result.stdout
+    assert result.stdout.strip() == "1.644854"
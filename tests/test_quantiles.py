@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+quantiles.Durations against plain sorted lists.
+
+The reference keeps every value: quantiles interpolate between the
+closest ranks of the sorted list (as the exact mode does), and a
+sketched quantile must be within RELATIVE_ACCURACY of the value at its
+rank. Count, mean, min and max are exact in both modes.
+
+Covered: the switch from exact values to the sketch past EXACT_LIMIT,
+zeros (counted apart by the sketch), and merge() of every combination
+of exact and sketched accumulators, including two exact ones that end
+up past the limit together.
+
+Run from the repository root:
+    python -m pytest -q tests
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantiles import EXACT_LIMIT, PERCENTILES, RELATIVE_ACCURACY, Durations
+
+QS = (0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1)
+
+
+def reference_quantile(values, q):
+    """Linear interpolation between the closest ranks of the sorted values."""
+    values = sorted(values)
+    position = q * (len(values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def durations(values):
+    d = Durations()
+    for value in values:
+        d.add(value)
+    return d
+
+
+def random_days(rng, n, zeros=0.05):
+    """Turnaround-like durations: mostly a few days, a long tail, some zeros."""
+    return [0 if rng.random() < zeros else round(rng.lognormvariate(1.5, 1.0), 3)
+            for _ in range(n)]
+
+
+def check(d, values):
+    """d holds exactly the values: exact quantiles, or within the sketch accuracy."""
+    assert d.count == len(values)
+    assert d.min == min(values) and d.max == max(values)
+    assert d.mean == pytest.approx(sum(values) / len(values))
+
+    ordered = sorted(values)
+    for q, got in zip(QS, d.quantiles(QS)):
+        if d.exact:
+            assert got == pytest.approx(reference_quantile(values, q)), q
+        else:
+            # The bucket holding the value at the rank, the sketch does not interpolate
+            expected = ordered[math.floor(q * (len(values) - 1))]
+            assert abs(got - expected) <= RELATIVE_ACCURACY * expected + 1e-9, (q, got, expected)
+
+
+def test_empty():
+    d = Durations()
+    assert d.quantile(0.5) is None and d.mean is None
+    assert d.summary() == {"count": 0, "mean": None, "min": None, "max": None,
+                           **{name: None for name in PERCENTILES}}
+
+
+def test_docstring_example():
+    d = durations((1, 2, 3, 40))
+    assert d.quantile(0.5) == 2.5
+    assert round(d.summary()["p95"], 2) == 34.45
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, EXACT_LIMIT])
+def test_exact(n):
+    values = random_days(random.Random(n), n)
+    d = durations(values)
+    assert d.exact
+    check(d, values)
+
+
+def test_switch_to_sketch():
+    values = random_days(random.Random(1), EXACT_LIMIT + 1)
+    d = durations(values[:-1])
+    assert d.exact
+    d.add(values[-1])
+    assert not d.exact and d.values is None
+    check(d, values)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sketch(seed):
+    rng = random.Random(seed)
+    values = random_days(rng, rng.randint(EXACT_LIMIT + 1, 20000))
+    d = durations(values)
+    assert not d.exact
+    check(d, values)
+    # The memory does not grow with the values
+    assert len(d.buckets) < 1000
+
+
+def test_sketch_zeros():
+    """Mostly zeros: the low quantiles come from the zero count, not a bucket."""
+    values = [0] * 1500 + [5.0] * 500
+    d = durations(values)
+    assert d.quantiles((0, 0.5, 0.74)) == [0, 0, 0]
+    assert d.quantile(0.8) == pytest.approx(5.0, rel=RELATIVE_ACCURACY)
+    check(d, values)
+
+
+@pytest.mark.parametrize("left, right", [
+    (10, 20),                              # exact + exact, still exact
+    (EXACT_LIMIT // 2, EXACT_LIMIT),       # exact + exact, past the limit together
+    (300, 5000),                           # exact + sketch
+    (5000, 300),                           # sketch + exact
+    (3000, 4000),                          # sketch + sketch
+    (0, 3000),                             # empty + sketch
+    (3000, 0),                             # sketch + empty
+])
+def test_merge(left, right):
+    rng = random.Random(left * 7 + right)
+    a_values, b_values = random_days(rng, left), random_days(rng, right)
+    a, b = durations(a_values), durations(b_values)
+
+    merged = a.merge(b)
+    assert merged is a
+    values = a_values + b_values
+    check(merged, values)
+    assert merged.exact == (len(values) <= EXACT_LIMIT)
+
+    # Same answer as one accumulator fed the whole stream
+    single = durations(values)
+    assert merged.exact == single.exact
+    assert merged.quantiles(QS) == pytest.approx(single.quantiles(QS))
+
+
+def test_merge_keeps_other():
+    """The merged accumulator is not changed."""
+    a, b = durations(random_days(random.Random(2), 50)), durations(random_days(random.Random(3), 3000))
+    before = (b.count, b.total, dict(b.buckets), b.zeros)
+    a.merge(b)
+    assert (b.count, b.total, dict(b.buckets), b.zeros) == before
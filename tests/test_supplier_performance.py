@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Controller.get_supplier_performance against the per-supplier loop it replaced.
+
+The reference is the loop of stats_suppliers.fetch_data before the
+grouped query: one query for the orders of each supplier, then two per
+supplier for its deliveries and turnaround times (sql2/sql3, with the
+min/max TAT added to sql3). The display rounding of the window is left
+out, so both sides return the raw values.
+
+The database is a small Generator dataset with a few deliveries
+cancelled and a supplier deactivated.
+
+Run from the repository root:
+    python -m pytest -q tests
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbms import DBMS
+from controller import Controller
+from generate_dataset import Generator
+
+END = datetime.date(2025, 6, 30)
+
+PERIODS = [
+    ("2024-07-01", "2025-06-30"),   # whole history
+    ("2025-01-01", "2025-03-31"),   # a quarter
+    ("2025-06-01", "2025-06-07"),   # a week, deliveries of older requests
+    ("2025-06-30", "2025-06-30"),   # one day
+    ("2019-01-01", "2019-12-31"),   # empty
+]
+
+
+class _TestDB(DBMS, Controller):
+    """DBMS with the Controller queries, as the background worker."""
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("suppliers") / "performance.db")
+    Generator(packages=60, labels=3000, deliveries=600, days=365, seed=7, end=END).build(path)
+
+    db = _TestDB(database=path)
+    db.write("UPDATE deliveries SET status = 0 WHERE delivery_id % 17 = 0")
+    db.write("UPDATE suppliers SET status = 0 WHERE supplier_id = "
+             "(SELECT MAX(supplier_id) FROM suppliers)")
+    yield db
+    db.close()
+
+
+def loop_performance(db, date_from, date_to):
+    """The per-supplier loop replaced by get_supplier_performance()."""
+    sql = """
+        SELECT
+            s.supplier_id,
+            s.description AS supplier,
+            COUNT(DISTINCT r.request_id) AS orders,
+            SUM(i.quantity) AS items_ordered,
+            COUNT(DISTINCT pk.package_id) AS products
+        FROM suppliers s
+        JOIN packages pk ON pk.supplier_id = s.supplier_id
+        JOIN items i ON i.package_id = pk.package_id
+        JOIN requests r ON r.request_id = i.request_id
+        WHERE r.issued >= ? AND r.issued <= ?
+        AND s.status = 1
+        GROUP BY s.supplier_id
+        ORDER BY items_ordered DESC
+    """
+    rs = db.read(True, sql, (date_from, date_to))
+
+    if not rs:
+        return []
+
+    data = []
+    for row in rs:
+        supplier_id = row["supplier_id"]
+
+        sql2 = """
+            SELECT SUM(d.quantity) AS delivered
+            FROM deliveries d
+            JOIN items i ON i.item_id = d.item_id
+            JOIN packages pk ON pk.package_id = i.package_id
+            WHERE pk.supplier_id = ? AND d.status = 1
+            AND d.delivered >= ? AND d.delivered <= ?
+        """
+        r2 = db.read(False, sql2, (supplier_id, date_from, date_to))
+        items_delivered = r2["delivered"] if r2 and r2["delivered"] else 0
+
+        sql3 = """
+            SELECT
+                AVG(julianday(d.delivered) - julianday(r.issued)) AS avg_tat,
+                MIN(julianday(d.delivered) - julianday(r.issued)) AS min_tat,
+                MAX(julianday(d.delivered) - julianday(r.issued)) AS max_tat
+            FROM deliveries d
+            JOIN items i ON i.item_id = d.item_id
+            JOIN requests r ON r.request_id = i.request_id
+            JOIN packages pk ON pk.package_id = i.package_id
+            WHERE pk.supplier_id = ? AND d.status = 1
+            AND d.delivered >= ? AND d.delivered <= ?
+        """
+        r3 = db.read(False, sql3, (supplier_id, date_from, date_to))
+
+        items_ordered = row["items_ordered"] or 0
+        completion = round((items_delivered / items_ordered * 100), 1) if items_ordered > 0 else 0
+
+        data.append({
+            "supplier_id": supplier_id,
+            "supplier": row["supplier"],
+            "orders": row["orders"],
+            "items_ordered": items_ordered,
+            "items_delivered": items_delivered,
+            "completion": completion,
+            "avg_tat": r3["avg_tat"],
+            "min_tat": r3["min_tat"],
+            "max_tat": r3["max_tat"],
+            "products": row["products"]
+        })
+
+    return data
+
+
+def test_dataset_covers_the_cases(db):
+    """The seeded database has cancelled deliveries and an inactive supplier with orders."""
+    assert db.read(False, "SELECT COUNT(*) AS n FROM deliveries WHERE status = 0")["n"] > 0
+    sql = """
+        SELECT COUNT(*) AS n
+        FROM items i
+        JOIN packages pk ON pk.package_id = i.package_id
+        JOIN suppliers s ON s.supplier_id = pk.supplier_id
+        WHERE s.status = 0
+    """
+    assert db.read(False, sql)["n"] > 0
+
+
+@pytest.mark.parametrize("date_from, date_to", PERIODS[:-1])
+def test_matches_loop(db, date_from, date_to):
+    expected = loop_performance(db, date_from, date_to)
+    rs = db.get_supplier_performance(date_from, date_to)
+
+    assert expected
+    assert sorted(r["supplier_id"] for r in rs) == sorted(r["supplier_id"] for r in expected)
+
+    by_supplier = {r["supplier_id"]: r for r in rs}
+    for ref in expected:
+        row = by_supplier[ref["supplier_id"]]
+        for key in ("supplier", "orders", "items_ordered", "items_delivered",
+                    "completion", "products"):
+            assert row[key] == ref[key], (ref["supplier"], key)
+        for key in ("avg_tat", "min_tat", "max_tat"):
+            if ref[key] is None:
+                assert row[key] is None, (ref["supplier"], key)
+            else:
+                assert row[key] == pytest.approx(ref[key]), (ref["supplier"], key)
+
+    ordered = [r["items_ordered"] for r in rs]
+    assert ordered == sorted(ordered, reverse=True)
+
+
+def test_empty_period(db):
+    date_from, date_to = PERIODS[-1]
+    assert loop_performance(db, date_from, date_to) == []
+    assert db.get_supplier_performance(date_from, date_to) == []
@@ -11,7 +11,10 @@ Version: I (SQLite Edition)
 """
 import tkinter as tk
 from tkinter import ttk
-from typing import List
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Pause in typing (ms) after which a debounced search runs
+DEBOUNCE_MS = 200
 
 
 class Tools:
@@ -203,6 +206,133 @@ class Tools:
 
         return s
 
+    def sync_tree(self, tree: ttk.Treeview,
+                  rows: Iterable[Tuple[object, Sequence, Sequence[str]]],
+                  prune: bool = True) -> Dict[str, int]:
+        """
+        Reconcile the rows of a flat Treeview with a list of keyed rows.
+
+        Instead of deleting every child and inserting again, only the rows
+        whose values or tags changed are updated in place, new rows are
+        inserted at their position, vanished rows deleted and the others
+        moved only when the order changed. Selection, focus and scroll
+        position of the surviving rows are kept, and a refresh costs in
+        proportion to what changed.
+
+        The values last written are remembered on the widget, so rows
+        should be changed through this method (prune=False updates a few
+        rows without touching the others).
+
+        Args:
+            tree: Treeview to update
+            rows: (iid, values, tags) in display order, iid being the
+                  primary key of the record
+            prune: Delete the rows not in rows (False for a partial update)
+
+        Returns:
+            Dict with the number of inserted, updated, moved and deleted rows
+
+        Example:
+            >>> self.engine.sync_tree(self.treeview, (
+            ...     (row["supplier_id"], (row["description"], row["reference"]), ())
+            ...     for row in rs))
+        """
+        synced = getattr(tree, "_synced_rows", None)
+        if synced is None:
+            synced = tree._synced_rows = {}
+
+        wanted = {}
+        order = []
+        for iid, values, tags in rows:
+            iid = str(iid)
+            if iid not in wanted:
+                order.append(iid)
+            wanted[iid] = (tuple(values), tuple(t for t in tags if t))
+
+        counts = {"inserted": 0, "updated": 0, "moved": 0, "deleted": 0}
+
+        current = list(tree.get_children())
+        present = set(current)
+
+        if prune:
+            vanished = [iid for iid in current if iid not in wanted]
+            if vanished:
+                tree.delete(*vanished)
+                for iid in vanished:
+                    synced.pop(iid, None)
+                counts["deleted"] = len(vanished)
+                present.difference_update(vanished)
+                current = [iid for iid in current if iid in present]
+
+        for iid in synced.keys() - present:
+            del synced[iid]
+
+        if not prune:
+            for iid in order:
+                row = wanted[iid]
+                if iid not in present:
+                    tree.insert("", tk.END, iid=iid, values=row[0], tags=row[1])
+                    counts["inserted"] += 1
+                elif synced.get(iid) != row:
+                    tree.item(iid, values=row[0], tags=row[1])
+                    counts["updated"] += 1
+                synced[iid] = row
+            return counts
+
+        # Walk the wanted order against the surviving children: rows
+        # already in place are skipped, the others moved or inserted
+        placed = set()
+        position = 0
+        for index, iid in enumerate(order):
+            row = wanted[iid]
+
+            while position < len(current) and current[position] in placed:
+                position += 1
+
+            if iid not in present:
+                tree.insert("", index, iid=iid, values=row[0], tags=row[1])
+                counts["inserted"] += 1
+            else:
+                if position < len(current) and current[position] == iid:
+                    position += 1
+                else:
+                    tree.move(iid, "", index)
+                    counts["moved"] += 1
+                if synced.get(iid) != row:
+                    tree.item(iid, values=row[0], tags=row[1])
+                    counts["updated"] += 1
+
+            placed.add(iid)
+            synced[iid] = row
+
+        return counts
+
+    def debounce(self, widget, callback, delay: int = DEBOUNCE_MS) -> None:
+        """
+        Call callback once, delay ms after the last of a burst of calls.
+
+        Each call cancels the one still pending for the same callback on
+        the same widget, so typing a word runs a search once, when the
+        user pauses, instead of at every key.
+
+        Example:
+            >>> self.search_var.trace_add(
+            ...     "write", lambda *args: self.engine.debounce(self, self.on_search))
+        """
+        pending = getattr(widget, "_debounced", None)
+        if pending is None:
+            pending = widget._debounced = {}
+
+        key = getattr(callback, "__name__", id(callback))
+        if key in pending:
+            widget.after_cancel(pending.pop(key))
+
+        def run():
+            pending.pop(key, None)
+            callback()
+
+        pending[key] = widget.after(delay, run)
+
     def center_window(self, window) -> None:
         """Center a window relative to its parent."""
         window.update_idletasks()
@@ -116,20 +116,7 @@ class UI(ParentView):
     def do_unload(self, code_int):
         """Unload (scarica) a label."""
         # Check if label exists by tick (barcode) or label_id
-        sql = """
-            SELECT
-                lb.label_id,
-                lb.tick,
-                lb.status,
-                p.description AS product_name,
-                b.description AS lot
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            WHERE lb.tick = ? OR lb.label_id = ?
-        """
-        row = self.engine.read(False, sql, (code_int, code_int))
+        row = self.engine.resolve_label(code_int)
 
         if not row:
             self.show_result(_("Label") + f" {code_int} " + _("not found!"), "red")
@@ -160,7 +147,8 @@ class UI(ParentView):
                 "green"
             )
             # Notify subscribers that a label was unloaded
-            self.engine.notify("label_unloaded")
+            self.engine.notify("label_unloaded", label_ids=(label_id,),
+                               batch_ids=(row["batch_id"],), package_ids=(row["package_id"],))
         else:
             self.show_result(_("Error unloading!"), "red")
 
@@ -130,10 +130,6 @@ class UI(ParentView):
 
     def load_deliberations(self):
         """Load deliberations list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """SELECT d.deliberation_id, d.reference, d.issued,
                         s.description AS supplier, d.amount, d.cig, d.description, d.status
                  FROM deliberations d
@@ -151,19 +147,21 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                amount_str = f"€ {row['amount']:,.2f}" if row["amount"] else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["deliberation_id"],
-                    row["reference"] or "",
-                    row["issued"] or "",
-                    row["supplier"] or "",
-                    amount_str,
-                    row["cig"] or "",
-                    row["description"] or ""
-                ), tags=(tag,) if tag else ())
+        rows = []
+        for row in rs or ():
+            tag = "inactive" if row["status"] != 1 else ""
+            amount_str = f"€ {row['amount']:,.2f}" if row["amount"] else ""
+            rows.append((row["deliberation_id"], (
+                row["deliberation_id"],
+                row["reference"] or "",
+                row["issued"] or "",
+                row["supplier"] or "",
+                amount_str,
+                row["cig"] or "",
+                row["description"] or ""
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -224,13 +222,10 @@ class UI(ParentView):
         self.load_deliberations()
 
         # Find and select the deliberation by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(deliberation_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(deliberation_id):
+            self.treeview.selection_set(deliberation_id)
+            self.treeview.see(deliberation_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window."""
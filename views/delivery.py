@@ -10,8 +10,6 @@ Author: 1966bc (Giuseppe Costanzi)
 License: GNU GPL v3
 Version: I (SQLite Edition)
 """
-import sys
-import inspect
 import datetime
 import tkinter as tk
 from tkinter import ttk
@@ -294,10 +292,12 @@ class UI(ParentView):
         self.refresh()
 
     def load_requests(self):
-        """Load sent requests that have pending items."""
-        # Clear treeviews
-        for item in self.treeRequests.get_children():
-            self.treeRequests.delete(item)
+        """
+        Load sent requests that have pending items.
+
+        Unchanged rows are kept: if the selected request is still pending
+        its items are reloaded, otherwise items and details are cleared.
+        """
         self.dict_requests.clear()
 
         sql = """
@@ -318,35 +318,37 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql)
 
-        if rs:
-            for row in rs:
-                request_id = row["request_id"]
-                self.dict_requests[request_id] = row
-
-                ref = row["reference"] or ""
-                issued_raw = row["issued"] or ""
-                # Convert from yyyy-mm-dd to dd-mm-yyyy
-                if issued_raw and "-" in issued_raw:
-                    parts = issued_raw.split("-")
-                    if len(parts) == 3:
-                        issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
-                    else:
-                        issued = issued_raw[:10]
+        rows = []
+        for row in rs or ():
+            request_id = row["request_id"]
+            self.dict_requests[request_id] = row
+
+            ref = row["reference"] or ""
+            issued_raw = row["issued"] or ""
+            # Convert from yyyy-mm-dd to dd-mm-yyyy
+            if issued_raw and "-" in issued_raw:
+                parts = issued_raw.split("-")
+                if len(parts) == 3:
+                    issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
                 else:
                     issued = issued_raw[:10]
+            else:
+                issued = issued_raw[:10]
 
-                self.treeRequests.insert(
-                    "", tk.END,
-                    iid=request_id,
-                    values=(ref, issued, row["pending_items"]),
-                    tags=("sent",)
-                )
+            rows.append((request_id, (ref, issued, row["pending_items"]), ("sent",)))
 
-        # Clear dependent lists
-        for item in self.treeItems.get_children():
-            self.treeItems.delete(item)
-        self.dict_items.clear()
-        self.clear_item_details()
+        self.engine.sync_tree(self.treeRequests, rows)
+
+        request = self.dict_requests.get(self.selected_request["request_id"]) if self.selected_request else None
+        if request:
+            self.selected_request = request
+            self.load_items(request["request_id"])
+        else:
+            # Clear dependent lists
+            self.selected_request = None
+            self.engine.sync_tree(self.treeItems, ())
+            self.dict_items.clear()
+            self.clear_item_details()
 
     def on_request_selected(self, evt=None):
         """Handle request selection - load pending items."""
@@ -361,12 +363,13 @@ class UI(ParentView):
             self.load_items(self.selected_request["request_id"])
 
     def load_items(self, request_id):
-        """Load items for selected request that are not fully delivered."""
-        # Clear items treeview
-        for item in self.treeItems.get_children():
-            self.treeItems.delete(item)
+        """
+        Load items for selected request that are not fully delivered.
+
+        Unchanged rows are kept; a selected item still listed is shown
+        again (and deselected if now fully delivered).
+        """
         self.dict_items.clear()
-        self.clear_item_details()
 
         sql = """
             SELECT
@@ -391,22 +394,24 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, (request_id,))
 
-        if rs:
-            for row in rs:
-                item_id = row["item_id"]
-                self.dict_items[item_id] = row
-                ordered = row["ordered"]
-                delivered = row["delivered"]
-
-                # Tag for fully delivered items
-                tag = ("completed",) if delivered >= ordered else ()
-
-                self.treeItems.insert(
-                    "", tk.END,
-                    iid=item_id,
-                    values=(row["product_name"] or "", ordered, delivered),
-                    tags=tag
-                )
+        rows = []
+        for row in rs or ():
+            item_id = row["item_id"]
+            self.dict_items[item_id] = row
+            ordered = row["ordered"]
+            delivered = row["delivered"]
+
+            # Tag for fully delivered items
+            tag = ("completed",) if delivered >= ordered else ()
+
+            rows.append((item_id, (row["product_name"] or "", ordered, delivered), tag))
+
+        self.engine.sync_tree(self.treeItems, rows)
+
+        if self.treeItems.selection():
+            self.on_item_selected()
+        else:
+            self.clear_item_details()
 
     def on_item_selected(self, evt=None):
         """Handle item selection - show details and load batches."""
@@ -588,7 +593,7 @@ class UI(ParentView):
             lot_number = self.new_lot.get().strip()
             exp_str = expiration_date.isoformat() if expiration_date else None
             sql = """SELECT batch_id FROM batches
-                     WHERE package_id = ? AND description = ? AND expiration = ? AND status = 1"""
+                     WHERE package_id = ? AND description = ? AND expiration IS ? AND status = 1"""
             existing = self.engine.read(False, sql, (
                 self.selected_item["package_id"],
                 lot_number,
@@ -621,9 +626,14 @@ class UI(ParentView):
         if not messagebox.askyesno(self.engine.app_title, msg, parent=self):
             return
 
-        try:
-            # Get or create batch
-            batch_id = self.get_or_create_batch()
+        # Remember current selection for repositioning
+        current_request_id = self.selected_request["request_id"] if self.selected_request else None
+        current_item_id = self.selected_item["item_id"] if self.selected_item else None
+
+        if self.batch_mode.get() == 0:
+            # Existing batch
+            idx = self.cb_batches.current()
+            batch_id = self.dict_batches[idx]["batch_id"] if idx >= 0 and idx in self.dict_batches else None
             if not batch_id:
                 messagebox.showerror(
                     self.engine.app_title,
@@ -631,130 +641,69 @@ class UI(ParentView):
                     parent=self
                 )
                 return
+            lot = expiration = None
+        else:
+            # New batch
+            batch_id = None
+            lot = self.new_lot.get().strip()
+            expiration_date = self.cal_expiration.get_date()
+            expiration = expiration_date.isoformat() if expiration_date else None
 
-            # Create delivery record
-            delivery_id = self.create_delivery()
-            if not delivery_id:
-                messagebox.showerror(
-                    self.engine.app_title,
-                    _("Error recording delivery!"),
-                    parent=self
-                )
-                return
+        delivered_date = self.cal_delivered.get_date()
 
-            # Create labels
-            labels_created = self.create_labels(batch_id, labels_to_create)
+        # Batch, delivery, labels and request closing in one transaction
+        result = self.engine.receive_delivery(
+            self.selected_item["item_id"],
+            self.selected_item["package_id"],
+            self.ddt.get().strip(),
+            delivered_date.isoformat() if delivered_date else None,
+            qty,
+            labels_to_create,
+            batch_id=batch_id,
+            lot=lot,
+            expiration=expiration,
+            request_id=current_request_id
+        )
 
-            # Success message
-            label_word = _("label") if labels_created == 1 else _("labels")
-            messagebox.showinfo(
+        if result is None:
+            messagebox.showerror(
                 self.engine.app_title,
-                _("Delivery recorded successfully!") + "\n\n" +
-                _("Created") + f" {labels_created} {label_word}.",
+                _("Error recording delivery!"),
                 parent=self
             )
+            return
 
-            # Remember current selection for repositioning
-            current_request_id = self.selected_request["request_id"] if self.selected_request else None
-            current_item_id = self.selected_item["item_id"] if self.selected_item else None
-
-            # Check if all items in this request are now fully delivered
-            if current_request_id:
-                self.check_and_close_request(current_request_id)
-
-            # Refresh and reposition
-            self.clear_form()
-            self.refresh_and_reposition(current_request_id, current_item_id)
-
-            # Notify subscribers that stock changed
-            self.engine.notify("stock_changed")
+        label_ids = result["label_ids"]
+        package_id = self.selected_item["package_id"]
 
-        except Exception as e:
-            self.engine.on_log(
-                inspect.stack()[0][3],
-                e,
-                type(e),
-                sys.modules[__name__]
-            )
-            messagebox.showerror(
-                self.engine.app_title,
-                _("Error during save:") + f"\n{e}",
-                parent=self
-            )
+        # Print labels if checkbox is checked and labels were created
+        if self.print_labels_var.get() == 1 and label_ids:
+            self.print_labels(label_ids)
 
-    def check_and_close_request(self, request_id):
-        """Check if all items are delivered and close the request if so."""
-        sql = """
-            SELECT COUNT(*) AS pending
-            FROM items i
-            WHERE i.request_id = ? AND i.status = 1
-            AND i.quantity > COALESCE(
-                (SELECT SUM(d.quantity) FROM deliveries d WHERE d.item_id = i.item_id AND d.status = 1), 0
-            )
-        """
-        result = self.engine.read(False, sql, (request_id,))
+        # Success message
+        labels_created = len(label_ids)
+        label_word = _("label") if labels_created == 1 else _("labels")
+        messagebox.showinfo(
+            self.engine.app_title,
+            _("Delivery recorded successfully!") + "\n\n" +
+            _("Created") + f" {labels_created} {label_word}.",
+            parent=self
+        )
 
-        if result and result["pending"] == 0:
-            # All items delivered - close the request
-            sql = "UPDATE requests SET status = 0 WHERE request_id = ?"
-            self.engine.write(sql, (request_id,))
+        if result["request_closed"]:
             messagebox.showinfo(
                 self.engine.app_title,
                 _("All items have been delivered.") + "\n" + _("The request has been closed."),
                 parent=self
             )
 
-    def get_or_create_batch(self):
-        """Get selected batch_id or create new batch and return its id."""
-        if self.batch_mode.get() == 0:
-            # Select existing
-            idx = self.cb_batches.current()
-            if idx >= 0 and idx in self.dict_batches:
-                return self.dict_batches[idx]["batch_id"]
-            return None
-        else:
-            # Create new
-            sql = """
-                INSERT INTO batches (package_id, description, expiration, status)
-                VALUES (?, ?, ?, 1)
-            """
-            expiration_date = self.cal_expiration.get_date()
-            return self.engine.write(sql, (
-                self.selected_item["package_id"],
-                self.new_lot.get().strip(),
-                expiration_date.isoformat() if expiration_date else None
-            ))
+        # Refresh and reposition
+        self.clear_form()
+        self.refresh_and_reposition(current_request_id, current_item_id)
 
-    def create_delivery(self):
-        """Create delivery record."""
-        sql = """
-            INSERT INTO deliveries (item_id, package_id, ddt, delivered, quantity, status)
-            VALUES (?, ?, ?, ?, ?, 1)
-        """
-        delivered_date = self.cal_delivered.get_date()
-        return self.engine.write(sql, (
-            self.selected_item["item_id"],
-            self.selected_item["package_id"],
-            self.ddt.get().strip(),
-            delivered_date.isoformat() if delivered_date else None,
-            self.quantity.get()
-        ))
-
-    def create_labels(self, batch_id, count):
-        """Create N labels for the batch and optionally print them."""
-        created = 0
-        label_ids = []
-        for _ in range(count):
-            label_id = self.engine.load_label(batch_id)
-            if label_id:
-                created += 1
-                label_ids.append(label_id)
-        
-        # Print labels if checkbox is checked and labels were created
-        if self.print_labels_var.get() == 1 and label_ids:
-            self.print_labels(label_ids)
-        
-        return created
+        # Notify subscribers that stock changed
+        self.engine.notify("stock_changed", package_ids=(package_id,), batch_ids=(result["batch_id"],),
+                           label_ids=label_ids, request_ids=(current_request_id,))
 
     def print_labels(self, label_ids):
         """Print barcode labels for the given label IDs."""
@@ -794,14 +743,15 @@ class UI(ParentView):
         """Refresh lists and try to reposition on the given request/item."""
         self.load_requests()
 
-        # Try to find and select the request by ID
-        if request_id and str(request_id) in self.treeRequests.get_children():
-            self.treeRequests.selection_set(request_id)
-            self.treeRequests.see(request_id)
-            self.on_request_selected()
+        # The current selection survives the reload; select the given
+        # request/item only if they are not the selected ones
+        if request_id and self.treeRequests.exists(request_id):
+            if self.treeRequests.selection() != (str(request_id),):
+                self.treeRequests.selection_set(request_id)
+                self.treeRequests.see(request_id)
+                self.on_request_selected()
 
-            # Try to find and select the item by ID
-            if item_id and str(item_id) in self.treeItems.get_children():
+            if item_id and self.treeItems.exists(item_id) and self.treeItems.selection() != (str(item_id),):
                 self.treeItems.selection_set(item_id)
                 self.treeItems.see(item_id)
                 self.on_item_selected()
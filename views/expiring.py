@@ -126,27 +126,24 @@ class UI(ParentView):
         return date_str or ""
 
     def refresh(self):
-        """Reload data."""
-        # Clear trees
-        for item in self.treeExpired.get_children():
-            self.treeExpired.delete(item)
-        for item in self.treeExpiring.get_children():
-            self.treeExpiring.delete(item)
-
+        """Reload data (rows keyed by batch, unchanged ones are kept)."""
         # Load expired batches
         expired = self.engine.get_expired_batches()
-        for row in expired:
-            self.treeExpired.insert("", tk.END, values=(
+        self.engine.sync_tree(self.treeExpired, (
+            (row["batch_id"], (
                 row.get("batch_id", 0),
                 row.get("product_name", ""),
                 row.get("lot", ""),
                 self.format_date(row.get("expiration", "")),
                 row.get("days_expired", 0),
                 row.get("labels_in_stock", 0)
-            ), tags=("expired",))
+            ), ("expired",))
+            for row in expired
+        ))
 
         # Load expiring batches (30 days)
         expiring = self.engine.get_expiring_batches(30)
+        rows = []
         for row in expiring:
             days_left = row.get("days_left", 0)
             if days_left <= 7:
@@ -156,13 +153,15 @@ class UI(ParentView):
             else:
                 tag = ""
 
-            self.treeExpiring.insert("", tk.END, values=(
+            rows.append((row["batch_id"], (
                 row.get("product_name", ""),
                 row.get("lot", ""),
                 self.format_date(row.get("expiration", "")),
                 days_left,
                 row.get("labels_in_stock", 0)
-            ), tags=(tag,) if tag else ())
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeExpiring, rows)
 
     def on_cancel_batch(self, evt=None):
         """Cancel selected expired batch and its labels."""
@@ -189,6 +188,8 @@ class UI(ParentView):
         if not messagebox.askyesno(self.engine.app_title, msg, parent=self):
             return
 
+        batch = self.engine.get_selected("batches", "batch_id", batch_id)
+
         # Cancel labels (status = -1)
         sql_labels = "UPDATE labels SET status = -1 WHERE batch_id = ? AND status = 1"
         self.engine.write(sql_labels, (batch_id,))
@@ -207,7 +208,8 @@ class UI(ParentView):
         self.refresh()
 
         # Notify subscribers that a batch was cancelled
-        self.engine.notify("batch_cancelled")
+        self.engine.notify("batch_cancelled", batch_ids=(int(batch_id),),
+                           package_ids=(batch["package_id"],) if batch else ())
 
     def on_cancel(self, evt=None):
         """Close the window."""
@@ -113,10 +113,6 @@ class UI(ParentView):
 
     def on_reset(self, evt=None):
         """Reload list."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """SELECT funding_id, code, description, status
                  FROM funding_sources WHERE 1=1"""
 
@@ -131,14 +127,16 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["funding_id"],
-                    row["code"] or "",
-                    row["description"] or ""
-                ), tags=(tag,) if tag else ())
+        rows = []
+        for row in rs or ():
+            tag = "inactive" if row["status"] != 1 else ""
+            rows.append((row["funding_id"], (
+                row["funding_id"],
+                row["code"] or "",
+                row["description"] or ""
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -199,13 +197,10 @@ class UI(ParentView):
         self.on_reset()
 
         # Find and select by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(funding_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(funding_id):
+            self.treeview.selection_set(funding_id)
+            self.treeview.see(funding_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window."""
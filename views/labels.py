@@ -118,9 +118,14 @@ class UI(ChildView):
 
         msg = _("Load {} label?").format(count) if count == 1 else _("Load {} labels?").format(count)
         if messagebox.askyesno(self.engine.app_title, msg, parent=self):
-            # Load labels
-            for i in range(count):
-                self.engine.load_label(self.batch_id)
+            # Load labels (single transaction)
+            if self.engine.load_labels(self.batch_id, count) is None:
+                messagebox.showerror(
+                    self.engine.app_title,
+                    _("Error loading labels!"),
+                    parent=self
+                )
+                return
 
             # Refresh labels list and stock count
             self.parent.load_labels(self.batch_id)
@@ -122,7 +122,7 @@ class UI(ChildView):
                  WHERE reference_id = 2 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -145,7 +145,7 @@ class UI(ChildView):
                  WHERE status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("conservations",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -128,10 +128,6 @@ class UI(ParentView):
 
     def load_locations(self):
         """Load locations list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """
             SELECT
                 l.location_id,
@@ -158,17 +154,19 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["location_id"],
-                    row["code"] or "",
-                    row["room"] or "",
-                    row["description"] or "",
-                    row["category"] or "",
-                    row["conservation"] or ""
-                ), tags=(tag,) if tag else ())
+        rows = []
+        for row in rs or ():
+            tag = "inactive" if row["status"] != 1 else ""
+            rows.append((row["location_id"], (
+                row["location_id"],
+                row["code"] or "",
+                row["room"] or "",
+                row["description"] or "",
+                row["category"] or "",
+                row["conservation"] or ""
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -229,13 +227,10 @@ class UI(ParentView):
         self.load_locations()
 
         # Find and select the location by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(location_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(location_id):
+            self.treeview.selection_set(location_id)
+            self.treeview.see(location_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window."""
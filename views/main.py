@@ -24,6 +24,7 @@ from views import locations
 from views import conservations
 from views import requests
 from views import delivery
+from views import reorders
 from views import stocks
 from views import settings
 from views import expiring
@@ -34,6 +35,7 @@ from views import stats_rotation
 from views import stats_tat
 from views import stats_suppliers
 from views import stats_expiring
+from views import query_stats
 from views import custom_label
 from views import funding_sources
 from views import memos
@@ -106,6 +108,10 @@ class Main(tk.Toplevel):
         m_database.add_command(label=_("Configure"), underline=0, command=self.on_config_database)
         m_database.add_command(label=_("Backup"), underline=0, command=self.on_backup)
         m_database.add_command(label=_("Compact"), underline=0, command=self.on_vacuum)
+        m_database.add_command(label=_("Check Stock Counters"), underline=0, command=self.on_check_stock)
+        m_database.add_command(label=_("Connection Tuning"), underline=1, command=self.on_db_pragmas)
+        m_database.add_command(label=_("Lock Contention"), underline=0, command=self.on_lock_stats)
+        m_database.add_command(label=_("Query Statistics"), underline=0, command=self.on_query_stats)
 
         m_file.add_command(label=_("Log"), underline=0, command=self.on_log)
         m_file.add_separator()
@@ -141,6 +147,7 @@ class Main(tk.Toplevel):
         m_requests = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label=_("Requests"), underline=0, menu=m_requests)
         m_requests.add_command(label=_("Requests"), underline=0, command=self.on_open_requests)
+        m_requests.add_command(label=_("Suggested Reorders"), underline=1, command=self.on_reorders)
         m_requests.add_separator()
         m_requests.add_command(label=_("Deliveries"), underline=0, command=self.on_deliveries)
 
@@ -259,6 +266,11 @@ class Main(tk.Toplevel):
         obj = requests.UI(self)
         obj.on_open()
 
+    def on_reorders(self):
+        """Suggested reorders from consumption and lead times."""
+        obj = reorders.UI(self)
+        obj.on_open()
+
     def on_deliveries(self):
         """Manage deliveries."""
         obj = delivery.UI(self)
@@ -510,6 +522,62 @@ class Main(tk.Toplevel):
                 parent=self
             )
 
+    def on_check_stock(self):
+        """Verify stock counters and daily movements against labels, rebuild them on request."""
+        rs = self.engine.verify_stock_counters()
+        movements = self.engine.verify_label_movements()
+
+        if rs is None or movements is None:
+            return
+
+        rs += movements
+
+        if not rs:
+            messagebox.showinfo(
+                self.engine.app_title,
+                _("Stock counters are consistent."),
+                parent=self
+            )
+            return
+
+        msg = f"{len(rs)} {_('stock counters do not match the labels.')}\n\n{_('Rebuild them now?')}"
+        if not messagebox.askyesno(self.engine.app_title, msg, parent=self):
+            return
+
+        if self.engine.rebuild_stock_counters() and self.engine.rebuild_label_movements():
+            self.engine.notify("stock_changed")
+            messagebox.showinfo(
+                self.engine.app_title,
+                _("Stock counters rebuilt!"),
+                parent=self
+            )
+
+    def on_db_pragmas(self):
+        """Show the connection PRAGMAs in effect on this workstation."""
+        lines = [f"{_('Profile')}: {self.engine.get_db_profile()}", ""]
+        for name, value in self.engine.get_effective_pragmas().items():
+            lines.append(f"{name} = {value}")
+        messagebox.showinfo(self.engine.app_title, "\n".join(lines), parent=self)
+
+    def on_lock_stats(self):
+        """Show how often this workstation had to wait for the database lock."""
+        lines = []
+        for kind, stats in self.engine.get_lock_stats().items():
+            lines.append(_("Reads") if kind == "read" else _("Writes"))
+            lines.append(f"  {_('Statements')}: {stats['statements']}")
+            lines.append(f"  {_('Waited')}: {stats['contended']}")
+            lines.append(f"  {_('Retries')}: {stats['retries']}")
+            lines.append(f"  {_('Failed')}: {stats['failures']}")
+            lines.append(f"  {_('Total wait')}: {stats['wait']:.2f} s")
+            lines.append(f"  {_('Max wait')}: {stats['max_wait']:.2f} s")
+            lines.append("")
+        messagebox.showinfo(self.engine.app_title, "\n".join(lines).rstrip(), parent=self)
+
+    def on_query_stats(self):
+        """Open top statements by total time."""
+        obj = query_stats.UI(self)
+        obj.on_open()
+
     def on_log(self):
         """Open log file."""
         self.engine.get_log_file()
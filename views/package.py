@@ -188,13 +188,11 @@ class UI(ChildView):
         if self.index is not None and selected_package:
             # Edit mode
             self.selected_package = selected_package
-            self.original_category_id = selected_package.get("category_id", 0)
             self.title(f"{_('Edit Package')} - {product_name}")
             self.set_values()
             self.btnFunding.config(state=tk.NORMAL)
         else:
             # New package mode
-            self.original_category_id = None
             self.title(f"{_('New Package')} - {product_name}")
             self.order_by_piece.set(1)
             self.pieces_per_label.set(1)
@@ -215,7 +213,7 @@ class UI(ChildView):
                  WHERE status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("suppliers",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -234,7 +232,7 @@ class UI(ChildView):
                  WHERE status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("conservations",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -257,7 +255,7 @@ class UI(ChildView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -280,7 +278,7 @@ class UI(ChildView):
                  WHERE status = 1
                  ORDER BY room, description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("locations",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -438,13 +436,10 @@ class UI(ChildView):
                 sql = self.engine.build_sql(self.parent.table, op="insert")
                 pk = self.engine.write(sql, tuple(args))
 
-            self.parent.refresh_and_select(pk)
+            # Notify subscribers (and the catalog index) before the parent reloads
+            self.engine.notify("package_changed", package_ids=(pk,))
 
-            # Notify subscribers if category changed
-            category_idx = self.cbCategories.current()
-            new_category_id = self.dict_categories.get(category_idx, 0)
-            if new_category_id != self.original_category_id:
-                self.engine.notify("package_changed")
+            self.parent.refresh_and_select(pk)
 
             self.on_cancel()
 
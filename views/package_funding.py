@@ -124,11 +124,7 @@ class UI(ChildView):
 
     def on_search_keyrelease(self, evt=None):
         """Auto-search after typing (with delay)."""
-        # Cancel previous scheduled search
-        if hasattr(self, '_search_after_id'):
-            self.after_cancel(self._search_after_id)
-        # Schedule new search after 300ms
-        self._search_after_id = self.after(300, self.on_search)
+        self.engine.debounce(self, self.on_search)
 
     def on_search(self, evt=None):
         """Search for packages matching the search text."""
@@ -139,26 +135,15 @@ class UI(ChildView):
         if len(search) < 2:
             return
 
-        # Search by product description or reference (warehouse code)
-        sql = """SELECT pk.package_id, pk.packaging, p.description AS product,
-                        p.reference, s.description AS supplier
-                 FROM packages pk
-                 JOIN products p ON p.product_id = pk.product_id
-                 JOIN suppliers s ON s.supplier_id = pk.supplier_id
-                 WHERE pk.status = 1
-                   AND (p.description LIKE ? OR p.reference LIKE ? OR pk.packaging LIKE ?)
-                 ORDER BY p.description, pk.packaging
-                 LIMIT 50"""
-        pattern = f"%{search}%"
-        rs = self.engine.read(True, sql, (pattern, pattern, pattern))
-
-        if rs:
-            for row in rs:
-                # Format: Product - Packaging (Supplier) [Code]
-                ref = f" [{row['reference']}]" if row['reference'] else ""
-                label = f"{row['product']} - {row['packaging']} ({row['supplier']}){ref}"
-                self.lstResults.insert(tk.END, label)
-                self.packages[label] = row["package_id"]
+        # Search by description, codes or packaging in the catalog index
+        catalog = self.engine.get_catalog()
+        for package_id in catalog.search(search, "all", limit=50):
+            row = catalog.entries[package_id]
+            # Format: Product - Packaging (Supplier) [Code]
+            ref = f" [{row['product_code']}]" if row['product_code'] else ""
+            label = f"{row['product']} - {row['packaging']} ({row['supplier']}){ref}"
+            self.lstResults.insert(tk.END, label)
+            self.packages[label] = package_id
 
     def on_result_selected(self, evt=None):
         """Handle selection from results list."""
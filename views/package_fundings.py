@@ -139,10 +139,6 @@ class UI(ParentView):
 
     def load_package_fundings(self):
         """Load package fundings list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """SELECT pf.package_funding_id,
                         p.description AS product,
                         pk.packaging,
@@ -171,23 +167,25 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tags = []
-                if row["status"] != 1:
-                    tags.append("inactive")
-                elif row["deliberation_id"]:
-                    tags.append("in_gara")
-
-                self.treeview.insert("", tk.END, values=(
-                    row["package_funding_id"],
-                    row["product"] or "",
-                    row["packaging"] or "",
-                    row["supplier"] or "",
-                    row["funding"] or "",
-                    row["deliberation"] or _("Economy"),
-                    row["valid_from"] or ""
-                ), tags=tuple(tags) if tags else ())
+        rows = []
+        for row in rs or ():
+            tags = []
+            if row["status"] != 1:
+                tags.append("inactive")
+            elif row["deliberation_id"]:
+                tags.append("in_gara")
+
+            rows.append((row["package_funding_id"], (
+                row["package_funding_id"],
+                row["product"] or "",
+                row["packaging"] or "",
+                row["supplier"] or "",
+                row["funding"] or "",
+                row["deliberation"] or _("Economy"),
+                row["valid_from"] or ""
+            ), tags))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -248,13 +246,10 @@ class UI(ParentView):
         self.load_package_fundings()
 
         # Find and select the package funding by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(package_funding_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(package_funding_id):
+            self.treeview.selection_set(package_funding_id)
+            self.treeview.see(package_funding_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window."""
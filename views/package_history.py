@@ -84,13 +84,12 @@ class UI(ChildView):
         self.load_history()
 
     def load_history(self):
-        """Load order history for the package."""
-        for item in self.treeHistory.get_children():
-            self.treeHistory.delete(item)
+        """Load order history for the package (rows keyed by item)."""
 
         # Query to get order history from items/requests/deliveries
         sql = """
             SELECT
+                i.item_id,
                 r.issued,
                 r.reference,
                 i.quantity AS ordered,
@@ -108,31 +107,29 @@ class UI(ChildView):
         total_ordered = 0
         total_delivered = 0
 
-        if rs:
-            for row in rs:
-                ordered = row["ordered"] or 0
-                delivered = row["delivered"] or 0
+        rows = []
+        for row in rs or ():
+            ordered = row["ordered"] or 0
+            delivered = row["delivered"] or 0
 
-                total_ordered += ordered
-                total_delivered += delivered
+            total_ordered += ordered
+            total_delivered += delivered
 
-                # Format date dd-mm-yyyy
-                issued = row["issued"] or ""
-                if issued and "-" in issued:
-                    parts = issued.split("-")
-                    if len(parts) == 3:
-                        issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
+            # Format date dd-mm-yyyy
+            issued = row["issued"] or ""
+            if issued and "-" in issued:
+                parts = issued.split("-")
+                if len(parts) == 3:
+                    issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
 
-                reference = row["reference"] or ""
+            reference = row["reference"] or ""
 
-                # Determine tag
-                tag = ("completed",) if delivered >= ordered and ordered > 0 else ()
+            # Determine tag
+            tag = ("completed",) if delivered >= ordered and ordered > 0 else ()
 
-                self.treeHistory.insert(
-                    "", tk.END,
-                    values=(issued, reference, ordered, delivered),
-                    tags=tag
-                )
+            rows.append((row["item_id"], (issued, reference, ordered, delivered), tag))
+
+        self.engine.sync_tree(self.treeHistory, rows)
 
         row_count = len(self.treeHistory.get_children())
         self.count.set(f"{_('Rows')}: {row_count} | {_('Tot. Ord')}: {total_ordered} | {_('Tot. Deliv')}: {total_delivered}")
@@ -120,10 +120,7 @@ class UI(ParentView):
         self.on_reset()
 
     def on_reset(self, evt=None):
-        """Reload packages list."""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Reload packages list (unchanged rows are kept)."""
 
         sql = """
             SELECT
@@ -148,28 +145,24 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, (self.selected_product["product_id"],))
 
-        if rs:
-            for row in rs:
-                package_id = row["package_id"]
-                in_the_dark = "S" if row["in_the_dark"] == 1 else "N"
-
-                tag = ("inactive",) if row["status"] != 1 else ()
-
-                self.tree.insert(
-                    "", tk.END,
-                    iid=package_id,
-                    values=(
-                        row["reference"] or "",
-                        row["supplier"] or "",
-                        row["labels"] or "",
-                        row["packaging"] or "",
-                        row["conservation"] or "",
-                        in_the_dark,
-                        row["category"] or "",
-                        row["fonte"] or ""
-                    ),
-                    tags=tag
-                )
+        rows = []
+        for row in rs or ():
+            in_the_dark = "S" if row["in_the_dark"] == 1 else "N"
+
+            tag = ("inactive",) if row["status"] != 1 else ()
+
+            rows.append((row["package_id"], (
+                row["reference"] or "",
+                row["supplier"] or "",
+                row["labels"] or "",
+                row["packaging"] or "",
+                row["conservation"] or "",
+                in_the_dark,
+                row["category"] or "",
+                row["fonte"] or ""
+            ), tag))
+
+        self.engine.sync_tree(self.tree, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.tree.get_children())}")
 
@@ -13,6 +13,7 @@ from tkinter import messagebox
 
 from i18n import _
 from views.parent_view import ParentView
+from views.virtual_tree import VirtualTree
 from views import price
 
 
@@ -48,45 +49,39 @@ class UI(ParentView):
         self.lbf = ttk.LabelFrame(f1, text=f"{_('Total')}: 0", style="App.TLabelframe")
         w = self.lbf
 
-        cols = ("price_id", "product", "package", "supplier", "price", "vat", "valid_from")
-        self.treeview = ttk.Treeview(w, columns=cols, show="headings", height=15)
+        # Only the visible rows are in the tree; the headings sort in the query
+        cols = ("product", "package", "supplier", "price", "vat", "valid_from")
+        self.vtPrices = VirtualTree(w, self.engine, cols, height=15,
+                                    sort_columns={"product": "product", "package": "packaging",
+                                                  "supplier": "supplier", "price": "price",
+                                                  "vat": "vat", "valid_from": "valid_from"},
+                                    on_select=self.on_item_selected)
+        tree = self.vtPrices.tree
 
-        # Hidden ID column
-        self.treeview.column("price_id", width=0, stretch=False)
-        self.treeview.heading("price_id", text="")
+        tree.column("product", width=180, anchor=tk.W)
+        tree.heading("product", text=_("Product"))
 
-        # Visible columns
-        self.treeview.column("product", width=180, anchor=tk.W)
-        self.treeview.heading("product", text=_("Product"), command=lambda: self.sort_column("product"))
+        tree.column("package", width=120, anchor=tk.W)
+        tree.heading("package", text=_("Packaging"))
 
-        self.treeview.column("package", width=120, anchor=tk.W)
-        self.treeview.heading("package", text=_("Packaging"), command=lambda: self.sort_column("package"))
+        tree.column("supplier", width=150, anchor=tk.W)
+        tree.heading("supplier", text=_("Supplier"))
 
-        self.treeview.column("supplier", width=150, anchor=tk.W)
-        self.treeview.heading("supplier", text=_("Supplier"), command=lambda: self.sort_column("supplier"))
+        tree.column("price", width=100, anchor=tk.E)
+        tree.heading("price", text=_("Price"))
 
-        self.treeview.column("price", width=100, anchor=tk.E)
-        self.treeview.heading("price", text=_("Price"), command=lambda: self.sort_column("price"))
+        tree.column("vat", width=60, anchor=tk.E)
+        tree.heading("vat", text=_("VAT %"))
 
-        self.treeview.column("vat", width=60, anchor=tk.E)
-        self.treeview.heading("vat", text=_("VAT %"), command=lambda: self.sort_column("vat"))
+        tree.column("valid_from", width=100, anchor=tk.CENTER)
+        tree.heading("valid_from", text=_("Valid from"))
 
-        self.treeview.column("valid_from", width=100, anchor=tk.CENTER)
-        self.treeview.heading("valid_from", text=_("Valid from"), command=lambda: self.sort_column("valid_from"))
+        self.vtPrices.pack(fill=tk.BOTH, expand=1)
 
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(w, orient=tk.VERTICAL, command=self.treeview.yview)
-        self.treeview.configure(yscrollcommand=scrollbar.set)
-
-        self.treeview.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        # Bindings
-        self.treeview.bind("<<TreeviewSelect>>", self.on_item_selected)
-        self.treeview.bind("<Double-1>", self.on_item_activated)
+        tree.bind("<Double-1>", self.on_item_activated)
 
         # Tag for inactive items
-        self.treeview.tag_configure("inactive", background="light gray")
+        tree.tag_configure("inactive", background="light gray")
 
         w.pack(fill=tk.BOTH, expand=1)
         f1.pack(side=tk.LEFT, fill=tk.BOTH, expand=1, padx=5, pady=5)
@@ -154,10 +149,7 @@ class UI(ParentView):
         self.load_prices()
 
     def load_prices(self):
-        """Load prices list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
+        """Show the prices with the current filters (the same filters re-read in place)."""
 
         sql = """SELECT pr.price_id, p.description AS product, pk.packaging,
                         s.description AS supplier, pr.price, pr.vat, pr.valid_from, pr.status
@@ -181,42 +173,33 @@ class UI(ParentView):
             sql += " AND pr.supplier_id = ?"
             args.append(supplier_id)
 
-        sql += " ORDER BY p.description, pk.packaging, s.description"
-
-        rs = self.engine.read(True, sql, tuple(args))
-
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                price_str = f"€ {row['price']:,.2f}" if row["price"] else ""
-                vat_str = f"{row['vat']:.0f}" if row["vat"] else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["price_id"],
-                    row["product"] or "",
-                    row["packaging"] or "",
-                    row["supplier"] or "",
-                    price_str,
-                    vat_str,
-                    row["valid_from"] or ""
-                ), tags=(tag,) if tag else ())
-
-        self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
-
-    def sort_column(self, col):
-        """Sort treeview by column."""
-        items = [(self.treeview.set(k, col), k) for k in self.treeview.get_children("")]
-        items.sort()
-
-        for index, (val, k) in enumerate(items):
-            self.treeview.move(k, "", index)
+        self.vtPrices.set_source(sql, args, key="price_id", sort="product",
+                                 row_values=self.get_values, on_loaded=self.show_total)
+
+    def show_total(self):
+        """Show the number of prices, once loaded."""
+        self.lbf.config(text=f"{_('Total')}: {self.vtPrices.total}")
+
+    @staticmethod
+    def get_values(row):
+        """Tree values and tags of a price row."""
+        tag = "inactive" if row["status"] != 1 else ""
+        price_str = f"€ {row['price']:,.2f}" if row["price"] else ""
+        vat_str = f"{row['vat']:.0f}" if row["vat"] else ""
+        return (
+            row["product"] or "",
+            row["packaging"] or "",
+            row["supplier"] or "",
+            price_str,
+            vat_str,
+            row["valid_from"] or ""
+        ), (tag,)
 
     def get_selected_id(self):
         """Get the price_id of the selected item."""
-        selection = self.treeview.selection()
+        selection = self.vtPrices.selection()
         if selection:
-            item = selection[0]
-            values = self.treeview.item(item, "values")
-            return values[0]  # price_id
+            return int(selection[0])
         return None
 
     def on_item_selected(self, evt=None):
@@ -258,14 +241,8 @@ class UI(ParentView):
         """Refresh list and select price by ID."""
         self.load_prices()
 
-        # Find and select the price by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(price_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        # Rows are keyed by price_id
+        self.vtPrices.select(price_id, on_done=lambda found: found and self.on_item_selected())
 
     def on_cancel(self, evt=None):
         """Close the window."""
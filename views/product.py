@@ -153,7 +153,7 @@ class UI(ChildView):
                 pk = self.engine.write(sql, tuple(args))
 
             # Notify subscribers that a product changed
-            self.engine.notify("product_changed", pk)
+            self.engine.notify("product_changed", product_ids=(pk,))
 
             self.parent.refresh_and_select(pk)
 
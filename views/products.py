@@ -143,10 +143,6 @@ class UI(ParentView):
 
     def load_products(self):
         """Load products list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """SELECT product_id, reference, description, status
                  FROM products WHERE 1=1"""
 
@@ -168,14 +164,16 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["product_id"],
-                    row["reference"] or "",
-                    row["description"] or ""
-                ), tags=(tag,) if tag else ())
+        rows = []
+        for row in rs or ():
+            tag = "inactive" if row["status"] != 1 else ""
+            rows.append((row["product_id"], (
+                row["product_id"],
+                row["reference"] or "",
+                row["description"] or ""
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -253,13 +251,10 @@ class UI(ParentView):
         self.load_products()
 
         # Find and select the product by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(product_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(product_id):
+            self.treeview.selection_set(product_id)
+            self.treeview.see(product_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window and clean up."""
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query Statistics - Top SQL statements by total time for Inventarium.
+
+Shows the counters collected by DBMS when query timing is enabled
+(profiling = 1 in config.ini, or the checkbox in this window) and the
+hit/miss counters of the query cache.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from i18n import _
+from views.parent_view import ParentView
+
+
+class UI(ParentView):
+    """Top statements by total time."""
+
+    def __init__(self, parent):
+        super().__init__(parent, name="query_stats")
+
+        if self._reusing:
+            return
+
+        self.minsize(900, 500)
+
+        self.profiling = tk.BooleanVar(value=self.engine.profiling)
+        self.dict_stats = {}
+
+        self.init_ui()
+        self.show()
+
+    def init_ui(self):
+        """Build the user interface."""
+        f0 = ttk.Frame(self, padding=10)
+        f0.pack(fill=tk.BOTH, expand=1)
+
+        r1 = ttk.Frame(f0)
+        r1.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Checkbutton(
+            r1,
+            text=_("Enable query timing"),
+            variable=self.profiling,
+            command=self.on_toggle_profiling,
+            style="App.TCheckbutton"
+        ).pack(side=tk.LEFT)
+
+        ttk.Label(
+            r1,
+            text=_("Slow query threshold:") + f" {self.engine.slow_query_ms} ms"
+        ).pack(side=tk.LEFT, padx=20)
+
+        tree_frame = ttk.Frame(f0)
+        tree_frame.pack(fill=tk.BOTH, expand=1)
+
+        columns = ("calls", "total_ms", "avg_ms", "max_ms", "rows", "callers", "sql")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
+
+        self.tree.heading("calls", text=_("Calls"))
+        self.tree.heading("total_ms", text=_("Total (ms)"))
+        self.tree.heading("avg_ms", text=_("Avg (ms)"))
+        self.tree.heading("max_ms", text=_("Max (ms)"))
+        self.tree.heading("rows", text=_("Rows"))
+        self.tree.heading("callers", text=_("Caller"))
+        self.tree.heading("sql", text="SQL")
+
+        self.tree.column("calls", width=60, anchor=tk.E)
+        self.tree.column("total_ms", width=90, anchor=tk.E)
+        self.tree.column("avg_ms", width=80, anchor=tk.E)
+        self.tree.column("max_ms", width=80, anchor=tk.E)
+        self.tree.column("rows", width=70, anchor=tk.E)
+        self.tree.column("callers", width=220)
+        self.tree.column("sql", width=400)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_item_selected)
+
+        self.lbl_cache = ttk.Label(f0, text="")
+        self.lbl_cache.pack(anchor=tk.W, pady=(5, 0))
+
+        # Full SQL and query plan of the selected statement
+        self.txt_detail = tk.Text(f0, height=8, wrap=tk.WORD, font="TkFixedFont")
+        self.txt_detail.pack(fill=tk.X, pady=(10, 0))
+
+        bf = ttk.Frame(f0)
+        bf.pack(fill=tk.X, pady=(10, 0))
+
+        self.engine.create_button(bf, _("Refresh"), self.load_data, width=12).pack(side=tk.LEFT, padx=5)
+        self.engine.create_button(bf, _("Reset"), self.on_reset, width=12).pack(side=tk.LEFT, padx=5)
+        self.engine.create_button(bf, _("Slow Query Log"), self.engine.get_slow_query_log, width=16).pack(side=tk.LEFT, padx=5)
+
+        self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
+
+    def on_open(self):
+        """Initialize and show the window."""
+        self.title(_("Query Statistics"))
+        self.engine.dict_instances["query_stats"] = self
+        self.load_data()
+
+    def load_data(self):
+        """Load statements ordered by total time (rows keyed by SQL text)."""
+        self.dict_stats = {}
+
+        rows = []
+        for row in self.engine.get_query_stats():
+            rows.append((row["sql"], (
+                row["calls"],
+                f"{row['total_ms']:.1f}",
+                f"{row['avg_ms']:.2f}",
+                f"{row['max_ms']:.1f}",
+                row["rows"],
+                row["callers"],
+                row["sql"]
+            ), ()))
+            self.dict_stats[row["sql"]] = row
+
+        self.engine.sync_tree(self.tree, rows)
+        if not self.tree.selection():
+            self.txt_detail.delete("1.0", tk.END)
+
+        cache = self.engine.get_cache_stats()
+        self.lbl_cache.config(text=(
+            f"{_('Query cache')}: {cache['entries']} {_('entries')}, "
+            f"{cache['hits']} {_('hits')}, {cache['misses']} {_('misses')}, "
+            f"{cache['invalidations']} {_('invalidated')}, {cache['evictions']} {_('evicted')}"
+        ))
+
+    def on_item_selected(self, evt=None):
+        """Show full SQL, callers and query plan of the selected statement."""
+        sel = self.tree.selection()
+        if not sel:
+            return
+
+        row = self.dict_stats[sel[0]]
+        plan = self.engine.explain_query_plan(row["sql"], self._dummy_args(row["sql"]))
+
+        self.txt_detail.delete("1.0", tk.END)
+        self.txt_detail.insert(tk.END, f"{row['callers']}\n\n{row['sql']}\n")
+        if plan:
+            self.txt_detail.insert(tk.END, "\n" + "\n".join(plan))
+
+    @staticmethod
+    def _dummy_args(sql):
+        """Return NULL parameters for the placeholders of sql (plans do not depend on values)."""
+        return (None,) * sql.count("?")
+
+    def on_toggle_profiling(self):
+        """Enable or disable query timing for this session."""
+        self.engine.set_profiling(self.profiling.get())
+
+    def on_reset(self):
+        """Clear the collected counters."""
+        self.engine.reset_query_stats()
+        self.load_data()
+
+    def on_cancel(self, evt=None):
+        """Close the window."""
+        if "query_stats" in self.engine.dict_instances:
+            del self.engine.dict_instances["query_stats"]
+        super().on_cancel()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suggested Reorders - Demand-driven reorder points for Inventarium.
+
+Lists every active package with its daily demand, lead time and reorder
+point (see forecast.py); the packages at or below the reorder point are
+selected and can be ordered with one draft request.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+import datetime
+
+from i18n import _
+from forecast import suggest_reorders
+from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
+
+SERVICE_LEVELS = ("90%", "95%", "99%")
+
+
+class UI(ParentView):
+    """Suggested reorders window."""
+
+    def __init__(self, parent):
+        super().__init__(parent, name="reorders")
+
+        if self._reusing:
+            return
+
+        self.minsize(1000, 550)
+
+        self.history_days = 180
+        self.service_level = tk.StringVar(value="95%")
+        self.cover_days = tk.IntVar(value=30)
+        self.rows = {}
+
+        self.init_ui()
+        self.show()
+
+    def init_ui(self):
+        """Build the user interface."""
+        f0 = ttk.Frame(self, padding=10)
+        f0.pack(fill=tk.BOTH, expand=1)
+
+        # Parameters frame
+        params = ttk.LabelFrame(f0, text=_("Parameters"), style="App.TLabelframe")
+        params.pack(fill=tk.X, pady=(0, 10))
+
+        r1 = ttk.Frame(params)
+        r1.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Label(r1, text=_("History:")).pack(side=tk.LEFT)
+        for text, days in [(_("90 days"), 90), (_("6 months"), 180), (_("Year"), 365)]:
+            self.engine.create_button(r1, text, lambda d=days: self.set_history(d), width=8).pack(side=tk.LEFT, padx=2)
+
+        ttk.Label(r1, text=_("Service level:")).pack(side=tk.LEFT, padx=(20, 5))
+        cb = ttk.Combobox(r1, state="readonly", width=6, values=SERVICE_LEVELS,
+                          textvariable=self.service_level, style="App.TCombobox")
+        cb.pack(side=tk.LEFT)
+        cb.bind("<<ComboboxSelected>>", lambda evt: self.load_data())
+
+        ttk.Label(r1, text=_("Cover (days):")).pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Spinbox(r1, from_=0, to=365, textvariable=self.cover_days, width=6).pack(side=tk.LEFT)
+
+        self.engine.create_button(r1, _("Calculate"), self.load_data).pack(side=tk.LEFT, padx=20)
+
+        # Results treeview
+        tree_frame = ttk.Frame(f0)
+        tree_frame.pack(fill=tk.BOTH, expand=1)
+
+        columns = ("product", "supplier", "stock", "on_order", "demand",
+                   "lead_time", "reorder_point", "labels", "quantity")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15,
+                                 selectmode="extended")
+
+        self.tree.heading("product", text=_("Product"))
+        self.tree.heading("supplier", text=_("Supplier"))
+        self.tree.heading("stock", text=_("Stock"))
+        self.tree.heading("on_order", text=_("On order"))
+        self.tree.heading("demand", text=_("Demand/day"))
+        self.tree.heading("lead_time", text=_("Lead time (days)"))
+        self.tree.heading("reorder_point", text=_("Reorder point"))
+        self.tree.heading("labels", text=_("Labels"))
+        self.tree.heading("quantity", text=_("Order qty"))
+
+        self.tree.column("product", width=220)
+        self.tree.column("supplier", width=150)
+        self.tree.column("stock", width=70, anchor=tk.E)
+        self.tree.column("on_order", width=80, anchor=tk.E)
+        self.tree.column("demand", width=90, anchor=tk.E)
+        self.tree.column("lead_time", width=110, anchor=tk.E)
+        self.tree.column("reorder_point", width=100, anchor=tk.E)
+        self.tree.column("labels", width=70, anchor=tk.E)
+        self.tree.column("quantity", width=80, anchor=tk.E)
+
+        self.tree.tag_configure("below", foreground="red")
+        self.tree.tag_configure("idle", foreground="gray")
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Summary label
+        self.lbl_summary = ttk.Label(f0, text="")
+        self.lbl_summary.pack(anchor=tk.W, pady=(10, 5))
+
+        # Buttons
+        bf = ttk.Frame(f0)
+        bf.pack(fill=tk.X, pady=(5, 0))
+
+        self.engine.create_button(bf, _("Create Draft Request"), self.on_create_request, width=20).pack(side=tk.LEFT, padx=5)
+        self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
+
+        self.progress = StatsProgress(bf, self.engine, "reorders")
+        self.progress.pack(side=tk.LEFT, padx=20)
+
+        self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
+
+    def on_open(self):
+        """Initialize and show the window."""
+        self.title(_("Suggested Reorders"))
+        self.engine.dict_instances["reorders"] = self
+        self.load_data()
+
+    def set_history(self, days):
+        """Set the demand history length and recalculate."""
+        self.history_days = days
+        self.load_data()
+
+    def load_data(self):
+        """Compute the reorder suggestions in background."""
+        history_days = self.history_days
+        service_level = int(self.service_level.get().rstrip("%")) / 100
+        try:
+            cover_days = max(int(self.cover_days.get()), 0)
+        except (tk.TclError, ValueError):
+            cover_days = 30
+
+        self.progress.start()
+        self.engine.run_stats(
+            self,
+            "reorders",
+            (history_days, service_level, cover_days, datetime.date.today()),
+            lambda db: suggest_reorders(db, history_days, service_level, cover_days,
+                                        progress=db.progress),
+            self.show_data,
+            on_progress=self.progress.on_progress,
+            on_error=self.progress.on_error
+        )
+
+    def show_data(self, data):
+        """Fill the tree and select the packages to reorder."""
+        self.progress.stop()
+        self.rows = {}
+        if not data:
+            self.engine.sync_tree(self.tree, ())
+            self.lbl_summary.config(text=_("No data available"))
+            return
+
+        rows = []
+        selected = []
+        for d in data:
+            if d["below"]:
+                tag = "below"
+            elif d["demand"] == 0:
+                tag = "idle"
+            else:
+                tag = ""
+
+            iid = str(d["package_id"])
+            rows.append((iid, (
+                d["product"],
+                d["supplier"],
+                d["in_stock"],
+                d["on_order"],
+                round(d["demand"], 2),
+                round(d["lead_time"], 1),
+                d["reorder_point"],
+                d["order_labels"] or "",
+                d["order_quantity"] or "",
+            ), (tag,)))
+            self.rows[iid] = d
+
+            if d["order_quantity"]:
+                selected.append(iid)
+
+        self.engine.sync_tree(self.tree, rows)
+        self.tree.selection_set(selected)
+
+        self.lbl_summary.config(
+            text=f"{_('Packages')}: {len(data)} | "
+                 f"{_('To reorder')}: {len(selected)} | "
+                 f"{_('History')}: {self.history_days} {_('days')}"
+        )
+
+    def on_create_request(self):
+        """Create a draft request with the selected suggestions."""
+        items = [
+            (self.rows[iid]["package_id"], self.rows[iid]["order_quantity"])
+            for iid in self.tree.selection()
+            if iid in self.rows and self.rows[iid]["order_quantity"]
+        ]
+
+        if not items:
+            messagebox.showwarning(
+                self.engine.app_title,
+                _("Select at least one package with a quantity to order!"),
+                parent=self
+            )
+            return
+
+        if not messagebox.askyesno(
+            self.engine.app_title,
+            _("Create a draft request with the selected packages?") + f" ({len(items)})",
+            parent=self
+        ):
+            return
+
+        request_id = self.engine.create_draft_request(items)
+        if request_id is None:
+            messagebox.showerror(
+                self.engine.app_title,
+                _("Error creating the request!"),
+                parent=self
+            )
+            return
+
+        self.engine.notify("request_changed", request_ids=(request_id,))
+
+        win = self.engine.dict_instances.get("requests")
+        if win is not None:
+            win.refresh_request_list()
+
+        messagebox.showinfo(
+            self.engine.app_title,
+            _("Draft request created."),
+            parent=self
+        )
+        self.load_data()
+
+    def export_csv(self):
+        """Export data to CSV file."""
+        from tkinter import filedialog
+        import csv
+
+        filename = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            title=_("Export Suggested Reorders")
+        )
+
+        if filename:
+            with open(filename, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, delimiter=";")
+                writer.writerow([_("Product"), _("Supplier"), _("Stock"), _("On order"),
+                                 _("Demand/day"), _("Lead time (days)"), _("Reorder point"),
+                                 _("Labels"), _("Order qty")])
+
+                for item in self.tree.get_children():
+                    writer.writerow(self.tree.item(item)["values"])
+
+    def on_cancel(self, evt=None):
+        """Close the window."""
+        if "reorders" in self.engine.dict_instances:
+            del self.engine.dict_instances["reorders"]
+        super().on_cancel()
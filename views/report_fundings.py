@@ -18,6 +18,7 @@ from tkinter import filedialog
 
 from i18n import _
 from views.parent_view import ParentView
+from views.virtual_tree import VirtualTree
 
 
 class UI(ParentView):
@@ -50,47 +51,51 @@ class UI(ParentView):
         self.lbf = ttk.LabelFrame(f1, text=f"{_('Total')}: 0", style="App.TLabelframe")
         w = self.lbf
 
+        # Only the visible rows are in the tree; the headings sort in the query
         cols = ("product", "package", "supplier", "funding", "deliberation", "cig", "valid_from")
-        self.treeview = ttk.Treeview(w, columns=cols, show="headings", height=18)
+        self.vtReport = VirtualTree(w, self.engine, cols, height=18,
+                                    sort_columns={"product": "product", "package": "packaging",
+                                                  "supplier": "supplier", "funding": "funding",
+                                                  "deliberation": "deliberation", "cig": "cig",
+                                                  "valid_from": "valid_from"})
+        tree = self.vtReport.tree
 
         # Columns
-        self.treeview.column("product", width=180, anchor=tk.W)
-        self.treeview.heading("product", text=_("Product"), command=lambda: self.sort_column("product"))
+        tree.column("product", width=180, anchor=tk.W)
+        tree.heading("product", text=_("Product"))
 
-        self.treeview.column("package", width=130, anchor=tk.W)
-        self.treeview.heading("package", text=_("Packaging"), command=lambda: self.sort_column("package"))
+        tree.column("package", width=130, anchor=tk.W)
+        tree.heading("package", text=_("Packaging"))
 
-        self.treeview.column("supplier", width=150, anchor=tk.W)
-        self.treeview.heading("supplier", text=_("Supplier"), command=lambda: self.sort_column("supplier"))
+        tree.column("supplier", width=150, anchor=tk.W)
+        tree.heading("supplier", text=_("Supplier"))
 
-        self.treeview.column("funding", width=120, anchor=tk.W)
-        self.treeview.heading("funding", text=_("Source"), command=lambda: self.sort_column("funding"))
+        tree.column("funding", width=120, anchor=tk.W)
+        tree.heading("funding", text=_("Source"))
 
-        self.treeview.column("deliberation", width=150, anchor=tk.W)
-        self.treeview.heading("deliberation", text=_("Resolution"), command=lambda: self.sort_column("deliberation"))
+        tree.column("deliberation", width=150, anchor=tk.W)
+        tree.heading("deliberation", text=_("Resolution"))
 
-        self.treeview.column("cig", width=120, anchor=tk.W)
-        self.treeview.heading("cig", text=_("CIG"), command=lambda: self.sort_column("cig"))
+        tree.column("cig", width=120, anchor=tk.W)
+        tree.heading("cig", text=_("CIG"))
 
-        self.treeview.column("valid_from", width=100, anchor=tk.CENTER)
-        self.treeview.heading("valid_from", text=_("Valid from"), command=lambda: self.sort_column("valid_from"))
+        tree.column("valid_from", width=100, anchor=tk.CENTER)
+        tree.heading("valid_from", text=_("Valid from"))
 
-        # Scrollbars
-        scrollbar_y = ttk.Scrollbar(w, orient=tk.VERTICAL, command=self.treeview.yview)
-        scrollbar_x = ttk.Scrollbar(w, orient=tk.HORIZONTAL, command=self.treeview.xview)
-        self.treeview.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        # Horizontal scrollbar (the vertical one is the VirtualTree's)
+        scrollbar_x = ttk.Scrollbar(w, orient=tk.HORIZONTAL, command=tree.xview)
+        tree.configure(xscrollcommand=scrollbar_x.set)
 
-        self.treeview.grid(row=0, column=0, sticky="nsew")
-        scrollbar_y.grid(row=0, column=1, sticky="ns")
+        self.vtReport.grid(row=0, column=0, sticky="nsew")
         scrollbar_x.grid(row=1, column=0, sticky="ew")
 
         w.grid_rowconfigure(0, weight=1)
         w.grid_columnconfigure(0, weight=1)
 
         # Tags for different funding types
-        self.treeview.tag_configure("in_gara", background="#e6ffe6")  # Green - In tender
-        self.treeview.tag_configure("economia", background="#fff9e6")  # Yellow - Direct purchase
-        self.treeview.tag_configure("inactive", background="light gray")
+        tree.tag_configure("in_gara", background="#e6ffe6")  # Green - In tender
+        tree.tag_configure("economia", background="#fff9e6")  # Yellow - Direct purchase
+        tree.tag_configure("inactive", background="light gray")
 
         w.pack(fill=tk.BOTH, expand=1)
         f1.pack(side=tk.LEFT, fill=tk.BOTH, expand=1, padx=5, pady=5)
@@ -203,12 +208,38 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load report data with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
-        sql = """SELECT p.description AS product,
+        """Show the report with current filters (rows keyed by package funding)."""
+        sql, args = self.get_query()
+        self.vtReport.set_source(sql, args, key="package_funding_id", sort="product",
+                                 row_values=lambda row: (self.get_values(row), (self.get_tag(row),)),
+                                 on_loaded=self.show_total)
+
+        # The counts cover every row, not only the ones shown
+        self.engine.read_async(self, False, f"""
+            SELECT
+                SUM(status = 1 AND COALESCE(deliberation_id, 0) != 0) AS in_gara,
+                SUM(status = 1 AND COALESCE(deliberation_id, 0) = 0) AS economia
+            FROM ({sql})""", args, self.show_summary, key="report_fundings.summary")
+
+    def show_total(self):
+        """Show the number of rows, once loaded."""
+        self.lbf.config(text=f"{_('Total')}: {self.vtReport.total}")
+
+    def show_summary(self, summary):
+        """Show the tender/economy counts of every row."""
+        summary = summary or {}
+        self.lblInGara.config(text=f"{_('In Tender')}: {summary.get('in_gara') or 0}")
+        self.lblEconomia.config(text=f"{_('Economy')}: {summary.get('economia') or 0}")
+
+    def get_query(self):
+        """
+        Build the report query for the current filters.
+
+        Returns:
+            (sql, args) tuple
+        """
+        sql = """SELECT pf.package_funding_id,
+                        p.description AS product,
                         pk.packaging,
                         s.description AS supplier,
                         fs.description AS funding,
@@ -248,53 +279,33 @@ class UI(ParentView):
             sql += " AND pk.supplier_id = ?"
             args.append(supplier_id)
 
-        sql += " ORDER BY p.description, pk.packaging"
-
-        rs = self.engine.read(True, sql, tuple(args))
-
-        count_gara = 0
-        count_economia = 0
-
-        if rs:
-            for row in rs:
-                tags = []
-                if row["status"] != 1:
-                    tags.append("inactive")
-                elif row["deliberation_id"]:
-                    tags.append("in_gara")
-                    count_gara += 1
-                else:
-                    tags.append("economia")
-                    count_economia += 1
-
-                deliberation_text = row["deliberation"] or _("Economy")
-
-                self.treeview.insert("", tk.END, values=(
-                    row["product"] or "",
-                    row["packaging"] or "",
-                    row["supplier"] or "",
-                    row["funding"] or "",
-                    deliberation_text,
-                    row["cig"] or "",
-                    row["valid_from"] or ""
-                ), tags=tuple(tags) if tags else ())
-
-        total = len(self.treeview.get_children())
-        self.lbf.config(text=f"{_('Total')}: {total}")
-        self.lblInGara.config(text=f"{_('In Tender')}: {count_gara}")
-        self.lblEconomia.config(text=f"{_('Economy')}: {count_economia}")
-
-    def sort_column(self, col):
-        """Sort treeview by column."""
-        items = [(self.treeview.set(k, col), k) for k in self.treeview.get_children("")]
-        items.sort()
-
-        for index, (val, k) in enumerate(items):
-            self.treeview.move(k, "", index)
+        return sql, tuple(args)
+
+    @staticmethod
+    def get_tag(row):
+        """Tree tag of a report row: inactive, in tender or economy."""
+        if row["status"] != 1:
+            return "inactive"
+        if row["deliberation_id"]:
+            return "in_gara"
+        return "economia"
+
+    @staticmethod
+    def get_values(row):
+        """Return the displayed (and exported) values of a report row."""
+        return (
+            row["product"] or "",
+            row["packaging"] or "",
+            row["supplier"] or "",
+            row["funding"] or "",
+            row["deliberation"] or _("Economy"),
+            row["cig"] or "",
+            row["valid_from"] or ""
+        )
 
     def on_export_csv(self, evt=None):
-        """Export report to CSV file."""
-        if not self.treeview.get_children():
+        """Export report to CSV file, streamed from the database with the current filters and order."""
+        if not self.vtReport.total:
             messagebox.showwarning(
                 self.engine.app_title,
                 _("No data to export!"),
@@ -327,9 +338,9 @@ class UI(ParentView):
                     ])
 
                     # Data
-                    for item in self.treeview.get_children():
-                        values = self.treeview.item(item, "values")
-                        writer.writerow(values)
+                    sql, args = self.vtReport.query()
+                    for row in self.engine.stream(sql, args):
+                        writer.writerow(self.get_values(row))
 
                 messagebox.showinfo(
                     self.engine.app_title,
@@ -25,6 +25,12 @@ class UI(ChildView):
         self.minsize(450, 300)
 
         self.quantity = tk.IntVar(value=1)
+        self.search_text = tk.StringVar()
+
+        # Packages matching the search (None: no search) and the
+        # category the products were listed for
+        self.search_ids = None
+        self.products_category_id = None
 
         # Dictionaries for combobox mappings
         self.dict_categories = {}
@@ -43,6 +49,12 @@ class UI(ChildView):
         combo_width = 50  # Wider for long product names
 
         r = 0
+        ttk.Label(w, text=_("Search Package:")).grid(row=r, column=0, sticky=tk.W, pady=2)
+        self.txtSearch = ttk.Entry(w, textvariable=self.search_text, width=combo_width)
+        self.txtSearch.grid(row=r, column=1, sticky=tk.W, padx=5, pady=2)
+        self.search_text.trace_add("write", lambda *args: self.engine.debounce(self, self.on_search))
+
+        r += 1
         ttk.Label(w, text=_("Category:")).grid(row=r, column=0, sticky=tk.W, pady=2)
         self.cbCategories = ttk.Combobox(w, state="readonly", width=combo_width, style="App.TCombobox")
         self.cbCategories.bind("<<ComboboxSelected>>", self.on_category_selected)
@@ -164,7 +176,7 @@ class UI(ChildView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -181,28 +193,38 @@ class UI(ChildView):
             # Clear packages and history when category changes
             self.cbPackages["values"] = []
             self.cbPackages.set("")
-            for item in self.trvHistory.get_children():
-                self.trvHistory.delete(item)
+            self.engine.sync_tree(self.trvHistory, ())
             self.lbfHistory.config(text=_("Order History"))
 
+    def on_search(self):
+        """Restrict the products to the packages matching the search text."""
+        search = self.search_text.get().strip()
+        search_ids = self.engine.get_catalog().search(search, "all") if search else None
+        if search_ids == self.search_ids:
+            return
+        self.search_ids = search_ids
+
+        category_id = self.dict_categories.get(self.cbCategories.current())
+        self.set_products(category_id)
+        self.cbPackages["values"] = []
+        self.cbPackages.set("")
+
+        # A single product found: show its packages at once
+        if len(self.dict_products) == 1:
+            self.cbProducts.current(0)
+            self.on_product_selected()
+
     def set_products(self, category_id):
-        """Load products into combobox filtered by category."""
+        """Load products into combobox filtered by category and search."""
         self.dict_products = {}
+        self.products_category_id = category_id
         voices = []
 
-        sql = """SELECT DISTINCT p.product_id, p.description
-                 FROM products p
-                 INNER JOIN packages pk ON pk.product_id = p.product_id
-                 WHERE p.status = 1 AND pk.status = 1
-                 AND pk.category_id = ?
-                 ORDER BY p.description"""
-
-        rs = self.engine.read(True, sql, (category_id,))
-
-        if rs:
-            for idx, row in enumerate(rs):
-                self.dict_products[idx] = row["product_id"]
-                voices.append(row["description"])
+        if category_id or self.search_ids is not None:
+            products = self.engine.get_catalog().products(category_id, self.search_ids)
+            for idx, (product_id, description) in enumerate(products):
+                self.dict_products[idx] = product_id
+                voices.append(description)
 
         self.cbProducts["values"] = voices
         self.cbProducts.set("")
@@ -211,56 +233,48 @@ class UI(ChildView):
         """Handle product selection - load packages."""
         if self.cbProducts.current() != -1:
             product_id = self.dict_products[self.cbProducts.current()]
-            category_id = self.dict_categories.get(self.cbCategories.current())
-            self.set_packages(product_id, category_id)
+            self.set_packages(product_id, self.products_category_id)
 
     def set_packages(self, product_id, category_id=None):
-        """Load packages for selected product filtered by category."""
+        """Load packages for selected product filtered by category and search."""
         self.dict_packages = {}
         voices = []
 
-        sql = """SELECT pk.package_id, s.description AS supplier, pk.packaging
-                 FROM packages pk
-                 INNER JOIN suppliers s ON s.supplier_id = pk.supplier_id
-                 WHERE pk.product_id = ? AND pk.status = 1"""
-
-        args = [product_id]
-
-        if category_id:
-            sql += " AND pk.category_id = ?"
-            args.append(category_id)
-
-        sql += " ORDER BY s.description"
-
-        rs = self.engine.read(True, sql, tuple(args))
-
-        if rs:
-            for idx, row in enumerate(rs):
-                self.dict_packages[idx] = row["package_id"]
-                display = f"{row['supplier']} - {row['packaging']}"
-                voices.append(display)
+        catalog = self.engine.get_catalog()
+        for idx, package_id in enumerate(catalog.packages(product_id, category_id, self.search_ids)):
+            row = catalog.entries[package_id]
+            self.dict_packages[idx] = package_id
+            display = f"{row['supplier']} - {row['packaging']}"
+            voices.append(display)
 
         self.cbPackages["values"] = voices
         if voices:
             self.cbPackages.current(0)
-            # Load history for first package
-            self.load_history(self.dict_packages[0])
+            self.on_package_selected()
 
     def on_package_selected(self, evt=None):
-        """Handle package selection - load order history."""
+        """Handle package selection - set its category and load order history."""
         if self.cbPackages.current() != -1:
             package_id = self.dict_packages[self.cbPackages.current()]
+            self.set_package_category(package_id)
             self.load_history(package_id)
 
-    def load_history(self, package_id):
-        """Load order history for selected package."""
-        # Clear existing items
-        for item in self.trvHistory.get_children():
-            self.trvHistory.delete(item)
+    def set_package_category(self, package_id):
+        """Select the category of a package (found by search without one)."""
+        entry = self.engine.get_catalog().entries.get(package_id)
+        if entry is None:
+            return
+        for key, value in self.dict_categories.items():
+            if value == entry["category_id"]:
+                self.cbCategories.current(key)
+                break
 
+    def load_history(self, package_id):
+        """Load order history for selected package (rows keyed by item)."""
         # Query with ordered quantity and delivered (labels generated)
         sql = """
             SELECT
+                i.item_id,
                 r.issued,
                 r.reference,
                 i.quantity AS ordered,
@@ -277,28 +291,25 @@ class UI(ChildView):
 
         rs = self.engine.read(True, sql, (package_id,))
 
-        if rs:
-            for row in rs:
-                # Format date (YYYY-MM-DD to DD-MM-YYYY)
-                issued = row["issued"] or ""
-                if issued and "-" in issued:
-                    parts = issued.split("-")
-                    if len(parts) == 3:
-                        issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
-
-                ordered = row["ordered"] or 0
-                delivered = row["delivered"] or 0
-                reference = row["reference"] or ""
-
-                # Determine tag for completed orders
-                tags = ("completed",) if delivered >= ordered and ordered > 0 else ()
-
-                # Insert into treeview
-                self.trvHistory.insert(
-                    "", tk.END,
-                    values=(issued, reference, ordered, delivered),
-                    tags=tags
-                )
+        rows = []
+        for row in rs or ():
+            # Format date (YYYY-MM-DD to DD-MM-YYYY)
+            issued = row["issued"] or ""
+            if issued and "-" in issued:
+                parts = issued.split("-")
+                if len(parts) == 3:
+                    issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
+
+            ordered = row["ordered"] or 0
+            delivered = row["delivered"] or 0
+            reference = row["reference"] or ""
+
+            # Determine tag for completed orders
+            tags = ("completed",) if delivered >= ordered and ordered > 0 else ()
+
+            rows.append((row["item_id"], (issued, reference, ordered, delivered), tags))
+
+        self.engine.sync_tree(self.trvHistory, rows)
 
         # Update label with count
         count = len(self.trvHistory.get_children())
@@ -181,7 +181,7 @@ class UI(ParentView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -193,16 +193,14 @@ class UI(ParentView):
             self.cbCategories.current(0)
 
     def on_reset(self, evt=None):
-        """Reload requests list."""
-        # Clear treeviews
-        for item in self.treeRequests.get_children():
-            self.treeRequests.delete(item)
-        for item in self.treeItems.get_children():
-            self.treeItems.delete(item)
+        """
+        Reload requests list.
 
+        Unchanged rows are kept: if the selected request is still listed
+        it stays selected and its detail is reloaded, otherwise the
+        detail is cleared.
+        """
         self.dict_requests = {}
-        self.selected_request = None
-        self.lblItems.config(text=_("Request Detail"))
 
         sql = """
             SELECT
@@ -226,35 +224,40 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                request_id = row["request_id"]
-                self.dict_requests[request_id] = row
-
-                # Format date
-                issued = row["issued"] or ""
-                if issued and "-" in issued:
-                    parts = issued.split("-")
-                    if len(parts) == 3:
-                        issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
-
-                ref = row["reference"] or ""
-                count = row["items_count"]
-
-                # Tag based on status: 0=closed, 1=draft, 2=sent
-                if row["status"] == 0:
-                    tag = ("closed",)
-                elif row["status"] == 2:
-                    tag = ("sent",)
-                else:
-                    tag = ("draft",)
-
-                self.treeRequests.insert(
-                    "", tk.END,
-                    iid=request_id,
-                    values=(ref, issued, count),
-                    tags=tag
-                )
+        rows = []
+        for row in rs or ():
+            request_id = row["request_id"]
+            self.dict_requests[request_id] = row
+
+            # Format date
+            issued = row["issued"] or ""
+            if issued and "-" in issued:
+                parts = issued.split("-")
+                if len(parts) == 3:
+                    issued = f"{parts[2]}-{parts[1]}-{parts[0]}"
+
+            ref = row["reference"] or ""
+            count = row["items_count"]
+
+            # Tag based on status: 0=closed, 1=draft, 2=sent
+            if row["status"] == 0:
+                tag = ("closed",)
+            elif row["status"] == 2:
+                tag = ("sent",)
+            else:
+                tag = ("draft",)
+
+            rows.append((request_id, (ref, issued, count), tag))
+
+        self.engine.sync_tree(self.treeRequests, rows)
+
+        if self.selected_request and self.selected_request["request_id"] in self.dict_requests:
+            self.on_request_selected()
+        else:
+            self.engine.sync_tree(self.treeItems, ())
+            self.dict_items = {}
+            self.selected_request = None
+            self.lblItems.config(text=_("Request Detail"))
 
     def on_request_selected(self, evt=None):
         """Handle request selection - load items."""
@@ -267,10 +270,7 @@ class UI(ParentView):
             self.set_items(request_id)
 
     def set_items(self, request_id):
-        """Load items for selected request."""
-        # Clear items treeview
-        for item in self.treeItems.get_children():
-            self.treeItems.delete(item)
+        """Load items for selected request (unchanged rows are kept)."""
         self.dict_items = {}
 
         # Update label
@@ -299,30 +299,22 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, (request_id,))
 
-        if rs:
-            for row in rs:
-                item_id = row["item_id"]
-                self.dict_items[item_id] = row
-
-                # Tag for cancelled items
-                tag = ("cancelled",) if row["status"] == 2 else ()
-
-                # Show note in product column for cancelled items
-                product = row["product"] or ""
-                if row["status"] == 2 and row.get("note"):
-                    product = f"[{_('Cancelled')}] {product}"
-
-                self.treeItems.insert(
-                    "", tk.END,
-                    iid=item_id,
-                    values=(
-                        product,
-                        row["supplier"] or "",
-                        row["packaging"] or "",
-                        row["quantity"]
-                    ),
-                    tags=tag
-                )
+        rows = []
+        for row in rs or ():
+            item_id = row["item_id"]
+            self.dict_items[item_id] = row
+
+            # Tag for cancelled items
+            tag = ("cancelled",) if row["status"] == 2 else ()
+
+            # Show note in product column for cancelled items
+            product = row["product"] or ""
+            if row["status"] == 2 and row.get("note"):
+                product = f"[{_('Cancelled')}] {product}"
+
+            rows.append((item_id, (product, row["supplier"] or "", row["packaging"] or "", row["quantity"]), tag))
+
+        self.engine.sync_tree(self.treeItems, rows)
 
     def on_item_selected(self, evt=None):
         """Handle item selection."""
@@ -365,7 +357,7 @@ class UI(ParentView):
         if last_id:
             self.on_reset()
             # Find and select the new request
-            if str(last_id) in self.treeRequests.get_children():
+            if self.treeRequests.exists(last_id):
                 self.treeRequests.selection_set(last_id)
                 self.treeRequests.see(last_id)
                 self.on_request_selected()
@@ -432,7 +424,7 @@ class UI(ParentView):
             self.refresh_request_list()
 
             # Notify subscribers that request changed
-            self.engine.notify("request_changed")
+            self.engine.notify("request_changed", request_ids=(request_id,))
 
     def on_add_item(self, evt=None):
         """Add item to selected request."""
@@ -603,15 +595,8 @@ class UI(ParentView):
         self.obj.on_open(item_data, product_name)
 
     def refresh_request_list(self):
-        """Refresh only the requests list keeping selection."""
-        if self.selected_request:
-            current_id = self.selected_request["request_id"]
-            self.on_reset()
-            # Re-select
-            if str(current_id) in self.treeRequests.get_children():
-                self.treeRequests.selection_set(current_id)
-                self.treeRequests.see(current_id)
-                self.on_request_selected()
+        """Refresh the requests list keeping selection."""
+        self.on_reset()
 
     def on_close_request(self, evt=None):
         """Close selected request (set status=0)."""
@@ -675,7 +660,7 @@ class UI(ParentView):
             self.on_reset()
 
             # Notify subscribers that request changed
-            self.engine.notify("request_changed")
+            self.engine.notify("request_changed", request_ids=(pk,))
 
     def on_delete_request(self, evt=None):
         """Delete selected request and all its items."""
@@ -707,7 +692,7 @@ class UI(ParentView):
             self.on_reset()
 
             # Notify subscribers that request changed
-            self.engine.notify("request_changed")
+            self.engine.notify("request_changed", request_ids=(pk,))
 
     def on_print(self, evt=None):
         """Print selected request."""
@@ -14,6 +14,7 @@ import datetime
 from i18n import _
 from calendarium import Calendarium
 from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
 
 
 class UI(ParentView):
@@ -28,6 +29,8 @@ class UI(ParentView):
         self.minsize(800, 550)
 
         self.dict_categories = {}
+        # Last calculated rows (product, supplier, consumed, avg_month), for export_csv
+        self.rows = []
 
         self.init_ui()
         self.show()
@@ -61,6 +64,7 @@ class UI(ParentView):
         ttk.Label(r2, text=_("Category:")).pack(side=tk.LEFT)
         self.cbCategories = ttk.Combobox(r2, state="readonly", width=25, style="App.TCombobox")
         self.cbCategories.pack(side=tk.LEFT, padx=5)
+        self.cbCategories.bind("<<ComboboxSelected>>", lambda evt: self.load_data())
 
         self.engine.create_button(r2, _("Calculate"), self.load_data).pack(side=tk.LEFT, padx=20)
 
@@ -105,6 +109,9 @@ class UI(ParentView):
 
         self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
 
+        self.progress = StatsProgress(bf, self.engine, f"{self}.cube")
+        self.progress.pack(side=tk.LEFT, padx=20)
+
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
     def on_open(self):
@@ -125,7 +132,7 @@ class UI(ParentView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -145,11 +152,7 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load consumption data."""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
+        """Get the movement cube (reloaded only if the database changed), then compute."""
         # Get date range
         if not self.cal_from.is_valid or not self.cal_to.is_valid:
             from tkinter import messagebox
@@ -160,12 +163,16 @@ class UI(ParentView):
             )
             return
 
+        self.progress.start()
+        self.engine.get_cube(self, self.show_data, self.progress.on_progress, self.progress.on_error)
+
+    def show_data(self, cube):
+        """Fill the tree with the consumption of the period, computed in memory."""
+        self.progress.stop()
+
         date_from = self.cal_from.get_date()
         date_to = self.cal_to.get_date()
 
-        date_from_str = date_from.isoformat()
-        date_to_str = date_to.isoformat()
-
         # Calculate months for average
         days = (date_to - date_from).days
         months = max(1, days / 30)
@@ -174,58 +181,41 @@ class UI(ParentView):
         cat_idx = self.cbCategories.current()
         category_id = self.dict_categories.get(cat_idx)
 
-        # Build query
-        sql = """
-            SELECT
-                p.description AS product,
-                s.description AS supplier,
-                COUNT(lb.label_id) AS consumed
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-            WHERE lb.unloaded >= ? AND lb.unloaded <= ? AND lb.status = 0
-        """
-        args = [date_from_str, date_to_str]
-
-        if category_id:
-            sql += " AND pk.category_id = ?"
-            args.append(category_id)
-
-        sql += """
-            GROUP BY pk.package_id
-            ORDER BY consumed DESC
-        """
-
-        rs = self.engine.read(True, sql, tuple(args))
-
-        total_consumed = 0
-        if rs:
-            for row in rs:
-                consumed = row["consumed"]
-                avg_month = round(consumed / months, 1)
-                total_consumed += consumed
-
-                self.tree.insert("", tk.END, values=(
-                    row["product"],
-                    row["supplier"] or "",
-                    consumed,
-                    avg_month
-                ))
+        totals = cube.totals(date_from, date_to, "unloaded_count",
+                             group_by="package", category_id=category_id or None)
+
+        self.rows = []
+        package_ids = []
+        for package_id, consumed in sorted(totals.items(), key=lambda kv: -kv[1]):
+            package = cube.packages[package_id]
+            self.rows.append((
+                package["product"],
+                package["supplier"] or "",
+                consumed,
+                round(consumed / months, 1)
+            ))
+            package_ids.append(package_id)
+
+        self.engine.sync_tree(self.tree, ((package_id, row, ())
+                                          for package_id, row in zip(package_ids, self.rows)))
+
+        total_consumed = sum(totals.values())
 
         # Update summary
         self.lbl_summary.config(
-            text=f"{_('Total products')}: {len(rs) if rs else 0} | "
+            text=f"{_('Total products')}: {len(self.rows)} | "
                  f"{_('Total consumed')}: {total_consumed} | "
                  f"{_('Period')}: {days} {_('days')}"
         )
 
     def export_csv(self):
-        """Export data to CSV file."""
+        """Export the last calculated data to CSV file."""
         from tkinter import filedialog
         import csv
 
+        if not self.rows:
+            return
+
         filename = filedialog.asksaveasfilename(
             parent=self,
             defaultextension=".csv",
@@ -237,10 +227,7 @@ class UI(ParentView):
             with open(filename, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f, delimiter=";")
                 writer.writerow([_("Product"), _("Supplier"), _("Consumed"), _("Avg/Month")])
-
-                for item in self.tree.get_children():
-                    values = self.tree.item(item)["values"]
-                    writer.writerow(values)
+                writer.writerows(self.rows)
 
     def on_cancel(self, evt=None):
         """Close the window."""
@@ -9,7 +9,6 @@ Version: I (SQLite Edition)
 """
 import tkinter as tk
 from tkinter import ttk
-import datetime
 
 from i18n import _
 from views.parent_view import ParentView
@@ -79,7 +78,11 @@ class UI(ParentView):
         bf = ttk.Frame(f0)
         bf.pack(fill=tk.X, pady=(15, 0))
 
-        self.engine.create_button(bf, _("Refresh"), self.load_data, width=12).pack(side=tk.LEFT, padx=5)
+        self.engine.create_button(bf, _("Refresh"), lambda: self.load_data(refresh=True),
+                                  width=12).pack(side=tk.LEFT, padx=5)
+
+        self.lbl_taken = ttk.Label(bf, text="")
+        self.lbl_taken.pack(side=tk.LEFT, padx=10)
 
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
@@ -89,202 +92,71 @@ class UI(ParentView):
         self.engine.dict_instances["stats_dashboard"] = self
         self.load_data()
 
-    def load_data(self):
-        """Load all dashboard metrics."""
-        self.load_stock_metrics()
-        self.load_reorder_metrics()
-        self.load_expiring_metrics()
-        self.load_movement_metrics()
-        self.load_request_metrics()
-        self.load_top_consumption()
-
-    def load_stock_metrics(self):
-        """Load stock overview metrics."""
-        # Clear frame
-        for w in self.frm_stock.winfo_children():
-            w.destroy()
-
-        # Total products
-        sql = "SELECT COUNT(DISTINCT pk.package_id) AS cnt FROM packages pk WHERE pk.status = 1"
-        row = self.engine.read(False, sql)
-        total_products = row["cnt"] if row else 0
-
-        # Total labels in stock
-        sql = "SELECT COUNT(*) AS cnt FROM labels WHERE status = 1"
-        row = self.engine.read(False, sql)
-        labels_in_stock = row["cnt"] if row else 0
-
-        # Active batches
-        sql = "SELECT COUNT(*) AS cnt FROM batches WHERE status = 1"
-        row = self.engine.read(False, sql)
-        active_batches = row["cnt"] if row else 0
-
-        self._add_metric(self.frm_stock, _("Active products:"), total_products)
-        self._add_metric(self.frm_stock, _("Labels in stock:"), labels_in_stock)
-        self._add_metric(self.frm_stock, _("Active batches:"), active_batches)
-
-    def load_reorder_metrics(self):
-        """Load reorder threshold metrics."""
-        for w in self.frm_reorder.winfo_children():
-            w.destroy()
-
-        # Products below reorder threshold
-        sql = """
-            SELECT COUNT(*) AS cnt
-            FROM packages pk
-            WHERE pk.status = 1 AND pk.reorder > 0
-            AND (
-                SELECT COUNT(*) FROM labels lb
-                JOIN batches b ON b.batch_id = lb.batch_id
-                WHERE b.package_id = pk.package_id AND lb.status = 1
-            ) <= pk.reorder
-        """
-        row = self.engine.read(False, sql)
-        below_reorder = row["cnt"] if row else 0
-
-        # Products with zero stock
-        sql = """
-            SELECT COUNT(*) AS cnt
-            FROM packages pk
-            WHERE pk.status = 1 AND pk.reorder > 0
-            AND (
-                SELECT COUNT(*) FROM labels lb
-                JOIN batches b ON b.batch_id = lb.batch_id
-                WHERE b.package_id = pk.package_id AND lb.status = 1
-            ) = 0
-        """
-        row = self.engine.read(False, sql)
-        zero_stock = row["cnt"] if row else 0
-
-        self._add_metric(self.frm_reorder, _("Products below threshold:"), below_reorder,
-                        color="orange" if below_reorder > 0 else None)
-        self._add_metric(self.frm_reorder, _("Out of stock products:"), zero_stock,
-                        color="red" if zero_stock > 0 else None)
-
-    def load_expiring_metrics(self):
-        """Load expiration metrics."""
-        for w in self.frm_expiring.winfo_children():
-            w.destroy()
-
-        today = datetime.date.today().isoformat()
-        in_30 = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
-        in_60 = (datetime.date.today() + datetime.timedelta(days=60)).isoformat()
-        in_90 = (datetime.date.today() + datetime.timedelta(days=90)).isoformat()
-
-        # Already expired
-        sql = """
-            SELECT COUNT(DISTINCT b.batch_id) AS cnt
-            FROM batches b
-            JOIN labels lb ON lb.batch_id = b.batch_id AND lb.status = 1
-            WHERE b.status = 1 AND b.expiration < ?
-        """
-        row = self.engine.read(False, sql, (today,))
-        expired = row["cnt"] if row else 0
-
-        # Expiring in 30 days
-        sql = """
-            SELECT COUNT(DISTINCT b.batch_id) AS cnt
-            FROM batches b
-            JOIN labels lb ON lb.batch_id = b.batch_id AND lb.status = 1
-            WHERE b.status = 1 AND b.expiration >= ? AND b.expiration <= ?
-        """
-        row = self.engine.read(False, sql, (today, in_30))
-        exp_30 = row["cnt"] if row else 0
-
-        # Expiring in 60 days
-        row = self.engine.read(False, sql, (today, in_60))
-        exp_60 = row["cnt"] if row else 0
-
-        # Expiring in 90 days
-        row = self.engine.read(False, sql, (today, in_90))
-        exp_90 = row["cnt"] if row else 0
-
-        self._add_metric(self.frm_expiring, _("Expired batches:"), expired,
-                        color="red" if expired > 0 else None)
-        self._add_metric(self.frm_expiring, _("Expiring (30 days):"), exp_30,
-                        color="orange" if exp_30 > 0 else None)
-        self._add_metric(self.frm_expiring, _("Expiring (60 days):"), exp_60)
-        self._add_metric(self.frm_expiring, _("Expiring (90 days):"), exp_90)
-
-    def load_movement_metrics(self):
-        """Load movement metrics for last 30 days."""
-        for w in self.frm_movements.winfo_children():
-            w.destroy()
-
-        date_30_ago = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
-
-        # Labels loaded
-        sql = "SELECT COUNT(*) AS cnt FROM labels WHERE loaded >= ?"
-        row = self.engine.read(False, sql, (date_30_ago,))
-        loaded = row["cnt"] if row else 0
-
-        # Labels unloaded
-        sql = "SELECT COUNT(*) AS cnt FROM labels WHERE unloaded >= ? AND status = 0"
-        row = self.engine.read(False, sql, (date_30_ago,))
-        unloaded = row["cnt"] if row else 0
-
-        # Labels cancelled
-        sql = "SELECT COUNT(*) AS cnt FROM labels WHERE status = -1"
-        row = self.engine.read(False, sql)
-        cancelled = row["cnt"] if row else 0
-
-        self._add_metric(self.frm_movements, _("Labels loaded:"), loaded)
-        self._add_metric(self.frm_movements, _("Labels unloaded:"), unloaded)
-        self._add_metric(self.frm_movements, _("Labels cancelled:"), cancelled)
-
-    def load_request_metrics(self):
-        """Load request metrics."""
-        for w in self.frm_requests.winfo_children():
-            w.destroy()
-
-        # Open requests
-        sql = "SELECT COUNT(*) AS cnt FROM requests WHERE status = 1"
-        row = self.engine.read(False, sql)
-        open_req = row["cnt"] if row else 0
-
-        # Pending items
-        sql = """
-            SELECT COUNT(*) AS cnt
-            FROM items i
-            JOIN requests r ON r.request_id = i.request_id AND r.status = 1
-            WHERE i.status = 1
-            AND i.quantity > COALESCE(
-                (SELECT SUM(d.quantity) FROM deliveries d WHERE d.item_id = i.item_id AND d.status = 1), 0
-            )
-        """
-        row = self.engine.read(False, sql)
-        pending_items = row["cnt"] if row else 0
-
-        self._add_metric(self.frm_requests, _("Open requests:"), open_req)
-        self._add_metric(self.frm_requests, _("Pending items:"), pending_items)
-
-    def load_top_consumption(self):
-        """Load top 5 consumed products in last 30 days."""
-        for w in self.frm_top.winfo_children():
-            w.destroy()
-
-        date_30_ago = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
-
-        sql = """
-            SELECT p.description AS product, COUNT(lb.label_id) AS consumed
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            WHERE lb.unloaded >= ? AND lb.status = 0
-            GROUP BY pk.package_id
-            ORDER BY consumed DESC
-            LIMIT 5
-        """
-        rs = self.engine.read(True, sql, (date_30_ago,))
-
-        if rs:
-            for row in rs:
-                product = row["product"][:30]
-                consumed = row["consumed"]
-                self._add_metric(self.frm_top, f"{product}:", consumed)
-        else:
-            ttk.Label(self.frm_top, text=_("No data available")).pack(anchor=tk.W, padx=10, pady=2)
+    def load_data(self, refresh=False):
+        """Show the dashboard snapshot, querying only if it is stale."""
+        self.engine.get_dashboard(self, self.show_data, refresh)
+
+    def show_data(self, snapshot):
+        """Fill the metric frames with the snapshot values."""
+        frames = (self.frm_stock, self.frm_reorder, self.frm_expiring,
+                  self.frm_movements, self.frm_requests, self.frm_top)
+
+        for frame in frames:
+            for w in frame.winfo_children():
+                w.destroy()
+
+        if snapshot is None:
+            self.lbl_taken.config(text="")
+            for frame in frames:
+                ttk.Label(frame, text=_("No data available")).pack(anchor=tk.W, padx=10, pady=2)
+            return
+
+        self.lbl_taken.config(text=_("Updated:") + " " + snapshot["taken"].strftime("%H:%M:%S"))
+
+        for frame, metrics in zip(frames, self.get_metrics(snapshot)):
+            for label, value, color in metrics:
+                self._add_metric(frame, label, value, color=color)
+
+            if not metrics:
+                ttk.Label(frame, text=_("No data available")).pack(anchor=tk.W, padx=10, pady=2)
+
+    def get_metrics(self, snapshot):
+        """Return the (label, value, color) rows of each frame, in frame order."""
+        below_reorder = snapshot["below_reorder"]
+        out_of_stock = snapshot["out_of_stock"]
+        expired = snapshot["expired"]
+        exp_30 = snapshot["expiring_30"]
+
+        return (
+            [
+                (_("Active products:"), snapshot["active_products"], None),
+                (_("Labels in stock:"), snapshot["labels_in_stock"], None),
+                (_("Active batches:"), snapshot["active_batches"], None),
+            ],
+            [
+                (_("Products below threshold:"), below_reorder,
+                 "orange" if below_reorder > 0 else None),
+                (_("Out of stock products:"), out_of_stock,
+                 "red" if out_of_stock > 0 else None),
+            ],
+            [
+                (_("Expired batches:"), expired, "red" if expired > 0 else None),
+                (_("Expiring (30 days):"), exp_30, "orange" if exp_30 > 0 else None),
+                (_("Expiring (60 days):"), snapshot["expiring_60"], None),
+                (_("Expiring (90 days):"), snapshot["expiring_90"], None),
+            ],
+            [
+                (_("Labels loaded:"), snapshot["loaded"], None),
+                (_("Labels unloaded:"), snapshot["unloaded"], None),
+                (_("Labels cancelled:"), snapshot["cancelled"], None),
+            ],
+            [
+                (_("Open requests:"), snapshot["open_requests"], None),
+                (_("Pending items:"), snapshot["pending_items"], None),
+            ],
+            [(f"{row['product'][:30]}:", row["consumed"], None)
+             for row in snapshot["top_consumption"]],
+        )
 
     def _add_metric(self, parent, label, value, color=None):
         """Add a metric row to the frame."""
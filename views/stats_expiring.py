@@ -13,7 +13,30 @@ import datetime
 
 from i18n import _
 from calendarium import Calendarium
+from fefo import analyse_fefo
 from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
+
+# Batches expired in a period with remaining stock
+SQL_EXPIRED_BATCHES = """
+    SELECT
+        b.batch_id,
+        p.description AS product,
+        s.description AS supplier,
+        b.description AS lot,
+        b.expiration,
+        bs.in_stock,
+        bs.used,
+        bs.in_stock + bs.used + bs.cancelled AS total
+    FROM batches b
+    JOIN packages pk ON pk.package_id = b.package_id
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+    JOIN batch_stock bs ON bs.batch_id = b.batch_id
+    WHERE b.expiration >= ? AND b.expiration <= ?
+    AND bs.in_stock > 0
+    ORDER BY b.expiration ASC
+"""
 
 
 class UI(ParentView):
@@ -27,6 +50,11 @@ class UI(ParentView):
 
         self.minsize(850, 550)
 
+        # Period and FEFO results of the last load, used by export_csv
+        self.period = None
+        self.fefo_data = {}
+        self.fefo_group = tk.StringVar(value="packages")
+
         self.init_ui()
         self.show()
 
@@ -98,8 +126,20 @@ class UI(ParentView):
         self.tree_expired.pack(fill=tk.X, pady=5)
 
         # FEFO efficiency
-        ttk.Label(f0, text=_("FEFO Efficiency (First Expired First Out)"),
-                 font=("", 10, "bold")).pack(anchor=tk.W, pady=(10, 0))
+        fr = ttk.Frame(f0)
+        fr.pack(fill=tk.X, pady=(10, 0))
+
+        ttk.Label(fr, text=_("FEFO Efficiency (First Expired First Out)"),
+                 font=("", 10, "bold")).pack(side=tk.LEFT)
+
+        for text, value in ((_("Supplier"), "suppliers"), (_("Category"), "categories"),
+                            (_("Product"), "packages")):
+            ttk.Radiobutton(
+                fr, text=text, variable=self.fefo_group, value=value,
+                command=self.show_fefo_analysis,
+                style="App.TRadiobutton"
+            ).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(fr, text=_("Group by:")).pack(side=tk.RIGHT, padx=5)
 
         columns2 = ("product", "total_labels", "fefo_correct", "fefo_pct")
         self.tree_fefo = ttk.Treeview(f0, columns=columns2, show="headings", height=8)
@@ -126,6 +166,9 @@ class UI(ParentView):
 
         self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
 
+        self.progress = StatsProgress(bf, self.engine, "stats_expiring", on_partial=self.show_partial)
+        self.progress.pack(side=tk.LEFT, padx=20)
+
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
     def on_open(self):
@@ -152,13 +195,7 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load expiration data."""
-        # Clear trees
-        for item in self.tree_expired.get_children():
-            self.tree_expired.delete(item)
-        for item in self.tree_fefo.get_children():
-            self.tree_fefo.delete(item)
-
+        """Load expiration data in background."""
         # Clear metrics
         for w in self.frm_metrics.winfo_children():
             w.destroy()
@@ -179,172 +216,178 @@ class UI(ParentView):
         date_from_str = date_from.isoformat()
         date_to_str = date_to.isoformat()
 
-        self.load_expired_batches(date_from_str, date_to_str)
-        self.load_fefo_analysis()
-        self.load_summary_metrics(date_from_str, date_to_str)
-
-    def load_expired_batches(self, date_from, date_to):
-        """Load batches that expired with remaining stock."""
-        sql = """
-            SELECT
-                p.description AS product,
-                s.description AS supplier,
-                b.description AS lot,
-                b.expiration,
-                SUM(CASE WHEN lb.status = 1 THEN 1 ELSE 0 END) AS in_stock,
-                SUM(CASE WHEN lb.status = 0 THEN 1 ELSE 0 END) AS used,
-                COUNT(lb.label_id) AS total
-            FROM batches b
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-            WHERE b.expiration >= ? AND b.expiration <= ?
-            GROUP BY b.batch_id
-            HAVING in_stock > 0
-            ORDER BY b.expiration ASC
-        """
-
-        rs = self.engine.read(True, sql, (date_from, date_to))
-
-        if rs:
-            for row in rs:
-                in_stock = row["in_stock"] or 0
-                used = row["used"] or 0
-                total = row["total"] or 0
-                loss_pct = round((in_stock / total * 100), 1) if total > 0 else 0
-
-                # Determine tag based on loss percentage
-                if loss_pct >= 50:
-                    tag = "high_loss"
-                elif loss_pct >= 25:
-                    tag = "medium_loss"
-                else:
-                    tag = ""
-
-                # Format expiration date
-                exp = row["expiration"] or ""
-                if exp and "-" in exp:
-                    parts = exp.split("-")
-                    if len(parts) == 3:
-                        exp = f"{parts[2]}-{parts[1]}-{parts[0]}"
-
-                self.tree_expired.insert("", tk.END, values=(
-                    row["product"],
-                    row["supplier"] or "",
-                    row["lot"],
-                    exp,
-                    in_stock,
-                    used,
-                    f"{loss_pct}%"
-                ), tags=(tag,) if tag else ())
-
-    def load_fefo_analysis(self):
-        """Load FEFO efficiency analysis."""
-        # This analyzes if labels were unloaded in order of expiration
-        sql = """
-            SELECT
-                p.description AS product,
-                pk.package_id,
-                COUNT(lb.label_id) AS total_labels
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            WHERE lb.status = 0 AND lb.unloaded IS NOT NULL
-            GROUP BY pk.package_id
-            HAVING total_labels > 1
-            ORDER BY total_labels DESC
-            LIMIT 20
-        """
+        self.period = (date_from_str, date_to_str)
+
+        self.progress.start()
+        self.engine.run_stats(
+            self,
+            "stats_expiring",
+            (date_from_str, date_to_str, datetime.date.today().isoformat()),
+            lambda db: self.fetch_data(db, date_from_str, date_to_str),
+            self.show_data,
+            on_progress=self.progress.on_progress,
+            on_error=self.progress.on_error
+        )
 
-        rs = self.engine.read(True, sql)
-
-        if rs:
-            for row in rs:
-                package_id = row["package_id"]
-
-                # Check FEFO compliance: for each unloaded label,
-                # was there a label with earlier expiration still in stock at that moment?
-                # Simplified: count labels unloaded when older stock existed
-                sql2 = """
-                    SELECT COUNT(*) AS fefo_violations
-                    FROM labels lb1
-                    JOIN batches b1 ON b1.batch_id = lb1.batch_id
-                    WHERE b1.package_id = ?
-                    AND lb1.status = 0
-                    AND EXISTS (
-                        SELECT 1 FROM labels lb2
-                        JOIN batches b2 ON b2.batch_id = lb2.batch_id
-                        WHERE b2.package_id = ?
-                        AND b2.expiration < b1.expiration
-                        AND (lb2.status = 1 OR (lb2.status = 0 AND lb2.unloaded > lb1.unloaded))
-                    )
-                """
-                r2 = self.engine.read(False, sql2, (package_id, package_id))
-                violations = r2["fefo_violations"] if r2 else 0
-
-                total = row["total_labels"]
-                correct = total - violations
-                fefo_pct = round((correct / total * 100), 1) if total > 0 else 100
-
-                # Determine tag
-                if fefo_pct >= 90:
-                    tag = "good"
-                elif fefo_pct >= 70:
-                    tag = "warning"
-                else:
-                    tag = "bad"
-
-                self.tree_fefo.insert("", tk.END, values=(
-                    row["product"],
-                    total,
-                    correct,
-                    f"{fefo_pct}%"
-                ), tags=(tag,))
-
-    def load_summary_metrics(self, date_from, date_to):
-        """Load summary metrics."""
+    def fetch_data(self, db, date_from, date_to):
+        """Run the expiration queries, showing each part when ready (worker thread)."""
+        expired_rs = self.load_expired_batches(db, date_from, date_to)
+        db.progress(1, 3, ("expired", expired_rs))
+
+        fefo_data = self.load_fefo_analysis(db)
+        db.progress(2, 3, ("fefo", fefo_data))
+
+        return expired_rs, fefo_data, self.load_summary_metrics(db, date_from, date_to)
+
+    def show_partial(self, partial):
+        """Show a part of the analysis computed so far."""
+        name, data = partial
+        if name == "expired":
+            self.show_expired_batches(data)
+        elif name == "fefo":
+            self.show_fefo_analysis(data)
+
+    def show_data(self, data):
+        """Fill trees and metrics with the loaded rows."""
+        self.progress.stop()
+        expired_rs, fefo_data, metrics = data
+
+        self.show_expired_batches(expired_rs)
+        self.show_fefo_analysis(fefo_data)
+
+        for label, value, color in metrics:
+            self._add_metric(label, value, color=color)
+
+    def load_expired_batches(self, db, date_from, date_to):
+        """Load batches that expired with remaining stock (worker thread)."""
+        return db.read(True, SQL_EXPIRED_BATCHES, (date_from, date_to))
+
+    def show_expired_batches(self, rs):
+        """Fill the expired batches tree (rows keyed by batch)."""
+        rows = []
+        for row in rs or ():
+            values, tag = self.format_expired_batch(row)
+            rows.append((row["batch_id"], values, (tag,)))
+
+        self.engine.sync_tree(self.tree_expired, rows)
+
+    @staticmethod
+    def format_expired_batch(row):
+        """Return the displayed values and the loss tag of an expired batch row."""
+        in_stock = row["in_stock"] or 0
+        used = row["used"] or 0
+        total = row["total"] or 0
+        loss_pct = round((in_stock / total * 100), 1) if total > 0 else 0
+
+        # Determine tag based on loss percentage
+        if loss_pct >= 50:
+            tag = "high_loss"
+        elif loss_pct >= 25:
+            tag = "medium_loss"
+        else:
+            tag = ""
+
+        # Format expiration date
+        exp = row["expiration"] or ""
+        if exp and "-" in exp:
+            parts = exp.split("-")
+            if len(parts) == 3:
+                exp = f"{parts[2]}-{parts[1]}-{parts[0]}"
+
+        values = (
+            row["product"],
+            row["supplier"] or "",
+            row["lot"],
+            exp,
+            in_stock,
+            used,
+            f"{loss_pct}%"
+        )
+        return values, tag
+
+    def load_fefo_analysis(self, db):
+        """Load FEFO efficiency per product, category and supplier (worker thread)."""
+        return analyse_fefo(db)
+
+    def show_fefo_analysis(self, data=None):
+        """Fill the FEFO tree with the selected grouping."""
+        if data is not None:
+            self.fefo_data = data
+
+        group = self.fefo_group.get()
+        self.tree_fefo.heading("product", text=self.get_fefo_heading(group))
+
+        rows = []
+        for row in self.fefo_data.get(group, []):
+            fefo_pct = row["fefo_pct"]
+
+            # Determine tag
+            if fefo_pct >= 90:
+                tag = "good"
+            elif fefo_pct >= 70:
+                tag = "warning"
+            else:
+                tag = "bad"
+
+            # Packages by id, categories and suppliers by name
+            rows.append((row.get("package_id", row["key"]), (
+                row["key"],
+                row["unloaded"],
+                row["correct"],
+                f"{fefo_pct}%"
+            ), (tag,)))
+
+        self.engine.sync_tree(self.tree_fefo, rows)
+
+    @staticmethod
+    def get_fefo_heading(group):
+        """Return the first column heading of a FEFO grouping."""
+        return {"packages": _("Product"), "categories": _("Category"),
+                "suppliers": _("Supplier")}[group]
+
+    def load_summary_metrics(self, db, date_from, date_to):
+        """Load summary metrics (worker thread)."""
         today = datetime.date.today().isoformat()
 
         # Total expired batches with stock
         sql = """
-            SELECT COUNT(DISTINCT b.batch_id) AS cnt
+            SELECT COUNT(*) AS cnt
             FROM batches b
-            JOIN labels lb ON lb.batch_id = b.batch_id AND lb.status = 1
+            JOIN batch_stock bs ON bs.batch_id = b.batch_id AND bs.in_stock > 0
             WHERE b.expiration < ?
         """
-        row = self.engine.read(False, sql, (today,))
+        row = db.read(False, sql, (today,))
         expired_with_stock = row["cnt"] if row else 0
 
         # Total expired labels (losses)
         sql = """
-            SELECT COUNT(*) AS cnt
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            WHERE lb.status = 1 AND b.expiration < ?
+            SELECT COALESCE(SUM(bs.in_stock), 0) AS cnt
+            FROM batch_stock bs
+            JOIN batches b ON b.batch_id = bs.batch_id
+            WHERE b.expiration < ?
         """
-        row = self.engine.read(False, sql, (today,))
+        row = db.read(False, sql, (today,))
         expired_labels = row["cnt"] if row else 0
 
         # Batches expiring in next 30 days
         in_30 = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
         sql = """
-            SELECT COUNT(DISTINCT b.batch_id) AS cnt
+            SELECT COUNT(*) AS cnt
             FROM batches b
-            JOIN labels lb ON lb.batch_id = b.batch_id AND lb.status = 1
+            JOIN batch_stock bs ON bs.batch_id = b.batch_id AND bs.in_stock > 0
             WHERE b.expiration >= ? AND b.expiration <= ?
         """
-        row = self.engine.read(False, sql, (today, in_30))
+        row = db.read(False, sql, (today, in_30))
         expiring_30 = row["cnt"] if row else 0
 
-        # Display metrics
-        self._add_metric(_("Expired batches with stock:"), expired_with_stock,
-                        color="red" if expired_with_stock > 0 else None)
-        self._add_metric(_("Expired labels (losses):"), expired_labels,
-                        color="red" if expired_labels > 0 else None)
-        self._add_metric(_("Expiring (30 days):"), expiring_30,
-                        color="orange" if expiring_30 > 0 else None)
+        return [
+            (_("Expired batches with stock:"), expired_with_stock,
+             "red" if expired_with_stock > 0 else None),
+            (_("Expired labels (losses):"), expired_labels,
+             "red" if expired_labels > 0 else None),
+            (_("Expiring (30 days):"), expiring_30,
+             "orange" if expiring_30 > 0 else None),
+        ]
 
     def _add_metric(self, label, value, color=None):
         """Add a metric to the metrics frame."""
@@ -358,10 +401,13 @@ class UI(ParentView):
         lbl.pack(side=tk.LEFT, padx=5)
 
     def export_csv(self):
-        """Export data to CSV file."""
+        """Export data to CSV file, expired batches streamed from the database."""
         from tkinter import filedialog
         import csv
 
+        if self.period is None:
+            return
+
         filename = filedialog.asksaveasfilename(
             parent=self,
             defaultextension=".csv",
@@ -377,18 +423,19 @@ class UI(ParentView):
                 writer.writerow([_("=== Expired Batches ===")])
                 writer.writerow([_("Product"), _("Supplier"), _("Lot"), _("Expiration"),
                                _("Remaining"), _("Used"), _("Loss %")])
-                for item in self.tree_expired.get_children():
-                    values = self.tree_expired.item(item)["values"]
+                for row in self.engine.stream(SQL_EXPIRED_BATCHES, self.period):
+                    values, _tag = self.format_expired_batch(row)
                     writer.writerow(values)
 
                 writer.writerow([])
 
                 # FEFO analysis
                 writer.writerow([_("=== FEFO Efficiency ===")])
-                writer.writerow([_("Product"), _("Labels Unloaded"), _("FEFO Correct"), _("Efficiency %")])
-                for item in self.tree_fefo.get_children():
-                    values = self.tree_fefo.item(item)["values"]
-                    writer.writerow(values)
+                group = self.fefo_group.get()
+                writer.writerow([self.get_fefo_heading(group), _("Labels Unloaded"),
+                                 _("FEFO Correct"), _("Efficiency %")])
+                for row in self.fefo_data.get(group, []):
+                    writer.writerow([row["key"], row["unloaded"], row["correct"], f"{row['fefo_pct']}%"])
 
     def on_cancel(self, evt=None):
         """Close the window."""
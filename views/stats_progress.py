@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+StatsProgress - Progress bar and Cancel button for background statistics.
+
+Usage:
+    self.progress = StatsProgress(bf, self.engine, "stats_tat")
+    self.progress.pack(side=tk.LEFT, padx=5)
+
+    self.progress.start()
+    self.engine.run_stats(self, "stats_tat", args, fn, self.show_data,
+                          on_progress=self.progress.on_progress,
+                          on_error=self.progress.on_error)
+    ...
+    self.progress.stop()  # in show_data
+
+Cancel stops the running job of the key (no callback follows).
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import sys
+import tkinter as tk
+from tkinter import ttk
+
+from i18n import _
+
+
+class StatsProgress(ttk.Frame):
+    """Progress of the background job with the given key."""
+
+    def __init__(self, parent, engine, key, on_partial=None):
+        """
+        Args:
+            parent: Parent widget
+            engine: Application engine (cancel_async)
+            key: Key of the job (as passed to run_stats / run_async)
+            on_partial: Callable(partial) for the partial results reported
+        """
+        super().__init__(parent)
+
+        self.engine = engine
+        self.key = key
+        self.on_partial = on_partial
+
+        self.bar = ttk.Progressbar(self, length=160, mode="determinate", maximum=100)
+        self.bar.pack(side=tk.LEFT)
+
+        self.lbl_status = ttk.Label(self, text="", width=12)
+        self.lbl_status.pack(side=tk.LEFT, padx=5)
+
+        self.btn_cancel = self.engine.create_button(self, _("Cancel"), self.on_cancel, width=8)
+        self.btn_cancel.pack(side=tk.LEFT)
+        self.btn_cancel.state(["disabled"])
+
+    def start(self):
+        """Show a running job of unknown length."""
+        self.bar.config(mode="indeterminate")
+        self.bar.start(20)
+        self.lbl_status.config(text=_("Computing..."))
+        self.btn_cancel.state(["!disabled"])
+
+    def on_progress(self, done, total=None, partial=None):
+        """Show a progress report (on_progress callback of the job)."""
+        if total:
+            if str(self.bar.cget("mode")) != "determinate":
+                self.bar.stop()
+                self.bar.config(mode="determinate")
+            percent = min(done * 100 // total, 100)
+            self.bar.config(value=percent)
+            self.lbl_status.config(text=f"{percent}%")
+
+        if partial is not None and self.on_partial is not None:
+            self.on_partial(partial)
+
+    def stop(self, text=""):
+        """Show the job as finished."""
+        self.bar.stop()
+        self.bar.config(mode="determinate", value=0)
+        self.lbl_status.config(text=text)
+        self.btn_cancel.state(["disabled"])
+
+    def on_error(self, exception):
+        """Show and log an error of the job (on_error callback of the job)."""
+        self.stop(_("Error"))
+        self.engine.on_log("run_stats", exception, type(exception), sys.modules[__name__], self.key)
+
+    def on_cancel(self):
+        """Cancel the running job."""
+        self.engine.cancel_async(self.key)
+        self.stop(_("Stopped"))
@@ -14,6 +14,7 @@ import datetime
 from i18n import _
 from calendarium import Calendarium
 from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
 
 
 class UI(ParentView):
@@ -76,11 +77,12 @@ class UI(ParentView):
         tree_frame = ttk.Frame(f0)
         tree_frame.pack(fill=tk.BOTH, expand=1)
 
-        columns = ("product", "supplier", "stock", "consumed", "rotation", "coverage", "abc")
+        columns = ("product", "supplier", "avg_stock", "stock", "consumed", "rotation", "coverage", "abc")
         self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
 
         self.tree.heading("product", text=_("Product"))
         self.tree.heading("supplier", text=_("Supplier"))
+        self.tree.heading("avg_stock", text=_("Avg Stock"))
         self.tree.heading("stock", text=_("Stock"))
         self.tree.heading("consumed", text=_("Consumed"))
         self.tree.heading("rotation", text=_("Rotation"))
@@ -89,6 +91,7 @@ class UI(ParentView):
 
         self.tree.column("product", width=200)
         self.tree.column("supplier", width=150)
+        self.tree.column("avg_stock", width=80, anchor=tk.E)
         self.tree.column("stock", width=80, anchor=tk.E)
         self.tree.column("consumed", width=80, anchor=tk.E)
         self.tree.column("rotation", width=80, anchor=tk.E)
@@ -116,6 +119,9 @@ class UI(ParentView):
 
         self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
 
+        self.progress = StatsProgress(bf, self.engine, "stats_rotation")
+        self.progress.pack(side=tk.LEFT, padx=20)
+
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
     def on_open(self):
@@ -134,11 +140,7 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load rotation data and calculate ABC classification."""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
+        """Load rotation data in background."""
         # Get date range
         if not self.cal_from.is_valid or not self.cal_to.is_valid:
             from tkinter import messagebox
@@ -155,105 +157,48 @@ class UI(ParentView):
         date_from_str = date_from.isoformat()
         date_to_str = date_to.isoformat()
 
-        # Calculate days for coverage
-        days = max(1, (date_to - date_from).days)
-
-        # Query: get all products with stock and consumption
-        sql = """
-            SELECT
-                pk.package_id,
-                p.description AS product,
-                s.description AS supplier,
-                (SELECT COUNT(*) FROM labels lb
-                 JOIN batches b ON b.batch_id = lb.batch_id
-                 WHERE b.package_id = pk.package_id AND lb.status = 1) AS stock,
-                (SELECT COUNT(*) FROM labels lb
-                 JOIN batches b ON b.batch_id = lb.batch_id
-                 WHERE b.package_id = pk.package_id
-                 AND lb.unloaded >= ? AND lb.unloaded <= ? AND lb.status = 0) AS consumed
-            FROM packages pk
-            JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-            WHERE pk.status = 1
-            ORDER BY consumed DESC
-        """
-
-        rs = self.engine.read(True, sql, (date_from_str, date_to_str))
-
-        if not rs:
-            return
-
-        # Calculate total consumption for ABC
-        total_consumed = sum(row["consumed"] for row in rs)
+        days = (date_to - date_from).days + 1
 
-        # Process data and calculate ABC
-        data = []
-        cumulative = 0
-
-        for row in rs:
-            stock = row["stock"]
-            consumed = row["consumed"]
-
-            # Rotation index = Consumed / Average Stock
-            # Simplified: using current stock as proxy
-            avg_stock = max(1, (stock + consumed) / 2)
-            rotation = round(consumed / avg_stock, 2) if avg_stock > 0 else 0
-
-            # Coverage days = Stock / Daily consumption
-            daily_consumption = consumed / days if days > 0 else 0
-            coverage = round(stock / daily_consumption, 0) if daily_consumption > 0 else float('inf')
-            if coverage == float('inf'):
-                coverage_str = "∞"
-            else:
-                coverage_str = str(int(coverage))
-
-            # ABC classification based on cumulative percentage
-            cumulative += consumed
-            if total_consumed > 0:
-                cumulative_pct = (cumulative / total_consumed) * 100
-            else:
-                cumulative_pct = 100
+        self.progress.start()
+        self.engine.run_stats(
+            self,
+            "stats_rotation",
+            (date_from_str, date_to_str),
+            lambda db: db.get_rotation(date_from_str, date_to_str),
+            lambda rs: self.show_data(rs, days),
+            on_error=self.progress.on_error
+        )
 
-            if cumulative_pct <= 80:
-                abc = "A"
-            elif cumulative_pct <= 95:
-                abc = "B"
-            else:
-                abc = "C"
-
-            data.append({
-                "product": row["product"],
-                "supplier": row["supplier"] or "",
-                "stock": stock,
-                "consumed": consumed,
-                "rotation": rotation,
-                "coverage": coverage_str,
-                "abc": abc
-            })
-
-        # Insert into tree
+    def show_data(self, rs, days):
+        """Fill the tree with the loaded rotation rows."""
+        self.progress.stop()
         count_a = count_b = count_c = 0
-        for d in data:
-            self.tree.insert("", tk.END, values=(
-                d["product"],
-                d["supplier"],
-                d["stock"],
-                d["consumed"],
-                d["rotation"],
-                d["coverage"],
-                d["abc"]
-            ), tags=(d["abc"],))
-
-            if d["abc"] == "A":
+        rows = []
+        for row in rs:
+            coverage = row["coverage"]
+            rows.append((row["package_id"], (
+                row["product"],
+                row["supplier"] or "",
+                row["avg_stock"],
+                row["stock"],
+                row["consumed"],
+                row["rotation"],
+                "∞" if coverage is None else coverage,
+                row["abc"]
+            ), (row["abc"],)))
+
+            if row["abc"] == "A":
                 count_a += 1
-            elif d["abc"] == "B":
+            elif row["abc"] == "B":
                 count_b += 1
             else:
                 count_c += 1
 
+        self.engine.sync_tree(self.tree, rows)
+
         # Update summary
         self.lbl_summary.config(
-            text=f"{_('Total products')}: {len(data)} | "
+            text=f"{_('Total products')}: {len(rs)} | "
                  f"{_('Class A')}: {count_a} | {_('Class B')}: {count_b} | {_('Class C')}: {count_c} | "
                  f"{_('Period')}: {days} {_('days')}"
         )
@@ -273,7 +218,7 @@ class UI(ParentView):
         if filename:
             with open(filename, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f, delimiter=";")
-                writer.writerow([_("Product"), _("Supplier"), _("Stock"), _("Consumed"),
+                writer.writerow([_("Product"), _("Supplier"), _("Avg Stock"), _("Stock"), _("Consumed"),
                                _("Rotation"), _("Coverage (days)"), _("ABC")])
 
                 for item in self.tree.get_children():
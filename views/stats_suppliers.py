@@ -14,6 +14,7 @@ import datetime
 from i18n import _
 from calendarium import Calendarium
 from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
 
 
 class UI(ParentView):
@@ -66,7 +67,7 @@ class UI(ParentView):
         tree_frame.pack(fill=tk.BOTH, expand=1)
 
         columns = ("supplier", "orders", "items_ordered", "items_delivered",
-                  "completion", "avg_tat", "products")
+                  "completion", "avg_tat", "min_tat", "max_tat", "products")
         self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
 
         self.tree.heading("supplier", text=_("Supplier"))
@@ -75,6 +76,8 @@ class UI(ParentView):
         self.tree.heading("items_delivered", text=_("Delivered"))
         self.tree.heading("completion", text=_("Completion %"))
         self.tree.heading("avg_tat", text=_("Avg TAT (days)"))
+        self.tree.heading("min_tat", text=_("Min (days)"))
+        self.tree.heading("max_tat", text=_("Max (days)"))
         self.tree.heading("products", text=_("Products"))
 
         self.tree.column("supplier", width=200)
@@ -83,6 +86,8 @@ class UI(ParentView):
         self.tree.column("items_delivered", width=90, anchor=tk.E)
         self.tree.column("completion", width=110, anchor=tk.E)
         self.tree.column("avg_tat", width=100, anchor=tk.E)
+        self.tree.column("min_tat", width=80, anchor=tk.E)
+        self.tree.column("max_tat", width=80, anchor=tk.E)
         self.tree.column("products", width=80, anchor=tk.E)
 
         # Tags for completion rate colors
@@ -106,6 +111,9 @@ class UI(ParentView):
 
         self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
 
+        self.progress = StatsProgress(bf, self.engine, "stats_suppliers")
+        self.progress.pack(side=tk.LEFT, padx=20)
+
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
     def on_open(self):
@@ -124,11 +132,7 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load supplier performance data."""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
+        """Load supplier performance data in background."""
         # Get date range
         if not self.cal_from.is_valid or not self.cal_to.is_valid:
             from tkinter import messagebox
@@ -145,110 +149,33 @@ class UI(ParentView):
         date_from_str = date_from.isoformat()
         date_to_str = date_to.isoformat()
 
-        # Query supplier performance
-        sql = """
-            SELECT
-                s.supplier_id,
-                s.description AS supplier,
-                COUNT(DISTINCT r.request_id) AS orders,
-                SUM(i.quantity) AS items_ordered,
-                SUM(COALESCE(
-                    (SELECT SUM(d.quantity) FROM deliveries d
-                     WHERE d.item_id = i.item_id AND d.status = 1
-                     AND d.delivered >= ? AND d.delivered <= ?), 0
-                )) AS items_delivered,
-                AVG(
-                    SELECT AVG(julianday(d2.delivered) - julianday(r2.issued))
-                    FROM deliveries d2
-                    JOIN items i2 ON i2.item_id = d2.item_id
-                    JOIN requests r2 ON r2.request_id = i2.request_id
-                    JOIN packages pk2 ON pk2.package_id = i2.package_id
-                    WHERE pk2.supplier_id = s.supplier_id
-                    AND d2.delivered >= ? AND d2.delivered <= ?
-                    AND d2.status = 1
-                ) AS avg_tat,
-                COUNT(DISTINCT pk.package_id) AS products
-            FROM suppliers s
-            JOIN packages pk ON pk.supplier_id = s.supplier_id
-            JOIN items i ON i.package_id = pk.package_id
-            JOIN requests r ON r.request_id = i.request_id
-            WHERE r.issued >= ? AND r.issued <= ?
-            AND s.status = 1
-            GROUP BY s.supplier_id
-            ORDER BY items_ordered DESC
-        """
-
-        # Simplified query - the above is complex, let's break it down
-        sql = """
-            SELECT
-                s.supplier_id,
-                s.description AS supplier,
-                COUNT(DISTINCT r.request_id) AS orders,
-                SUM(i.quantity) AS items_ordered,
-                COUNT(DISTINCT pk.package_id) AS products
-            FROM suppliers s
-            JOIN packages pk ON pk.supplier_id = s.supplier_id
-            JOIN items i ON i.package_id = pk.package_id
-            JOIN requests r ON r.request_id = i.request_id
-            WHERE r.issued >= ? AND r.issued <= ?
-            AND s.status = 1
-            GROUP BY s.supplier_id
-            ORDER BY items_ordered DESC
-        """
-
-        rs = self.engine.read(True, sql, (date_from_str, date_to_str))
-
-        if not rs:
+        self.progress.start()
+        self.engine.run_stats(
+            self,
+            "stats_suppliers",
+            (date_from_str, date_to_str),
+            lambda db: self.fetch_data(db, date_from_str, date_to_str),
+            self.show_data,
+            on_error=self.progress.on_error
+        )
+
+    def fetch_data(self, db, date_from_str, date_to_str):
+        """Run the supplier performance query (worker thread)."""
+        return db.get_supplier_performance(date_from_str, date_to_str)
+
+    def show_data(self, data):
+        """Fill the tree with the loaded supplier rows."""
+        self.progress.stop()
+        if not data:
+            self.engine.sync_tree(self.tree, ())
             self.lbl_summary.config(text=_("No data in the selected period"))
             return
 
-        # For each supplier, get delivery stats
-        data = []
-        for row in rs:
-            supplier_id = row["supplier_id"]
-
-            # Get delivered items
-            sql2 = """
-                SELECT SUM(d.quantity) AS delivered
-                FROM deliveries d
-                JOIN items i ON i.item_id = d.item_id
-                JOIN packages pk ON pk.package_id = i.package_id
-                WHERE pk.supplier_id = ? AND d.status = 1
-                AND d.delivered >= ? AND d.delivered <= ?
-            """
-            r2 = self.engine.read(False, sql2, (supplier_id, date_from_str, date_to_str))
-            items_delivered = r2["delivered"] if r2 and r2["delivered"] else 0
-
-            # Get average TAT
-            sql3 = """
-                SELECT AVG(julianday(d.delivered) - julianday(r.issued)) AS avg_tat
-                FROM deliveries d
-                JOIN items i ON i.item_id = d.item_id
-                JOIN requests r ON r.request_id = i.request_id
-                JOIN packages pk ON pk.package_id = i.package_id
-                WHERE pk.supplier_id = ? AND d.status = 1
-                AND d.delivered >= ? AND d.delivered <= ?
-            """
-            r3 = self.engine.read(False, sql3, (supplier_id, date_from_str, date_to_str))
-            avg_tat = round(r3["avg_tat"], 1) if r3 and r3["avg_tat"] else 0
-
-            items_ordered = row["items_ordered"] or 0
-            completion = round((items_delivered / items_ordered * 100), 1) if items_ordered > 0 else 0
-
-            data.append({
-                "supplier": row["supplier"],
-                "orders": row["orders"],
-                "items_ordered": items_ordered,
-                "items_delivered": items_delivered,
-                "completion": completion,
-                "avg_tat": avg_tat,
-                "products": row["products"]
-            })
-
         # Insert into tree
         total_ordered = 0
         total_delivered = 0
 
+        rows = []
         for d in data:
             # Determine tag based on completion rate
             if d["completion"] >= 90:
@@ -258,15 +185,17 @@ class UI(ParentView):
             else:
                 tag = "bad"
 
-            self.tree.insert("", tk.END, values=(
+            rows.append((d["supplier_id"], (
                 d["supplier"],
                 d["orders"],
                 d["items_ordered"],
                 d["items_delivered"],
                 f"{d['completion']}%",
-                d["avg_tat"],
+                round(d["avg_tat"], 1) if d["avg_tat"] else 0,
+                int(d["min_tat"]) if d["min_tat"] else 0,
+                int(d["max_tat"]) if d["max_tat"] else 0,
                 d["products"]
-            ), tags=(tag,))
+            ), (tag,)))
 
             total_ordered += d["items_ordered"]
             total_delivered += d["items_delivered"]
@@ -296,7 +225,8 @@ class UI(ParentView):
             with open(filename, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f, delimiter=";")
                 writer.writerow([_("Supplier"), _("Orders"), _("Ordered"), _("Delivered"),
-                               _("Completion %"), _("Avg TAT (days)"), _("Products")])
+                               _("Completion %"), _("Avg TAT (days)"), _("Min (days)"),
+                               _("Max (days)"), _("Products")])
 
                 for item in self.tree.get_children():
                     values = self.tree.item(item)["values"]
@@ -14,6 +14,9 @@ import datetime
 from i18n import _
 from calendarium import Calendarium
 from views.parent_view import ParentView
+from views.stats_progress import StatsProgress
+
+COLUMNS = ("name", "count", "mean", "median", "p90", "p95", "min", "max")
 
 
 class UI(ParentView):
@@ -27,6 +30,8 @@ class UI(ParentView):
 
         self.minsize(850, 550)
 
+        self.data = None
+
         self.init_ui()
         self.show()
 
@@ -68,46 +73,28 @@ class UI(ParentView):
         self.frm_metrics = ttk.Frame(metrics)
         self.frm_metrics.pack(fill=tk.X, padx=10, pady=10)
 
-        # Results treeview - Order TAT
-        ttk.Label(f0, text=_("Request → Delivery Time (by supplier)"),
-                 font=("", 10, "bold")).pack(anchor=tk.W)
+        # Grouping
+        r3 = ttk.Frame(f0)
+        r3.pack(fill=tk.X, pady=(0, 5))
 
-        columns = ("supplier", "orders", "avg_days", "min_days", "max_days")
-        self.tree_order = ttk.Treeview(f0, columns=columns, show="headings", height=8)
+        ttk.Label(r3, text=_("Group by:")).pack(side=tk.LEFT)
+        self.group_by = tk.StringVar(value="supplier")
+        for text, value in [(_("Supplier"), "supplier"), (_("Product"), "product")]:
+            ttk.Radiobutton(r3, text=text, variable=self.group_by, value=value,
+                            command=self.show_groups, style="App.TRadiobutton").pack(side=tk.LEFT, padx=10)
 
-        self.tree_order.heading("supplier", text=_("Supplier"))
-        self.tree_order.heading("orders", text=_("Orders"))
-        self.tree_order.heading("avg_days", text=_("Avg (days)"))
-        self.tree_order.heading("min_days", text=_("Min (days)"))
-        self.tree_order.heading("max_days", text=_("Max (days)"))
-
-        self.tree_order.column("supplier", width=250)
-        self.tree_order.column("orders", width=100, anchor=tk.E)
-        self.tree_order.column("avg_days", width=100, anchor=tk.E)
-        self.tree_order.column("min_days", width=100, anchor=tk.E)
-        self.tree_order.column("max_days", width=100, anchor=tk.E)
+        # Results treeview - Order TAT
+        ttk.Label(f0, text=_("Request → Delivery Time"),
+                 font=("", 10, "bold")).pack(anchor=tk.W)
 
+        self.tree_order = self._create_tree(f0, _("Orders"))
         self.tree_order.pack(fill=tk.X, pady=5)
 
         # Results treeview - Stock TAT
         ttk.Label(f0, text=_("Stock Time (Loading → Unloading)"),
                  font=("", 10, "bold")).pack(anchor=tk.W, pady=(10, 0))
 
-        columns2 = ("product", "labels", "avg_days", "min_days", "max_days")
-        self.tree_stock = ttk.Treeview(f0, columns=columns2, show="headings", height=8)
-
-        self.tree_stock.heading("product", text=_("Product"))
-        self.tree_stock.heading("labels", text=_("Labels"))
-        self.tree_stock.heading("avg_days", text=_("Avg (days)"))
-        self.tree_stock.heading("min_days", text=_("Min (days)"))
-        self.tree_stock.heading("max_days", text=_("Max (days)"))
-
-        self.tree_stock.column("product", width=250)
-        self.tree_stock.column("labels", width=100, anchor=tk.E)
-        self.tree_stock.column("avg_days", width=100, anchor=tk.E)
-        self.tree_stock.column("min_days", width=100, anchor=tk.E)
-        self.tree_stock.column("max_days", width=100, anchor=tk.E)
-
+        self.tree_stock = self._create_tree(f0, _("Labels"))
         self.tree_stock.pack(fill=tk.BOTH, expand=1, pady=5)
 
         # Buttons
@@ -116,8 +103,30 @@ class UI(ParentView):
 
         self.engine.create_button(bf, _("Export CSV"), self.export_csv, width=12).pack(side=tk.LEFT, padx=5)
 
+        self.progress = StatsProgress(bf, self.engine, "stats_tat", on_partial=self.show_results)
+        self.progress.pack(side=tk.LEFT, padx=20)
+
         self.engine.create_button(bf, _("Close"), self.on_cancel, width=12).pack(side=tk.RIGHT, padx=5)
 
+    def _create_tree(self, parent, count_heading):
+        """Create a TAT treeview: group, count, mean, percentiles and range."""
+        tree = ttk.Treeview(parent, columns=COLUMNS, show="headings", height=8)
+
+        tree.heading("name", text=_("Supplier"))
+        tree.heading("count", text=count_heading)
+        tree.heading("mean", text=_("Avg (days)"))
+        tree.heading("median", text=_("Median"))
+        tree.heading("p90", text="P90")
+        tree.heading("p95", text="P95")
+        tree.heading("min", text=_("Min (days)"))
+        tree.heading("max", text=_("Max (days)"))
+
+        tree.column("name", width=250)
+        for column in COLUMNS[1:]:
+            tree.column(column, width=80, anchor=tk.E)
+
+        return tree
+
     def on_open(self):
         """Initialize and show the window."""
         self.title(_("Time Analysis (TAT)"))
@@ -134,12 +143,8 @@ class UI(ParentView):
         self.load_data()
 
     def load_data(self):
-        """Load TAT data."""
-        # Clear trees
-        for item in self.tree_order.get_children():
-            self.tree_order.delete(item)
-        for item in self.tree_stock.get_children():
-            self.tree_stock.delete(item)
+        """Load TAT data in background."""
+        self.data = None
 
         # Clear metrics
         for w in self.frm_metrics.winfo_children():
@@ -161,108 +166,72 @@ class UI(ParentView):
         date_from_str = date_from.isoformat()
         date_to_str = date_to.isoformat()
 
-        self.load_order_tat(date_from_str, date_to_str)
-        self.load_stock_tat(date_from_str, date_to_str)
-        self.load_summary_metrics(date_from_str, date_to_str)
-
-    def load_order_tat(self, date_from, date_to):
-        """Load order-to-delivery TAT by supplier."""
-        sql = """
-            SELECT
-                s.description AS supplier,
-                COUNT(DISTINCT d.delivery_id) AS orders,
-                AVG(julianday(d.delivered) - julianday(r.issued)) AS avg_days,
-                MIN(julianday(d.delivered) - julianday(r.issued)) AS min_days,
-                MAX(julianday(d.delivered) - julianday(r.issued)) AS max_days
-            FROM deliveries d
-            JOIN items i ON i.item_id = d.item_id
-            JOIN requests r ON r.request_id = i.request_id
-            JOIN packages pk ON pk.package_id = i.package_id
-            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-            WHERE d.delivered >= ? AND d.delivered <= ? AND d.status = 1
-            GROUP BY pk.supplier_id
-            ORDER BY avg_days DESC
-        """
-
-        rs = self.engine.read(True, sql, (date_from, date_to))
-
-        if rs:
-            for row in rs:
-                avg_days = round(row["avg_days"], 1) if row["avg_days"] else 0
-                min_days = int(row["min_days"]) if row["min_days"] else 0
-                max_days = int(row["max_days"]) if row["max_days"] else 0
-
-                self.tree_order.insert("", tk.END, values=(
-                    row["supplier"] or "N/D",
-                    row["orders"],
-                    avg_days,
-                    min_days,
-                    max_days
-                ))
-
-    def load_stock_tat(self, date_from, date_to):
-        """Load stock residence time (loaded to unloaded)."""
-        sql = """
-            SELECT
-                p.description AS product,
-                COUNT(lb.label_id) AS labels,
-                AVG(julianday(lb.unloaded) - julianday(lb.loaded)) AS avg_days,
-                MIN(julianday(lb.unloaded) - julianday(lb.loaded)) AS min_days,
-                MAX(julianday(lb.unloaded) - julianday(lb.loaded)) AS max_days
-            FROM labels lb
-            JOIN batches b ON b.batch_id = lb.batch_id
-            JOIN packages pk ON pk.package_id = b.package_id
-            JOIN products p ON p.product_id = pk.product_id
-            WHERE lb.unloaded >= ? AND lb.unloaded <= ?
-            AND lb.status = 0 AND lb.loaded IS NOT NULL
-            GROUP BY pk.package_id
-            ORDER BY avg_days DESC
-        """
-
-        rs = self.engine.read(True, sql, (date_from, date_to))
-
-        if rs:
-            for row in rs:
-                avg_days = round(row["avg_days"], 1) if row["avg_days"] else 0
-                min_days = int(row["min_days"]) if row["min_days"] else 0
-                max_days = int(row["max_days"]) if row["max_days"] else 0
-
-                self.tree_stock.insert("", tk.END, values=(
-                    row["product"],
-                    row["labels"],
-                    avg_days,
-                    min_days,
-                    max_days
-                ))
-
-    def load_summary_metrics(self, date_from, date_to):
-        """Load overall summary metrics."""
-        # Overall order TAT
-        sql = """
-            SELECT
-                AVG(julianday(d.delivered) - julianday(r.issued)) AS avg_order_tat
-            FROM deliveries d
-            JOIN items i ON i.item_id = d.item_id
-            JOIN requests r ON r.request_id = i.request_id
-            WHERE d.delivered >= ? AND d.delivered <= ? AND d.status = 1
-        """
-        row = self.engine.read(False, sql, (date_from, date_to))
-        avg_order_tat = round(row["avg_order_tat"], 1) if row and row["avg_order_tat"] else "N/D"
-
-        # Overall stock TAT
-        sql = """
-            SELECT
-                AVG(julianday(lb.unloaded) - julianday(lb.loaded)) AS avg_stock_tat
-            FROM labels lb
-            WHERE lb.unloaded >= ? AND lb.unloaded <= ?
-            AND lb.status = 0 AND lb.loaded IS NOT NULL
-        """
-        row = self.engine.read(False, sql, (date_from, date_to))
-        avg_stock_tat = round(row["avg_stock_tat"], 1) if row and row["avg_stock_tat"] else "N/D"
-
-        # Display metrics
-        self._add_metric(_("Avg order TAT:"), f"{avg_order_tat} {_('days')}")
-        self._add_metric(_("Avg stock TAT:"), f"{avg_stock_tat} {_('days')}")
+        self.progress.start()
+        self.engine.run_stats(
+            self,
+            "stats_tat",
+            (date_from_str, date_to_str),
+            lambda db: db.get_tat_statistics(date_from_str, date_to_str, progress=db.progress),
+            self.show_data,
+            on_progress=self.progress.on_progress,
+            on_error=self.progress.on_error
+        )
+
+    def show_data(self, data):
+        """Show the complete statistics."""
+        self.progress.stop()
+        self.show_results(data)
+
+    def show_results(self, data):
+        """Show the metrics and the groups of the measures computed so far."""
+        self.data = data
+
+        for w in self.frm_metrics.winfo_children():
+            w.destroy()
+
+        if "order" in data:
+            order = data["order"]["all"]
+            self._add_metric(_("Avg order TAT:"), self._days(order["mean"]))
+            self._add_metric(_("Median order TAT:"), self._days(order["median"]))
+        if "stock" in data:
+            stock = data["stock"]["all"]
+            self._add_metric(_("Avg stock TAT:"), self._days(stock["mean"]))
+            self._add_metric(_("Median stock TAT:"), self._days(stock["median"]))
+
+        self.show_groups()
+
+    def show_groups(self):
+        """Fill both trees with the selected grouping."""
+        group_by = self.group_by.get()
+        heading = _("Supplier") if group_by == "supplier" else _("Product")
+
+        for tree, measure in ((self.tree_order, "order"), (self.tree_stock, "stock")):
+            tree.heading("name", text=heading)
+
+            # Not computed yet: keep the previous rows until the measure arrives
+            if self.data is None or measure not in self.data:
+                continue
+
+            self.engine.sync_tree(tree, ((row["id"], self._values(row), ())
+                                         for row in self.data[measure][group_by]))
+
+    @staticmethod
+    def _values(row):
+        """Tree/CSV values of a TAT record."""
+        return (
+            row["name"] or "N/D",
+            row["count"],
+            round(row["mean"], 1),
+            round(row["median"], 1),
+            round(row["p90"], 1),
+            round(row["p95"], 1),
+            int(row["min"]),
+            int(row["max"]),
+        )
+
+    def _days(self, value):
+        """Format a duration for the metrics."""
+        return f"{round(value, 1)} {_('days')}" if value is not None else "N/D"
 
     def _add_metric(self, label, value):
         """Add a metric to the metrics frame."""
@@ -284,25 +253,20 @@ class UI(ParentView):
             title=_("Export TAT")
         )
 
-        if filename:
+        if filename and self.data is not None and "stock" in self.data:
+            headings = [_("Avg (days)"), _("Median"), "P90", "P95", _("Min (days)"), _("Max (days)")]
+
             with open(filename, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f, delimiter=";")
 
-                # Order TAT
-                writer.writerow([_("=== Order TAT ===")])
-                writer.writerow([_("Supplier"), _("Orders"), _("Avg (days)"), _("Min (days)"), _("Max (days)")])
-                for item in self.tree_order.get_children():
-                    values = self.tree_order.item(item)["values"]
-                    writer.writerow(values)
-
-                writer.writerow([])
-
-                # Stock TAT
-                writer.writerow([_("=== Stock TAT ===")])
-                writer.writerow([_("Product"), _("Labels"), _("Avg (days)"), _("Min (days)"), _("Max (days)")])
-                for item in self.tree_stock.get_children():
-                    values = self.tree_stock.item(item)["values"]
-                    writer.writerow(values)
+                for measure, title, count in (("order", _("=== Order TAT ==="), _("Orders")),
+                                              ("stock", _("=== Stock TAT ==="), _("Labels"))):
+                    for group_by, heading in (("supplier", _("Supplier")), ("product", _("Product"))):
+                        writer.writerow([title])
+                        writer.writerow([heading, count] + headings)
+                        for row in self.data[measure][group_by]:
+                            writer.writerow(self._values(row))
+                        writer.writerow([])
 
     def on_cancel(self, evt=None):
         """Close the window."""
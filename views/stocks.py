@@ -116,7 +116,7 @@ class UI(ParentView):
                  WHERE status = 1
                  ORDER BY room, description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("locations",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -144,7 +144,7 @@ class UI(ParentView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs, start=1):
@@ -204,162 +204,133 @@ class UI(ParentView):
 
     def print_detailed_report(self, category_id, category_name):
         """Print detailed report with batches and labels."""
-        try:
-            self.config(cursor="watch")
-            self.update()
-
-            from reports import rpt_stocks
-
-            # Get products with stock info
-            sql = """
-                SELECT
-                    pk.package_id,
-                    p.description AS product_name,
-                    pk.reference AS supplier_code,
-                    s.description AS supplier,
-                    pk.packaging,
-                    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
-                FROM packages pk
-                JOIN products p ON p.product_id = pk.product_id
-                LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-                LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
-                LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-                WHERE pk.status = 1 AND p.status = 1
-            """
-            args = []
-
-            if category_id:
-                sql += " AND pk.category_id = ?"
-                args.append(category_id)
-
-            sql += " GROUP BY pk.package_id ORDER BY p.description"
-
-            rs = self.engine.read(True, sql, tuple(args))
-
-            if rs:
-                report = rpt_stocks.Report(self)
-                report.init_report(rs, category_name)
-                report.create_doc()
-            else:
-                messagebox.showinfo(
-                    self.engine.app_title,
-                    _("No products found for the selected category."),
-                    parent=self
-                )
-
-        except Exception as e:
-            messagebox.showerror(
-                self.engine.app_title,
-                _("Error generating report:") + f"\n{e}",
-                parent=self
-            )
-        finally:
-            self.config(cursor="")
-            self.update()
+        from reports import rpt_stocks
+
+        # Get products with stock info
+        sql = """
+            SELECT
+                pk.package_id,
+                p.description AS product_name,
+                pk.reference AS supplier_code,
+                s.description AS supplier,
+                pk.packaging,
+                COALESCE(SUM(bs.in_stock), 0) AS in_stock
+            FROM packages pk
+            JOIN products p ON p.product_id = pk.product_id
+            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+            LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
+            LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
+            WHERE pk.status = 1 AND p.status = 1
+        """
+        args = []
+
+        if category_id:
+            sql += " AND pk.category_id = ?"
+            args.append(category_id)
+
+        sql += " GROUP BY pk.package_id ORDER BY p.description"
+
+        self.engine.read_async(
+            self, True, sql, tuple(args),
+            lambda rs: self.create_report(
+                rs, rpt_stocks.Report,
+                _("No products found for the selected category."), category_name
+            ),
+            key="stocks.report",
+            on_error=self.on_report_error
+        )
 
     def print_compact_report(self, category_id, category_name):
         """Print compact report with just product and stock count."""
-        try:
-            self.config(cursor="watch")
-            self.update()
-
-            from reports import rpt_stocks_list
-
-            sql = """
-                SELECT
-                    p.description AS product_name,
-                    pk.reference AS supplier_code,
-                    s.description AS supplier,
-                    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
-                FROM packages pk
-                JOIN products p ON p.product_id = pk.product_id
-                LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-                LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
-                LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-                WHERE pk.status = 1 AND p.status = 1
-            """
-            args = []
-
-            if category_id:
-                sql += " AND pk.category_id = ?"
-                args.append(category_id)
-
-            sql += " GROUP BY pk.package_id ORDER BY p.description"
-
-            rs = self.engine.read(True, sql, tuple(args))
-
-            if rs:
-                report = rpt_stocks_list.Report(self)
-                report.init_report(rs, category_name)
-                report.create_doc()
-            else:
-                messagebox.showinfo(
-                    self.engine.app_title,
-                    _("No products found for the selected category."),
-                    parent=self
-                )
-
-        except Exception as e:
-            messagebox.showerror(
-                self.engine.app_title,
-                _("Error generating report:") + f"\n{e}",
-                parent=self
-            )
-        finally:
-            self.config(cursor="")
-            self.update()
+        from reports import rpt_stocks_list
+
+        sql = """
+            SELECT
+                p.description AS product_name,
+                pk.reference AS supplier_code,
+                s.description AS supplier,
+                COALESCE(SUM(bs.in_stock), 0) AS in_stock
+            FROM packages pk
+            JOIN products p ON p.product_id = pk.product_id
+            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+            LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
+            LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
+            WHERE pk.status = 1 AND p.status = 1
+        """
+        args = []
+
+        if category_id:
+            sql += " AND pk.category_id = ?"
+            args.append(category_id)
+
+        sql += " GROUP BY pk.package_id ORDER BY p.description"
+
+        self.engine.read_async(
+            self, True, sql, tuple(args),
+            lambda rs: self.create_report(
+                rs, rpt_stocks_list.Report,
+                _("No products found for the selected category."), category_name
+            ),
+            key="stocks.report",
+            on_error=self.on_report_error
+        )
 
     def print_location_report(self, location_id, location_name, show_stock=True):
         """Print report for a single location."""
-        try:
-            self.config(cursor="watch")
-            self.update()
-
-            from reports import rpt_locations
-
-            sql = """
-                SELECT
-                    l.description AS location_name,
-                    l.room,
-                    p.description AS product_name,
-                    pk.reference AS supplier_code,
-                    pk.packaging,
-                    pk.shelf,
-                    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
-                FROM packages pk
-                JOIN products p ON p.product_id = pk.product_id
-                LEFT JOIN locations l ON l.location_id = pk.location_id
-                LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-                LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
-                LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-                WHERE pk.status = 1 AND p.status = 1
-                AND pk.location_id = ?
-                GROUP BY pk.package_id
-                ORDER BY pk.shelf, p.description
-            """
-
-            rs = self.engine.read(True, sql, (location_id,))
-
-            if rs:
-                report = rpt_locations.Report(self)
-                report.init_report(rs, location_name, show_stock=show_stock)
-                report.create_doc()
-            else:
-                messagebox.showinfo(
-                    self.engine.app_title,
-                    _("No products found for the selected location."),
-                    parent=self
-                )
+        from reports import rpt_locations
+
+        sql = """
+            SELECT
+                l.description AS location_name,
+                l.room,
+                p.description AS product_name,
+                pk.reference AS supplier_code,
+                pk.packaging,
+                pk.shelf,
+                COALESCE(SUM(bs.in_stock), 0) AS in_stock
+            FROM packages pk
+            JOIN products p ON p.product_id = pk.product_id
+            LEFT JOIN locations l ON l.location_id = pk.location_id
+            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+            LEFT JOIN batches b ON b.package_id = pk.package_id AND b.status = 1
+            LEFT JOIN batch_stock bs ON bs.batch_id = b.batch_id
+            WHERE pk.status = 1 AND p.status = 1
+            AND pk.location_id = ?
+            GROUP BY pk.package_id
+            ORDER BY pk.shelf, p.description
+        """
+
+        self.engine.read_async(
+            self, True, sql, (location_id,),
+            lambda rs: self.create_report(
+                rs, rpt_locations.Report,
+                _("No products found for the selected location."), location_name,
+                show_stock=show_stock
+            ),
+            key="stocks.report",
+            on_error=self.on_report_error
+        )
+
+    def create_report(self, rs, report_class, empty_message, *args, **kwargs):
+        """Create the report document from the loaded rows."""
+        if not rs:
+            messagebox.showinfo(self.engine.app_title, empty_message, parent=self)
+            return
 
+        try:
+            report = report_class(self)
+            report.init_report(rs, *args, **kwargs)
+            report.create_doc()
         except Exception as e:
-            messagebox.showerror(
-                self.engine.app_title,
-                _("Error generating report:") + f"\n{e}",
-                parent=self
-            )
-        finally:
-            self.config(cursor="")
-            self.update()
+            self.on_report_error(e)
+
+    def on_report_error(self, e):
+        """Show a report generation error."""
+        messagebox.showerror(
+            self.engine.app_title,
+            _("Error generating report:") + f"\n{e}",
+            parent=self
+        )
 
     def on_cancel(self, evt=None):
         """Close the dialog."""
@@ -132,6 +132,9 @@ class UI(ChildView):
                 sql = self.engine.build_sql(self.parent.table, op="insert")
                 pk = self.engine.write(sql, tuple(args))
 
+            # Notify subscribers that a supplier changed
+            self.engine.notify("supplier_changed", supplier_ids=(pk,))
+
             self.parent.refresh_and_select(pk)
 
             self.on_cancel()
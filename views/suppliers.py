@@ -119,10 +119,6 @@ class UI(ParentView):
 
     def load_suppliers(self):
         """Load suppliers list with current filters."""
-        # Clear treeview
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
         sql = """SELECT supplier_id, description, reference, status
                  FROM suppliers WHERE 1=1"""
 
@@ -137,14 +133,16 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, tuple(args))
 
-        if rs:
-            for row in rs:
-                tag = "inactive" if row["status"] != 1 else ""
-                self.treeview.insert("", tk.END, values=(
-                    row["supplier_id"],
-                    row["description"] or "",
-                    row["reference"] or ""
-                ), tags=(tag,) if tag else ())
+        rows = []
+        for row in rs or ():
+            tag = "inactive" if row["status"] != 1 else ""
+            rows.append((row["supplier_id"], (
+                row["supplier_id"],
+                row["description"] or "",
+                row["reference"] or ""
+            ), (tag,)))
+
+        self.engine.sync_tree(self.treeview, rows)
 
         self.lbf.config(text=f"{_('Total')}: {len(self.treeview.get_children())}")
 
@@ -205,13 +203,10 @@ class UI(ParentView):
         self.load_suppliers()
 
         # Find and select the supplier by ID
-        for item in self.treeview.get_children():
-            values = self.treeview.item(item, "values")
-            if str(values[0]) == str(supplier_id):
-                self.treeview.selection_set(item)
-                self.treeview.see(item)
-                self.on_item_selected()
-                break
+        if self.treeview.exists(supplier_id):
+            self.treeview.selection_set(supplier_id)
+            self.treeview.see(supplier_id)
+            self.on_item_selected()
 
     def on_cancel(self, evt=None):
         """Close the window."""
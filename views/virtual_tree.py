@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VirtualTree - Windowed Treeview over a paged query.
+
+Only the rows that fit the widget are inserted in the Treeview; the
+others stay in the database and are read a page at a time while the
+user scrolls. Pages are read with keyset pagination (the rows after the
+last row of the previous page, on the sort column and the key) and a
+few are kept in memory, so scrolling through tens of thousands of rows
+costs one small indexed query every page_size rows. Jumps made with the
+scrollbar to a page not reached yet fall back to LIMIT/OFFSET.
+
+The count and the pages are read on the background query thread
+(Engine.run_async), one job per tree: a newer read supersedes a pending
+one, and the rows shown stay until the new ones arrive. The position of
+a row to select and the rows re-read by refresh_rows() are read there
+too, so the Tk thread never waits on the database.
+
+Sorting is done by the query (ORDER BY the sort column, then the key),
+not by moving items, and the selection is kept by key while the row
+scrolls out of the window and back.
+
+Usage:
+    self.vtPrices = VirtualTree(w, self.engine, cols, height=15,
+                                sort_columns={"product": "product", "price": "price"},
+                                on_select=self.on_item_selected)
+    self.vtPrices.tree.heading("product", text=_("Product"))
+    ...
+    self.vtPrices.set_source(sql, args, key="price_id", sort="product",
+                             row_values=lambda row: ((row["product"], row["price"]), ()),
+                             on_loaded=self.show_total)
+
+    self.vtPrices.selection()    # ("42",)
+    self.vtPrices.row()          # the selected row, as read
+    self.vtPrices.select(42, on_done=lambda found: ...)  # scroll to the row and select it
+    self.vtPrices.refresh()      # re-read the window, keeping position and selection
+    self.vtPrices.total          # rows of the query, once loaded
+    self.vtPrices.refresh_rows((42, 43))  # re-read only these rows
+
+The source query must not have an ORDER BY and must return the key and
+the sort columns.
+
+Author: 1966bc (Giuseppe Costanzi)
+License: GNU GPL v3
+Version: I (SQLite Edition)
+"""
+import re
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+
+# Rows read by one page query
+PAGE_SIZE = 200
+
+# Pages kept in memory
+CACHE_PAGES = 8
+
+# Changed rows re-read one by one by refresh_rows(); with more the list
+# is re-read (and the IN list stays under the 999 parameters of SQLite)
+REFRESH_ROWS = 500
+
+# Rows scrolled by one mouse wheel step
+WHEEL_ROWS = 3
+
+# Used until a row has been drawn and can be measured
+ROW_HEIGHT = 20
+HEADING_HEIGHT = 24
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class VirtualTree(ttk.Frame):
+    """Treeview showing a window of the rows of a query."""
+
+    def __init__(self, parent, engine, columns, height=10, show="headings",
+                 sort_columns=None, on_select=None, page_size=PAGE_SIZE):
+        """
+        Args:
+            parent: Parent widget
+            engine: Application engine (read, run_async, sync_tree)
+            columns: Treeview columns
+            height: Rows shown until the widget is laid out
+            show: Treeview show option ("headings", or "" for a plain list)
+            sort_columns: Dict tree column -> query column; clicking the
+                          heading sorts by it (again: descending)
+            on_select: Callable() when the user selects a row
+            page_size: Rows read by one page query
+        """
+        super().__init__(parent)
+
+        self.engine = engine
+        self.sort_columns = sort_columns or {}
+        self.on_select = on_select
+        self.page_size = page_size
+
+        self.tree = ttk.Treeview(self, columns=columns, show=show, height=height,
+                                 selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for column, sql_column in self.sort_columns.items():
+            self.tree.heading(column, command=lambda c=sql_column: self.sort_by(c))
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Up>", lambda evt: self._move(-1))
+        self.tree.bind("<Down>", lambda evt: self._move(1))
+        self.tree.bind("<Prior>", lambda evt: self._move(-self.visible))
+        self.tree.bind("<Next>", lambda evt: self._move(self.visible))
+        self.tree.bind("<Home>", lambda evt: self._move(-self.total))
+        self.tree.bind("<End>", lambda evt: self._move(self.total))
+
+        self.sql = None
+        self.args = ()
+        self.key = None
+        self.sort = None
+        self.descending = False
+        self.row_values = None
+
+        self.total = 0
+        self.first = 0
+        self.visible = height
+        self.selected = None
+
+        self._selected_row = None
+        # Position of the selected row, None until known again after a refresh
+        self._selected_index = None
+        self._window = {}
+        self._pages = OrderedDict()
+        self._anchors = {}
+        # Count and pages to be re-read; background job and its waiters
+        self._stale = False
+        self._loading = False
+        self._on_loaded = []
+        self._job_key = f"virtual_tree.{id(self)}"
+        # Bumped by refresh(): rows re-read before it are dropped
+        self._generation = 0
+        self._row_height = None
+        self._heading_height = HEADING_HEIGHT if "headings" in str(show) else 0
+
+    # -------------------------------------------------------------------------
+    # Source
+    # -------------------------------------------------------------------------
+
+    def set_source(self, sql, args=(), key="id", row_values=None, sort=None, descending=False,
+                   on_loaded=None):
+        """
+        Show the rows of a query.
+
+        Setting again the same query re-reads it in place, like refresh();
+        a different one starts from the top. The selection is kept if its
+        row is still in the list.
+
+        Args:
+            sql: SELECT without ORDER BY
+            args: Query parameters
+            key: Column with the unique key of the row (the item iid)
+            row_values: Callable(row) -> (values, tags)
+            sort: Column to sort by (default the key)
+            descending: Sort descending
+            on_loaded: Callable() once the rows are shown (total is known)
+        """
+        sort = sort or key
+        for column in (key, sort):
+            if not _IDENTIFIER.match(column):
+                raise ValueError(f"Invalid column name: {column}")
+
+        args = tuple(args)
+        same = (sql, args, key) == (self.sql, self.args, self.key)
+
+        if key != self.key:
+            self.selected = None
+            self._selected_row = None
+
+        self.sql = sql
+        self.args = args
+        self.key = key
+        self.row_values = row_values or (lambda row: (tuple(row.values()), ()))
+
+        if not same:
+            self.sort = sort
+            self.descending = descending
+            self.first = 0
+
+        self.refresh(on_loaded)
+
+    def clear(self):
+        """Remove the source and every row."""
+        self.engine.cancel_async(self._job_key)
+        self.engine.cancel_async(self._job_key + ".index")
+        self._generation += 1
+        self.sql = None
+        self.args = ()
+        self.key = None
+        self.total = 0
+        self.first = 0
+        self.selected = None
+        self._selected_row = None
+        self._selected_index = None
+        self._pages.clear()
+        self._anchors.clear()
+        self._stale = False
+        self._loading = False
+        self._on_loaded = []
+        self.render()
+
+    def refresh(self, on_loaded=None):
+        """
+        Re-read the rows in background, keeping position and selection.
+
+        The rows shown stay until the new ones arrive; if the selected
+        row left the list the selection is removed.
+
+        Args:
+            on_loaded: Callable() once the rows are shown
+        """
+        if on_loaded is not None:
+            self._on_loaded.append(on_loaded)
+
+        if self.sql is None:
+            self.total = 0
+            self.render()
+            return
+
+        self._stale = True
+        self._selected_index = None
+        self._generation += 1
+        self._load()
+
+    def refresh_rows(self, keys):
+        """
+        Re-read in background only the rows of the given keys, if they are in memory.
+
+        For rows changed in place: the cached copies are replaced and
+        the window updated. If one of them left the list or moved in
+        the sort order, everything is re-read with refresh(). Keys of
+        rows not read yet are ignored, they will be read when shown.
+        """
+        # A full re-read is already on its way
+        if self.sql is None or self._stale:
+            return
+
+        keys = {str(key) for key in keys}
+        ids = [row[self.key] for rows in self._pages.values()
+               for row in rows if str(row[self.key]) in keys]
+        if not ids:
+            return
+        if len(ids) > REFRESH_ROWS:
+            self.refresh()
+            return
+
+        sql = (f"SELECT q.*, {self._sort_expr()} AS _sort FROM ({self.sql}) AS q "
+               f"WHERE q.\"{self.key}\" IN ({', '.join('?' * len(ids))})")
+        args = self.args + tuple(ids)
+        generation = self._generation
+
+        # Not keyed: a later call for other rows must not drop this one
+        self.engine.run_async(self, lambda db: db.read(True, sql, args) or [],
+                              lambda fresh: self._rows_loaded(generation, ids, fresh))
+
+    def _rows_loaded(self, generation, ids, fresh):
+        """Take the rows read by refresh_rows() (Tk thread)."""
+        # A refresh since has read, or is reading, everything again
+        if generation != self._generation or self._stale:
+            return
+
+        if len(fresh) != len(ids):
+            self.refresh()
+            return
+
+        cached = {}
+        keys = {str(key) for key in ids}
+        for rows in self._pages.values():
+            for i, row in enumerate(rows):
+                if str(row[self.key]) in keys:
+                    cached[str(row[self.key])] = (rows, i)
+
+        for row in fresh:
+            # Page dropped from memory meanwhile, read again when shown
+            if str(row[self.key]) not in cached:
+                continue
+            rows, i = cached[str(row[self.key])]
+            if row["_sort"] != rows[i]["_sort"]:
+                self.refresh()
+                return
+            rows[i] = row
+            if self.selected == str(row[self.key]):
+                self._selected_row = row
+
+        self.render()
+
+    def sort_by(self, column):
+        """Sort by a query column; sorting again by the same one reverses the order."""
+        if self.sql is None:
+            return
+        if not _IDENTIFIER.match(column):
+            raise ValueError(f"Invalid column name: {column}")
+
+        self.descending = not self.descending if column == self.sort else False
+        self.sort = column
+        self.first = 0
+
+        if self.selected is not None:
+            self.refresh(lambda: self.selected is not None and self.see(self._selected_row[self.key]))
+        else:
+            self.refresh()
+
+    def query(self):
+        """
+        The source query in display order.
+
+        Returns:
+            (sql, args) tuple, e.g. to export the whole list
+        """
+        return (f"SELECT q.*, {self._sort_expr()} AS _sort FROM ({self.sql}) AS q "
+                f"{self._order_by()}", self.args)
+
+    # -------------------------------------------------------------------------
+    # Pages
+    # -------------------------------------------------------------------------
+
+    def _sort_expr(self):
+        # NULLs would break the row value comparison of the keyset; the
+        # key is never NULL and is left bare so that its index can be used
+        if self.sort == self.key:
+            return f"q.\"{self.key}\""
+        return f"IFNULL(q.\"{self.sort}\", '')"
+
+    def _order_by(self):
+        direction = "DESC" if self.descending else "ASC"
+        return f"ORDER BY _sort {direction}, q.\"{self.key}\" {direction}"
+
+    def _window_pages(self, first, total):
+        """Pages holding the rows of the window starting at first."""
+        if not total:
+            return range(0)
+        last = min(first + self.visible, total) - 1
+        return range(first // self.page_size, last // self.page_size + 1)
+
+    def _missing(self):
+        """True if a page of the window is not in memory."""
+        return any(page not in self._pages for page in self._window_pages(self.first, self.total))
+
+    def _load(self):
+        """
+        Read in background the count (if stale) and the missing pages of the window.
+
+        The queries are built here, on the Tk thread, from the state at
+        the time of the call; a newer _load() supersedes this one.
+        """
+        stale = self._stale
+        args = self.args
+        page_size = self.page_size
+        visible = self.visible
+        first = self.first
+        total = self.total
+        key = self.key
+        cached = set() if stale else set(self._pages)
+        anchors = {} if stale else dict(self._anchors)
+        selected = self._selected_row[key] if stale and self._selected_row is not None else None
+
+        count_sql = f"SELECT COUNT(*) AS n FROM ({self.sql})"
+        select = f"SELECT q.*, {self._sort_expr()} AS _sort FROM ({self.sql}) AS q"
+        op = "<" if self.descending else ">"
+        keyset = f" WHERE ({self._sort_expr()}, q.\"{key}\") {op} (?, ?)"
+        order = f" {self._order_by()} LIMIT ? OFFSET ?"
+
+        def fetch(db):
+            count = total
+            if stale:
+                row = db.read(False, count_sql, args)
+                count = row["n"] if row else 0
+            start = max(0, min(first, count - visible))
+            last = min(start + visible, count) - 1
+
+            pages = {}
+            for page in range(start // page_size, last // page_size + 1) if count else ():
+                if page in cached:
+                    continue
+                anchor = anchors.get(page)
+                if page and anchor is not None:
+                    # Keyset: the rows after the last one of the previous page
+                    rows = db.read(True, select + keyset + order, args + tuple(anchor) + (page_size, 0))
+                else:
+                    rows = db.read(True, select + order, args + (page_size, page * page_size))
+                rows = rows or []
+                pages[page] = rows
+                if len(rows) == page_size:
+                    anchors[page + 1] = (rows[-1]["_sort"], rows[-1][key])
+
+            # The selected row as it is now, None if it left the list
+            row = None
+            if selected is not None:
+                row = db.read(False, select + f" WHERE q.\"{key}\" = ?", args + (selected,))
+            return count, start, pages, anchors, row
+
+        self._loading = True
+        self.engine.run_async(self, fetch, lambda result: self._loaded(stale, result), key=self._job_key)
+
+    def _loaded(self, stale, result):
+        """Take the rows read by _load() and show them (Tk thread)."""
+        count, first, pages, anchors, selected_row = result
+        self._loading = False
+
+        if stale:
+            self._stale = False
+            self.total = count
+            self._pages.clear()
+            self._anchors.clear()
+            if self.selected is not None:
+                self._selected_row = selected_row
+                if selected_row is None:
+                    self.selected = None
+
+        self.first = first
+        self._pages.update(pages)
+        self._anchors.update(anchors)
+
+        self.render()
+
+        # Keep the pages just shown, the least recently used go first
+        while len(self._pages) > CACHE_PAGES:
+            self._pages.popitem(last=False)
+
+    def _page(self, page):
+        """Rows of a page in memory (empty if not read yet)."""
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        return []
+
+    def rows(self, start, count):
+        """Rows start..start + count of the list, as far as they are in memory."""
+        rows = []
+        index = start
+        end = min(start + count, self.total)
+        while index < end:
+            page, offset = divmod(index, self.page_size)
+            chunk = self._page(page)[offset:offset + end - index]
+            if not chunk:
+                break
+            rows.extend(chunk)
+            index += len(chunk)
+        return rows
+
+    def index(self, key, callback):
+        """
+        Find the position of the row with the given key.
+
+        Rows in the window are found at once, the others are looked up
+        in background (a newer lookup supersedes a pending one).
+
+        Args:
+            key: Key of the row
+            callback: Callable(index), index None if the row is not in the list
+        """
+        if self.sql is None:
+            callback(None)
+            return
+
+        iid = str(key)
+        if iid in self._window and not self._stale:
+            callback(self.first + self.tree.index(iid))
+            return
+
+        args = self.args
+        lookup_sql = (f"SELECT {self._sort_expr()} AS _sort, q.\"{self.key}\" AS _key "
+                      f"FROM ({self.sql}) AS q WHERE q.\"{self.key}\" = ?")
+        op = ">" if self.descending else "<"
+        count_sql = (f"SELECT COUNT(*) AS n FROM ({self.sql}) AS q "
+                     f"WHERE ({self._sort_expr()}, q.\"{self.key}\") {op} (?, ?)")
+
+        def fetch(db):
+            row = db.read(False, lookup_sql, args + (key,))
+            if row is None:
+                return None
+            row = db.read(False, count_sql, args + (row["_sort"], row["_key"]))
+            return row["n"] if row else None
+
+        self.engine.run_async(self, fetch, callback, key=self._job_key + ".index")
+
+    # -------------------------------------------------------------------------
+    # Window
+    # -------------------------------------------------------------------------
+
+    def render(self):
+        """
+        Show the rows of the window first..first + visible.
+
+        If some are not in memory they are read in background and the
+        window is drawn when they arrive.
+        """
+        if self.sql is not None and self._stale:
+            self._load()
+            return
+
+        self.first = max(0, min(self.first, self.total - self.visible))
+        if self.sql is not None and self._missing():
+            self._load()
+            return
+
+        rows = self.rows(self.first, self.visible) if self.sql is not None else []
+
+        self._window = {str(row[self.key]): row for row in rows}
+        self.engine.sync_tree(self.tree, (
+            (row[self.key], *self.row_values(row)) for row in rows
+        ))
+
+        if self.selected in self._window and self.tree.selection() != (self.selected,):
+            self.tree.selection_set(self.selected)
+
+        if self.total:
+            self.scrollbar.set(self.first / self.total, (self.first + len(rows)) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+        if rows and self._row_height is None and self._measure():
+            self.render()
+            return
+
+        if self._on_loaded and not self._loading:
+            callbacks, self._on_loaded = self._on_loaded, []
+            for callback in callbacks:
+                callback()
+
+    def _measure(self):
+        """Measure the drawn rows; True if the rows that fit changed."""
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else ""
+        if not bbox:
+            return False
+
+        self._heading_height, self._row_height = bbox[1], bbox[3]
+        rows = self._fit()
+        if rows == self.visible:
+            return False
+        self.visible = rows
+        return True
+
+    def _fit(self):
+        """Rows that fit the height of the Treeview."""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return self.visible
+        return max(1, (height - self._heading_height) // (self._row_height or ROW_HEIGHT))
+
+    def _on_configure(self, evt=None):
+        rows = self._fit()
+        if rows != self.visible:
+            self.visible = rows
+            self.render()
+
+    def scroll_to(self, first):
+        """Show the window starting at the given row."""
+        self.first = first
+        self.render()
+
+    def see(self, key):
+        """Scroll the row with the given key into the window, if it is in the list."""
+        self.index(key, lambda index: index is not None and self._show(index))
+
+    def _show(self, index):
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.visible:
+            self.scroll_to(index - self.visible + 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: moveto fraction, or scroll n units/pages."""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, evt):
+        if evt.num == 4:
+            step = -WHEEL_ROWS
+        elif evt.num == 5:
+            step = WHEEL_ROWS
+        else:
+            step = -WHEEL_ROWS if evt.delta > 0 else WHEEL_ROWS
+        self.scroll_to(self.first + step)
+        return "break"
+
+    # -------------------------------------------------------------------------
+    # Selection
+    # -------------------------------------------------------------------------
+
+    def selection(self):
+        """Key (as iid string) of the selected row, as a tuple like Treeview.selection()."""
+        return (self.selected,) if self.selected is not None else ()
+
+    def row(self, key=None):
+        """The selected row (or the row of a key in the window), as read from the query."""
+        if key is None:
+            return self._selected_row
+        return self._window.get(str(key))
+
+    def exists(self, key, callback):
+        """Call callback(True) if the row with the given key is in the list, else callback(False)."""
+        self.index(key, lambda index: callback(index is not None))
+
+    def select(self, key, notify=False, on_done=None):
+        """
+        Scroll to the row with the given key and select it.
+
+        Args:
+            key: Key of the row
+            notify: Call on_select as for a user selection
+            on_done: Callable(found) once done, found False if the row is not in the list
+        """
+        def selected(index):
+            if index is None:
+                if on_done is not None:
+                    on_done(False)
+                return
+            self._select_index(index, notify, on_done)
+
+        self.index(key, selected)
+
+    def selection_clear(self):
+        """Remove the selection."""
+        self.selected = None
+        self._selected_row = None
+        self._selected_index = None
+        if self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def _select_index(self, index, notify, on_done=None):
+        self._show(index)
+        if self._stale or self._loading or index // self.page_size not in self._pages:
+            # Selected once its page is shown
+            self._on_loaded.append(lambda: self._select_index(index, notify, on_done))
+            if not self._loading:
+                self._load()
+            return
+
+        rows = self.rows(index, 1)
+        if not rows:
+            if on_done is not None:
+                on_done(False)
+            return
+
+        self._selected_row = rows[0]
+        self._selected_index = index
+        self.selected = str(rows[0][self.key])
+        if self.tree.exists(self.selected):
+            if self.tree.selection() != (self.selected,):
+                self.tree.selection_set(self.selected)
+            self.tree.focus(self.selected)
+
+        if notify and self.on_select is not None:
+            self.on_select()
+        if on_done is not None:
+            on_done(True)
+
+    def _move(self, delta):
+        """Keyboard navigation across the whole list."""
+        if not self.total:
+            return "break"
+
+        def move(index):
+            if index is None:
+                index = self.first
+            else:
+                index = max(0, min(self.total - 1, index + delta))
+            self._select_index(index, notify=True)
+
+        if self.selected is None:
+            move(None)
+        elif self._selected_index is not None:
+            # Known since the row was selected: no lookup on every key press
+            move(self._selected_index)
+        else:
+            self.index(self._selected_row[self.key], move)
+        return "break"
+
+    def _on_tree_select(self, evt=None):
+        # Rows scrolling out of the window leave the Treeview without a
+        # selection: only a different row selected by the user counts
+        selection = self.tree.selection()
+        if not selection or selection[0] == self.selected:
+            return
+
+        self.selected = selection[0]
+        self._selected_row = self._window.get(self.selected)
+        self._selected_index = self.first + self.tree.index(self.selected)
+        if self.on_select is not None:
+            self.on_select()
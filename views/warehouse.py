@@ -16,11 +16,43 @@ from tkinter import messagebox
 
 from i18n import _
 from views.parent_view import ParentView
+from views.virtual_tree import VirtualTree
 from views import batch
 from views import labels
 from views import package_history
 from views import package
 
+# Active packages with stock; load_products() appends the filters
+SQL_PRODUCTS = """
+    SELECT
+        pk.package_id,
+        p.description AS product_name,
+        p.reference AS product_code,
+        pk.packaging,
+        pk.reorder,
+        s.description AS supplier,
+        COALESCE(ps.in_stock, 0) AS in_stock
+    FROM packages pk
+    JOIN products p ON p.product_id = pk.product_id
+    LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
+    LEFT JOIN package_stock ps ON ps.package_id = pk.package_id
+    WHERE pk.status = 1 AND p.status = 1
+"""
+
+# Packages matched by the current search, on the connection of the
+# background query thread (TEMP tables are per connection) that reads
+# the products list
+SQL_SEARCH_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS warehouse_search (
+        search_id INTEGER NOT NULL,
+        package_id INTEGER NOT NULL,
+        PRIMARY KEY (search_id, package_id)
+    ) WITHOUT ROWID
+"""
+
+# Rows per INSERT into warehouse_search (two parameters each, under 999)
+SEARCH_CHUNK = 400
+
 
 class UI(ParentView):
     """
@@ -44,9 +76,10 @@ class UI(ParentView):
         self.label_action = tk.IntVar(value=0)
         self.show_all_labels = tk.BooleanVar(value=False)
         self.dict_categories = {}
-        self.dict_labels = {}  # Maps listbox index to label_id
         self.selected_package_id = None
         self.selected_batch_id = None
+        # ((search term, mode, package ids), search id) of the stored search
+        self.stored_search = None
 
         # Attributes for package.py compatibility
         self.table = "packages"
@@ -84,26 +117,26 @@ class UI(ParentView):
         # Products Treeview
         self.lbfProducts = ttk.LabelFrame(f1, text=_("Products"), style="App.TLabelframe")
 
+        # Only the visible rows are in the tree, the others are paged in
         cols = ("product", "stock")
-        self.treeProducts = ttk.Treeview(self.lbfProducts, columns=cols, show="headings", height=12)
+        self.vtProducts = VirtualTree(self.lbfProducts, self.engine, cols, height=12,
+                                      sort_columns={"product": "product_name", "stock": "in_stock"},
+                                      on_select=self.on_selected_product)
+        tree = self.vtProducts.tree
 
-        self.treeProducts.column("product", width=250, minwidth=150, anchor=tk.W, stretch=True)
-        self.treeProducts.heading("product", text=_("Product"), anchor=tk.W)
+        tree.column("product", width=250, minwidth=150, anchor=tk.W, stretch=True)
+        tree.heading("product", text=_("Product"), anchor=tk.W)
 
-        self.treeProducts.column("stock", width=40, minwidth=40, anchor=tk.CENTER, stretch=False)
-        self.treeProducts.heading("stock", text=_("Stk"), anchor=tk.CENTER)
+        tree.column("stock", width=40, minwidth=40, anchor=tk.CENTER, stretch=False)
+        tree.heading("stock", text=_("Stk"), anchor=tk.CENTER)
 
-        sb = ttk.Scrollbar(self.lbfProducts, orient=tk.VERTICAL, command=self.treeProducts.yview)
-        self.treeProducts.configure(yscrollcommand=sb.set)
-        self.treeProducts.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
-        sb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.vtProducts.pack(fill=tk.BOTH, expand=1)
 
-        self.treeProducts.bind("<<TreeviewSelect>>", self.on_selected_product)
-        self.treeProducts.bind("<Double-1>", self.on_details)
+        tree.bind("<Double-1>", self.on_details)
 
         # Tags for coloring
-        self.treeProducts.tag_configure("no_stock", background="light coral")
-        self.treeProducts.tag_configure("low_stock", background="khaki")
+        tree.tag_configure("no_stock", background="light coral")
+        tree.tag_configure("low_stock", background="khaki")
 
         self.lbfProducts.pack(side=tk.TOP, fill=tk.BOTH, expand=1, pady=5)
 
@@ -152,26 +185,16 @@ class UI(ParentView):
         )
         self.chkShowAll.pack(anchor=tk.W, padx=2, pady=2)
 
-        # Listbox container
-        list_frame = ttk.Frame(self.lbfLabels)
-        list_frame.pack(fill=tk.BOTH, expand=1)
-
-        sb = ttk.Scrollbar(list_frame, orient=tk.VERTICAL)
-        self.lstLabels = tk.Listbox(
-            list_frame,
-            height=8,
-            font=("TkFixedFont", 10),
-            relief=tk.GROOVE,
-            selectmode=tk.SINGLE,
-            exportselection=0,
-            yscrollcommand=sb.set
-        )
-        sb.config(command=self.lstLabels.yview)
-        self.lstLabels.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
-        sb.pack(side=tk.RIGHT, fill=tk.Y)
+        # Labels list, paged like the products (a batch can have thousands)
+        self.vtLabels = VirtualTree(self.lbfLabels, self.engine, ("label",), height=8, show="",
+                                    on_select=self.on_selected_label)
+        self.vtLabels.pack(fill=tk.BOTH, expand=1)
 
-        self.lstLabels.bind("<<ListboxSelect>>", self.on_selected_label)
-        self.lstLabels.bind("<Double-Button-1>", self.on_activated_label)
+        self.vtLabels.tree.bind("<Double-Button-1>", self.on_activated_label)
+
+        # Color by status: 0=used, -1=cancelled
+        self.vtLabels.tree.tag_configure("used", background="light gray")
+        self.vtLabels.tree.tag_configure("cancelled", background="light coral")
 
         self.lbfLabels.pack(side=tk.TOP, fill=tk.BOTH, expand=1, pady=5)
 
@@ -181,10 +204,13 @@ class UI(ParentView):
         self.txSearch.bind("<Return>", self.on_search)
         self.txSearch.pack(fill=tk.X, padx=2, pady=2)
 
+        # Search as you type, when the typing pauses
+        self.search_var.trace_add("write", lambda *args: self.engine.debounce(self, self.on_search))
+
         # Search options
         for idx, text in enumerate((_("Product"), _("Code"))):
-            ttk.Radiobutton(w, text=text, variable=self.search_option,
-                            value=idx, style="App.TRadiobutton").pack(anchor=tk.W)
+            ttk.Radiobutton(w, text=text, variable=self.search_option, value=idx,
+                            command=self.on_search, style="App.TRadiobutton").pack(anchor=tk.W)
         w.pack(fill=tk.X, padx=5, pady=5)
 
         # Buttons
@@ -230,39 +256,57 @@ class UI(ParentView):
         self.clear_lists()
         self.lbfProducts.config(text=_("Products (select category)"))
 
-    def on_stock_changed(self, data=None):
-        """Handle stock_changed event from delivery."""
-        self.refresh_batches()
-        self.update_product_stock()
-
-    def on_label_unloaded(self, data=None):
-        """Handle label_unloaded event from barcode."""
-        if self.selected_batch_id:
-            self.load_labels(self.selected_batch_id)
+    def on_stock_changed(self, changes=None):
+        """Handle stock_changed event from delivery: batches and stock of the packages involved."""
+        package_ids = self.changed_ids(changes, "package_ids")
+        if package_ids is None or self.selected_package_id in package_ids:
+            self.refresh_batches()
+        self.refresh_products(package_ids)
+
+    def on_label_unloaded(self, changes=None):
+        """Handle label_unloaded event from barcode: the labels and stock involved."""
+        batch_ids = self.changed_ids(changes, "batch_ids")
+        if self.selected_batch_id and (batch_ids is None or self.selected_batch_id in batch_ids):
+            if batch_ids is None or not self.show_all_labels.get():
+                # Unloaded labels leave the list of the labels in stock
+                self.load_labels(self.selected_batch_id)
+            else:
+                self.vtLabels.refresh_rows(changes.get("label_ids", ()))
+        self.refresh_products(self.changed_ids(changes, "package_ids"))
 
-    def on_batch_cancelled(self, data=None):
+    def on_batch_cancelled(self, changes=None):
         """Handle batch_cancelled event from expiring."""
-        self.refresh()
+        package_ids = self.changed_ids(changes, "package_ids")
+        if package_ids is None:
+            self.refresh()
+            return
+        if self.selected_package_id in package_ids:
+            self.refresh_batches()
+        self.refresh_products(package_ids)
 
-    def on_category_changed(self, data=None):
+    def on_category_changed(self, changes=None):
         """Handle category_changed event from category."""
         self.set_categories()
 
-    def on_package_changed(self, data=None):
+    def on_package_changed(self, changes=None):
         """Handle package_changed event from package."""
         self.refresh()
 
-    def on_product_changed(self, data=None):
+    def on_product_changed(self, changes=None):
         """Handle product_changed event from product."""
         self.refresh()
 
+    @staticmethod
+    def changed_ids(changes, key):
+        """Ids of a kind in an event payload, None if everything may have changed."""
+        return None if changes is None else changes.get(key, set())
+
     def on_refresh(self, evt=None):
         """Refresh lists respecting current category selection."""
         # Get current category selection
         category_idx = self.cbCategories.current()
         if category_idx != -1:
             category_id = self.dict_categories.get(category_idx, 0)
-            self.clear_lists()
             self.load_products(category_id=category_id)
         else:
             # No category selected - just clear lists
@@ -271,20 +315,18 @@ class UI(ParentView):
 
     def clear_lists(self):
         """Clear all lists."""
-        for item in self.treeProducts.get_children():
-            self.treeProducts.delete(item)
-        for item in self.treeBatches.get_children():
-            self.treeBatches.delete(item)
-        self.lstLabels.delete(0, tk.END)
+        self.vtProducts.clear()
+        self.engine.sync_tree(self.treeBatches, ())
+        self.vtLabels.clear()
         self.selected_package_id = None
         self.selected_batch_id = None
         self.update_counts()
 
     def update_counts(self):
         """Update item counts in labels."""
-        prod_count = len(self.treeProducts.get_children())
+        prod_count = self.vtProducts.total
         batch_count = len(self.treeBatches.get_children())
-        label_count = self.lstLabels.size()
+        label_count = self.vtLabels.total
         self.lbfProducts.config(text=f"{_('Products')} ({prod_count})")
         self.lbfBatches.config(text=f"{_('Batches')} ({batch_count})")
         self.lbfLabels.config(text=f"{_('Labels')} ({label_count})")
@@ -303,7 +345,7 @@ class UI(ParentView):
                  WHERE reference_id = 1 AND status = 1
                  ORDER BY description"""
 
-        rs = self.engine.read(True, sql)
+        rs = self.engine.read_cached(True, sql, tables=("categories",))
 
         if rs:
             for idx, row in enumerate(rs):
@@ -323,32 +365,16 @@ class UI(ParentView):
                     self.cbCategories.current(idx)
                     break
 
-    def load_products(self, category_id=None, search_term=None):
-        """Load products into treeview."""
-        for item in self.treeProducts.get_children():
-            self.treeProducts.delete(item)
-        for item in self.treeBatches.get_children():
-            self.treeBatches.delete(item)
-        self.lstLabels.delete(0, tk.END)
-        self.selected_package_id = None
-        self.selected_batch_id = None
+    def load_products(self, category_id=None, search_term=None, on_loaded=None):
+        """
+        Show the products of a category or search.
 
-        sql = """
-            SELECT
-                pk.package_id,
-                p.description AS product_name,
-                p.reference AS product_code,
-                pk.packaging,
-                pk.reorder,
-                s.description AS supplier,
-                COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
-            FROM packages pk
-            JOIN products p ON p.product_id = pk.product_id
-            LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
-            LEFT JOIN batches b ON b.package_id = pk.package_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-            WHERE pk.status = 1 AND p.status = 1
+        Only the visible window is read, in background (see VirtualTree),
+        sorted by the column chosen in the headings; unchanged filters
+        re-read the rows in place. on_loaded() is called once the rows
+        are shown.
         """
+        sql = SQL_PRODUCTS
 
         args = []
 
@@ -357,40 +383,65 @@ class UI(ParentView):
             args.append(category_id)
 
         if search_term:
-            if self.search_option.get() == 0:
-                sql += " AND p.description LIKE ?"
-            else:
-                sql += " AND p.reference LIKE ?"
-            args.append(f"%{search_term}%")
-
-        sql += " GROUP BY pk.package_id ORDER BY p.description"
+            # Matched in memory (catalog index), the query only adds the stock
+            mode = "code" if self.search_option.get() else "name"
+            package_ids = self.engine.get_catalog().search(search_term, mode)
+            sql += (" AND pk.package_id IN "
+                    "(SELECT package_id FROM temp.warehouse_search WHERE search_id = ?)")
+            args.append(self.store_search(search_term, mode, package_ids))
+
+        self.vtProducts.set_source(sql, args, key="package_id", sort="product_name",
+                                   row_values=self.product_values,
+                                   on_loaded=lambda: self.show_products(on_loaded))
+
+    def store_search(self, search_term, mode, package_ids):
+        """
+        Write the packages matched by a search into temp.warehouse_search.
 
-        rs = self.engine.read(True, sql, tuple(args))
+        The matches can be more than the 999 parameters of older SQLite,
+        so the products query reads them from a TEMP table instead of an
+        IN list. The table is filled on the background query thread by a
+        job queued before the products are read (jobs run in order); the
+        same search with the same matches is not written again.
 
-        if rs:
-            for row in rs:
-                package_id = row["package_id"]
-                stock = row["in_stock"] or 0
-                reorder = row["reorder"] or 0
-                product = row["product_name"] or ""
-
-                # Determine tag based on stock vs reorder level
-                if stock == 0 and reorder > 0:
-                    tag = "no_stock"
-                elif stock <= reorder and reorder > 0:
-                    tag = "low_stock"
-                else:
-                    tag = ""
-
-                self.treeProducts.insert(
-                    "", tk.END,
-                    iid=package_id,
-                    values=(product, stock),
-                    tags=(tag,) if tag else ()
-                )
+        Returns:
+            Search id, the query argument (a new one starts from the top)
+        """
+        search = (search_term, mode, tuple(package_ids))
+        if self.stored_search is not None and self.stored_search[0] == search:
+            return self.stored_search[1]
+
+        search_id = self.stored_search[1] + 1 if self.stored_search else 1
+        self.stored_search = (search, search_id)
+
+        def store(db):
+            db.write(SQL_SEARCH_TABLE)
+            db.write("DELETE FROM temp.warehouse_search")
+            for i in range(0, len(package_ids), SEARCH_CHUNK):
+                chunk = package_ids[i:i + SEARCH_CHUNK]
+                db.write("INSERT OR IGNORE INTO temp.warehouse_search (search_id, package_id) "
+                         f"VALUES {', '.join(['(?, ?)'] * len(chunk))}",
+                         tuple(value for package_id in chunk for value in (search_id, package_id)))
+
+        self.engine.run_async(self, store, lambda result: None)
+        return search_id
+
+    def show_products(self, on_loaded=None):
+        """
+        Once the products are shown: if the selected package is gone
+        its batches and labels are cleared.
+        """
+        if self.selected_package_id and not self.vtProducts.selection():
+            self.engine.sync_tree(self.treeBatches, ())
+            self.vtLabels.clear()
+            self.selected_package_id = None
+            self.selected_batch_id = None
 
         self.update_counts()
 
+        if on_loaded:
+            on_loaded()
+
     def format_date(self, date_str):
         """Convert yyyy-mm-dd to dd-mm-yyyy."""
         if date_str and '-' in date_str:
@@ -399,12 +450,22 @@ class UI(ParentView):
                 return f"{parts[2]}-{parts[1]}-{parts[0]}"
         return date_str or ""
 
+    def product_values(self, row):
+        """Products tree values and tags of a SQL_PRODUCTS row."""
+        stock = row["in_stock"] or 0
+        return (row["product_name"] or "", stock), (self.stock_tag(stock, row["reorder"] or 0),)
+
+    @staticmethod
+    def stock_tag(stock, reorder):
+        """Products tree tag for the stock against the reorder level."""
+        if stock == 0 and reorder > 0:
+            return "no_stock"
+        if stock <= reorder and reorder > 0:
+            return "low_stock"
+        return ""
+
     def load_batches(self, package_id):
-        """Load batches for selected package."""
-        for item in self.treeBatches.get_children():
-            self.treeBatches.delete(item)
-        self.lstLabels.delete(0, tk.END)
-        self.selected_batch_id = None
+        """Load batches for selected package (unchanged rows are kept)."""
 
         sql = """
             SELECT
@@ -419,74 +480,62 @@ class UI(ParentView):
 
         rs = self.engine.read(True, sql, (package_id,))
 
-        if rs:
-            for row in rs:
-                batch_id = row["batch_id"]
-                days = row["days_left"]
-                lot = row["description"] or ""
-                exp = self.format_date(row["expiration"])
-
-                # Determine tag based on expiration
-                if days is not None:
-                    if days < 0:
-                        tag = "expired"
-                    elif days <= 30:
-                        tag = "expiring"
-                    else:
-                        tag = ""
+        rows = []
+        for row in rs or ():
+            days = row["days_left"]
+            lot = row["description"] or ""
+            exp = self.format_date(row["expiration"])
+
+            # Determine tag based on expiration
+            if days is not None:
+                if days < 0:
+                    tag = "expired"
+                elif days <= 30:
+                    tag = "expiring"
                 else:
                     tag = ""
+            else:
+                tag = ""
 
-                days_str = str(days) if days is not None else ""
+            days_str = str(days) if days is not None else ""
 
-                self.treeBatches.insert(
-                    "", tk.END,
-                    iid=batch_id,
-                    values=(lot, exp, days_str),
-                    tags=(tag,) if tag else ()
-                )
+            rows.append((row["batch_id"], (lot, exp, days_str), (tag,)))
+
+        self.engine.sync_tree(self.treeBatches, rows)
+
+        if self.selected_batch_id and not self.treeBatches.exists(self.selected_batch_id):
+            self.vtLabels.clear()
+            self.selected_batch_id = None
 
         self.update_counts()
 
     def load_labels(self, batch_id):
-        """Load labels for selected batch."""
-        self.lstLabels.delete(0, tk.END)
-        self.dict_labels.clear()
+        """Show the labels of the selected batch (the same batch is re-read in place)."""
+        sql = """SELECT label_id, tick, status
+                 FROM labels
+                 WHERE batch_id = ?"""
 
         # Filter by status if not showing all
-        if self.show_all_labels.get():
-            sql = """SELECT label_id, tick, status
-                     FROM labels
-                     WHERE batch_id = ?
-                     ORDER BY label_id"""
-            rs = self.engine.read(True, sql, (batch_id,))
+        if not self.show_all_labels.get():
+            sql += " AND status = 1"
+
+        self.vtLabels.set_source(sql, (batch_id,), key="label_id", row_values=self.label_values,
+                                 on_loaded=self.update_counts)
+
+    @staticmethod
+    def label_values(row):
+        """Labels list values and tags: the tick (or the label_id), colored by status."""
+        display = str(row["tick"]) if row["tick"] else str(row["label_id"])
+
+        # 1=active, 0=used, -1=cancelled
+        if row["status"] == 0:
+            tag = "used"
+        elif row["status"] == -1:
+            tag = "cancelled"
         else:
-            sql = """SELECT label_id, tick, status
-                     FROM labels
-                     WHERE batch_id = ? AND status = 1
-                     ORDER BY label_id"""
-            rs = self.engine.read(True, sql, (batch_id,))
+            tag = ""
 
-        if rs:
-            for idx, row in enumerate(rs):
-                label_id = row["label_id"]
-                tick = row["tick"]
-                status = row["status"]
-
-                # Map index to label_id for actions
-                self.dict_labels[idx] = label_id
-
-                # Display tick if available, otherwise label_id
-                display = str(tick) if tick else str(label_id)
-                self.lstLabels.insert(tk.END, display)
-
-                # Color by status: 1=active, 0=used, -1=cancelled
-                if status == 0:
-                    self.lstLabels.itemconfig(idx, bg="light gray")
-                elif status == -1:
-                    self.lstLabels.itemconfig(idx, bg="light coral")
-
-        self.update_counts()
+        return (display,), (tag,)
 
     # -------------------------------------------------------------------------
     # Event handlers
@@ -500,11 +549,15 @@ class UI(ParentView):
             self.load_products(category_id=category_id)
 
     def on_search(self, evt=None):
-        """Handle search."""
+        """Handle search (Return, or a pause while typing)."""
         term = self.search_var.get().strip()
         if term:
             self.cbCategories.set("")
             self.load_products(search_term=term)
+        elif self.cbCategories.current() == -1:
+            # Search emptied with no category: back to the initial state
+            self.clear_lists()
+            self.lbfProducts.config(text=_("Products (select category)"))
 
     def on_toggle_show_all(self):
         """Handle show all labels checkbox toggle."""
@@ -513,7 +566,7 @@ class UI(ParentView):
 
     def on_selected_product(self, evt=None):
         """Handle product selection - load batches."""
-        selection = self.treeProducts.selection()
+        selection = self.vtProducts.selection()
         if selection:
             package_id = int(selection[0])
             self.selected_package_id = package_id
@@ -521,7 +574,7 @@ class UI(ParentView):
 
     def on_details(self, evt=None):
         """Show details of selected product/package."""
-        selection = self.treeProducts.selection()
+        selection = self.vtProducts.selection()
         if selection:
             package_id = int(selection[0])
 
@@ -535,16 +588,14 @@ class UI(ParentView):
                     c.description AS conservation,
                     cat.description AS category,
                     pk.in_the_dark,
-                    COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
+                    COALESCE(ps.in_stock, 0) AS in_stock
                 FROM packages pk
                 JOIN products p ON p.product_id = pk.product_id
                 LEFT JOIN suppliers s ON s.supplier_id = pk.supplier_id
                 LEFT JOIN conservations c ON c.conservation_id = pk.conservation_id
                 LEFT JOIN categories cat ON cat.category_id = pk.category_id
-                LEFT JOIN batches b ON b.package_id = pk.package_id
-                LEFT JOIN labels lb ON lb.batch_id = b.batch_id
+                LEFT JOIN package_stock ps ON ps.package_id = pk.package_id
                 WHERE pk.package_id = ?
-                GROUP BY pk.package_id
             """
             row = self.engine.read(False, sql, (package_id,))
 
@@ -574,11 +625,10 @@ class UI(ParentView):
 
     def on_history(self, evt=None):
         """Show order history for selected product/package."""
-        selection = self.treeProducts.selection()
+        selection = self.vtProducts.selection()
         if selection:
             package_id = int(selection[0])
-            item = self.treeProducts.item(selection[0])
-            product_name = item["values"][0]
+            product_name = self.vtProducts.row()["product_name"]
 
             obj = package_history.UI(self)
             obj.on_open(package_id, product_name)
@@ -591,7 +641,7 @@ class UI(ParentView):
 
     def on_edit_package(self, evt=None):
         """Open package edit dialog for selected product."""
-        selection = self.treeProducts.selection()
+        selection = self.vtProducts.selection()
         if selection:
             package_id = int(selection[0])
 
@@ -625,16 +675,26 @@ class UI(ParentView):
         search_term = self.search_var.get().strip() or None
 
         if category_id is not None or search_term:
-            self.load_products(category_id=category_id, search_term=search_term)
+            self.load_products(category_id=category_id, search_term=search_term,
+                               on_loaded=lambda: self.select_package(pk))
+        else:
+            self.select_package(pk)
 
-        # Re-select the package
-        for item in self.treeProducts.get_children():
-            if int(item) == pk:
-                self.treeProducts.selection_set(item)
-                self.treeProducts.see(item)
+    def select_package(self, pk):
+        """Re-select the given package in the products list."""
+        def selected(found):
+            if found:
                 self.selected_package_id = pk
                 self.load_batches(pk)
-                break
+
+        self.vtProducts.select(pk, on_done=selected)
+
+    @staticmethod
+    def select_row(tree, iid):
+        """Select and show a row, unless it is already the selection."""
+        if tree.selection() != (str(iid),):
+            tree.selection_set(iid)
+        tree.see(iid)
 
     def on_selected_batch(self, evt=None):
         """Handle batch selection - load labels."""
@@ -646,13 +706,13 @@ class UI(ParentView):
 
     def on_selected_label(self, evt=None):
         """Handle label selection - copy barcode to clipboard."""
-        if self.lstLabels.curselection():
-            idx = self.lstLabels.curselection()[0]
-            barcode = self.lstLabels.get(idx)
+        row = self.vtLabels.row()
+        if row:
+            barcode = self.label_values(row)[0][0]
             self.clipboard_clear()
             self.clipboard_append(barcode)
             # Update label frame to show feedback
-            self.lbfLabels.config(text=f"{_('Labels')} ({self.lstLabels.size()}) - {_('Copied!')}")
+            self.lbfLabels.config(text=f"{_('Labels')} ({self.vtLabels.total}) - {_('Copied!')}")
 
     def on_activated_batch(self, evt=None):
         """Handle batch double-click - open edit dialog."""
@@ -665,10 +725,9 @@ class UI(ParentView):
 
             if selected_batch and self.selected_package_id:
                 # Get product name from treeview
-                prod_selection = self.treeProducts.selection()
+                prod_selection = self.vtProducts.selection()
                 if prod_selection:
-                    item = self.treeProducts.item(prod_selection[0])
-                    product_name = item["values"][0]
+                    product_name = self.vtProducts.row()["product_name"]
                     selected_package = (self.selected_package_id, product_name)
 
                     obj = batch.UI(self, index=batch_id)
@@ -676,11 +735,9 @@ class UI(ParentView):
 
     def on_activated_label(self, evt=None):
         """Handle label click - action based on radio selection."""
-        if self.lstLabels.curselection():
-            idx = self.lstLabels.curselection()[0]
-            label_id = self.dict_labels.get(idx)
-            if not label_id:
-                return
+        selection = self.vtLabels.selection()
+        if selection:
+            label_id = int(selection[0])
 
             selected_label = self.engine.get_selected("labels", "label_id", label_id)
 
@@ -740,51 +797,20 @@ class UI(ParentView):
                         )
 
     def reposition_label(self, label_id):
-        """Reposition listbox selection on the given label_id."""
-        for idx, lid in self.dict_labels.items():
-            if lid == label_id:
-                self.lstLabels.selection_clear(0, tk.END)
-                self.lstLabels.selection_set(idx)
-                self.lstLabels.see(idx)
-                break
+        """Reposition the labels selection on the given label_id."""
+        self.vtLabels.select(label_id, on_done=lambda found: found or self.vtLabels.selection_clear())
 
     def update_product_stock(self):
-        """Update stock count for the currently selected product in treeview."""
-        if not self.selected_package_id:
-            return
-
-        # Query current stock for this package
-        sql = """
-            SELECT 
-                pk.reorder,
-                COUNT(CASE WHEN lb.status = 1 THEN 1 END) AS in_stock
-            FROM packages pk
-            LEFT JOIN batches b ON b.package_id = pk.package_id
-            LEFT JOIN labels lb ON lb.batch_id = b.batch_id
-            WHERE pk.package_id = ?
-            GROUP BY pk.package_id
-        """
-        row = self.engine.read(False, sql, (self.selected_package_id,))
-
-        if row:
-            stock = row["in_stock"] or 0
-            reorder = row["reorder"] or 0
-
-            # Determine tag based on stock vs reorder level
-            if stock == 0 and reorder > 0:
-                tag = ("no_stock",)
-            elif stock <= reorder and reorder > 0:
-                tag = ("low_stock",)
-            else:
-                tag = ()
+        """Update the stock shown for the selected product, after a label operation."""
+        if self.selected_package_id:
+            self.refresh_products((self.selected_package_id,))
 
-            # Update treeview cell
-            item_id = str(self.selected_package_id)
-            if self.treeProducts.exists(item_id):
-                current_values = self.treeProducts.item(item_id, "values")
-                # Keep product name, update stock
-                new_values = (current_values[0], stock)
-                self.treeProducts.item(item_id, values=new_values, tags=tag)
+    def refresh_products(self, package_ids=None):
+        """Re-read the stock of the given packages (None: of all the products shown)."""
+        if package_ids is None:
+            self.vtProducts.refresh(self.update_counts)
+        elif package_ids:
+            self.vtProducts.refresh_rows(package_ids)
 
     def on_print_label(self, label_id):
         """Print barcode label for the given label_id."""
@@ -817,11 +843,10 @@ class UI(ParentView):
 
     def on_new_batch(self, evt=None):
         """Create new batch for selected product."""
-        selection = self.treeProducts.selection()
+        selection = self.vtProducts.selection()
         if selection:
             package_id = int(selection[0])
-            item = self.treeProducts.item(selection[0])
-            product_name = item["values"][0]
+            product_name = self.vtProducts.row()["product_name"]
             selected_package = (package_id, product_name)
 
             obj = batch.UI(self)
@@ -844,10 +869,9 @@ class UI(ParentView):
 
             if selected_batch and self.selected_package_id:
                 # Get product name from treeview
-                prod_selection = self.treeProducts.selection()
+                prod_selection = self.vtProducts.selection()
                 if prod_selection:
-                    item = self.treeProducts.item(prod_selection[0])
-                    product_name = item["values"][0]
+                    product_name = self.vtProducts.row()["product_name"]
                     selected_package = (self.selected_package_id, product_name)
 
                     obj = labels.UI(self)
@@ -910,14 +934,10 @@ class UI(ParentView):
             self.load_batches(self.selected_package_id)
 
             # Re-select the batch if it still exists
-            if batch_id:
-                for item in self.treeBatches.get_children():
-                    if int(item) == batch_id:
-                        self.treeBatches.selection_set(item)
-                        self.treeBatches.see(item)
-                        self.selected_batch_id = batch_id
-                        self.load_labels(batch_id)
-                        break
+            if batch_id and self.treeBatches.exists(batch_id):
+                self.select_row(self.treeBatches, batch_id)
+                self.selected_batch_id = batch_id
+                self.load_labels(batch_id)
 
     def refresh_current_selection(self):
         """Refresh current selection after label operations."""
@@ -932,27 +952,27 @@ class UI(ParentView):
 
         # Always reload products if a category is selected
         if category_id is not None or search_term:
-            self.load_products(category_id=category_id, search_term=search_term)
+            self.load_products(category_id=category_id, search_term=search_term,
+                               on_loaded=lambda: self.reselect(package_id, batch_id))
+        else:
+            self.reselect(package_id, batch_id)
+
+    def reselect(self, package_id, batch_id):
+        """Re-select product and batch after the products list is reloaded."""
+        def selected(found):
+            if not found:
+                return
+            self.selected_package_id = package_id
+            self.load_batches(package_id)
+
+            # Re-select the batch
+            if batch_id and self.treeBatches.exists(batch_id):
+                self.select_row(self.treeBatches, batch_id)
+                self.selected_batch_id = batch_id
+                self.load_labels(batch_id)
 
-        # Re-select the product if it was selected
         if package_id:
-            for item in self.treeProducts.get_children():
-                if int(item) == package_id:
-                    self.treeProducts.selection_set(item)
-                    self.treeProducts.see(item)
-                    self.selected_package_id = package_id
-                    self.load_batches(package_id)
-
-                    # Re-select the batch
-                    if batch_id:
-                        for b_item in self.treeBatches.get_children():
-                            if int(b_item) == batch_id:
-                                self.treeBatches.selection_set(b_item)
-                                self.treeBatches.see(b_item)
-                                self.selected_batch_id = batch_id
-                                self.load_labels(batch_id)
-                                break
-                    break
+            self.vtProducts.select(package_id, on_done=selected)
 
     def on_cancel(self, evt=None):
         """Close the window."""